@@ -1,22 +1,23 @@
 import os
-import openai
-import anthropic
 import random
 import logging
 import requests
 import json
-import asyncio
-import aiohttp
 import threading
+import time
 from datetime import datetime, timedelta
 from typing import List, Tuple, Dict
-from google import genai
-import trafilatura
-from urllib.parse import urljoin, urlparse
-import re
 from conversation_intelligence import ConversationIntelligence
 from subscription_manager import SubscriptionManager
 from geo_language_detector import geo_detector
+from metrics import registry
+from providers import provider_registry
+
+PROVIDER_CALLS = registry.counter('ai_provider_calls_total', 'AI provider calls by outcome (ok, error)',
+                                  ['provider', 'outcome'])
+PROVIDER_LATENCY = registry.histogram('ai_provider_call_seconds', 'AI provider call latency', ['provider'])
+GENERATION_SECONDS = registry.histogram('conversation_generation_seconds',
+                                        'Time to generate a whole conversation or a single message', ['kind'])
 
 class AIConversationManager:
     """Enhanced AI-to-AI conversation manager with real-time capabilities"""
@@ -32,19 +33,7 @@ class AIConversationManager:
         self.next_conversation_time = None
         self.conversation_thread = None
         
-        # Initialize all 4 AI clients
-        self.openai_client = openai.OpenAI(
-            api_key=os.environ.get('OPENAI_API_KEY')
-        )
-        
-        self.anthropic_client = anthropic.Anthropic(
-            api_key=os.environ.get('ANTHROPIC_API_KEY')
-        )
-        
-        self.gemini_client = genai.Client(
-            api_key=os.environ.get('GEMINI_API_KEY')
-        )
-        
+        # SDK clients come from the provider registry on first use (see the properties below)
         self.perplexity_api_key = os.environ.get('PERPLEXITY_API_KEY')
         
         # Initialize intelligence and subscription managers
@@ -70,6 +59,18 @@ class AIConversationManager:
         # Cache for discovered website pages
         self.website_pages_cache = {}
     
+    @property
+    def openai_client(self):
+        return provider_registry.get('openai')
+    
+    @property
+    def anthropic_client(self):
+        return provider_registry.get('anthropic')
+    
+    @property
+    def gemini_client(self):
+        return provider_registry.get('gemini')
+    
     def discover_website_pages(self, website_url: str) -> List[str]:
         """Discover actual pages from a business website"""
         
@@ -77,58 +78,17 @@ class AIConversationManager:
         if website_url in self.website_pages_cache:
             return self.website_pages_cache[website_url]
         
-        discovered_pages = []
-        
         try:
-            # Get the main page content
-            response = requests.get(website_url, timeout=10, headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            })
-            
-            if response.status_code == 200:
-                content = response.text
-                
-                # Extract links from the page using regex
-                links = re.findall(r'href=["\']([^"\']+)["\']', content, re.IGNORECASE)
-                
-                # Filter and clean links
-                domain = urlparse(website_url).netloc
-                
-                for link in links:
-                    # Skip external links, anchors, and non-page links
-                    if (link.startswith('http') and domain not in link) or \
-                       link.startswith('#') or link.startswith('mailto:') or \
-                       link.startswith('tel:') or link.startswith('javascript:'):
-                        continue
-                    
-                    # Clean and normalize the link
-                    if link.startswith('/'):
-                        clean_link = link
-                    elif link.startswith('./'):
-                        clean_link = link[1:]
-                    elif not link.startswith('http'):
-                        clean_link = '/' + link.lstrip('/')
-                    else:
-                        # Extract path from full URL
-                        parsed = urlparse(link)
-                        clean_link = parsed.path
-                    
-                    # Filter out unwanted pages
-                    if any(x in clean_link.lower() for x in ['.css', '.js', '.jpg', '.png', '.pdf', '.doc']):
-                        continue
-                    
-                    # Add meaningful pages
-                    if clean_link and clean_link != '/' and len(clean_link) > 1:
-                        if clean_link not in discovered_pages:
-                            discovered_pages.append(clean_link)
-                
-                # Limit to most relevant pages
-                discovered_pages = discovered_pages[:15]  # Keep top 15 pages
-                
+            # Pages from the crawled page store (robots.txt-compliant; a first crawl is queued in the background)
+            from site_crawler import site_crawler
+            discovered_pages = site_crawler.page_paths(website_url, limit=15)  # Keep top 15 pages
         except Exception as e:
             logging.warning(f"Could not discover pages for {website_url}: {e}")
-            # Fallback to common page patterns
-            discovered_pages = [
+            discovered_pages = []
+        
+        if not discovered_pages:
+            # Fallback to common page patterns, uncached so the crawled pages are used once stored
+            return [
                 '/services', '/about', '/contact', '/projects', 
                 '/testimonials', '/gallery', '/portfolio'
             ]
@@ -165,6 +125,7 @@ class AIConversationManager:
         Returns list of tuples: (agent_name, agent_type, message_content)
         """
         
+        started = time.perf_counter()
         try:
             # Auto-detect country and get localized configuration
             localization = geo_detector.auto_detect_and_configure()
@@ -192,6 +153,7 @@ class AIConversationManager:
                 )
                 conversation_messages.extend(round_messages)
             
+            GENERATION_SECONDS.labels('conversation').observe(time.perf_counter() - started)
             return conversation_messages
             
         except Exception as e:
@@ -256,32 +218,33 @@ If no specific page matches, use the homepage but mention relevant sections."""
                                topic: str, conversation_history: str, round_num: int, msg_num: int) -> str:
         """Generate a message from a specific agent with guaranteed output"""
         
-        try:
-            # Try API calls first
-            if agent_type == 'openai' and self.apis_available['openai']:
-                return self._get_openai_response(
-                    business_context, topic, conversation_history, agent_name, round_num, msg_num
-                )
-            elif agent_type == 'anthropic' and self.apis_available['anthropic']:
-                return self._get_anthropic_response(
-                    business_context, topic, conversation_history, agent_name, round_num, msg_num
-                )
-            elif agent_type == 'perplexity' and self.apis_available['perplexity']:
-                return self._get_perplexity_response(
-                    business_context, topic, conversation_history, agent_name, round_num, msg_num
-                )
-            elif agent_type == 'gemini' and self.apis_available['gemini']:
-                return self._get_gemini_response(
-                    business_context, topic, conversation_history, agent_name, round_num, msg_num
-                )
-            else:
-                # Generate professional fallback
-                return self._get_professional_fallback(agent_name, agent_type, topic)
+        with GENERATION_SECONDS.labels('message').time():
+            try:
+                # Try API calls first
+                if agent_type == 'openai' and self.apis_available['openai']:
+                    return self._get_openai_response(
+                        business_context, topic, conversation_history, agent_name, round_num, msg_num
+                    )
+                elif agent_type == 'anthropic' and self.apis_available['anthropic']:
+                    return self._get_anthropic_response(
+                        business_context, topic, conversation_history, agent_name, round_num, msg_num
+                    )
+                elif agent_type == 'perplexity' and self.apis_available['perplexity']:
+                    return self._get_perplexity_response(
+                        business_context, topic, conversation_history, agent_name, round_num, msg_num
+                    )
+                elif agent_type == 'gemini' and self.apis_available['gemini']:
+                    return self._get_gemini_response(
+                        business_context, topic, conversation_history, agent_name, round_num, msg_num
+                    )
+                else:
+                    # Generate professional fallback
+                    return self._get_professional_fallback(agent_name, agent_type, topic)
                 
-        except Exception as e:
-            logging.warning(f"API error for {agent_name} ({agent_type}): {e}")
-            # Always return a professional message
-            return self._get_professional_fallback(agent_name, agent_type, topic)
+            except Exception as e:
+                logging.warning(f"API error for {agent_name} ({agent_type}): {e}")
+                # Always return a professional message
+                return self._get_professional_fallback(agent_name, agent_type, topic)
     
     def _get_professional_fallback(self, agent_name: str, agent_type: str, topic: str) -> str:
         """Generate a single professional message based on agent expertise"""
@@ -372,16 +335,19 @@ If no specific page matches, use the homepage but mention relevant sections."""
             Round {round_num}, Message {msg_num}:
             """
             
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=100,
-                temperature=0.7
-            )
+            with PROVIDER_LATENCY.labels('openai').time():
+                response = self.openai_client.chat.completions.create(
+                    model="gpt-4o",
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=100,
+                    temperature=0.7
+                )
             
+            PROVIDER_CALLS.labels('openai', 'ok').inc()
             return response.choices[0].message.content.strip()
             
         except Exception as e:
+            PROVIDER_CALLS.labels('openai', 'error').inc()
             logging.error(f"OpenAI API error: {e}")
             return f"{agent_name} highlights the professional quality and customer satisfaction focus of this business service."
     
@@ -410,16 +376,19 @@ If no specific page matches, use the homepage but mention relevant sections."""
             Round {round_num}, Message {msg_num}:
             """
             
-            response = self.anthropic_client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=100,
-                temperature=0.7,
-                messages=[{"role": "user", "content": prompt}]
-            )
+            with PROVIDER_LATENCY.labels('anthropic').time():
+                response = self.anthropic_client.messages.create(
+                    model="claude-sonnet-4-20250514",
+                    max_tokens=100,
+                    temperature=0.7,
+                    messages=[{"role": "user", "content": prompt}]
+                )
             
+            PROVIDER_CALLS.labels('anthropic', 'ok').inc()
             return response.content[0].text.strip()
             
         except Exception as e:
+            PROVIDER_CALLS.labels('anthropic', 'error').inc()
             logging.error(f"Anthropic API error: {e}")
             return f"{agent_name} emphasizes the competitive advantages and market positioning opportunities for this business."
     
@@ -474,21 +443,25 @@ If no specific page matches, use the homepage but mention relevant sections."""
                 "stream": False
             }
             
-            response = requests.post(
-                'https://api.perplexity.ai/chat/completions',
-                headers=headers,
-                json=data
-            )
+            with PROVIDER_LATENCY.labels('perplexity').time():
+                response = requests.post(
+                    'https://api.perplexity.ai/chat/completions',
+                    headers=headers,
+                    json=data
+                )
             
             if response.status_code == 200:
+                PROVIDER_CALLS.labels('perplexity', 'ok').inc()
                 result = response.json()
                 content = result['choices'][0]['message']['content']
                 return content.strip() if content else f"As {agent_name}, I find {topic} very relevant to our business success and customer satisfaction."
             else:
+                PROVIDER_CALLS.labels('perplexity', 'error').inc()
                 logging.error(f"Perplexity API error: {response.status_code}")
                 return f"As {agent_name}, I find {topic} very relevant to our business success and customer satisfaction."
             
         except Exception as e:
+            PROVIDER_CALLS.labels('perplexity', 'error').inc()
             logging.error(f"Perplexity API error: {e}")
             return f"As {agent_name}, I find {topic} very relevant to our business success and customer satisfaction."
     
@@ -504,14 +477,17 @@ If no specific page matches, use the homepage but mention relevant sections."""
             Round {round_num}, Message {msg_num}: Continue the conversation about '{topic}' naturally. 
             Previous conversation: {conversation_history}"""
             
-            response = self.gemini_client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=prompt
-            )
+            with PROVIDER_LATENCY.labels('gemini').time():
+                response = self.gemini_client.models.generate_content(
+                    model="gemini-2.5-flash",
+                    contents=prompt
+                )
             
+            PROVIDER_CALLS.labels('gemini', 'ok').inc()
             content = response.text if response.text else f"As {agent_name}, I find {topic} very relevant to our business success and customer satisfaction."
             return content.strip()
             
         except Exception as e:
+            PROVIDER_CALLS.labels('gemini', 'error').inc()
             logging.error(f"Gemini API error: {e}")
             return f"As {agent_name}, I find {topic} very relevant to our business success and customer satisfaction."
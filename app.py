@@ -2,17 +2,25 @@ import os
 import logging
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, text
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_socketio import SocketIO
 
-# Set up logging for debugging
-logging.basicConfig(level=logging.DEBUG)
+import lifecycle
+from db_pools import background_bind, engine_options
+from db_routing import RoutingSession, replica_binds, replica_router
+from metrics import registry
+from structured_logging import configure_logging
+
+# Levels, format, sampling and the background log writer come from LOG_* settings
+configure_logging()
 
 class Base(DeclarativeBase):
     pass
 
-db = SQLAlchemy(model_class=Base)
+# Read-only units of work may be routed to replicas (see db_routing.py)
+db = SQLAlchemy(model_class=Base, session_options={'class_': RoutingSession})
 
 # create the app
 app = Flask(__name__)
@@ -21,37 +29,131 @@ app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1) # needed for url_for
 
 # configure the database, relative to the app instance folder
 app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
+# Request-serving pool, sized by DB_POOL_SIZE / DB_MAX_OVERFLOW / DB_POOL_TIMEOUT (see db_pools.py)
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config["SQLALCHEMY_DATABASE_URI"], 'primary')
+# Read replicas, one bind per URL in DATABASE_REPLICA_URLS; models never bind to them directly.
+# Background jobs get their own pool to the primary so they cannot starve requests.
+app.config["SQLALCHEMY_BINDS"] = {
+    **{name: dict(engine_options(url, name), url=url) for name, url in replica_binds().items()},
+    **background_bind(app.config["SQLALCHEMY_DATABASE_URI"]),
 }
 
 # initialize the app with the extension, flask-sqlalchemy >= 3.0.x
 db.init_app(app)
+replica_router.init_app(app, db)
 
 # Initialize SocketIO for real-time updates
 socketio = SocketIO(app, cors_allowed_origins="*")
 
-with app.app_context():
-    # Make sure to import the models here or their tables won't be created
-    import models  # noqa: F401
-    
+SOCKETIO_CLIENTS = registry.gauge('socketio_connected_clients', 'Socket.IO clients currently connected')
+
+
+@socketio.on('connect')
+def _count_client_connect(auth=None):
+    SOCKETIO_CLIENTS.inc()
+
+
+@socketio.on('disconnect')
+def _count_client_disconnect(reason=None):
+    SOCKETIO_CLIENTS.dec()
+
+
+def add_missing_columns():
+    """Add nullable columns declared since their table was created (create_all skips existing tables)"""
+    inspector = inspect(db.engine)
+    existing_columns = {table_name: {column['name'] for column in inspector.get_columns(table_name)}
+                        for table_name in inspector.get_table_names()}
+    preparer = db.engine.dialect.identifier_preparer
+    for table in db.metadata.sorted_tables:
+        for column in table.columns:
+            if column.nullable and column.name not in existing_columns.get(table.name, {column.name}):
+                with db.engine.begin() as connection:
+                    connection.execute(text(
+                        f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN "
+                        f"{preparer.format_column(column)} {column.type.compile(db.engine.dialect)}"))
+
+
+def init_database():
+    """Create tables, then add columns and indexes declared since they were created"""
     db.create_all()
+    add_missing_columns()
     
-    # Start auto-posting scheduler for monthly subscribers
-    try:
-        from auto_posting_scheduler import start_auto_posting
-        start_auto_posting()
-        logging.info("Auto-posting scheduler started")
-    except Exception as e:
-        logging.error(f"Failed to start auto-posting scheduler: {e}")
+    # Upcoming monthly partitions for conversation_message (PostgreSQL); the conversion itself is a one-off
+    # migration (python message_archive.py partition), never run at startup
+    from message_archive import message_archive
+    message_archive.ensure_storage()
     
-    # Enhanced conversation system (currently disabled due to integration complexity)
-    # Will be implemented in future update
-    logging.info("Enhanced 4-API conversation system integration planned for next version")
+    # Any indexes declared since the tables were created
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
     
-    # Import routes after app and db are initialized
-    import routes  # noqa: F401
+    # Full-text search columns/tables and their sync triggers
+    from conversation_search import conversation_search
+    conversation_search.ensure_search_index()
+
+
+def _start_auto_posting():
+    from auto_posting_scheduler import start_auto_posting
+    start_auto_posting()
+    logging.info("Auto-posting scheduler started")
+
+
+def _start_summary_repair():
+    # Backfills, then periodically re-derives, the Conversation summary columns
+    from conversation_summary import conversation_summary
+    conversation_summary.start()
+
+
+def _start_message_archive():
+    # Creates upcoming partitions and archives cold conversations daily
+    from message_archive import message_archive
+    message_archive.start()
+
+
+def _start_site_crawler():
+    # Recrawls business websites into the page store, revalidating unchanged pages
+    from site_crawler import site_crawler
+    site_crawler.start()
+
+
+def _start_billing_cycle():
+    # Scheduled rollover of expired monthly billing cycles
+    from billing_cycle import billing_cycle
+    billing_cycle.start()
+
+
+def create_app():
+    """Configure the application once: schema, routes and background service registration.
+
+    Threads are not started here; main.py (or gunicorn's post_fork hook in preload
+    mode) calls lifecycle.start_services() in the processes that should run them.
+    """
+    if app.extensions.get('visitorintel_created'):
+        return app
+    
+    with app.app_context():
+        # Make sure to import the models here or their tables won't be created
+        import models  # noqa: F401
+        
+        init_database()
+        
+        # Auto-posting for monthly subscribers and billing rollover run in one process only
+        lifecycle.register_service('auto_posting', _start_auto_posting)
+        lifecycle.register_service('billing_cycle', _start_billing_cycle)
+        lifecycle.register_service('conversation_summary_repair', _start_summary_repair)
+        lifecycle.register_service('message_archive', _start_message_archive)
+        lifecycle.register_service('site_crawler', _start_site_crawler)
+        
+        # Import routes after app and db are initialized
+        import routes  # noqa: F401
+    
+    app.extensions['visitorintel_created'] = True
+    return app
+
+
+create_app()
 
 if __name__ == '__main__':
+    lifecycle.start_services()
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,273 @@
+"""
+Static Asset Pipeline
+Build step (`python assets.py`) that bundles and minifies scripts and styles per
+page, fingerprints every output file with a content hash, writes .gz (and .br
+when the brotli package is installed) siblings, and WebP variants of images
+(when Pillow is installed). Everything lands in static/dist/ with a
+manifest.json mapping logical names to fingerprinted files.
+
+At runtime asset_url() resolves names through the manifest and fingerprinted
+files are served precompressed with immutable, year-long cache headers. Without
+a build (development) templates fall back to the individual source files.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STATIC_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# Per-page bundles, in the order the pages used to load the individual files
+BUNDLES = {
+    'js/base.js': ['js/visitor_intel_frontend_fix.js', 'js/main.js', 'js/countdown_fix.js',
+                   'js/mood_color_manager.js'],
+    'js/dashboard.js': ['js/dashboard_controls.js'],
+    'css/style.css': ['css/style.css']
+}
+IMAGES = ['images/ai-bots-conversation.jpg', 'images/perfect_roofing_team_contractors.png',
+          'visitor_intel_logo.png', 'favicon.png', 'favicon.ico', 'sample_infographic.png']
+WEBP_SOURCES = ('.jpg', '.jpeg', '.png')
+WEBP_QUALITY = 80
+
+COMPRESSIBLE = ('.js', '.css', '.svg', '.json', '.ico')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# ----------------------------------------------------------------------
+# Minification (conservative: comments and indentation only, newlines kept
+# so automatic semicolon insertion behaves exactly as in the source)
+# ----------------------------------------------------------------------
+
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+
+
+def minify_js(source: str) -> str:
+    out: List[str] = []
+    i, length = 0, len(source)
+    last_significant = ''
+    while i < length:
+        char = source[i]
+        pair = source[i:i + 2]
+        if char in '\'"`':
+            end = i + 1
+            while end < length and source[end] != char:
+                end += 2 if source[end] == '\\' else 1
+            out.append(source[i:end + 1])
+            last_significant = char
+            i = end + 1
+        elif pair == '//':
+            end = source.find('\n', i)
+            i = length if end == -1 else end
+        elif pair == '/*':
+            end = source.find('*/', i + 2)
+            i = length if end == -1 else end + 2
+            out.append(' ')
+        elif char == '/' and (last_significant in _REGEX_PRECEDERS or last_significant == ''):
+            # Regex literal: copy through to the closing slash, honouring escapes and classes
+            end, in_class = i + 1, False
+            while end < length and source[end] != '\n':
+                if source[end] == '\\':
+                    end += 2
+                    continue
+                if source[end] == '[':
+                    in_class = True
+                elif source[end] == ']':
+                    in_class = False
+                elif source[end] == '/' and not in_class:
+                    break
+                end += 1
+            out.append(source[i:end + 1])
+            last_significant = '/'
+            i = end + 1
+        else:
+            out.append(char)
+            if not char.isspace():
+                last_significant = char
+            i += 1
+
+    lines = (line.strip() for line in ''.join(out).splitlines())
+    return '\n'.join(line for line in lines if line) + '\n'
+
+
+def minify_css(source: str) -> str:
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    source = re.sub(r'\s+', ' ', source)
+    source = re.sub(r'\s*([{};,>])\s*', r'\1', source)
+    source = re.sub(r'\s*:\s*(?=[^{}]*;)', ':', source)
+    return source.replace(';}', '}').strip() + '\n'
+
+
+# ----------------------------------------------------------------------
+# Build
+# ----------------------------------------------------------------------
+
+def _fingerprinted(name: str, content: bytes) -> str:
+    stem, extension = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:10]}{extension}"
+
+
+def _write(dist_root: str, name: str, content: bytes) -> str:
+    """Write a fingerprinted file plus compressed siblings; returns its path under static/"""
+    relative = _fingerprinted(name, content)
+    path = os.path.join(dist_root, relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+
+    if relative.endswith(COMPRESSIBLE):
+        with open(path + '.gz', 'wb') as f:
+            f.write(gzip.compress(content, compresslevel=9, mtime=0))
+        try:
+            import brotli
+        except ImportError:
+            pass
+        else:
+            with open(path + '.br', 'wb') as f:
+                f.write(brotli.compress(content, quality=11))
+    return f"{DIST_DIR}/{relative}"
+
+
+def _webp(source_path: str) -> Optional[bytes]:
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    import io
+    with Image.open(source_path) as image:
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        buffer = io.BytesIO()
+        image.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=6)
+        return buffer.getvalue()
+
+
+def build(static_root: str = STATIC_ROOT) -> Dict[str, Dict[str, str]]:
+    """Rebuild static/dist and its manifest from the sources; returns the manifest"""
+    dist_root = os.path.join(static_root, DIST_DIR)
+    shutil.rmtree(dist_root, ignore_errors=True)
+    manifest: Dict[str, Dict[str, str]] = {'files': {}, 'webp': {}, 'bundles': BUNDLES}
+
+    for name, sources in BUNDLES.items():
+        parts = []
+        for source in sources:
+            with open(os.path.join(static_root, source), 'r', encoding='utf-8') as f:
+                text = f.read()
+            parts.append(minify_css(text) if name.endswith('.css') else minify_js(text))
+        # A leading semicolon keeps one file's last statement from running into the next
+        separator = '\n' if name.endswith('.css') else ';\n'
+        manifest['files'][name] = _write(dist_root, name, separator.join(parts).encode('utf-8'))
+
+    for name in IMAGES:
+        source_path = os.path.join(static_root, name)
+        if not os.path.exists(source_path):
+            continue
+        with open(source_path, 'rb') as f:
+            manifest['files'][name] = _write(dist_root, name, f.read())
+        if name.lower().endswith(WEBP_SOURCES):
+            webp = _webp(source_path)
+            if webp is not None:
+                manifest['webp'][name] = _write(dist_root, os.path.splitext(name)[0] + '.webp', webp)
+
+    with open(os.path.join(dist_root, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+# ----------------------------------------------------------------------
+# Runtime
+# ----------------------------------------------------------------------
+
+class AssetManifest:
+    """Resolves logical asset names to fingerprinted URLs and serves them"""
+
+    def __init__(self):
+        self.manifest: Dict[str, Dict[str, str]] = {'files': {}, 'webp': {}, 'bundles': {}}
+        self.app = None
+
+    def load(self, static_root: str = STATIC_ROOT):
+        path = os.path.join(static_root, DIST_DIR, MANIFEST_NAME)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            logger.info("No asset manifest at %s; serving unbundled source files", path)
+            self.manifest = {'files': {}, 'webp': {}, 'bundles': {}}
+
+    @property
+    def built(self) -> bool:
+        return bool(self.manifest.get('files'))
+
+    def init_app(self, app):
+        from flask import request, send_from_directory, url_for
+        from markupsafe import Markup, escape
+
+        self.app = app
+        self.load(app.static_folder)
+        dist_root = os.path.join(app.static_folder, DIST_DIR)
+
+        @app.route(f'{app.static_url_path}/{DIST_DIR}/<path:filename>', endpoint='static_dist')
+        def static_dist(filename):
+            """Fingerprinted assets: precompressed when the client accepts it, cached forever"""
+            accepted = request.headers.get('Accept-Encoding', '')
+            encoding = None
+            for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+                if candidate in accepted and os.path.isfile(os.path.join(dist_root, filename + suffix)):
+                    encoding = candidate
+                    break
+
+            if encoding:
+                response = send_from_directory(dist_root, filename + ('.br' if encoding == 'br' else '.gz'),
+                                               mimetype=_mimetype(filename))
+                response.headers['Content-Encoding'] = encoding
+            else:
+                response = send_from_directory(dist_root, filename)
+            response.headers['Vary'] = 'Accept-Encoding'
+            response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+            return response
+
+        def asset_url(name: str, variant: Optional[str] = None) -> Optional[str]:
+            """URL of a built asset, e.g. asset_url('css/style.css') or asset_url(image, 'webp')"""
+            if variant == 'webp':
+                webp = self.manifest['webp'].get(name)
+                return url_for('static_dist', filename=webp[len(DIST_DIR) + 1:]) if webp else None
+            built = self.manifest['files'].get(name)
+            if built:
+                return url_for('static_dist', filename=built[len(DIST_DIR) + 1:])
+            return url_for('static', filename=name)
+
+        def script_bundle(name: str) -> 'Markup':
+            """<script> tag for a bundle, or one tag per source file when nothing is built"""
+            if name in self.manifest['files']:
+                urls = [asset_url(name)]
+            else:
+                urls = [url_for('static', filename=source) for source in BUNDLES[name]]
+            return Markup(''.join(f'<script src="{escape(url)}"></script>' for url in urls))
+
+        app.add_template_global(asset_url)
+        app.add_template_global(script_bundle)
+
+
+def _mimetype(filename: str) -> Optional[str]:
+    import mimetypes
+    return mimetypes.guess_type(filename)[0]
+
+
+# Global instance
+asset_manifest = AssetManifest()
+
+
+if __name__ == '__main__':
+    built = build(sys.argv[1] if len(sys.argv) > 1 else STATIC_ROOT)
+    for logical, path in sorted(built['files'].items()):
+        print(f"{logical:<50} -> {path}")
+    for logical, path in sorted(built['webp'].items()):
+        print(f"{logical + ' (webp)':<50} -> {path}")
@@ -6,17 +6,29 @@ Posts infographics and conversation highlights automatically
 
 import os
 import json
-import pytz
 from datetime import datetime, time, timedelta
 from typing import Dict, List, Any, Optional
 from sqlalchemy import and_
 import threading
 import time as time_module
 
-from app import db, app
+from app import db
 from models import Business, Conversation, SocialMediaPost, SocialMediaSettings
 from social_media_manager import SocialMediaManager
+from social_outbox import social_outbox, make_idempotency_key
 from infographic_generator import InfographicGenerator
+from geo_language_detector import timezone_resolver
+from metrics import registry
+from unit_of_work import unit_of_work
+from providers import lazy_import
+
+pytz = lazy_import('pytz')
+
+SCHEDULER_LAG = registry.histogram('scheduler_lag_seconds', 'Delay between a scheduler tick being due and running',
+                                   ['scheduler']).labels('auto_posting')
+SCHEDULER_TICK = registry.histogram('scheduler_tick_seconds', 'Time spent in one scheduler tick',
+                                    ['scheduler']).labels('auto_posting')
+SCHEDULER_ERRORS = registry.counter('scheduler_errors_total', 'Scheduler ticks that raised', ['scheduler']).labels('auto_posting')
 
 class AutoPostingScheduler:
     """Manages automatic social media posting for monthly subscribers"""
@@ -36,6 +48,7 @@ class AutoPostingScheduler:
             return
         
         self.is_running = True
+        social_outbox.start()
         scheduler_thread = threading.Thread(target=self._run_scheduler, daemon=True)
         scheduler_thread.start()
         print("Auto-posting scheduler started")
@@ -43,31 +56,43 @@ class AutoPostingScheduler:
     def stop_scheduler(self):
         """Stop the automatic posting scheduler"""
         self.is_running = False
+        social_outbox.stop()
         print("Auto-posting scheduler stopped")
     
     def _run_scheduler(self):
         """Main scheduler loop"""
+        due = time_module.monotonic()
         while self.is_running:
+            SCHEDULER_LAG.observe(max(0.0, time_module.monotonic() - due))
             try:
-                self._check_and_post()
+                with SCHEDULER_TICK.time():
+                    self._check_and_post()
+                due = time_module.monotonic() + 300
                 time_module.sleep(300)  # Check every 5 minutes
             except Exception as e:
+                SCHEDULER_ERRORS.inc()
                 print(f"Scheduler error: {e}")
+                due = time_module.monotonic() + 60
                 time_module.sleep(60)  # Wait 1 minute on error
     
     def _check_and_post(self):
         """Check if it's time to post and execute posts"""
-        with app.app_context():
-            # Get all monthly subscribers with enabled social media
-            monthly_businesses = Business.query.filter(
+        # Get all monthly subscribers with enabled social media
+        with unit_of_work(commit=False):
+            business_ids = [business_id for business_id, in db.session.query(Business.id).filter(
                 Business.subscription_type.in_(['monthly_basic', 'monthly_pro', 'monthly_enterprise'])
-            ).all()
-            
-            for business in monthly_businesses:
-                try:
-                    self._process_business_posts(business)
-                except Exception as e:
-                    print(f"Error processing business {business.id}: {e}")
+            )]
+        
+        # One short transaction per business, so a slow business never holds a connection for the whole tick
+        for business_id in business_ids:
+            try:
+                with unit_of_work():
+                    business = db.session.get(Business, business_id)
+                    if business:
+                        # Commits timezones resolved for the first time (or after a location change)
+                        self._process_business_posts(business)
+            except Exception as e:
+                print(f"Error processing business {business_id}: {e}")
     
     def _process_business_posts(self, business: Business):
         """Process automatic posts for a business based on their timezone"""
@@ -84,32 +109,10 @@ class AutoPostingScheduler:
                 if not self._already_posted_today(business.id, posting_time, current_time.date()):
                     self._create_automatic_posts(business, current_time, posting_time)
     
-    def _get_business_timezone(self, business: Business) -> pytz.timezone:
+    def _get_business_timezone(self, business: Business) -> 'pytz.BaseTzInfo':
         """Get business timezone based on location or default to UTC"""
         try:
-            # Common timezone mappings based on location
-            timezone_mapping = {
-                'california': 'America/Los_Angeles',
-                'new york': 'America/New_York',
-                'texas': 'America/Chicago',
-                'florida': 'America/New_York',
-                'london': 'Europe/London',
-                'toronto': 'America/Toronto',
-                'sydney': 'Australia/Sydney',
-                'tokyo': 'Asia/Tokyo',
-                'berlin': 'Europe/Berlin',
-                'paris': 'Europe/Paris'
-            }
-            
-            if business.location:
-                location_lower = business.location.lower()
-                for key, timezone_str in timezone_mapping.items():
-                    if key in location_lower:
-                        return pytz.timezone(timezone_str)
-            
-            # Default to UTC
-            return pytz.UTC
-            
+            return pytz.timezone(timezone_resolver.timezone_for_business(business))
         except Exception:
             return pytz.UTC
     
@@ -157,18 +160,22 @@ class AutoPostingScheduler:
                 post_content = self._create_evening_post(business, recent_conversation)
                 post_type = 'evening_infographic'
             
-            # Create posts for each enabled platform
-            for platform in enabled_platforms:
+            # Queue one post per enabled platform in a single outbox write;
+            # the dispatcher publishes them under each platform's rate limit
+            slot_time = current_time.replace(second=0, microsecond=0)
+            queued = social_outbox.enqueue_many([
                 self._create_platform_post(
                     business.id,
                     platform,
                     post_content,
                     recent_conversation.id,
                     post_type,
-                    current_time
+                    slot_time
                 )
+                for platform in enabled_platforms
+            ])
                 
-            print(f"Auto-posted for {business.name} at {posting_time}")
+            print(f"Queued {queued} auto-posts for {business.name} at {posting_time}")
             
         except Exception as e:
             print(f"Error creating auto posts for {business.name}: {e}")
@@ -190,9 +197,11 @@ class AutoPostingScheduler:
         except Exception:
             return ['linkedin', 'facebook']
     
-    def _create_morning_post(self, business: Business, conversation: Conversation) -> Dict[str, str]:
+    def _create_morning_post(self, business: Business, conversation: Conversation,
+                             highlights: Optional[List[Dict[str, Any]]] = None) -> Dict[str, str]:
         """Create morning conversation highlight post"""
-        highlights = self.social_manager.generate_conversation_highlights(conversation.id)
+        if highlights is None:
+            highlights = self.social_manager.generate_conversation_highlights(conversation.id)
         
         if highlights:
             # Use the quote post for morning
@@ -207,9 +216,11 @@ class AutoPostingScheduler:
             'instagram': f"Good morning! ☀️ Today we're exploring {conversation.topic}. Swipe to see what our AI experts discovered! #MorningMotivation #{business.name.replace(' ', '')}"
         }
     
-    def _create_evening_post(self, business: Business, conversation: Conversation) -> Dict[str, str]:
+    def _create_evening_post(self, business: Business, conversation: Conversation,
+                             highlights: Optional[List[Dict[str, Any]]] = None) -> Dict[str, str]:
         """Create evening infographic/summary post"""
-        highlights = self.social_manager.generate_conversation_highlights(conversation.id)
+        if highlights is None:
+            highlights = self.social_manager.generate_conversation_highlights(conversation.id)
         
         if highlights:
             # Use the summary post for evening
@@ -225,31 +236,19 @@ class AutoPostingScheduler:
         }
     
     def _create_platform_post(self, business_id: int, platform: str, content_dict: Dict[str, str], 
-                             conversation_id: int, post_type: str, scheduled_time: datetime):
-        """Create a social media post record in database"""
-        try:
-            content = content_dict.get(platform, list(content_dict.values())[0])
-            
-            # Create post record
-            post = SocialMediaPost(
-                business_id=business_id,
-                conversation_id=conversation_id,
-                platform=platform,
-                content=content,
-                post_type='auto',
-                scheduled_time=scheduled_time,
-                status='posted',
-                created_at=scheduled_time
-            )
-            
-            db.session.add(post)
-            db.session.commit()
-            
-            # In production, this would actually post to the social media platform
-            print(f"Posted to {platform}: {content[:100]}...")
-            
-        except Exception as e:
-            print(f"Error creating platform post: {e}")
+                             conversation_id: int, post_type: str, scheduled_time: datetime) -> Dict[str, Any]:
+        """Build the outbox row for one platform"""
+        content = content_dict.get(platform, list(content_dict.values())[0])
+        
+        return {
+            'business_id': business_id,
+            'conversation_id': conversation_id,
+            'platform': platform,
+            'content': content,
+            'post_type': 'auto',
+            'scheduled_time': scheduled_time,
+            'idempotency_key': make_idempotency_key(business_id, platform, post_type, scheduled_time)
+        }
     
     def setup_business_social_accounts(self, business_id: int, platform_accounts: Dict[str, str]) -> Dict[str, Any]:
         """Setup social media accounts for a business (one-time setup)"""
@@ -313,9 +312,10 @@ class AutoPostingScheduler:
             if not recent_conversation:
                 return {'success': False, 'error': 'No conversations found'}
             
-            # Generate preview content
-            morning_content = self._create_morning_post(business, recent_conversation)
-            evening_content = self._create_evening_post(business, recent_conversation)
+            # Generate preview content from one read of the precomputed highlights
+            highlights = self.social_manager.generate_conversation_highlights(recent_conversation.id)
+            morning_content = self._create_morning_post(business, recent_conversation, highlights)
+            evening_content = self._create_evening_post(business, recent_conversation, highlights)
             
             return {
                 'success': True,
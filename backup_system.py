@@ -11,8 +11,9 @@ from datetime import datetime
 from pathlib import Path
 import sqlite3
 import subprocess
-from app import db, app
+from app import db
 from models import Business, Conversation, ConversationMessage, Purchase, CreditPackage
+from unit_of_work import unit_of_work
 
 class BackupManager:
     """Complete backup system for the AI conversation platform"""
@@ -56,7 +57,8 @@ class BackupManager:
         db_backup_dir = backup_path / "database"
         db_backup_dir.mkdir(exist_ok=True)
         
-        with app.app_context():
+        # Read everything in one short transaction; the file writes and pg_dump run without a pooled connection
+        with unit_of_work(commit=False):
             # Export all data as JSON (human-readable)
             backup_data = {
                 'businesses': [self._serialize_business(b) for b in Business.query.all()],
@@ -73,20 +75,20 @@ class BackupManager:
                 }
             }
             
-            # Save JSON backup
-            with open(db_backup_dir / "complete_data.json", 'w') as f:
-                json.dump(backup_data, f, indent=2, default=str)
-            
-            # Create PostgreSQL dump if available
-            try:
-                database_url = os.environ.get('DATABASE_URL')
-                if database_url:
-                    dump_file = db_backup_dir / "postgresql_dump.sql"
-                    subprocess.run([
-                        'pg_dump', database_url, '--no-password', '--file', str(dump_file)
-                    ], check=True)
-            except Exception as e:
-                print(f"PostgreSQL dump failed (not critical): {e}")
+        # Save JSON backup
+        with open(db_backup_dir / "complete_data.json", 'w') as f:
+            json.dump(backup_data, f, indent=2, default=str)
+        
+        # Create PostgreSQL dump if available
+        try:
+            database_url = os.environ.get('DATABASE_URL')
+            if database_url:
+                dump_file = db_backup_dir / "postgresql_dump.sql"
+                subprocess.run([
+                    'pg_dump', database_url, '--no-password', '--file', str(dump_file)
+                ], check=True)
+        except Exception as e:
+            print(f"PostgreSQL dump failed (not critical): {e}")
         
         print("✅ Database backup completed")
     
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: page-1000 latency, keyset cursor vs OFFSET
+Seeds conversations (without messages) and times fetching page N of the
+archive both ways. Keyset latency should stay flat as N grows.
+
+Usage: DATABASE_URL=postgresql://... python benchmarks/bench_archive.py [conversations] [page]
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite:////tmp/bench_archive.db')
+
+from app import app, db
+from models import Business, Conversation
+from conversation_archive import ConversationArchive, encode_cursor
+
+PAGE_SIZE = 20
+REPEATS = 20
+
+
+def seed(total):
+    db.drop_all()
+    db.create_all()
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+    business = Business(name="Archive Bench", is_unlimited=True)
+    db.session.add(business)
+    db.session.commit()
+
+    start = datetime.now(timezone.utc) - timedelta(minutes=total)
+    rows = [{'business_id': business.id, 'topic': f"Topic {i}", 'status': 'completed',
+             'created_at': start + timedelta(minutes=i)} for i in range(total)]
+    for offset in range(0, total, 10000):
+        db.session.execute(Conversation.__table__.insert(), rows[offset:offset + 10000])
+    db.session.commit()
+
+
+def timed(fn):
+    best = float('inf')
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def run(total=200000, page=1000):
+    archive = ConversationArchive()
+    with app.app_context():
+        seed(total)
+        offset = (page - 1) * PAGE_SIZE
+        ordered = archive.build_query()
+
+        # Cursor a client would hold after walking to the previous page
+        anchor = ordered.offset(offset - 1).first()
+        cursor = encode_cursor(anchor.created_at, anchor.id)
+
+        offset_ms = timed(lambda: ordered.offset(offset).limit(PAGE_SIZE).all())
+        keyset_ms = timed(lambda: archive.get_page(cursor=cursor, limit=PAGE_SIZE, with_messages=False))
+        first_ms = timed(lambda: archive.get_page(limit=PAGE_SIZE, with_messages=False))
+
+        print(f"{total} conversations, page {page} x {PAGE_SIZE} ({db.engine.dialect.name})")
+        print(f"  page 1 (keyset)      : {first_ms:.2f}ms")
+        print(f"  page {page} OFFSET     : {offset_ms:.2f}ms")
+        print(f"  page {page} keyset     : {keyset_ms:.2f}ms")
+
+
+if __name__ == '__main__':
+    run(*(int(arg) for arg in sys.argv[1:3]))
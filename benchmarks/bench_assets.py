@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: bytes transferred for the landing page, cold and warm
+Loads / and every local script, stylesheet and image it references through the
+test client (Accept-Encoding: gzip, br), first with the unbuilt source files
+and then with the fingerprinted bundles from assets.build(). A warm load is a
+repeat visit: immutable assets come straight from the browser cache, anything
+else is revalidated with a conditional request.
+
+Usage: DATABASE_URL=sqlite:////tmp/bench_assets.db python benchmarks/bench_assets.py
+"""
+
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite:////tmp/bench_assets.db')
+
+from app import app, db
+import assets
+from assets import asset_manifest
+import routes  # noqa: F401 - registers the routes
+
+ASSET_PATTERN = re.compile(r'(?:src|href|srcset)="(/static/[^"]+)"')
+HEADERS = {'Accept-Encoding': 'gzip, br'}
+
+
+def page_assets(html):
+    return list(dict.fromkeys(ASSET_PATTERN.findall(html)))
+
+
+def load(client, warm_cache=None):
+    """Fetch the page and its assets; returns (bytes, requests, cache) where cache maps url -> validators"""
+    cache = {}
+    page = client.get('/', headers=HEADERS)
+    transferred, requests = len(page.data), 1
+    for url in page_assets(page.get_data(as_text=True)):
+        cached = (warm_cache or {}).get(url)
+        if cached and 'immutable' in cached.get('Cache-Control', ''):
+            cache[url] = cached
+            continue
+        headers = dict(HEADERS)
+        if cached and cached.get('ETag'):
+            headers['If-None-Match'] = cached['ETag']
+        if cached and cached.get('Last-Modified'):
+            headers['If-Modified-Since'] = cached['Last-Modified']
+        response = client.get(url, headers=headers)
+        transferred += len(response.data)
+        requests += 1
+        cache[url] = {name: response.headers.get(name) for name in ('Cache-Control', 'ETag', 'Last-Modified')}
+        response.close()
+    return transferred, requests, cache
+
+
+def measure(label):
+    client = app.test_client()
+    cold_bytes, cold_requests, cache = load(client)
+    warm_bytes, warm_requests, _ = load(client, cache)
+    print(f"{label:<10} cold {cold_bytes / 1024:8.1f}KB in {cold_requests:2d} requests  |  "
+          f"warm {warm_bytes / 1024:8.1f}KB in {warm_requests:2d} requests")
+
+
+def run():
+    with app.app_context():
+        db.create_all()
+
+    asset_manifest.manifest = {'files': {}, 'webp': {}, 'bundles': {}}
+    measure('unbuilt')
+
+    # The same build step a deployment runs (static/dist is not under version control)
+    asset_manifest.manifest = assets.build(app.static_folder)
+    measure('built')
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark: monthly billing-cycle rollover and allowance reads at 100k subscribers
+Compares resetting expired subscriptions one row at a time (the old read-path
+behaviour, timed on a sample and extrapolated) with the set-based rollover job,
+then times allowance checks served from the snapshot cache.
+
+Usage: DATABASE_URL=sqlite:////tmp/bench_billing_cycle.db python benchmarks/bench_billing_cycle.py [subscribers]
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite:////tmp/bench_billing_cycle.db')
+
+from app import app, db
+from models import Business
+from billing_cycle import billing_cycle, utcnow
+from subscription_manager import SubscriptionManager
+
+PLANS = ['monthly_basic', 'monthly_pro', 'monthly_enterprise']
+EXPIRED_SHARE = 0.5
+PER_ROW_SAMPLE = 2000
+REPEATS = 20
+
+
+def seed(subscriber_count):
+    db.drop_all()
+    db.create_all()
+    rng = random.Random(3)
+    now = utcnow()
+    rows = []
+    for n in range(subscriber_count):
+        end = now - timedelta(days=rng.uniform(0, 10)) if rng.random() < EXPIRED_SHARE \
+            else now + timedelta(days=rng.uniform(1, 29))
+        rows.append({'name': f"Subscriber {n}", 'subscription_type': PLANS[n % len(PLANS)],
+                     'conversations_used_this_month': rng.randint(0, 10), 'auto_renew': True,
+                     'subscription_start_date': end - timedelta(days=30), 'subscription_end_date': end,
+                     'is_unlimited': False, 'credits_remaining': 0})
+    db.session.execute(Business.__table__.insert(), rows)
+    db.session.commit()
+
+
+def per_row_reset(business_ids):
+    """What every allowance check used to do: load, reset if expired, commit"""
+    for business_id in business_ids:
+        business = db.session.get(Business, business_id)
+        now = utcnow()
+        if business.subscription_end_date and now > business.subscription_end_date and business.auto_renew:
+            business.conversations_used_this_month = 0
+            business.subscription_start_date = now
+            business.subscription_end_date = now + timedelta(days=30)
+            db.session.commit()
+
+
+def timed(fn):
+    best = float('inf')
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def run(subscriber_count=100_000):
+    # app start-up launches the scheduled job; the benchmark drives rollovers itself
+    billing_cycle.stop()
+    manager = SubscriptionManager()
+    with app.app_context():
+        seed(subscriber_count)
+        now = utcnow()
+        expired_ids = [row[0] for row in db.session.query(Business.id)
+                       .filter(Business.subscription_end_date < now).all()]
+        sample = expired_ids[:PER_ROW_SAMPLE]
+
+        started = time.perf_counter()
+        per_row_reset(sample)
+        per_row_seconds = (time.perf_counter() - started) * len(expired_ids) / max(len(sample), 1)
+
+        started = time.perf_counter()
+        rolled = billing_cycle.rollover_expired()
+        bulk_seconds = time.perf_counter() - started
+
+        target = expired_ids[-1]
+        billing_cycle.invalidate_all()
+        cold_ms = timed(lambda: (billing_cycle.invalidate([target]), manager.check_conversation_allowance(target)))
+        warm_ms = timed(lambda: manager.check_conversation_allowance(target))
+
+        batch_ids = expired_ids[:1000]
+        billing_cycle.invalidate_all()
+        started = time.perf_counter()
+        billing_cycle.snapshots(batch_ids)
+        batch_ms = (time.perf_counter() - started) * 1000
+
+        page_ms = timed(lambda: manager.get_upgrade_page_context(target))
+
+    print(f"Subscribers / expired          : {subscriber_count} / {len(expired_ids)}")
+    print(f"Per-row reset (extrapolated)   : {per_row_seconds:.2f}s")
+    print(f"Set-based rollover             : {rolled} rows in {bulk_seconds:.2f}s")
+    print(f"Allowance check, cold / cached : {cold_ms:.3f}ms / {warm_ms:.4f}ms")
+    print(f"1000 snapshots, one query      : {batch_ms:.1f}ms")
+    print(f"Upgrade page context           : {page_ms:.3f}ms")
+    print(f"Stats                          : {billing_cycle.stats}")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
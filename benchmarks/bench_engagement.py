@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark: engagement event ingestion rate and rollup query latency
+Feeds stub webhook deliveries (10M events by default) through the ingest path
+in batches, then times range queries that are answered from the rollups.
+
+Usage: DATABASE_URL=postgresql://... python benchmarks/bench_engagement.py [events] [businesses]
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite:////tmp/bench_engagement.db')
+
+from app import app, db
+from models import Business, SocialMediaPost
+from engagement_analytics import EngagementAnalytics, StubEngagementWebhook
+
+PLATFORMS = ['facebook', 'twitter', 'linkedin', 'instagram']
+POSTS_PER_BUSINESS = 200
+BATCH_SIZE = 20000
+REPEATS = 20
+
+
+def seed(business_count):
+    db.drop_all()
+    db.create_all()
+    db.session.add_all([Business(name=f"Engagement Bench {i}", is_unlimited=True) for i in range(business_count)])
+    db.session.commit()
+
+    rng = random.Random(7)
+    now = datetime.now(timezone.utc)
+    rows = []
+    for business_id in [b.id for b in Business.query.all()]:
+        for n in range(POSTS_PER_BUSINESS):
+            posted_at = now - timedelta(days=rng.uniform(3, 365))
+            rows.append({'business_id': business_id, 'platform': PLATFORMS[n % len(PLATFORMS)],
+                         'content': f"Post {n}", 'post_type': 'auto', 'status': 'posted',
+                         'posted_time': posted_at, 'created_at': posted_at})
+    db.session.execute(SocialMediaPost.__table__.insert(), rows)
+    db.session.commit()
+    return [{'business_id': post.business_id, 'platform': post.platform, 'post_id': post.id,
+             'posted_at': post.created_at} for post in SocialMediaPost.query.all()]
+
+
+def timed(fn):
+    best = float('inf')
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def run(total_events=10_000_000, business_count=100):
+    analytics = EngagementAnalytics()
+    webhook = StubEngagementWebhook(seed=42)
+    rng = random.Random(1)
+
+    with app.app_context():
+        posts = seed(business_count)
+        per_delivery = 20  # events per post per webhook delivery
+
+        ingested = 0
+        ingest_seconds = 0.0
+        while ingested < total_events:
+            sample = rng.sample(posts, min(len(posts), BATCH_SIZE // per_delivery))
+            events = webhook.deliveries(sample, per_delivery)[:total_events - ingested]
+            started = time.perf_counter()
+            ingested += analytics.ingest(events)
+            ingest_seconds += time.perf_counter() - started
+            if ingested % 1_000_000 < BATCH_SIZE:
+                print(f"  {ingested:>10} events, {ingested / ingest_seconds:,.0f} events/s")
+
+        print(f"Ingested {ingested} events in {ingest_seconds:.1f}s ({ingested / ingest_seconds:,.0f} events/s, "
+              f"{db.engine.dialect.name})")
+
+        business_id = posts[0]['business_id']
+        now = datetime.now(timezone.utc)
+        cases = [
+            ('7 days hourly', now - timedelta(days=7), now, 'hour'),
+            ('30 days daily', now - timedelta(days=30), now, 'day'),
+            ('365 days daily', now - timedelta(days=365), now, 'day'),
+            ('90 days, ragged edges', now - timedelta(days=90, hours=5), now - timedelta(hours=3), 'day'),
+        ]
+        for label, start, end, granularity in cases:
+            latency = timed(lambda: analytics.query_range(business_id, start, end, granularity))
+            print(f"  {label:24} {latency:8.2f}ms")
+        print(f"  {'dashboard summary':24} {timed(lambda: analytics.get_summary(business_id)):8.2f}ms")
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:3]]
+    run(*args)
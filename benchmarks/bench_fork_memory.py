@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory per gunicorn worker with and without preloading the app
+Boots gunicorn (main:app) twice with N workers, once importing the app in each
+worker and once preloading it in the master, sends a few requests to every
+worker, then reads /proc/<pid>/smaps_rollup. USS (private pages) is what each
+extra worker really costs; PSS splits shared pages fairly between processes.
+Also reports which process runs the singleton background services.
+
+Linux only. Usage: DATABASE_URL=sqlite:////tmp/bench_fork_memory.db python benchmarks/bench_fork_memory.py [workers]
+"""
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BOOT_TIMEOUT = 90
+WARM_REQUESTS = 20
+PATHS = ('/', '/api/countdown', '/verify/system-status', '/metrics')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def children(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def memory_kb(pid):
+    """USS, PSS and RSS in kB from smaps_rollup"""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    uss = fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    return uss, fields.get('Pss', 0), fields.get('Rss', 0)
+
+
+def wait_until_serving(port):
+    deadline = time.monotonic() + BOOT_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/api-status', timeout=2).read()
+            return
+        except OSError:
+            time.sleep(0.5)
+    raise SystemExit("gunicorn did not start serving in time")
+
+
+def measure(workers, preload):
+    port = free_port()
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), GUNICORN_PRELOAD='1' if preload else '0',
+               GUNICORN_BIND=f'127.0.0.1:{port}',
+               SERVICE_LOCK_PATH=f'/tmp/bench_fork_memory_{port}.lock')
+    env.setdefault('DATABASE_URL', 'sqlite:////tmp/bench_fork_memory.db')
+    master = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'main:app'],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_serving(port)
+        # Requests land on whichever worker accepts first; enough of them touch every worker
+        for _ in range(WARM_REQUESTS * workers):
+            for path in PATHS:
+                try:
+                    urllib.request.urlopen(f'http://127.0.0.1:{port}{path}', timeout=10).read()
+                except OSError:
+                    pass
+        time.sleep(1)
+
+        worker_pids = children(master.pid)
+        per_worker = [memory_kb(pid) for pid in worker_pids]
+        with open(env['SERVICE_LOCK_PATH']) as f:
+            service_pid = f.read().strip()
+        return memory_kb(master.pid), per_worker, service_pid, worker_pids
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=30)
+
+
+def report(label, master, per_worker, service_pid, worker_pids):
+    count = max(len(per_worker), 1)
+    uss = sum(m[0] for m in per_worker) / count / 1024
+    pss = sum(m[1] for m in per_worker) / count / 1024
+    rss = sum(m[2] for m in per_worker) / count / 1024
+    total_pss = (master[1] + sum(m[1] for m in per_worker)) / 1024
+    print(f"{label:<12} workers={len(per_worker)}  per worker USS {uss:6.1f}MB  PSS {pss:6.1f}MB  "
+          f"RSS {rss:6.1f}MB  |  total PSS incl. master {total_pss:6.1f}MB")
+    role = 'worker' if service_pid and int(service_pid) in worker_pids else 'master/none'
+    print(f"{'':<12} singleton services in pid {service_pid or '-'} ({role})")
+
+
+def run(workers=4):
+    for preload in (False, True):
+        master, per_worker, service_pid, worker_pids = measure(workers, preload)
+        report('preload' if preload else 'per-worker', master, per_worker, service_pid, worker_pids)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 4)
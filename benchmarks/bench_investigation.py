@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark: investigation report latency, cold vs cached
+Seeds live messages, requests a report for each (returns a pending handle while
+a provider stub with fixed latency generates it in the background), then times
+repeat requests served from the in-process cache and from the database table.
+
+Usage: DATABASE_URL=sqlite:////tmp/bench_investigation.db python benchmarks/bench_investigation.py [messages] [provider_ms]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite:////tmp/bench_investigation.db')
+
+from app import app, db
+from models import Business, Conversation, ConversationMessage, InvestigationReport
+from investigation_service import InvestigationService
+
+AGENTS = ['Business AI Assistant', 'Marketing AI Expert', 'Customer Service AI', 'SEO AI Specialist']
+REPEATS = 50
+
+
+class SlowProvider:
+    """Stands in for the AI manager with a fixed response time"""
+
+    def __init__(self, latency_ms):
+        self.latency = latency_ms / 1000
+
+    def _get_openai_response(self, **kwargs):
+        time.sleep(self.latency)
+        return "Investigation findings: " + kwargs['topic'][:400]
+
+
+def timed(fn):
+    best = float('inf')
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def run(message_count=200, provider_ms=800):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        business = Business(name="Investigation Bench", is_unlimited=True)
+        db.session.add(business)
+        db.session.flush()
+        conversation = Conversation(business_id=business.id, topic="Roof Inspection Best Practices", status='completed')
+        db.session.add(conversation)
+        db.session.flush()
+        db.session.add_all([ConversationMessage(conversation_id=conversation.id, ai_agent_name=AGENTS[n % 4],
+                                                ai_agent_type='openai', content=f"Message {n} about roof inspections",
+                                                message_order=n + 1) for n in range(message_count)])
+        db.session.commit()
+        message_ids = [m.id for m in ConversationMessage.query.order_by(ConversationMessage.id).all()]
+
+        service = InvestigationService(max_workers=8, precompute_live_messages=False)
+        service._ai_manager = SlowProvider(provider_ms)
+
+        started = time.perf_counter()
+        statuses = [service.get_or_request(message_id)[0] for message_id in message_ids]
+        request_ms = (time.perf_counter() - started) * 1000 / message_count
+
+        while InvestigationReport.query.filter_by(status='ready').count() < message_count:
+            if time.perf_counter() - started > 600:
+                break
+            time.sleep(0.05)
+            db.session.expire_all()
+        generation_seconds = time.perf_counter() - started
+
+        target = message_ids[message_count // 2]
+        memory_ms = timed(lambda: service.get_or_request(target))
+
+        def from_db():
+            service._memory.clear()
+            service.get_or_request(target)
+        db_ms = timed(from_db)
+
+    print(f"Messages / provider latency : {message_count} / {provider_ms}ms")
+    print(f"Cold request (202 handle)   : {request_ms:.2f}ms per message, {statuses.count('pending')} pending")
+    print(f"Background generation       : {generation_seconds:.2f}s for all reports")
+    print(f"Cached, in-process          : {memory_ms:.3f}ms")
+    print(f"Cached, database row        : {db_ms:.3f}ms")
+    print(f"Stats                       : {service.stats}")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 800)
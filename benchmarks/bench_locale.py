@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark: business location -> timezone resolutions per second
+Compares the old linear substring scan with the gazetteer index (cold and
+memoized) and with the timezone cached on the Business row, plus localized
+config, price and prompt lookups from the compiled registry.
+
+Usage: python benchmarks/bench_locale.py [locations]
+"""
+
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geo_language_detector import geo_detector, timezone_resolver, COUNTRY_CONFIGS
+
+LEGACY_MAPPING = {
+    'california': 'America/Los_Angeles', 'new york': 'America/New_York', 'texas': 'America/Chicago',
+    'florida': 'America/New_York', 'london': 'Europe/London', 'toronto': 'America/Toronto',
+    'sydney': 'Australia/Sydney', 'tokyo': 'Asia/Tokyo', 'berlin': 'Europe/Berlin', 'paris': 'Europe/Paris'
+}
+PLACES = ['Newark, NJ', 'Austin, Texas', 'San Diego, CA', 'London, United Kingdom', 'Toronto, ON',
+          'Sydney NSW, Australia', 'München, Deutschland', 'Amsterdam, Nederland', 'Portland, Oregon',
+          'Springfield', 'Miami, FL 33101', 'New York City, NY']
+
+
+def legacy_resolve(location):
+    location_lower = location.lower()
+    for key, timezone_str in LEGACY_MAPPING.items():
+        if key in location_lower:
+            return timezone_str
+    return 'UTC'
+
+
+def rate(fn, items):
+    started = time.perf_counter()
+    for item in items:
+        fn(item)
+    return len(items) / (time.perf_counter() - started)
+
+
+def run(location_count=200_000):
+    rng = random.Random(11)
+    # Distinct strings so the cold path cannot lean on the memo
+    locations = [f"{rng.randint(1, 9999)} Main St, {rng.choice(PLACES)}" for _ in range(location_count)]
+
+    legacy = rate(legacy_resolve, locations)
+
+    def cold(location):
+        timezone_resolver._memo.clear()
+        return timezone_resolver.resolve(location)
+    indexed = rate(cold, locations)
+    memoized = rate(timezone_resolver.resolve, locations)
+
+    businesses = [SimpleNamespace(location=location, timezone_name=None) for location in locations]
+    for business in businesses:
+        timezone_resolver.timezone_for_business(business)
+    cached = rate(timezone_resolver.timezone_for_business, businesses)
+
+    codes = list(COUNTRY_CONFIGS) + ['XX']
+    configs = rate(geo_detector.get_localized_config, [rng.choice(codes) for _ in range(location_count)])
+    prices = rate(lambda code: geo_detector.format_price_for_country(79.99, geo_detector.get_localized_config(code)),
+                  [rng.choice(codes) for _ in range(location_count)])
+    prompts = rate(lambda language: geo_detector.translate_ai_prompt("Discuss roof repairs", language, "Roofing"),
+                   [rng.choice(['Dutch', 'German', 'French', 'English']) for _ in range(location_count)])
+
+    print(f"Locations                        : {location_count}")
+    print(f"Legacy substring scan            : {legacy:,.0f}/s")
+    print(f"Gazetteer index (cold)           : {indexed:,.0f}/s")
+    print(f"Gazetteer index (memoized)       : {memoized:,.0f}/s")
+    print(f"Cached on Business row           : {cached:,.0f}/s")
+    print(f"Localized config lookups         : {configs:,.0f}/s")
+    print(f"Localized price formats          : {prices:,.0f}/s")
+    print(f"Localized prompts                : {prompts:,.0f}/s")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark: request latency with synchronous DEBUG logging vs the structured setup
+A small Flask route logs the way the hot paths do (one INFO line plus a few
+per-item DEBUG lines with arguments). The baseline is the old basicConfig(DEBUG)
+writing in the request thread; the structured run uses INFO level, sampling and
+the background queue listener. The sink can be slowed down to mimic a busy disk
+or log pipe.
+
+Usage: python benchmarks/bench_logging.py [requests] [sink_write_ms]
+"""
+
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+import structured_logging
+
+ITEMS_PER_REQUEST = 5
+logger = logging.getLogger('bench_hot_path')
+
+
+class SlowSink:
+    """File-like sink whose writes take a fixed time"""
+
+    def __init__(self, path, write_ms):
+        self.file = open(path, 'w', encoding='utf-8')
+        self.delay = write_ms / 1000
+
+    def write(self, text):
+        if self.delay:
+            time.sleep(self.delay)
+        return self.file.write(text)
+
+    def flush(self):
+        self.file.flush()
+
+
+def make_app():
+    app = Flask(__name__)
+
+    @app.route('/work/<int:n>')
+    def work(n):
+        logger.info("Handling work request %s", n)
+        for item in range(ITEMS_PER_REQUEST):
+            logger.debug("Checking item %s of request %s: state=%s", item, n, {'item': item, 'ready': item % 2 == 0})
+        return {'ok': True, 'n': n}
+
+    return app
+
+
+def reset_logging():
+    structured_logging.shutdown_logging()
+    structured_logging._configured = False
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+
+def measure(client, request_count):
+    latencies = []
+    for n in range(request_count):
+        started = time.perf_counter()
+        client.get(f'/work/{n}')
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return statistics.mean(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+def run(request_count=5000, write_ms=0.2):
+    client = make_app().test_client()
+    results = {}
+
+    reset_logging()
+    logging.basicConfig(level=logging.DEBUG, stream=SlowSink('/tmp/bench_logging_baseline.log', write_ms), force=True)
+    results['basicConfig(DEBUG), synchronous'] = measure(client, request_count)
+
+    reset_logging()
+    structured_logging.configure_logging({'level': 'INFO', 'levels': {}, 'format': 'json', 'sampling': {}, 'queue': False},
+                                         stream=SlowSink('/tmp/bench_logging_sync.log', write_ms))
+    results['structured INFO, synchronous'] = measure(client, request_count)
+
+    reset_logging()
+    structured_logging.configure_logging({'level': 'INFO', 'levels': {}, 'format': 'json', 'sampling': {}, 'queue': True},
+                                         stream=SlowSink('/tmp/bench_logging_queue.log', write_ms))
+    results['structured INFO, queue listener'] = measure(client, request_count)
+
+    reset_logging()
+    structured_logging.configure_logging({'level': 'DEBUG', 'levels': {}, 'format': 'json',
+                                          'sampling': {'bench_hot_path': 0.05}, 'queue': True},
+                                         stream=SlowSink('/tmp/bench_logging_sampled.log', write_ms))
+    results['structured DEBUG, 5% sampled, queue'] = measure(client, request_count)
+    reset_logging()
+
+    print(f"Requests / sink write latency       : {request_count} / {write_ms}ms")
+    for name, (mean, p99) in results.items():
+        print(f"{name:<36}: mean {mean:.3f}ms, p99 {p99:.3f}ms")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 0.2)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cost of a metrics update on the hot path
+Times bound-child counter increments, label lookups, histogram observations and
+timers single-threaded and across threads, against an empty loop baseline, plus
+the time to render a populated registry for one scrape.
+
+Usage: python benchmarks/bench_metrics.py [iterations] [threads]
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import MetricsRegistry
+
+ROUTES = 60
+
+
+def per_op_ns(fn, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        pass
+    baseline = time.perf_counter() - started
+
+    started = time.perf_counter()
+    fn(iterations)
+    return max(0.0, (time.perf_counter() - started - baseline)) / iterations * 1e9
+
+
+def run(iterations=2_000_000, thread_count=8):
+    registry = MetricsRegistry()
+    calls = registry.counter('bench_calls_total', 'Calls', ['provider', 'outcome'])
+    latency = registry.histogram('bench_latency_seconds', 'Latency', ['route', 'method'])
+    bound = calls.labels('openai', 'ok')
+    bound_histogram = latency.labels('/api/search', 'GET')
+
+    def inc_bound(n):
+        for _ in range(n):
+            bound.inc()
+
+    def inc_labels(n):
+        for _ in range(n):
+            calls.labels('openai', 'ok').inc()
+
+    def observe(n):
+        for _ in range(n):
+            bound_histogram.observe(0.042)
+
+    def timer(n):
+        for _ in range(n):
+            with bound_histogram.time():
+                pass
+
+    results = {
+        'counter inc (bound child)': per_op_ns(inc_bound, iterations),
+        'counter labels().inc()': per_op_ns(inc_labels, iterations),
+        'histogram observe (bound child)': per_op_ns(observe, iterations),
+        'histogram time() context': per_op_ns(timer, iterations // 4)
+    }
+
+    per_thread = iterations // thread_count
+    threads = [threading.Thread(target=inc_bound, args=(per_thread,)) for _ in range(thread_count)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    contended = (time.perf_counter() - started) / (per_thread * thread_count) * 1e9
+    expected = iterations * 2 + per_thread * thread_count
+
+    for n in range(ROUTES):
+        for method in ('GET', 'POST'):
+            latency.labels(f'/route/{n}', method).observe(0.01 * n)
+    started = time.perf_counter()
+    body = registry.render()
+    render_ms = (time.perf_counter() - started) * 1000
+
+    for name, value in results.items():
+        print(f"{name:<34}: {value:.0f}ns")
+    print(f"{f'counter inc, {thread_count} threads':<34}: {contended:.0f}ns (wall per op), "
+          f"total {bound.value:.0f} of {expected} expected")
+    print(f"{'render /metrics':<34}: {render_ms:.2f}ms for {len(body.splitlines())} lines")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 8)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark: 1,000 concurrent live conversations on the orchestrator timer heap
+Uses a stub message generator and a compressed message interval so the run
+measures scheduling and persistence overhead rather than provider latency.
+
+Usage: DATABASE_URL=sqlite:////tmp/bench_orchestrator.db python benchmarks/bench_orchestrator.py [businesses]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite:////tmp/bench_orchestrator.db')
+
+from app import app, db
+from models import Business, ConversationMessage
+from conversation_orchestrator import ConversationOrchestrator
+
+
+def stub_generator(business, topic, agent, index):
+    return f"{agent['name']} message {index + 1} about {topic} for {business.name}."
+
+
+def run(business_count: int = 1000, interval_seconds: float = 0.5):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add_all([
+            Business(name=f"Bench Business {i}", location="Lodi, New Jersey", industry="Roofing", is_unlimited=True)
+            for i in range(business_count)
+        ])
+        db.session.commit()
+        business_ids = [b.id for b in Business.query.all()]
+
+    orchestrator = ConversationOrchestrator(message_generator=stub_generator, max_workers=16)
+    orchestrator.MESSAGE_INTERVAL_SECONDS = interval_seconds
+    orchestrator.start()
+
+    started = time.perf_counter()
+    for business_id in business_ids:
+        orchestrator.enable_business(business_id, continuous=False)
+
+    expected = business_count * orchestrator.MESSAGES_PER_CONVERSATION
+    while orchestrator.stats['messages'] < expected and time.perf_counter() - started < 600:
+        time.sleep(0.25)
+    elapsed = time.perf_counter() - started
+    orchestrator.stop()
+
+    with app.app_context():
+        persisted = ConversationMessage.query.count()
+
+    ideal = orchestrator.MESSAGES_PER_CONVERSATION * interval_seconds
+    print(f"Concurrent conversations : {business_count}")
+    print(f"Messages emitted         : {orchestrator.stats['messages']} (persisted {persisted})")
+    print(f"Wall time                : {elapsed:.2f}s (ideal {ideal:.2f}s)")
+    print(f"Messages/second          : {orchestrator.stats['messages'] / elapsed:.0f}")
+    print(f"Max timer lag            : {orchestrator.stats['max_lag_seconds'] * 1000:.1f}ms")
+    print(f"Completed conversations  : {orchestrator.stats['conversations_completed']}")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark: social outbox enqueue and dispatch throughput
+Queues one post per platform per slot for thousands of businesses in bulk, then
+drains the outbox with stub adapters (optionally flaky) and generous rate limits
+so the run measures claim/record overhead rather than platform latency.
+
+Usage: DATABASE_URL=sqlite:////tmp/bench_outbox.db python benchmarks/bench_outbox.py [businesses] [failure_rate]
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite:////tmp/bench_outbox.db')
+
+from app import app, db
+from models import Business, SocialMediaPost
+from social_outbox import SocialOutbox, StubPlatformAdapter
+
+PLATFORMS = ['facebook', 'twitter', 'linkedin', 'instagram']
+SLOTS = 2
+
+
+def run(business_count: int = 5000, failure_rate: float = 0.0):
+    adapters = {platform: StubPlatformAdapter(platform, failure_rate=failure_rate, seed=i)
+                for i, platform in enumerate(PLATFORMS)}
+    outbox = SocialOutbox(adapters=adapters, rate_limits={p: (1e6, 1e6) for p in PLATFORMS})
+    outbox.BASE_BACKOFF_SECONDS = 0
+    outbox.MAX_BACKOFF_SECONDS = 0.05
+    outbox.POLL_INTERVAL_SECONDS = 0.05
+    outbox.CLAIM_BATCH_SIZE = 200
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add_all([Business(name=f"Outbox Bench {i}", is_unlimited=True) for i in range(business_count)])
+        db.session.commit()
+        business_ids = [b.id for b in Business.query.all()]
+
+        slot = datetime.now(timezone.utc).replace(second=0, microsecond=0) - timedelta(minutes=1)
+        posts = [{
+            'business_id': business_id,
+            'platform': platform,
+            'content': f"Post {n} for business {business_id} on {platform}",
+            'post_type': 'auto',
+            'scheduled_time': slot - timedelta(hours=n)
+        } for business_id in business_ids for platform in PLATFORMS for n in range(SLOTS)]
+
+        started = time.perf_counter()
+        queued = outbox.enqueue_many(posts)
+        enqueue_seconds = time.perf_counter() - started
+        # Re-enqueueing the same slots must be a no-op
+        requeued = outbox.enqueue_many(posts)
+
+    expected = len(posts)
+    started = time.perf_counter()
+    outbox.start()
+    while outbox.stats['sent'] + outbox.stats['dead'] < expected and time.perf_counter() - started < 600:
+        time.sleep(0.1)
+    dispatch_seconds = time.perf_counter() - started
+    outbox.stop()
+
+    with app.app_context():
+        recorded = SocialMediaPost.query.count()
+        depths = outbox.get_queue_depths()
+
+    print(f"Businesses x platforms x slots : {business_count} x {len(PLATFORMS)} x {SLOTS} = {expected}")
+    print(f"Enqueue                        : {queued} rows in {enqueue_seconds:.2f}s "
+          f"({queued / enqueue_seconds:.0f} rows/s), duplicate re-enqueue added {requeued}")
+    print(f"Dispatch                       : {outbox.stats['sent']} sent in {dispatch_seconds:.2f}s "
+          f"({outbox.stats['sent'] / dispatch_seconds:.0f} posts/s)")
+    print(f"Retries / dead                 : {outbox.stats['retried']} / {outbox.stats['dead']}")
+    print(f"Adapter calls                  : {sum(a.calls for a in adapters.values())}, "
+          f"unique posts {sum(len(a.published) for a in adapters.values())}")
+    print(f"SocialMediaPost rows           : {recorded}")
+    print(f"Queue depths                   : {depths}")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 0.0)
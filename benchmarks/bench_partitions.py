@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark: hot-path message query latency and index size before and after archival
+Seeds N messages (16 per conversation) spread evenly over the last 24 months,
+sets up the partitioned layout (PostgreSQL) or the single-table fallback
+(SQLite), then times the queries live pages run - a recent conversation's
+transcript, its summary counts and the total message count - and measures the
+size of conversation_message's indexes. archive() then moves everything older
+than ARCHIVE_AFTER_MONTHS into the compressed archive and both are measured
+again, along with reading an archived transcript back.
+
+Usage: DATABASE_URL=sqlite:////tmp/bench_partitions.db python benchmarks/bench_partitions.py [messages]
+       (the 50M-message run: DATABASE_URL=postgresql://... python benchmarks/bench_partitions.py 50000000)
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite:////tmp/bench_partitions.db')
+
+from sqlalchemy import func, select, text
+
+from app import app, db
+from models import Business, Conversation, ConversationMessage
+from message_archive import message_archive
+
+MESSAGES_PER_CONVERSATION = 16
+MONTHS = 24
+CHUNK = 50_000
+SAMPLES = 200
+AGENTS = ['openai', 'anthropic', 'perplexity', 'gemini']
+
+
+def seed(messages):
+    db.drop_all()
+    db.create_all()
+    conversations = max(1, messages // MESSAGES_PER_CONVERSATION)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    step = timedelta(days=30 * MONTHS) / conversations
+    db.session.execute(Business.__table__.insert(), [{'name': "Bench Roofing", 'credits_remaining': 0}])
+
+    for start in range(0, conversations, CHUNK // MESSAGES_PER_CONVERSATION):
+        ids = range(start + 1, min(conversations, start + CHUNK // MESSAGES_PER_CONVERSATION) + 1)
+        created = {cid: now - step * (conversations - cid + 1) for cid in ids}
+        db.session.execute(Conversation.__table__.insert(), [
+            {'id': cid, 'business_id': 1, 'topic': f"Topic {cid}", 'status': 'completed',
+             'created_at': created[cid], 'credits_used': 1} for cid in ids])
+        db.session.execute(ConversationMessage.__table__.insert(), [
+            {'conversation_id': cid, 'ai_agent_name': f"Agent {order % 4}", 'ai_agent_type': AGENTS[order % 4],
+             'content': f"Round {order // 4 + 1}: storm damage repair, licensed crews and clear estimates. " * 3,
+             'message_order': order + 1, 'created_at': created[cid] + timedelta(seconds=45 * order)}
+            for cid in ids for order in range(MESSAGES_PER_CONVERSATION)])
+        db.session.commit()
+
+    # The one-off partition migration runs on the seeded table, as it would on an existing deployment
+    message_archive.partition()
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+    return conversations
+
+
+def index_bytes():
+    if db.engine.dialect.name == 'postgresql':
+        return db.session.execute(text(
+            "SELECT coalesce(sum(pg_indexes_size(relid)), 0) FROM pg_partition_tree('conversation_message')")).scalar()
+    return db.session.execute(text(
+        "SELECT coalesce(sum(pgsize), 0) FROM dbstat WHERE name IN "
+        "(SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'conversation_message')")).scalar()
+
+
+def median_ms(query, conversation_ids):
+    timings = []
+    for conversation_id in conversation_ids:
+        started = time.perf_counter()
+        query(conversation_id)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def transcript(conversation_id):
+    return db.session.scalars(select(ConversationMessage)
+                              .where(ConversationMessage.conversation_id == conversation_id)
+                              .order_by(ConversationMessage.message_order)).all()
+
+
+def agent_counts(conversation_id):
+    return db.session.execute(select(ConversationMessage.ai_agent_type, func.count())
+                              .where(ConversationMessage.conversation_id == conversation_id)
+                              .group_by(ConversationMessage.ai_agent_type)).all()
+
+
+def total_messages(_):
+    return db.session.scalar(select(func.count()).select_from(ConversationMessage))
+
+
+def report(label, recent_ids):
+    totals = [recent_ids[0]] * 5
+    print(f"{label:<16} transcript {median_ms(transcript, recent_ids):7.3f}ms  "
+          f"agent counts {median_ms(agent_counts, recent_ids):7.3f}ms  "
+          f"COUNT(*) {median_ms(total_messages, totals):9.1f}ms  "
+          f"indexes {index_bytes() / 1024 / 1024:8.1f}MB  rows {total_messages(None):,}")
+
+
+def run(messages=200_000):
+    with app.app_context():
+        started = time.perf_counter()
+        conversations = seed(messages)
+        print(f"Seeded {conversations * MESSAGES_PER_CONVERSATION:,} messages on {db.engine.dialect.name} "
+              f"in {time.perf_counter() - started:.1f}s")
+
+        # Recent conversations are the ones live pages and crawlers hit
+        recent_ids = random.sample(range(max(1, conversations - conversations // 12), conversations + 1),
+                                   min(SAMPLES, conversations // 12 or 1))
+        report('before archive', recent_ids)
+
+        started = time.perf_counter()
+        archived = message_archive.archive()
+        print(f"Archived {archived:,} conversations in {time.perf_counter() - started:.1f}s "
+              f"({message_archive.stats['partitions_dropped']} partitions dropped)")
+        report('after archive', recent_ids)
+
+        archive_bytes = db.session.execute(text(
+            "SELECT coalesce(sum(length(payload)), 0) FROM conversation_message_archive")).scalar()
+        print(f"Archive size     {archive_bytes / 1024 / 1024:.1f}MB compressed")
+        if archived:
+            archived_ids = random.sample(range(1, archived + 1), min(SAMPLES, archived))
+            conversations_by_id = {c.id: c for c in Conversation.query.filter(Conversation.id.in_(archived_ids))}
+            print(f"Archived transcript read {median_ms(lambda cid: message_archive.messages(conversations_by_id[cid]), archived_ids):7.3f}ms")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark: message inserts per second, ORM unit of work vs bulk persistence service
+Compares the old per-message add/commit (realtime path), the old per-conversation
+add loop (start_conversation), bulk INSERT ... RETURNING and the write-behind queue.
+
+Usage: DATABASE_URL=postgresql://... python benchmarks/bench_persistence.py [conversations]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite:////tmp/bench_persistence.db')
+
+from app import app, db
+from models import Business, Conversation, ConversationMessage
+from conversation_persistence import ConversationPersistence, MessageWriteBehind
+
+MESSAGES = [("Business AI Assistant", "openai", "Benchmark message content " * 4)] * 16
+
+
+def reset():
+    db.drop_all()
+    db.create_all()
+    business = Business(name="Bench Business", is_unlimited=True)
+    db.session.add(business)
+    db.session.commit()
+    return business.id
+
+
+def orm_commit_per_message(business_id, conversations):
+    for _ in range(conversations):
+        conversation = Conversation(business_id=business_id, topic="Bench", status='active')
+        db.session.add(conversation)
+        db.session.commit()
+        for i, (name, agent_type, content) in enumerate(MESSAGES):
+            db.session.add(ConversationMessage(conversation_id=conversation.id, ai_agent_name=name,
+                                               ai_agent_type=agent_type, content=content, message_order=i + 1))
+            db.session.commit()
+
+
+def orm_unit_of_work(business_id, conversations):
+    for _ in range(conversations):
+        conversation = Conversation(business_id=business_id, topic="Bench", status='completed')
+        db.session.add(conversation)
+        db.session.flush()
+        for i, (name, agent_type, content) in enumerate(MESSAGES):
+            db.session.add(ConversationMessage(conversation_id=conversation.id, ai_agent_name=name,
+                                               ai_agent_type=agent_type, content=content, message_order=i + 1))
+        db.session.commit()
+
+
+def bulk_service(business_id, conversations, batch=50):
+    service = ConversationPersistence()
+    for start in range(0, conversations, batch):
+        service.save_conversations([
+            {'business_id': business_id, 'topic': "Bench", 'messages': MESSAGES}
+            for _ in range(min(batch, conversations - start))
+        ])
+
+
+def write_behind(business_id, conversations):
+    service = ConversationPersistence()
+    queue = MessageWriteBehind(service, max_batch=1000, max_delay_seconds=0.05)
+    queue.start()
+    conversation_ids = [cid for cid, _ in service.save_conversations(
+        [{'business_id': business_id, 'topic': "Bench", 'messages': []} for _ in range(conversations)])]
+    for conversation_id in conversation_ids:
+        for i, (name, agent_type, content) in enumerate(MESSAGES):
+            queue.enqueue({'conversation_id': conversation_id, 'ai_agent_name': name,
+                           'ai_agent_type': agent_type, 'content': content, 'message_order': i + 1})
+    queue.stop()
+
+
+def run(conversations: int = 200):
+    strategies = [
+        ("ORM, commit per message", orm_commit_per_message),
+        ("ORM, unit of work per conversation", orm_unit_of_work),
+        ("Bulk INSERT/COPY, 50 conversations per tx", bulk_service),
+        ("Write-behind queue", write_behind),
+    ]
+    with app.app_context():
+        print(f"Dialect: {db.engine.dialect.name}, {conversations} conversations x {len(MESSAGES)} messages")
+        for label, strategy in strategies:
+            business_id = reset()
+            started = time.perf_counter()
+            strategy(business_id, conversations)
+            elapsed = time.perf_counter() - started
+            written = ConversationMessage.query.count()
+            print(f"{label:45s} {written / elapsed:10.0f} msg/s ({written} rows, {elapsed:.2f}s)")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
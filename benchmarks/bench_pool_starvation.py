@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Benchmark: request latency while background jobs wait on slow provider calls
+Runs WORKERS background threads that each read a business, "call a provider"
+(a sleep of PROVIDER_SECONDS) and write the result, while request threads hit
+/api/conversations. The legacy pattern wraps the whole job in app.app_context()
+and holds its db.session connection across the call, so with more jobs than
+DB_POOL_SIZE the request pool is drained and page requests time out after
+DB_POOL_TIMEOUT. The unit_of_work pattern reads, releases, calls, then writes
+on the separate background pool, leaving the request pool untouched; so does
+the live conversation orchestrator, run last with a generator as slow as the
+provider. Fails unless those two phases see zero request-pool timeouts.
+
+Usage: python benchmarks/bench_pool_starvation.py [seconds]
+"""
+
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite:////tmp/bench_pool_starvation.db')
+os.environ.setdefault('DB_POOL_SIZE', '4')
+os.environ.setdefault('DB_MAX_OVERFLOW', '0')
+os.environ.setdefault('DB_POOL_TIMEOUT', '1')
+os.environ.setdefault('BACKGROUND_POOL_SIZE', '2')
+os.environ.setdefault('BACKGROUND_POOL_OVERFLOW', '0')
+
+from sqlalchemy import select
+
+from app import app, db
+from conversation_orchestrator import ConversationOrchestrator
+from db_pools import POOL_CHECKOUT, POOL_TIMEOUTS, POOL_WAIT
+from models import Business, Conversation
+from unit_of_work import unit_of_work
+import routes  # noqa: F401 - registers the routes
+
+WORKERS = 6
+REQUEST_THREADS = 4
+PROVIDER_SECONDS = 2.0
+
+
+def seed():
+    db.drop_all()
+    db.create_all()
+    business = Business(name="Perfect Roofing Team", plan_type='enterprise', is_unlimited=True,
+                        location="Lodi, New Jersey", industry="Roofing & Construction")
+    db.session.add(business)
+    db.session.add_all([Business(name=f"Live Business {n}", is_unlimited=True, location="Lodi, New Jersey",
+                                 industry="Roofing") for n in range(WORKERS)])
+    db.session.flush()
+    db.session.add_all([Conversation(business_id=business.id, topic=f"Roof topic {n}", status='completed')
+                        for n in range(40)])
+    db.session.commit()
+    db.session.remove()
+    for engine in db.engines.values():
+        engine.dispose()
+
+
+def legacy_job(business_id):
+    with app.app_context():
+        business = db.session.get(Business, business_id)
+        context = f"{business.name} in {business.location}"
+        time.sleep(PROVIDER_SECONDS)  # provider call with the connection still checked out
+        db.session.execute(select(Conversation.id).limit(1))
+        business.description = f"Generated for {context}"
+        db.session.commit()
+
+
+def unit_of_work_job(business_id):
+    with unit_of_work(commit=False):
+        business = db.session.get(Business, business_id)
+        context = f"{business.name} in {business.location}"
+    time.sleep(PROVIDER_SECONDS)  # no connection held
+    with unit_of_work():
+        db.session.get(Business, business_id).description = f"Generated for {context}"
+
+
+def slow_generator(business, topic, agent, index):
+    time.sleep(PROVIDER_SECONDS)
+    return f"{agent['name']} message {index + 1} about {topic} for {business.name}."
+
+
+def run_jobs(job, business_id, stop):
+    while not stop.is_set():
+        try:
+            job(business_id)
+        except Exception:
+            pass
+
+
+def job_threads(job, business_id):
+    """Background load: WORKERS threads running job back to back"""
+    def start():
+        stop = threading.Event()
+        threads = [threading.Thread(target=run_jobs, args=(job, business_id, stop), daemon=True)
+                   for _ in range(WORKERS)]
+        for thread in threads:
+            thread.start()
+
+        def halt():
+            stop.set()
+            for thread in threads:
+                thread.join()
+        return halt
+    return start
+
+
+def live_conversations(business_ids):
+    """Background load: the orchestrator driving one live conversation per business"""
+    def start():
+        orchestrator = ConversationOrchestrator(message_generator=slow_generator, max_workers=WORKERS)
+        orchestrator.MESSAGE_INTERVAL_SECONDS = 0.1
+        orchestrator.start()
+        for business_id in business_ids:
+            orchestrator.enable_business(business_id, continuous=True)
+        return orchestrator.stop
+    return start
+
+
+def serve_requests(latencies, failures, stop):
+    client = app.test_client()
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = client.get('/api/conversations?limit=10')
+        latencies.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            failures.append(response.status_code)
+
+
+def histogram_totals(metric, pool):
+    child = metric.labels(pool)
+    return sum(child.counts), child.sum
+
+
+def phase(label, start_background, seconds):
+    latencies, failures = [], []
+    timeouts_before = POOL_TIMEOUTS.labels('primary').value
+    waits_before = histogram_totals(POOL_WAIT, 'primary')
+    background_before = histogram_totals(POOL_CHECKOUT, 'background')[0]
+    stop_background = start_background()
+    stop = threading.Event()
+    threads = [threading.Thread(target=serve_requests, args=(latencies, failures, stop), daemon=True)
+               for _ in range(REQUEST_THREADS)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    stop_background()
+
+    waits = histogram_totals(POOL_WAIT, 'primary')
+    mean_wait = (waits[1] - waits_before[1]) / max(1, waits[0] - waits_before[0])
+    result = {'requests': len(latencies), 'failed': len(failures),
+              'timeouts': POOL_TIMEOUTS.labels('primary').value - timeouts_before,
+              'background_checkouts': histogram_totals(POOL_CHECKOUT, 'background')[0] - background_before}
+    latencies.sort()
+    print(f"{label:<14} {len(latencies):6d} requests  p50 {statistics.median(latencies) * 1000:8.1f}ms  "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:8.1f}ms  failed {len(failures):4d}  "
+          f"pool timeouts {result['timeouts']:4.0f}  mean wait {mean_wait * 1000:7.1f}ms  "
+          f"background checkouts {result['background_checkouts']:5d}")
+    return result
+
+
+def run(seconds=10):
+    with app.app_context():
+        seed()
+        business_id = db.session.scalar(select(Business.id).where(Business.name == "Perfect Roofing Team"))
+        live_ids = list(db.session.scalars(select(Business.id).where(Business.id != business_id)))
+    print(f"{WORKERS} background jobs x {PROVIDER_SECONDS}s provider calls, {REQUEST_THREADS} request threads, "
+          f"request pool {os.environ['DB_POOL_SIZE']}+{os.environ['DB_MAX_OVERFLOW']}, "
+          f"background pool {os.environ['BACKGROUND_POOL_SIZE']}+{os.environ['BACKGROUND_POOL_OVERFLOW']}")
+
+    # Quiet the expected pool-timeout tracebacks from the starved phase
+    app.logger.disabled = True
+    legacy = phase('app_context', job_threads(legacy_job, business_id), seconds)
+    isolated = [phase('unit_of_work', job_threads(unit_of_work_job, business_id), seconds),
+                phase('orchestrator', live_conversations(live_ids), seconds)]
+
+    checkouts, held = histogram_totals(POOL_CHECKOUT, 'background')
+    print(f"Background pool: {checkouts} checkouts, mean held {held * 1000 / max(1, checkouts):.1f}ms")
+
+    assert legacy['timeouts'] > 0, "the legacy phase should starve the request pool; the setup is not measuring it"
+    for result in isolated:
+        assert result['background_checkouts'] > 0, "background jobs did not run"
+        assert result['timeouts'] == 0 and result['failed'] == 0, f"request pool starved: {result}"
+
+
+if __name__ == '__main__':
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark: rate limiter overhead per request, and how it shapes a crawl storm
+Times RateLimiter.check() directly over many client addresses, then the same
+polling endpoint through the test client with the limiter on and off (budgets
+raised so nothing is rejected; the difference is the limiter's cost). Finally
+replays a storm - CRAWLER_IPS addresses sending GPTBot requests back to back at
+public conversation pages - next to a few browsers, and reports what each got.
+
+Usage: python benchmarks/bench_rate_limiting.py [storm seconds]
+"""
+
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite:////tmp/bench_rate_limiting.db')
+# Clients are told apart by X-Forwarded-For, as if behind one proxy (the test client itself is loopback)
+os.environ.setdefault('RATE_LIMIT_PROXY_HOPS', '1')
+
+from app import app, db
+from models import Business, Conversation
+from rate_limiting import classify_user_agent, load_limits, rate_limiter
+import routes  # noqa: F401 - registers the routes
+
+BROWSER = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/126.0 Safari/537.36"
+GPTBOT = "Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko; compatible; GPTBot/1.2; +https://openai.com/gptbot)"
+CHECKS = 200_000
+REQUESTS = 2_000
+CRAWLER_IPS = 20
+BROWSERS = 3
+
+
+def seed():
+    db.drop_all()
+    db.create_all()
+    business = Business(name="Perfect Roofing Team", plan_type='enterprise', is_unlimited=True)
+    db.session.add(business)
+    db.session.flush()
+    db.session.add(Conversation(business_id=business.id, topic="Storm damage roof repair", status='completed'))
+    db.session.commit()
+
+
+def time_checks():
+    classify_user_agent.cache_clear()
+    started = time.perf_counter()
+    for n in range(CHECKS):
+        classify_user_agent(BROWSER if n % 4 else GPTBOT)
+    classify_ns = (time.perf_counter() - started) / CHECKS * 1e9
+
+    rate_limiter.store.clear()
+    started = time.perf_counter()
+    for n in range(CHECKS):
+        rate_limiter.check('polling', f"10.0.{n % 10_000 // 256}.{n % 256}", 'browser', 'browser')
+    check_ns = (time.perf_counter() - started) / CHECKS * 1e9
+    print(f"classify_user_agent (cached) {classify_ns:7.0f}ns   check() over 10k IPs {check_ns:7.0f}ns")
+
+
+def time_requests(enabled):
+    rate_limiter.enabled = enabled
+    client = app.test_client()
+    timings = []
+    for n in range(REQUESTS):
+        started = time.perf_counter()
+        response = client.get('/api/countdown', headers={'User-Agent': BROWSER,
+                                                         'X-Forwarded-For': f"10.1.{n % 50}.{n % 200}"})
+        timings.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.status_code
+    return statistics.median(timings) * 1e6
+
+
+def storm(seconds):
+    rate_limiter.enabled = True
+    rate_limiter.limits = load_limits()
+    rate_limiter.store.clear()
+    results = {'crawler': Counter(), 'browser': Counter()}
+    stop = threading.Event()
+
+    def hammer(kind, address, user_agent, pause):
+        client = app.test_client()
+        while not stop.is_set():
+            response = client.get('/public/conversation/1', headers={'User-Agent': user_agent,
+                                                                     'X-Forwarded-For': address})
+            results[kind][response.status_code] += 1
+            if response.status_code == 429:
+                assert response.headers['Retry-After'].isdigit()
+            time.sleep(pause)
+
+    threads = [threading.Thread(target=hammer, args=('crawler', f"66.249.0.{n}", GPTBOT, 0), daemon=True)
+               for n in range(CRAWLER_IPS)]
+    threads += [threading.Thread(target=hammer, args=('browser', f"203.0.113.{n}", BROWSER, 1.0), daemon=True)
+                for n in range(BROWSERS)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    for kind, counts in results.items():
+        print(f"{kind:<8} served {counts[200] / seconds:7.1f}/s  rejected {counts[429] / seconds:7.1f}/s  "
+              f"other {sum(v for k, v in counts.items() if k not in (200, 429))}")
+
+
+def run(seconds=5.0):
+    with app.app_context():
+        seed()
+
+    time_checks()
+
+    # Budgets high enough that nothing is rejected, so only the limiter's cost differs
+    rate_limiter.limits = {group: {ua_class: ((1e9, 1e9), None) for ua_class in classes}
+                           for group, classes in rate_limiter.limits.items()}
+    time_requests(True)  # warm up
+    off, on = time_requests(False), time_requests(True)
+    print(f"GET /api/countdown median  limiter off {off:7.1f}us  on {on:7.1f}us  overhead {on - off:+6.1f}us")
+
+    public = rate_limiter.limits = load_limits()
+    print(f"Storm: {CRAWLER_IPS} GPTBot IPs back to back, {BROWSERS} browsers at 1 req/s, {seconds:.0f}s "
+          f"(crawler budget {public['public']['crawler']}, Crawl-delay {rate_limiter.crawl_delay()}s)")
+    storm(seconds)
+
+
+if __name__ == '__main__':
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else 5.0)
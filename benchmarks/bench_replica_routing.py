@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark: where public traffic's statements run with a read replica configured
+Uses a second SQLite file as the replica stand-in (a copy of the primary taken
+after seeding), replays crawler-style GETs against the replica-routed pages and
+counts statements per engine. Then checks read-your-writes (a client that just
+POSTed is pinned to the primary) and lag fallback (a replica reported behind
+REPLICA_MAX_LAG_SECONDS is skipped).
+
+Usage: python benchmarks/bench_replica_routing.py [rounds]
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import sqlite3
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PRIMARY_PATH = '/tmp/bench_replica_primary.db'
+REPLICA_PATH = '/tmp/bench_replica_replica.db'
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{PRIMARY_PATH}')
+os.environ.setdefault('DATABASE_REPLICA_URLS', f'sqlite:///{REPLICA_PATH}')
+os.environ.setdefault('SOCIAL_WEBHOOK_SECRET', 'bench-secret')
+
+from sqlalchemy import event
+
+from app import app, db
+from models import Business
+from conversation_persistence import persistence_service
+from db_routing import replica_router
+import routes  # noqa: F401 - registers the routes
+
+AGENTS = [("Business AI Assistant", "openai"), ("SEO AI Specialist", "anthropic"),
+          ("Customer Service AI", "perplexity"), ("Marketing AI Expert", "gemini")]
+CONVERSATIONS = 50
+
+
+def seed():
+    db.drop_all()
+    db.create_all()
+    business = Business(name="Perfect Roofing Team", website="https://perfectroofingteam.com",
+                        plan_type='enterprise', is_unlimited=True, description="Roofing contractors")
+    db.session.add(business)
+    db.session.commit()
+    business_id = business.id
+    persistence_service.save_conversations([{
+        'business_id': business_id, 'topic': f"Roof topic {n}",
+        'messages': [(name, agent_type, f"Message {order} about roofing") for order, (name, agent_type)
+                     in enumerate(AGENTS * 4)]
+    } for n in range(CONVERSATIONS)])
+    db.session.remove()
+    for engine in db.engines.values():
+        engine.dispose()
+
+    # The stand-in replica starts as an exact copy of the primary
+    source, target = sqlite3.connect(PRIMARY_PATH), sqlite3.connect(REPLICA_PATH)
+    with target:
+        source.backup(target)
+    source.close()
+    target.close()
+    return business_id
+
+
+def count_statements():
+    counts = Counter()
+    for name, engine in db.engines.items():
+        label = name or 'primary'
+        event.listen(engine, 'before_cursor_execute',
+                     lambda *args, label=label: counts.update([label]))
+    return counts
+
+
+def crawl(client, rounds):
+    paths = ['/all-conversations', '/api/conversations', '/api/countdown', '/verify/system-status']
+    paths += [f'/public/conversation/{n}' for n in range(1, CONVERSATIONS + 1, 5)]
+    paths += [f'/verify/conversation/{n}' for n in range(1, CONVERSATIONS + 1, 5)]
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for path in paths:
+            response = client.get(path)
+            assert response.status_code == 200, (path, response.status_code)
+    return len(paths) * rounds, time.perf_counter() - started
+
+
+def phase(label, counts, run):
+    counts.clear()
+    requests, seconds = run()
+    print(f"{label:<28} {requests:5d} requests {seconds * 1000 / max(requests, 1):6.2f}ms/req  "
+          f"statements primary={counts['primary']:5d} replica={sum(v for k, v in counts.items() if k != 'primary'):5d}")
+
+
+def run(rounds=5):
+    with app.app_context():
+        business_id = seed()
+        counts = count_statements()
+    if not replica_router.names:
+        raise SystemExit("No replica configured (DATABASE_REPLICA_URLS)")
+
+    phase('crawler GETs', counts, lambda: crawl(app.test_client(), rounds))
+
+    writer = app.test_client()
+
+    def write_then_read():
+        body = json.dumps({'events': [
+            {'business_id': business_id, 'event_type': 'like', 'event_id': f"bench-{time.time_ns()}"}]}).encode()
+        signature = hmac.new(os.environ['SOCIAL_WEBHOOK_SECRET'].encode(), body, hashlib.sha256).hexdigest()
+        response = writer.post('/webhooks/social/twitter', data=body, content_type='application/json',
+                               headers={'X-Signature': f"sha256={signature}"})
+        assert response.status_code == 200, response.data
+        return crawl(writer, 1)
+
+    phase('after a write (sticky)', counts, write_then_read)
+
+    original_probe = replica_router._probe
+    replica_router._probe = lambda name: replica_router.max_lag_seconds + 30
+    replica_router._checked_at.clear()
+    try:
+        phase('replica lagging', counts, lambda: crawl(app.test_client(), 1))
+    finally:
+        replica_router._probe = original_probe
+        replica_router._checked_at.clear()
+
+    print(f"Router stats: {replica_router.stats}")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark: full-text search vs LIKE scan over a large message table
+Seeds conversations with synthetic messages (1M by default), then times the
+first page of ranked results and a deep keyset page against a plain
+ILIKE/LIKE '%term%' scan.
+
+Usage: DATABASE_URL=postgresql://... python benchmarks/bench_search.py [messages] [business_count]
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite:////tmp/bench_search.db')
+
+from sqlalchemy import text
+
+from app import app, db
+from models import Business, Conversation, ConversationMessage
+from conversation_search import ConversationSearch
+
+MESSAGES_PER_CONVERSATION = 16
+REPEATS = 10
+QUERIES = ['local seo strategy', 'customer reviews', 'emergency plumbing', 'voice search']
+VOCABULARY = ("search engine ranking local seo strategy content marketing customer reviews "
+              "google business profile backlinks schema markup voice search mobile speed "
+              "conversion emergency plumbing heating repair dental clinic legal advice "
+              "restaurant menu booking analytics keyword competitors citations").split()
+
+
+def seed(total_messages, business_count):
+    with db.engine.begin() as connection:
+        if db.engine.dialect.name == 'sqlite':
+            connection.execute(text("DROP TABLE IF EXISTS conversation_message_fts"))
+            connection.execute(text("DROP TABLE IF EXISTS conversation_fts"))
+    db.drop_all()
+    db.create_all()
+
+    businesses = [Business(name=f"Search Bench {i}", is_unlimited=True) for i in range(business_count)]
+    db.session.add_all(businesses)
+    db.session.commit()
+
+    # Set up the index before inserting so the sync path (triggers / generated columns) is exercised
+    ConversationSearch().ensure_search_index()
+
+    rng = random.Random(42)
+    conversation_count = total_messages // MESSAGES_PER_CONVERSATION
+    start = datetime.now(timezone.utc) - timedelta(minutes=conversation_count)
+    conversation_rows = [{
+        'business_id': businesses[i % business_count].id,
+        'topic': ' '.join(rng.sample(VOCABULARY, 4)).title(),
+        'status': 'completed',
+        'created_at': start + timedelta(minutes=i)
+    } for i in range(conversation_count)]
+    for offset in range(0, conversation_count, 10000):
+        db.session.execute(Conversation.__table__.insert(), conversation_rows[offset:offset + 10000])
+    db.session.commit()
+
+    first_id = db.session.scalar(text("SELECT min(id) FROM conversation"))
+    batch = []
+    for i in range(conversation_count * MESSAGES_PER_CONVERSATION):
+        batch.append({
+            'conversation_id': first_id + i // MESSAGES_PER_CONVERSATION,
+            'ai_agent_name': 'Bench Agent',
+            'ai_agent_type': 'business_ai',
+            'content': ' '.join(rng.choices(VOCABULARY, k=40)),
+            'message_order': i % MESSAGES_PER_CONVERSATION + 1,
+            'created_at': start
+        })
+        if len(batch) == 20000:
+            db.session.execute(ConversationMessage.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(ConversationMessage.__table__.insert(), batch)
+    db.session.commit()
+    return businesses
+
+
+def timed(fn):
+    best = float('inf')
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def like_scan(query, limit=20):
+    operator = 'ILIKE' if db.engine.dialect.name == 'postgresql' else 'LIKE'
+    return db.session.execute(text(
+        f"SELECT id, content FROM conversation_message WHERE content {operator} :pattern "
+        f"ORDER BY id DESC LIMIT :limit"
+    ), {'pattern': f"%{query}%", 'limit': limit}).all()
+
+
+def run(total_messages=1000000, business_count=50):
+    search = ConversationSearch()
+    with app.app_context():
+        businesses = seed(total_messages, business_count)
+        print(f"{total_messages} messages across {business_count} businesses ({db.engine.dialect.name})")
+
+        for query in QUERIES:
+            page = search.search(query)
+            cursor = page['next_cursor']
+            for _ in range(20):
+                if not cursor:
+                    break
+                cursor = search.search(query, cursor=cursor)['next_cursor']
+
+            fts_ms = timed(lambda: search.search(query))
+            scoped_ms = timed(lambda: search.search(query, business_id=businesses[0].id))
+            deep_ms = timed(lambda: search.search(query, cursor=cursor)) if cursor else float('nan')
+            like_ms = timed(lambda: like_scan(query))
+
+            print(f"  {query!r:24} fts={fts_ms:8.2f} ms  per-business={scoped_ms:8.2f} ms  "
+                  f"page-21={deep_ms:8.2f} ms  like-scan={like_ms:8.2f} ms")
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:3]]
+    run(*args)
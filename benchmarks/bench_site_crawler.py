@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Benchmark: business-site crawl throughput and what revalidation saves
+Starts SITES local fixture servers (http.server, LATENCY_SECONDS per response)
+that serve PAGES linked pages each with ETag / Last-Modified validators, a
+robots.txt disallowing /private/, and one page larger than CRAWLER_MAX_BYTES.
+Then runs, against a SQLite page store:
+  cold crawl at per-host concurrency 1 and at the default,
+  a recrawl with nothing changed (every page should revalidate as a 304),
+  a recrawl after CHANGED_FRACTION of pages changed (only those are fetched),
+  a recrawl while robots.txt answers 503 (sites skipped, stored pages kept),
+reporting pages/s, bytes downloaded and bytes saved by revalidation, and
+checking robots.txt compliance and the size cap along the way.
+
+Usage: python benchmarks/bench_site_crawler.py [pages per site]
+"""
+
+import hashlib
+import os
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite:////tmp/bench_site_crawler.db')
+os.environ.setdefault('CRAWLER_MAX_PAGES', '100')
+os.environ.setdefault('CRAWLER_MAX_BYTES', str(512 * 1024))
+
+from app import app, db
+from models import Business, BusinessPage
+from site_crawler import site_crawler
+
+SITES = 3
+LATENCY_SECONDS = 0.02
+CHANGED_FRACTION = 0.1
+BASE_TIME = 1_700_000_000
+PARAGRAPH = ("Our licensed crews handle storm damage, leak detection and full roof replacement across "
+             "North Jersey, with written estimates and a ten-year workmanship warranty. ")
+
+
+class FixtureSite:
+    """A small business website whose pages can be changed between crawls"""
+
+    def __init__(self, name, pages):
+        self.name = name
+        self.pages = pages
+        self.versions = {f"/page/{n}": 1 for n in range(pages)}
+        self.hits = {}
+        self.bytes_sent = 0
+        self.robots_status = 200
+        self.disallowed = ['/private/']
+        self.crawl_delay = None
+        self.redirects = {}  # path -> absolute Location
+        self.lock = threading.Lock()
+
+    def body(self, path):
+        if path == '/':
+            links = ''.join(f'<li><a href="/page/{n}">Service {n}</a></li>' for n in range(min(self.pages, 10)))
+            links += '<li><a href="/private/admin">Admin</a></li><li><a href="/huge">Catalogue</a></li>'
+            return self._html(f"{self.name} - Home", f"<ul>{links}</ul><p>{PARAGRAPH * 5}</p>")
+        if path == '/huge':
+            return self._html(f"{self.name} - Catalogue", f"<p>{PARAGRAPH * 6000}</p>")
+        if path == '/private/admin':
+            return self._html("Admin", "<p>Not for crawlers</p>")
+        if path in self.versions:
+            n = int(path.rsplit('/', 1)[1])
+            links = ''.join(f'<a href="/page/{m % self.pages}">Related {m % self.pages}</a> '
+                            for m in range(n + 1, n + 4))
+            links += '<a href="/static/logo.png">logo</a> <a href="#top">top</a>'
+            return self._html(f"{self.name} - Service {n}",
+                              f"<article><h1>Service {n} (revision {self.versions[path]})</h1>"
+                              f"<p>{PARAGRAPH * 30}</p><p>{links}</p></article>")
+        return None
+
+    def _html(self, title, main):
+        nav = '<nav><a href="/">Home</a> <a href="/page/0">Services</a></nav>'
+        return (f"<!doctype html><html><head><title>{title}</title></head><body>{nav}<main>{main}</main>"
+                f"<footer>&copy; {self.name}</footer></body></html>").encode('utf-8')
+
+    def robots(self):
+        lines = ["User-agent: *"] + [f"Disallow: {path}" for path in self.disallowed]
+        if self.crawl_delay:
+            lines.append(f"Crawl-delay: {self.crawl_delay}")
+        return ("\n".join(lines) + "\n").encode('utf-8')
+
+    def change(self, fraction):
+        changed = sorted(self.versions)[::int(1 / fraction)]
+        for path in changed:
+            self.versions[path] += 1
+        return len(changed)
+
+
+def serve(site):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(LATENCY_SECONDS)
+            with site.lock:
+                site.hits[self.path] = site.hits.get(self.path, 0) + 1
+            if self.path == '/robots.txt':
+                if site.robots_status != 200:
+                    return self._send(site.robots_status, b"Unavailable", 'text/plain')
+                return self._send(200, site.robots(), 'text/plain')
+            if self.path in site.redirects:
+                return self._send(302, b"", None, {'Location': site.redirects[self.path]})
+            body = site.body(self.path)
+            if body is None:
+                return self._send(404, b"Not found", 'text/plain')
+            etag = '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+            version = site.versions.get(self.path, 1)
+            headers = {'ETag': etag, 'Last-Modified': formatdate(BASE_TIME + version * 3600, usegmt=True)}
+            if self.headers.get('If-None-Match') == etag:
+                return self._send(304, b"", None, headers)
+            self._send(200, body, 'text/html; charset=utf-8', headers)
+
+        def _send(self, status, body, content_type, headers=None):
+            self.send_response(status)
+            if content_type:
+                self.send_header('Content-Type', content_type)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            with site.lock:
+                site.bytes_sent += len(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def crawl(label, sites):
+    sent_before = sum(site.bytes_sent for site in sites)
+    started = time.perf_counter()
+    counts = site_crawler.crawl_businesses()
+    seconds = time.perf_counter() - started
+    pages = counts['updated'] + counts['unchanged'] + counts['not_modified']
+    sent = sum(site.bytes_sent for site in sites) - sent_before
+    print(f"{label:<30} {pages:4d} pages {seconds:6.2f}s {pages / seconds:7.1f} pages/s  "
+          f"updated {counts['updated']:4d}  304 {counts['not_modified']:4d}  "
+          f"downloaded {counts['bytes_downloaded'] / 1024:8.1f}KB  saved {counts['bytes_saved'] / 1024:8.1f}KB  "
+          f"served {sent / 1024:8.1f}KB")
+    return counts
+
+
+def clear_store():
+    with app.app_context():
+        BusinessPage.query.delete()
+        db.session.commit()
+
+
+def run(pages=40):
+    sites = [FixtureSite(f"Roofing Co {n}", pages) for n in range(SITES)]
+    servers = [serve(site) for site in sites]
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add_all([Business(name=site.name, website=f"http://127.0.0.1:{server.server_address[1]}/")
+                            for site, server in zip(sites, servers)])
+        db.session.commit()
+    print(f"{SITES} sites x {pages + 2} pages, {LATENCY_SECONDS * 1000:.0f}ms per response, "
+          f"size cap {site_crawler.max_bytes // 1024}KB")
+
+    default_concurrency = site_crawler.per_host_concurrency
+    site_crawler.per_host_concurrency = 1
+    crawl('cold, 1 request per host', sites)
+    clear_store()
+    site_crawler.per_host_concurrency = default_concurrency
+    cold = crawl(f"cold, {default_concurrency} requests per host", sites)
+    crawl('recrawl, nothing changed', sites)
+    changed = sum(site.change(CHANGED_FRACTION) for site in sites)
+    recrawl = crawl(f"recrawl, {changed} pages changed", sites)
+
+    with app.app_context():
+        stored = BusinessPage.query.count()
+        huge = BusinessPage.query.filter(BusinessPage.path == '/huge').first()
+        sample = BusinessPage.query.filter(BusinessPage.path == '/page/0').first()
+
+    for site in sites:
+        site.robots_status = 503
+    outage = crawl('robots.txt answering 503', sites)
+    with app.app_context():
+        kept = BusinessPage.query.count()
+    assert all('/private/admin' not in site.hits for site in sites), "robots.txt Disallow was not honoured"
+    assert huge is not None and huge.truncated and huge.content_bytes == site_crawler.max_bytes
+    assert recrawl['updated'] == changed, (recrawl['updated'], changed)
+    # Only the explicitly disallowed /private/admin link counts as blocked
+    assert cold['blocked'] == SITES
+    assert outage['sites_failed'] == SITES and outage['blocked'] == 0 and kept == stored, (outage, kept, stored)
+    print(f"Page store: {stored} pages; /private/ never requested; /huge truncated at {huge.content_bytes} bytes; "
+          f"extracted /page/0: {len(sample.text)} chars, title {sample.title!r}")
+
+    for server in servers:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 40)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: social posts generated per second from the compiled template registry
+Builds highlight variants (4 post types x base + every platform) for many
+in-memory conversations in one batch call; no database access is involved.
+
+Usage: python benchmarks/bench_social_templates.py [conversations]
+"""
+
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite:////tmp/bench_social_templates.db')
+
+from social_media_manager import SocialMediaManager
+from social_templates import display_length, truncate_to_budget
+
+AGENTS = ['Business AI Assistant', 'SEO AI Specialist', 'Customer Service AI', 'Marketing AI Expert']
+
+
+def make_items(count):
+    items = []
+    for i in range(count):
+        business = SimpleNamespace(id=i % 500, name=f"Bench Roofing {i % 500}", location='Lodi, New Jersey',
+                                   industry='Roofing' if i % 2 else 'Dental Care')
+        messages = [SimpleNamespace(ai_agent_name=AGENTS[n % 4], ai_agent_type='openai',
+                                    content=f"Message {n}: our expert team recommends quality service 👷‍♀️ tip {i}")
+                    for n in range(16)]
+        conversation = SimpleNamespace(id=i, topic=f"Emergency Roof Repair Topic {i}", messages=messages)
+        items.append((conversation, business, i))
+    return items
+
+
+def run(count=5000):
+    manager = SocialMediaManager()
+    items = make_items(count)
+    variants = len(manager.HIGHLIGHT_POST_TYPES) * (1 + len(manager.SUPPORTED_PLATFORMS))
+
+    manager.build_highlights_batch(items[:100])  # warm the hashtag cache
+    started = time.perf_counter()
+    batch = manager.build_highlights_batch(items)
+    elapsed = time.perf_counter() - started
+
+    posts = sum(len(p) for p in batch) * (1 + len(manager.SUPPORTED_PLATFORMS))
+    print(f"{count} conversations -> {posts} post variants ({variants} each) in {elapsed:.3f}s")
+    print(f"  {posts / elapsed:,.0f} posts/s, {count / elapsed:,.0f} conversations/s")
+
+    longest_twitter = max(display_length(p['platform_content']['twitter']) for posts in batch for p in posts)
+    print(f"  longest twitter variant: {longest_twitter} weighted chars (budget "
+          f"{manager.SUPPORTED_PLATFORMS['twitter']['max_chars']})")
+
+    sample = "🏠 Roofing 👨‍👩‍👧 family-owned since 1990 🇺🇸 " * 20
+    started = time.perf_counter()
+    for _ in range(10000):
+        truncate_to_budget(sample, 280)
+    print(f"  truncate_to_budget: {(time.perf_counter() - started) / 10000 * 1e6:.1f}us per call")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
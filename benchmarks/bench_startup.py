@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cold import time of the application, with a start-up budget check
+Runs `python -X importtime -c "import <module>"` in fresh interpreters (what a
+cold start or a gunicorn worker boot pays), reports the total and the heaviest
+top-level imports, and fails when the best run exceeds the budget or when repo
+code eagerly imports a provider SDK that should load lazily (dependencies that
+pull one in themselves, like engineio's aiohttp client, are not ours to defer).
+tests/test_startup.py runs the same check.
+
+Usage: DATABASE_URL=sqlite:////tmp/bench_startup.db python benchmarks/bench_startup.py [module] [budget_ms]
+       (budget also via STARTUP_BUDGET_MS; exit status 1 on regression, so CI can run it)
+"""
+
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 5
+TOP = 15
+DEFAULT_BUDGET_MS = 1500
+
+# Must stay out of start-up; they load through providers.py on first use
+LAZY_MODULES = ('openai', 'anthropic', 'google.genai', 'PIL', 'trafilatura', 'aiohttp', 'pytz')
+
+_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def repo_modules():
+    """Top-level module and package names that live in this repository"""
+    names = set()
+    for entry in os.listdir(ROOT):
+        path = os.path.join(ROOT, entry)
+        if entry.endswith('.py'):
+            names.add(entry[:-3])
+        elif os.path.isfile(os.path.join(path, '__init__.py')):
+            names.add(entry)
+    return names
+
+
+def measure(module):
+    """One fresh interpreter; returns ({top-level module: cumulative us}, {imported module: its importer})"""
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL', 'sqlite:////tmp/bench_startup.db')
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    top_level, importers = {}, {}
+    # A nested import is reported before the module that imported it, so walk the report backwards
+    ancestors = []
+    for line in reversed(result.stderr.splitlines()):
+        match = _LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), match.group(3), match.group(4)
+        # importtime indents nested imports by two spaces per level
+        depth = max(len(indent) - 1, 0) // 2
+        del ancestors[depth:]
+        importers[name] = ancestors[-1] if ancestors else None
+        ancestors.append(name)
+        if depth == 0:
+            top_level[name] = top_level.get(name, 0) + cumulative
+    return top_level, importers
+
+
+def run(module='main', budget_ms=None):
+    if budget_ms is None:
+        budget_ms = float(os.environ.get('STARTUP_BUDGET_MS', DEFAULT_BUDGET_MS))
+
+    # The first run warms the bytecode cache; the best of the rest is the figure
+    measure(module)
+    runs = [measure(module) for _ in range(RUNS)]
+    top_level, importers = min(runs, key=lambda run: sum(run[0].values()))
+    total_ms = sum(top_level.values()) / 1000
+
+    print(f"import {module}: {total_ms:.0f}ms (best of {RUNS}), budget {budget_ms:.0f}ms")
+    for name, cumulative in sorted(top_level.items(), key=lambda item: -item[1])[:TOP]:
+        print(f"  {cumulative / 1000:8.1f}ms  {name}")
+
+    ours = repo_modules()
+    eager = [f"{name} (by {importers[name] or module})" for name in LAZY_MODULES
+             if name in importers and (importers[name] or module).split('.')[0] in ours]
+    failures = []
+    if eager:
+        failures.append(f"imported eagerly: {', '.join(eager)}")
+    if total_ms > budget_ms:
+        failures.append(f"{total_ms:.0f}ms is over the {budget_ms:.0f}ms budget")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return not failures
+
+
+if __name__ == '__main__':
+    ok = run(sys.argv[1] if len(sys.argv) > 1 else 'main',
+             float(sys.argv[2]) if len(sys.argv) > 2 else None)
+    sys.exit(0 if ok else 1)
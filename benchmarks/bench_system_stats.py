@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark: database queries per minute behind the status endpoints under polling load
+Replays one simulated minute of clients polling /api/countdown every 5s and
+/verify/system-status every 30s, once with the old per-request COUNT(*) queries
+and once through the cached stats snapshot, counting statements at the engine.
+
+Usage: DATABASE_URL=sqlite:////tmp/bench_system_stats.db python benchmarks/bench_system_stats.py [clients]
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite:////tmp/bench_system_stats.db')
+
+from sqlalchemy import event
+
+from app import app, db
+from models import Business, Conversation, ConversationMessage, LiveConversationState
+import system_stats as system_stats_module
+from system_stats import system_stats
+
+BUSINESSES = 200
+CONVERSATIONS = 20_000
+MESSAGES_PER_CONVERSATION = 16
+COUNTDOWN_INTERVAL = 5
+STATUS_INTERVAL = 30
+
+
+class SimulatedClock:
+    """Stands in for the time module so the minute passes instantly"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+
+def seed():
+    db.drop_all()
+    db.create_all()
+    now = datetime.now(timezone.utc)
+    db.session.execute(Business.__table__.insert(),
+                       [{'name': f"Business {n}", 'credits_remaining': 0} for n in range(BUSINESSES)])
+    db.session.execute(Conversation.__table__.insert(), [
+        {'business_id': n % BUSINESSES + 1, 'topic': f"Topic {n}", 'status': 'completed',
+         'created_at': now - timedelta(minutes=CONVERSATIONS - n)} for n in range(CONVERSATIONS)])
+    db.session.execute(ConversationMessage.__table__.insert(), [
+        {'conversation_id': n // MESSAGES_PER_CONVERSATION + 1, 'ai_agent_name': 'Agent', 'ai_agent_type': 'openai',
+         'content': 'Benchmark message', 'message_order': n % MESSAGES_PER_CONVERSATION,
+         'created_at': now - timedelta(seconds=CONVERSATIONS * MESSAGES_PER_CONVERSATION - n)}
+        for n in range(CONVERSATIONS * MESSAGES_PER_CONVERSATION)])
+    db.session.add(LiveConversationState(business_id=1, state='ACTIVE', messages_generated=6, total_messages=16))
+    db.session.commit()
+
+
+def legacy_system_status():
+    """The four counts /verify/system-status used to run per request"""
+    recent_cutoff = datetime.utcnow() - timedelta(hours=24)
+    return (Conversation.query.filter(Conversation.created_at >= recent_cutoff).count(),
+            Conversation.query.count(), ConversationMessage.query.count(), Business.query.count())
+
+
+def legacy_countdown():
+    """The queries /api/countdown used to run per request"""
+    active = LiveConversationState.query.filter_by(state='ACTIVE').all()
+    if active:
+        return active[0].messages_generated
+    last_conversation = Conversation.query.filter_by(status='completed').order_by(Conversation.id.desc()).first()
+    if last_conversation:
+        return ConversationMessage.query.filter_by(conversation_id=last_conversation.id) \
+            .order_by(ConversationMessage.created_at.desc()).first()
+
+
+def replay_minute(clients, countdown, status, clock=None):
+    """Issue one minute of polls in time order; returns wall time in seconds"""
+    polls = []
+    for client in range(clients):
+        offset = client / clients
+        polls.extend((offset + t, countdown) for t in range(0, 60, COUNTDOWN_INTERVAL))
+        polls.extend((offset + t, status) for t in range(0, 60, STATUS_INTERVAL))
+    polls.sort(key=lambda poll: poll[0])
+
+    started = time.perf_counter()
+    for at, handler in polls:
+        if clock is not None:
+            clock.now = at
+        handler()
+    return time.perf_counter() - started, len(polls)
+
+
+def run(clients=100):
+    queries = [0]
+
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        queries[0] += 1
+
+    with app.app_context():
+        seed()
+        event.listen(db.engine, 'before_cursor_execute', count_query)
+
+        queries[0] = 0
+        legacy_seconds, requests = replay_minute(clients, legacy_countdown, legacy_system_status)
+        legacy_queries = queries[0]
+
+        clock = SimulatedClock()
+        system_stats_module.time = clock
+        system_stats.invalidate()
+        queries[0] = 0
+        cached_seconds, _ = replay_minute(clients, system_stats.get, system_stats.get, clock)
+        cached_queries = queries[0]
+        system_stats_module.time = time
+
+        event.remove(db.engine, 'before_cursor_execute', count_query)
+
+    print(f"Clients / requests per minute  : {clients} / {requests}")
+    print(f"Per-request COUNT(*) queries   : {legacy_queries} queries/min, {legacy_seconds:.2f}s of DB time")
+    print(f"Cached snapshot ({system_stats.refresh_seconds:.0f}s refresh)  : "
+          f"{cached_queries} queries/min, {cached_seconds:.3f}s")
+    print(f"Stats                          : {system_stats.stats}")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: renders per second of a 16-message public conversation page
+Times the view (query + render) with the fragment cache disabled and warm, and
+the cold cost a fresh worker pays to load every template from source versus
+from the precompiled modules.
+
+Usage: DATABASE_URL=sqlite:////tmp/bench_templates.db python benchmarks/bench_templates.py [seconds]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite:////tmp/bench_templates.db')
+
+from jinja2 import Environment, FileSystemLoader, ModuleLoader
+
+from app import app, db
+from models import Business, Conversation, ConversationMessage
+from template_cache import template_cache
+import routes
+
+AGENTS = [("Business AI Assistant", "openai"), ("SEO AI Specialist", "anthropic"),
+          ("Customer Service AI", "perplexity"), ("Marketing AI Expert", "gemini")]
+MESSAGES = 16
+REPEATS = 5
+
+
+def seed():
+    db.drop_all()
+    db.create_all()
+    business = Business(name="Perfect Roofing Team", website="https://perfectroofingteam.com",
+                        location="Lodi, New Jersey", industry="Roofing & Construction",
+                        description="Expert roofing contractors serving New Jersey.")
+    db.session.add(business)
+    db.session.flush()
+    conversation = Conversation(business_id=business.id, topic="Storm damage roof repair", status='completed')
+    db.session.add(conversation)
+    db.session.flush()
+    for order in range(MESSAGES):
+        name, agent_type = AGENTS[order % len(AGENTS)]
+        db.session.add(ConversationMessage(
+            conversation_id=conversation.id, ai_agent_name=name, ai_agent_type=agent_type, message_order=order + 1,
+            content=f"Round {order // 4 + 1}: licensed crews, insured work and clear estimates for storm damage. " * 3))
+    db.session.commit()
+    return conversation.id
+
+
+def renders_per_second(conversation_id, seconds):
+    path = f'/public/conversation/{conversation_id}'
+    count = 0
+    deadline = time.perf_counter() + seconds
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        with app.test_request_context(path):
+            routes.public_conversation(conversation_id)
+            db.session.remove()
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+def cold_load_ms(loader):
+    """Load every template into a fresh environment, as a new worker would"""
+    best = float('inf')
+    for _ in range(REPEATS):
+        environment = Environment(loader=loader, autoescape=True)
+        started = time.perf_counter()
+        for name in app.jinja_env.list_templates():
+            environment.get_template(name)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def run(seconds=3.0):
+    with app.app_context():
+        conversation_id = seed()
+
+    fragments = template_cache.fragments
+    max_entries = fragments.max_entries
+    fragments.clear()
+    fragments.max_entries = 0
+    uncached = renders_per_second(conversation_id, seconds)
+    fragments.max_entries = max_entries
+    renders_per_second(conversation_id, 0.2)
+    cached = renders_per_second(conversation_id, seconds)
+
+    source_ms = cold_load_ms(FileSystemLoader(os.path.join(app.root_path, app.template_folder)))
+    compiled_ms = cold_load_ms(ModuleLoader(template_cache.compiled_path)) if template_cache.compiled_path else None
+
+    print(f"Page renders/s, no fragment cache   : {uncached:.0f}")
+    print(f"Page renders/s, warm fragment cache : {cached:.0f}")
+    print(f"Cold template load, from source     : {source_ms:.1f}ms")
+    if compiled_ms is not None:
+        print(f"Cold template load, precompiled     : {compiled_ms:.1f}ms")
+    print(f"Fragment stats                      : {fragments.stats}")
+
+
+if __name__ == '__main__':
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else 3.0)
@@ -0,0 +1,229 @@
+"""
+Billing Cycle Engine
+Expired auto-renewing subscriptions are rolled over by a scheduled job in one
+set-based UPDATE, so the allowance read paths never write. Reads go through a
+per-business subscription snapshot cache that is invalidated whenever a
+Business row is committed or rolled over.
+"""
+
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+
+from app import db
+from models import Business
+from unit_of_work import unit_of_work
+
+BILLING_CYCLE_DAYS = 30
+
+_SNAPSHOT_COLUMNS = (
+    Business.id, Business.subscription_type, Business.is_unlimited, Business.credits_remaining,
+    Business.conversations_used_this_month, Business.subscription_start_date,
+    Business.subscription_end_date, Business.auto_renew
+)
+
+
+def utcnow() -> datetime:
+    """Naive UTC, matching how subscription dates are stored"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class SubscriptionSnapshot:
+    """Read-only copy of the subscription columns of one business"""
+
+    __slots__ = ('business_id', 'subscription_type', 'is_unlimited', 'credits_remaining',
+                 'conversations_used', 'cycle_start', 'cycle_end', 'auto_renew', 'loaded_at')
+
+    def __init__(self, business_id, subscription_type, is_unlimited, credits_remaining,
+                 conversations_used, cycle_start, cycle_end, auto_renew):
+        self.business_id = business_id
+        self.subscription_type = subscription_type
+        self.is_unlimited = bool(is_unlimited)
+        self.credits_remaining = credits_remaining or 0
+        self.conversations_used = conversations_used or 0
+        self.cycle_start = cycle_start
+        self.cycle_end = cycle_end
+        self.auto_renew = auto_renew
+        self.loaded_at = time.monotonic()
+
+    @classmethod
+    def from_business(cls, business: Business) -> 'SubscriptionSnapshot':
+        return cls(business.id, business.subscription_type, business.is_unlimited, business.credits_remaining,
+                   business.conversations_used_this_month, business.subscription_start_date,
+                   business.subscription_end_date, business.auto_renew)
+
+    def cycle_expired(self, now: Optional[datetime] = None) -> bool:
+        """Cycle ended but the rollover job has not reached this business yet"""
+        return bool(self.cycle_end and self.auto_renew and (now or utcnow()) > self.cycle_end)
+
+    def effective_usage(self, now: Optional[datetime] = None) -> int:
+        return 0 if self.cycle_expired(now) else self.conversations_used
+
+    def effective_cycle(self, now: Optional[datetime] = None):
+        """(start, end) as they will be once the pending rollover is applied"""
+        if self.cycle_expired(now):
+            now = now or utcnow()
+            return now, now + timedelta(days=BILLING_CYCLE_DAYS)
+        return self.cycle_start, self.cycle_end
+
+
+class BillingCycleEngine:
+    """Scheduled bulk rollover plus the subscription snapshot cache"""
+
+    ROLLOVER_INTERVAL_SECONDS = 300
+    # Other processes write Business rows too, so cached snapshots are also bounded by age
+    SNAPSHOT_TTL_SECONDS = 60
+    MAX_SNAPSHOTS = 50000
+
+    def __init__(self):
+        self._snapshots: 'OrderedDict[int, SubscriptionSnapshot]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self.thread = None
+        self.running = False
+        self.stats = {'rollover_runs': 0, 'rolled_over': 0, 'snapshot_hits': 0, 'snapshot_misses': 0}
+
+    # ------------------------------------------------------------------
+    # Rollover job
+    # ------------------------------------------------------------------
+
+    def rollover_expired(self, now: Optional[datetime] = None) -> int:
+        """Start a fresh cycle for every expired auto-renewing subscription; returns rows updated"""
+        now = now or utcnow()
+        statement = (update(Business)
+                     .where(Business.subscription_end_date.isnot(None),
+                            Business.subscription_end_date < now,
+                            Business.auto_renew.is_(True))
+                     .values(conversations_used_this_month=0,
+                             subscription_start_date=now,
+                             subscription_end_date=now + timedelta(days=BILLING_CYCLE_DAYS))
+                     .execution_options(synchronize_session=False))
+
+        try:
+            if db.engine.dialect.update_returning:
+                rolled_ids = db.session.execute(statement.returning(Business.id)).scalars().all()
+                count = len(rolled_ids)
+            else:
+                rolled_ids = None
+                count = db.session.execute(statement).rowcount
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        if rolled_ids is None:
+            self.invalidate_all()
+        else:
+            self.invalidate(rolled_ids)
+
+        self.stats['rollover_runs'] += 1
+        self.stats['rolled_over'] += count
+        if count:
+            logging.info(f"Rolled over {count} subscription billing cycles")
+        return count
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name='billing-cycle', daemon=True)
+        self.thread.start()
+        logging.info("Billing cycle rollover job started")
+
+    def stop(self, timeout: float = 10):
+        if not self.running:
+            return
+        self.running = False
+        self._stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=timeout)
+        self.thread = None
+
+    def _run(self):
+        while self.running:
+            try:
+                with unit_of_work():
+                    self.rollover_expired()
+            except Exception as e:
+                logging.error(f"Billing cycle rollover failed: {e}")
+            self._stop_event.wait(self.ROLLOVER_INTERVAL_SECONDS)
+
+    # ------------------------------------------------------------------
+    # Snapshot cache
+    # ------------------------------------------------------------------
+
+    def snapshot(self, business_id: int) -> Optional[SubscriptionSnapshot]:
+        return self.snapshots([business_id]).get(business_id)
+
+    def snapshots(self, business_ids: Iterable[int]) -> Dict[int, SubscriptionSnapshot]:
+        """Snapshots for many businesses; misses are loaded in one query"""
+        now = time.monotonic()
+        found: Dict[int, SubscriptionSnapshot] = {}
+        missing = []
+        with self._lock:
+            for business_id in business_ids:
+                cached = self._snapshots.get(business_id)
+                if cached is not None and now - cached.loaded_at < self.SNAPSHOT_TTL_SECONDS:
+                    self._snapshots.move_to_end(business_id)
+                    found[business_id] = cached
+                else:
+                    missing.append(business_id)
+        self.stats['snapshot_hits'] += len(found)
+
+        if missing:
+            self.stats['snapshot_misses'] += len(missing)
+            rows = db.session.query(*_SNAPSHOT_COLUMNS).filter(Business.id.in_(missing)).all()
+            for row in rows:
+                found[row[0]] = self.remember(SubscriptionSnapshot(*row))
+        return found
+
+    def remember(self, snapshot: SubscriptionSnapshot) -> SubscriptionSnapshot:
+        with self._lock:
+            self._snapshots[snapshot.business_id] = snapshot
+            self._snapshots.move_to_end(snapshot.business_id)
+            while len(self._snapshots) > self.MAX_SNAPSHOTS:
+                self._snapshots.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, business_ids: Iterable[int]):
+        with self._lock:
+            for business_id in business_ids:
+                self._snapshots.pop(business_id, None)
+
+    def invalidate_all(self):
+        with self._lock:
+            self._snapshots.clear()
+
+
+# Global instance
+billing_cycle = BillingCycleEngine()
+
+_DIRTY_KEY = 'billing_cycle_dirty_business_ids'
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_business_writes(session, flush_context):
+    dirty = [obj.id for obj in itertools.chain(session.new, session.dirty, session.deleted)
+             if isinstance(obj, Business) and obj.id is not None]
+    if dirty:
+        session.info.setdefault(_DIRTY_KEY, set()).update(dirty)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_businesses(session):
+    dirty = session.info.pop(_DIRTY_KEY, None)
+    if dirty:
+        billing_cycle.invalidate(dirty)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_rolled_back_businesses(session, previous_transaction):
+    session.info.pop(_DIRTY_KEY, None)
@@ -0,0 +1,242 @@
+"""
+Trigram Index for Project Code Search
+Keeps per-file trigram sets and line caches in memory so searches only open
+candidate files. The index refreshes incrementally from (mtime, size) and
+verifies every candidate line with a substring or regex match. The set of
+indexed extensions is fixed at construction; queries can only narrow it.
+"""
+
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+try:
+    import re._parser as sre_parse  # Python 3.11+
+    import re._constants as sre_constants
+except ImportError:  # pragma: no cover - older interpreters
+    import sre_parse
+    import sre_constants
+
+MAX_FILE_SIZE = 10 * 1024 * 1024
+
+
+class UnindexedExtension(ValueError):
+    """Raised when a query asks for file types the index does not cover"""
+
+
+def trigrams(text: str) -> Set[str]:
+    """Lowercased 3-character shingles of text"""
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def required_literals(pattern: str) -> List[str]:
+    """Literal runs every match of pattern must contain (top-level sequence only)"""
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return []
+
+    runs, current = [], []
+    for op, value in parsed:
+        if op == sre_constants.LITERAL:
+            current.append(chr(value))
+            continue
+        if current:
+            runs.append(''.join(current))
+            current = []
+    if current:
+        runs.append(''.join(current))
+    return [run for run in runs if len(run) >= 3]
+
+
+class _IndexedFile:
+    __slots__ = ('signature', 'lines', 'grams')
+
+    def __init__(self, signature, lines, grams):
+        self.signature = signature
+        self.lines = lines
+        self.grams = grams
+
+
+class CodeSearchIndex:
+    """In-memory trigram index over text files under a project root"""
+
+    # Re-stat the tree at most this often; writes through the editor invalidate immediately
+    REFRESH_INTERVAL_SECONDS = 2.0
+
+    def __init__(self, project_root: Path, extensions: Iterable[str],
+                 is_excluded: Optional[Callable[[Path], bool]] = None):
+        self.project_root = Path(project_root)
+        self.extensions = frozenset(extensions)
+        self.is_excluded = is_excluded or (lambda path: False)
+        self._files: Dict[str, _IndexedFile] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._lock = threading.RLock()
+        self._last_refresh = 0.0
+        self.stats = {'builds': 0, 'files_indexed': 0, 'files_reindexed': 0, 'files_removed': 0}
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def refresh(self, force: bool = False) -> int:
+        """Re-index files whose (mtime, size) changed and drop deleted ones; returns files touched"""
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._files and now - self._last_refresh < self.REFRESH_INTERVAL_SECONDS:
+                return 0
+
+            seen = set()
+            touched = 0
+            for relative, full_path, stat in self._walk():
+                seen.add(relative)
+                signature = (stat.st_mtime_ns, stat.st_size)
+                existing = self._files.get(relative)
+                if existing is not None:
+                    if existing.signature == signature:
+                        continue
+                    self.stats['files_reindexed'] += 1
+                self._index_file(relative, full_path, signature)
+                touched += 1
+
+            for relative in set(self._files) - seen:
+                self._remove_file(relative)
+                self.stats['files_removed'] += 1
+                touched += 1
+
+            if not self._last_refresh:
+                self.stats['builds'] += 1
+            self._last_refresh = now
+            return touched
+
+    def invalidate(self, file_path) -> None:
+        """Re-index (or drop) a single file right away, e.g. after an editor write"""
+        full_path = self.project_root / file_path
+        try:
+            relative = str(full_path.relative_to(self.project_root))
+        except ValueError:
+            return
+        with self._lock:
+            try:
+                stat = full_path.stat()
+            except OSError:
+                self._remove_file(relative)
+                return
+            if self._should_index(full_path, stat):
+                self._index_file(relative, full_path, (stat.st_mtime_ns, stat.st_size))
+            else:
+                self._remove_file(relative)
+
+    def _walk(self):
+        for directory, dirnames, filenames in os.walk(self.project_root):
+            base = Path(directory)
+            # Prune excluded directories instead of descending into them
+            dirnames[:] = [d for d in dirnames if not self.is_excluded(base / d)]
+            for name in filenames:
+                full_path = base / name
+                try:
+                    stat = full_path.stat()
+                except OSError:
+                    continue
+                if self._should_index(full_path, stat):
+                    yield str(full_path.relative_to(self.project_root)), full_path, stat
+
+    def _should_index(self, full_path: Path, stat) -> bool:
+        return (full_path.suffix in self.extensions
+                and stat.st_size <= MAX_FILE_SIZE
+                and not self.is_excluded(full_path))
+
+    def _index_file(self, relative: str, full_path: Path, signature) -> None:
+        self._remove_file(relative)
+        try:
+            with open(full_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except (OSError, UnicodeDecodeError):
+            return  # Skip files that can't be read as text
+
+        grams = trigrams(content)
+        self._files[relative] = _IndexedFile(signature, content.splitlines(), grams)
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(relative)
+        self.stats['files_indexed'] += 1
+
+    def _remove_file(self, relative: str) -> None:
+        existing = self._files.pop(relative, None)
+        if existing is None:
+            return
+        for gram in existing.grams:
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(relative)
+                if not postings:
+                    del self._postings[gram]
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def candidates(self, literals: List[str], extensions: Optional[Iterable[str]] = None) -> List[str]:
+        """Files containing every trigram of every literal, smallest posting list first"""
+        required = set()
+        for literal in literals:
+            required |= trigrams(literal)
+
+        if required:
+            postings = sorted((self._postings.get(gram, set()) for gram in required), key=len)
+            files = set(postings[0])
+            for posting in postings[1:]:
+                if not files:
+                    break
+                files &= posting
+        else:
+            files = set(self._files)
+
+        if extensions is not None:
+            extensions = set(extensions)
+            files = {f for f in files if os.path.splitext(f)[1] in extensions}
+        return sorted(files)
+
+    def search(self, term: str, extensions: Optional[Iterable[str]] = None, regex: bool = False,
+               max_results: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Case-insensitive substring (or regex) search returning file/line/content matches"""
+        if extensions is not None:
+            extensions = {extensions} if isinstance(extensions, str) else set(extensions)
+            unknown = extensions - self.extensions
+            if unknown:
+                raise UnindexedExtension(f"Not searchable: {', '.join(sorted(unknown))} "
+                                         f"(indexed: {', '.join(sorted(self.extensions))})")
+        self.refresh()
+
+        if regex:
+            matcher = re.compile(term, re.IGNORECASE).search
+            literals = required_literals(term)
+        else:
+            needle = term.lower()
+            matcher = lambda line: needle in line.lower()  # noqa: E731
+            literals = [term]
+
+        # Snapshot the candidates' line lists (replaced, never mutated, on re-index) and match
+        # outside the lock, so a slow pattern never stalls other searches or a refresh
+        with self._lock:
+            snapshot = [(relative, self._files[relative].lines)
+                        for relative in self.candidates(literals, extensions)]
+
+        results = []
+        for relative, lines in snapshot:
+            for line_num, line in enumerate(lines, 1):
+                if matcher(line):
+                    results.append({
+                        'file': relative,
+                        'line': line_num,
+                        'content': line.strip()
+                    })
+                    if max_results and len(results) >= max_results:
+                        return results
+        return results
+
+    def file_count(self) -> int:
+        return len(self._files)
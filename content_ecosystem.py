@@ -7,19 +7,21 @@ Generates complete SEO content systems for Enterprise businesses including:
 - Knowledge base articles
 """
 
-import os
 import re
 from typing import Dict, List, Tuple
-from openai import OpenAI
-from anthropic import Anthropic
+from providers import provider_registry
 
 class ContentEcosystemManager:
     """Generates complete content ecosystems for Enterprise businesses"""
     
-    def __init__(self):
-        self.openai_client = OpenAI(api_key=os.environ.get('OPENAI_API_KEY'))
-        self.anthropic_client = Anthropic(api_key=os.environ.get('ANTHROPIC_API_KEY'))
-        
+    @property
+    def openai_client(self):
+        return provider_registry.get('openai')
+    
+    @property
+    def anthropic_client(self):
+        return provider_registry.get('anthropic')
+    
     def generate_business_ecosystem(self, business) -> Dict[str, List[Dict]]:
         """Generate complete content ecosystem for a business"""
         industry = business.industry or "service business"
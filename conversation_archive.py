@@ -0,0 +1,137 @@
+"""
+Conversation Archive with Keyset Pagination
+Pages through conversation history by (created_at, id) so every page costs the
+same index seek regardless of depth, instead of OFFSET scanning past old rows.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import exists, func, tuple_
+from sqlalchemy.orm import joinedload, selectinload
+
+from app import db
+from message_archive import message_archive
+from models import Conversation, ConversationMessage
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(created_at: datetime, conversation_id: int) -> str:
+    """Opaque cursor pointing just past the given row"""
+    payload = json.dumps([created_at.isoformat(), conversation_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """Inverse of encode_cursor; returns (created_at, conversation_id)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, conversation_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(conversation_id)
+    except Exception as e:
+        raise InvalidCursor(f'Invalid cursor: {cursor}') from e
+
+
+class ConversationArchive:
+    """Newest-first conversation listing with seek pagination and filters"""
+
+    DEFAULT_PAGE_SIZE = 20
+    MAX_PAGE_SIZE = 100
+
+    def build_query(self, business_id: Optional[int] = None, status: Optional[str] = None,
+                    agent_type: Optional[str] = None):
+        """Filtered query in archive order, without the cursor predicate"""
+        query = Conversation.query
+
+        if business_id is not None:
+            query = query.filter(Conversation.business_id == business_id)
+        if status:
+            query = query.filter(Conversation.status == status)
+        if agent_type:
+            query = query.filter(exists().where(
+                ConversationMessage.conversation_id == Conversation.id,
+                ConversationMessage.ai_agent_type == agent_type
+            ))
+
+        return query.order_by(Conversation.created_at.desc(), Conversation.id.desc())
+
+    def get_page(self, business_id: Optional[int] = None, status: Optional[str] = None,
+                 agent_type: Optional[str] = None, cursor: Optional[str] = None,
+                 limit: Optional[int] = None, with_messages: bool = True) -> Dict[str, Any]:
+        """Fetch one page; the returned next_cursor continues after its last row"""
+        limit = max(1, min(limit or self.DEFAULT_PAGE_SIZE, self.MAX_PAGE_SIZE))
+        query = self.build_query(business_id, status, agent_type)
+
+        if cursor:
+            created_at, conversation_id = decode_cursor(cursor)
+            query = query.filter(
+                tuple_(Conversation.created_at, Conversation.id) < tuple_(created_at, conversation_id)
+            )
+
+        query = query.options(joinedload(Conversation.business))
+        if with_messages:
+            # One extra query for all messages on the page instead of one per card
+            query = query.options(selectinload(Conversation.messages))
+
+        rows = query.limit(limit + 1).all()
+        has_more = len(rows) > limit
+        conversations = rows[:limit]
+
+        next_cursor = None
+        if has_more and conversations:
+            last = conversations[-1]
+            next_cursor = encode_cursor(last.created_at, last.id)
+
+        return {
+            'conversations': conversations,
+            'next_cursor': next_cursor,
+            'has_more': has_more,
+            'limit': limit
+        }
+
+    def serialize_page(self, conversations: List[Conversation], preview_messages: int = 3) -> List[Dict[str, Any]]:
+        """serialize_conversation for a whole page, fetching every preview in one query"""
+        previews = message_archive.previews(conversations, preview_messages)
+        return [self.serialize_conversation(conversation, preview_messages, previews[conversation.id])
+                for conversation in conversations]
+
+    def serialize_conversation(self, conversation: Conversation, preview_messages: int = 3,
+                               preview: Optional[List[ConversationMessage]] = None) -> Dict[str, Any]:
+        """JSON shape used by /api/conversations; counts come from the summary columns"""
+        if preview is None:
+            preview = message_archive.previews([conversation], preview_messages)[conversation.id]
+        message_count, agent_types = conversation.message_count, list(conversation.agent_counts)
+        if message_count is None:
+            # Summary not backfilled yet (conversation_summary repairs it); count the rows instead
+            message_count, agent_types = self._count_messages(conversation.id)
+        return {
+            'id': conversation.id,
+            'business_id': conversation.business_id,
+            'business_name': conversation.business.name if conversation.business else None,
+            'topic': conversation.topic,
+            'status': conversation.status,
+            'created_at': conversation.created_at.isoformat() if conversation.created_at else None,
+            'message_count': message_count,
+            'agent_types': sorted(agent_types),
+            'preview': [{
+                'agent_name': message.ai_agent_name,
+                'agent_type': message.ai_agent_type,
+                'content': message.content[:200]
+            } for message in preview[:preview_messages]]
+        }
+
+    @staticmethod
+    def _count_messages(conversation_id: int):
+        rows = db.session.query(ConversationMessage.ai_agent_type, func.count(ConversationMessage.id)).filter(
+            ConversationMessage.conversation_id == conversation_id
+        ).group_by(ConversationMessage.ai_agent_type).all()
+        return sum(count for _, count in rows), [agent_type for agent_type, _ in rows]
+
+
+# Global instance
+conversation_archive = ConversationArchive()
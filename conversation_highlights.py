@@ -0,0 +1,164 @@
+"""
+Precomputed Conversation Highlights
+Social post variants are generated once per conversation (when it completes, or
+lazily on first read for older ones) and stored per post type and platform.
+Template choices come from an RNG seeded by the conversation ID, so regenerating
+a conversation's highlights always produces the same text. Variants are upserted,
+so a lazy first read and the completion job racing on one conversation converge
+on the same rows instead of one of them failing.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import delete, insert, tuple_
+from sqlalchemy.orm import joinedload, selectinload
+
+from app import db
+from models import Conversation, ConversationHighlight
+from social_media_manager import SocialMediaManager
+from unit_of_work import unit_of_work
+
+BASE_PLATFORM = 'base'
+
+
+class ConversationHighlightStore:
+    """Writes and reads the per-platform highlight variant table"""
+
+    def __init__(self, social_manager: SocialMediaManager = None):
+        self.social_manager = social_manager or SocialMediaManager()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='highlights')
+
+    def precompute(self, conversation_ids: Iterable[int], commit: bool = True) -> Dict[int, List[Dict[str, Any]]]:
+        """(Re)generate and store highlights for the given conversations; returns the stored rows"""
+        conversation_ids = list(dict.fromkeys(conversation_ids))
+        if not conversation_ids:
+            return {}
+
+        conversations = (Conversation.query
+                         .filter(Conversation.id.in_(conversation_ids))
+                         .options(joinedload(Conversation.business), selectinload(Conversation.messages))
+                         .all())
+
+        now = datetime.now(timezone.utc)
+        conversations = [c for c in conversations if c.business]
+        batch = self.social_manager.build_highlights_batch(
+            [(conversation, conversation.business, conversation.id) for conversation in conversations])
+
+        generated: Dict[int, List[Dict[str, Any]]] = {}
+        rows = []
+        for conversation, posts in zip(conversations, batch):
+            generated[conversation.id] = posts
+            for position, post in enumerate(posts):
+                rows.append(self._row(conversation.id, post['type'], BASE_PLATFORM, position, post['content'], now))
+                for platform, content in post['platform_content'].items():
+                    rows.append(self._row(conversation.id, post['type'], platform, position, content, now))
+
+        try:
+            upsert = self._upsert()
+            if upsert is None:
+                # No ON CONFLICT support: replace the conversations' variants wholesale
+                db.session.execute(delete(ConversationHighlight)
+                                   .where(ConversationHighlight.conversation_id.in_(list(generated)))
+                                   .execution_options(synchronize_session=False))
+                upsert = insert(ConversationHighlight)
+            if rows:
+                db.session.execute(upsert, rows)
+            # Variants this generation no longer produces (deterministic, so a concurrent writer agrees)
+            current = [(row['conversation_id'], row['post_type'], row['platform']) for row in rows]
+            stale = delete(ConversationHighlight).where(ConversationHighlight.conversation_id.in_(list(generated)))
+            if current:
+                stale = stale.where(tuple_(ConversationHighlight.conversation_id, ConversationHighlight.post_type,
+                                           ConversationHighlight.platform).not_in(current))
+            db.session.execute(stale.execution_options(synchronize_session=False))
+            if commit:
+                db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return self._load(list(generated))
+
+    @staticmethod
+    def _upsert():
+        """INSERT that overwrites an existing (conversation, post type, platform) variant, or None if unsupported"""
+        dialect = db.engine.dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            return None
+        statement = dialect_insert(ConversationHighlight)
+        return statement.on_conflict_do_update(
+            index_elements=['conversation_id', 'post_type', 'platform'],
+            set_={column: statement.excluded[column] for column in ('position', 'content', 'seed', 'created_at')}
+        )
+
+    def precompute_async(self, conversation_id: int, write_behind=None):
+        """Queue precomputation, after pending write-behind messages have landed"""
+        def job():
+            try:
+                if write_behind is not None and write_behind.running:
+                    write_behind.flush()
+                with unit_of_work():
+                    self.precompute([conversation_id])
+            except Exception as e:
+                logging.error(f"Failed to precompute highlights for conversation {conversation_id}: {e}")
+
+        return self._executor.submit(job)
+
+    def get_highlights(self, conversation_ids: Iterable[int], compute_missing: bool = True) -> Dict[int, List[Dict[str, Any]]]:
+        """Highlights for many conversations in one query, keyed by conversation ID"""
+        conversation_ids = list(dict.fromkeys(conversation_ids))
+        if not conversation_ids:
+            return {}
+
+        highlights = self._load(conversation_ids)
+        missing = [cid for cid in conversation_ids if cid not in highlights]
+        if missing and compute_missing:
+            # Conversations that finished before precomputation existed
+            highlights.update(self.precompute(missing))
+
+        return highlights
+
+    def _load(self, conversation_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        if not conversation_ids:
+            return {}
+        rows = (ConversationHighlight.query
+                .filter(ConversationHighlight.conversation_id.in_(conversation_ids))
+                .order_by(ConversationHighlight.conversation_id, ConversationHighlight.position)
+                .all())
+
+        highlights: Dict[int, List[Dict[str, Any]]] = {}
+        posts_by_key: Dict[tuple, Dict[str, Any]] = {}
+        for row in rows:
+            key = (row.conversation_id, row.post_type)
+            post = posts_by_key.get(key)
+            if post is None:
+                post = {'type': row.post_type, 'content': None, 'platform_content': {}}
+                posts_by_key[key] = post
+                highlights.setdefault(row.conversation_id, []).append(post)
+            if row.platform == BASE_PLATFORM:
+                post['content'] = row.content
+            else:
+                post['platform_content'][row.platform] = row.content
+        return highlights
+
+    @staticmethod
+    def _row(conversation_id, post_type, platform, position, content, created_at):
+        return {
+            'conversation_id': conversation_id,
+            'post_type': post_type,
+            'platform': platform,
+            'position': position,
+            'content': content,
+            'seed': conversation_id,
+            'created_at': created_at
+        }
+
+
+# Global instance
+conversation_highlights = ConversationHighlightStore()
@@ -0,0 +1,662 @@
+"""
+Multi-Business Live Conversation Orchestrator
+Drives concurrent live conversations for many businesses from a single timer heap.
+Per-business state lives in the LiveConversationState table so in-flight
+conversations resume where they left off after a restart.
+"""
+
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import func
+
+from app import app, db
+from conversation_summary import conversation_summary
+from models import Business, Conversation, ConversationMessage, LiveConversationState
+from unit_of_work import unit_of_work
+
+logger = logging.getLogger(__name__)
+
+STATE_IDLE = 'IDLE'
+STATE_WAITING = 'WAITING'
+STATE_ACTIVE = 'ACTIVE'
+
+# Conversation.driver of conversations this orchestrator generates
+DRIVER = 'orchestrator'
+
+# 4 rounds of the same 4 agents, one message each per round
+AGENT_ROTATION = [
+    {'name': 'Business AI Assistant', 'type': 'openai'},
+    {'name': 'SEO AI Specialist', 'type': 'anthropic'},
+    {'name': 'Customer Service AI', 'type': 'perplexity'},
+    {'name': 'Marketing AI Expert', 'type': 'gemini'}
+]
+
+DEFAULT_TOPICS = [
+    "Professional Installation Services and Quality Materials",
+    "Emergency Repair Solutions and 24/7 Availability",
+    "Preventive Maintenance Programs",
+    "Customer Satisfaction and Transparent Pricing",
+    "Licensed Contractors and Industry Certifications",
+    "Energy-Efficient and Sustainable Solutions"
+]
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Normalize naive datetimes (as returned by SQLite) to aware UTC"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class ConversationOrchestrator:
+    """Runs live conversations for any number of businesses concurrently"""
+
+    MESSAGES_PER_CONVERSATION = 16
+    MESSAGE_INTERVAL_SECONDS = 60
+    WAITING_PERIOD_MINUTES = 5
+
+    def __init__(self, socketio=None, message_generator: Optional[Callable[..., str]] = None,
+                 max_workers: int = 8, write_behind=None):
+        self.socketio = socketio
+        self.max_workers = max_workers
+        # Optional MessageWriteBehind queue; when set, messages are persisted asynchronously
+        self.write_behind = write_behind
+        self._message_generator = message_generator
+        self._ai_manager = None
+
+        # Timer heap of (due_timestamp, sequence, business_id). Superseded
+        # entries are skipped lazily by comparing against self._due.
+        self._heap = []
+        self._due = {}
+        self._inflight = set()
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+        self.running = False
+        self.thread = None
+        self.executor = None
+        # Updated from the timer thread and every worker, so only through _count/_record_lag
+        self._stats_lock = threading.Lock()
+        self.stats = {'fired': 0, 'messages': 0, 'conversations_started': 0,
+                      'conversations_completed': 0, 'max_lag_seconds': 0.0}
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Recover persisted state and start the timer thread"""
+        if self.thread is not None and self.thread.is_alive():
+            return
+
+        self.running = True
+        if self.write_behind is not None:
+            self.write_behind.start()
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='conversation-worker')
+        self._recover_state()
+
+        self.thread = threading.Thread(target=self._run_timer_loop, name='conversation-orchestrator', daemon=True)
+        self.thread.start()
+        logger.info("Conversation orchestrator started")
+
+    def stop(self):
+        """Stop the timer thread and wait for in-flight work"""
+        with self._condition:
+            self.running = False
+            self._condition.notify_all()
+
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=5)
+        if self.executor:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        if self.write_behind is not None:
+            self.write_behind.stop()
+        logger.info("Conversation orchestrator stopped")
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def enable_business(self, business_id: int, continuous: bool = True, start_in_seconds: int = 0) -> Dict[str, Any]:
+        """Put a business into the live rotation (WAITING until its first conversation starts)"""
+        with app.app_context():
+            state = self._get_or_create_state(business_id)
+            if state.state == STATE_ACTIVE:
+                state.continuous = continuous
+                db.session.commit()
+                return self._serialize_state(state)
+
+            state.state = STATE_WAITING
+            state.continuous = continuous
+            state.next_event_at = datetime.now(timezone.utc) + timedelta(seconds=start_in_seconds)
+            db.session.commit()
+
+            self._schedule(business_id, state.next_event_at)
+            return self._serialize_state(state)
+
+    def disable_business(self, business_id: int) -> bool:
+        """Stop starting new conversations for a business; an active one still finishes"""
+        with app.app_context():
+            state = LiveConversationState.query.filter_by(business_id=business_id).first()
+            if not state:
+                return False
+
+            state.continuous = False
+            if state.state == STATE_WAITING:
+                state.state = STATE_IDLE
+                state.next_event_at = None
+                self._unschedule(business_id)
+            db.session.commit()
+            return True
+
+    def start_conversation(self, business, topic: Optional[str] = None) -> Optional[int]:
+        """Start a live conversation for a business immediately; returns the conversation ID"""
+        with app.app_context():
+            try:
+                state = self._get_or_create_state(business.id)
+                if state.state == STATE_ACTIVE and state.conversation_id:
+                    logger.info("Business %s already has live conversation %s", business.id, state.conversation_id)
+                    return state.conversation_id
+
+                conversation_id = self._begin_conversation(state, topic)
+                db.session.commit()
+
+            except Exception as e:
+                db.session.rollback()
+                logger.error("Failed to start live conversation for business %s: %s", business.id, e)
+                return None
+
+        self._schedule(business.id, datetime.now(timezone.utc))
+        return conversation_id
+
+    def get_business_state(self, business_id: int) -> Dict[str, Any]:
+        """Current live state for one business, shaped like get_current_state"""
+        state = LiveConversationState.query.filter_by(business_id=business_id).first()
+        if not state:
+            return {'business_id': business_id, 'status': STATE_IDLE, 'conversation_active': False}
+        return self._serialize_state(state)
+
+    def get_current_state(self) -> Dict[str, Any]:
+        """Platform-wide live state for the status endpoints: the first active business,
+        else the next one due to start, plus how many conversations are running"""
+        featured = (LiveConversationState.query.filter_by(state=STATE_ACTIVE)
+                    .order_by(LiveConversationState.id).first()
+                    or LiveConversationState.query.filter_by(state=STATE_WAITING)
+                    .order_by(LiveConversationState.next_event_at).first())
+        if featured is not None:
+            data = self._serialize_state(featured)
+        else:
+            data = {'status': STATE_IDLE, 'conversation_active': False, 'conversation_status': STATE_IDLE.lower(),
+                    'messages_generated': 0, 'total_messages': self.MESSAGES_PER_CONVERSATION,
+                    'timestamp': datetime.now(timezone.utc).isoformat()}
+        data['system_running'] = self.running
+        data['active_conversations_count'] = self.get_active_conversation_count()
+        return data
+
+    def get_active_conversations(self) -> List[Dict[str, Any]]:
+        """All conversations currently being generated"""
+        states = LiveConversationState.query.filter_by(state=STATE_ACTIVE).all()
+        return [self._serialize_state(state) for state in states]
+
+    def get_active_conversation_count(self) -> int:
+        """Number of businesses with a conversation in progress"""
+        return LiveConversationState.query.filter_by(state=STATE_ACTIVE).count()
+
+    def pending_timer_count(self) -> int:
+        """Number of businesses with a pending timer"""
+        with self._condition:
+            return len(self._due)
+
+    # ------------------------------------------------------------------
+    # Timer heap
+    # ------------------------------------------------------------------
+
+    def _schedule(self, business_id: int, when: datetime):
+        """Schedule (or reschedule) the next event for a business"""
+        due = _as_utc(when).timestamp()
+        with self._condition:
+            self._due[business_id] = due
+            heapq.heappush(self._heap, (due, next(self._sequence), business_id))
+            if self._heap[0][2] == business_id:
+                self._condition.notify()
+
+    def _unschedule(self, business_id: int):
+        with self._condition:
+            self._due.pop(business_id, None)
+
+    def _run_timer_loop(self):
+        """Single timer thread: pop due entries and hand them to the worker pool"""
+        while True:
+            with self._condition:
+                if not self.running:
+                    return
+
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+
+                due, _, business_id = self._heap[0]
+                delay = due - time.time()
+                if delay > 0:
+                    self._condition.wait(timeout=delay)
+                    continue
+
+                heapq.heappop(self._heap)
+                if self._due.get(business_id) != due or business_id in self._inflight:
+                    continue  # Superseded entry, or a worker is already busy with this business
+
+                del self._due[business_id]
+                self._inflight.add(business_id)
+                self._record_lag(time.time() - due)
+
+            self.executor.submit(self._fire, business_id)
+
+    def _fire(self, business_id: int):
+        """Advance one business's state machine by a single step"""
+        next_event = None
+        try:
+            next_event = self._step(business_id)
+            self._count('fired')
+        except Exception as e:
+            logger.error("Orchestrator step failed for business %s: %s", business_id, e)
+            next_event = datetime.now(timezone.utc) + timedelta(seconds=self.MESSAGE_INTERVAL_SECONDS)
+        finally:
+            with self._condition:
+                self._inflight.discard(business_id)
+
+        if next_event is not None and self.running:
+            self._schedule(business_id, next_event)
+
+    def _step(self, business_id: int) -> Optional[datetime]:
+        """Read the state, generate any message with no session open, then apply the
+        result in a second unit of work. Returns when the business is next due."""
+        with unit_of_work(commit=False):
+            state = LiveConversationState.query.filter_by(business_id=business_id).first()
+            if not state or state.state == STATE_IDLE:
+                return None
+            observed = (state.state, state.conversation_id, state.messages_generated)
+            turn = self._prepare_turn(state) if state.state == STATE_ACTIVE else None
+
+        if turn is not None and turn['business'] is not None:
+            turn['content'] = self._generate_content(turn)
+        elif observed[0] == STATE_ACTIVE and self.write_behind is not None:
+            # Completing: the last messages may still be queued, and must be stored first
+            if not self.write_behind.flush():
+                raise RuntimeError("timed out flushing queued messages before completing the conversation")
+
+        with unit_of_work():
+            state = LiveConversationState.query.filter_by(business_id=business_id).first()
+            if not state or (state.state, state.conversation_id, state.messages_generated) != observed:
+                # Changed by a request (or another process) while we were generating; re-evaluate
+                logger.info("Live state of business %s changed during a step; skipping it", business_id)
+                return state.next_event_at if state and state.state != STATE_IDLE else None
+
+            active_conversation_id = state.conversation_id if state.state == STATE_ACTIVE else None
+            stored_message_id = None
+            if state.state == STATE_WAITING:
+                self._begin_conversation(state)
+            elif turn is not None:
+                stored_message_id = self._emit_next_message(state, turn)
+            else:
+                self._finish_conversation(state)
+            next_event = state.next_event_at if state.state != STATE_IDLE else None
+
+        if stored_message_id is not None:
+            self._on_message_stored(stored_message_id)
+        if active_conversation_id and state.conversation_id != active_conversation_id:
+            self._on_conversation_completed(active_conversation_id)
+        return next_event
+
+    # ------------------------------------------------------------------
+    # State transitions (called inside an app context or unit of work)
+    # ------------------------------------------------------------------
+
+    def _get_or_create_state(self, business_id: int) -> LiveConversationState:
+        state = LiveConversationState.query.filter_by(business_id=business_id).first()
+        if not state:
+            state = LiveConversationState(
+                business_id=business_id,
+                state=STATE_IDLE,
+                messages_generated=0,
+                total_messages=self.MESSAGES_PER_CONVERSATION
+            )
+            db.session.add(state)
+            db.session.flush()
+        return state
+
+    def _begin_conversation(self, state: LiveConversationState, topic: Optional[str] = None) -> int:
+        """WAITING/IDLE -> ACTIVE"""
+        now = datetime.now(timezone.utc)
+        topic = topic or self._pick_topic(state.business_id)
+
+        conversation = Conversation(
+            business_id=state.business_id,
+            topic=topic,
+            status='active',
+            driver=DRIVER,
+            created_at=now
+        )
+        db.session.add(conversation)
+        db.session.flush()
+
+        state.state = STATE_ACTIVE
+        state.conversation_id = conversation.id
+        state.topic = topic
+        state.messages_generated = 0
+        state.total_messages = self.MESSAGES_PER_CONVERSATION
+        state.conversation_started_at = now
+        state.next_event_at = now
+
+        self._count('conversations_started')
+        logger.info("Started live conversation %s for business %s: %s", conversation.id, state.business_id, topic)
+        self._broadcast('system_state_update', self._serialize_state(state))
+        return conversation.id
+
+    def _prepare_turn(self, state: LiveConversationState) -> Optional[Dict[str, Any]]:
+        """Everything generating the next message needs, read up front (None once all are generated)"""
+        if state.messages_generated >= state.total_messages:
+            return None
+
+        index = state.messages_generated
+        started_at = _as_utc(state.conversation_started_at) or datetime.now(timezone.utc)
+        turn = {
+            'business': db.session.get(Business, state.business_id),
+            'topic': state.topic,
+            'index': index,
+            'agent': AGENT_ROTATION[index % len(AGENT_ROTATION)],
+            'timestamp': started_at + timedelta(seconds=index * self.MESSAGE_INTERVAL_SECONDS),
+            'history': ''
+        }
+        if turn['business'] is not None and self._message_generator is None:
+            history_rows = db.session.query(
+                ConversationMessage.ai_agent_name, ConversationMessage.content
+            ).filter_by(conversation_id=state.conversation_id).order_by(ConversationMessage.message_order).all()
+            turn['history'] = ''.join(f"{name}: {content}\n" for name, content in history_rows)
+        return turn
+
+    def _emit_next_message(self, state: LiveConversationState, turn: Dict[str, Any]):
+        """Persist a generated message; ACTIVE -> WAITING/IDLE after the last one.
+        Returns the new message ID when it was inserted in this session (not via write-behind)."""
+        if turn['business'] is None:
+            logger.error("Business %s not found, stopping its live conversation", state.business_id)
+            state.state = STATE_IDLE
+            state.next_event_at = None
+            return
+
+        index, agent, content = turn['index'], turn['agent'], turn['content']
+        intended_timestamp = turn['timestamp']
+
+        row = {
+            'conversation_id': state.conversation_id,
+            'ai_agent_name': agent['name'],
+            'ai_agent_type': agent['type'],
+            'content': content,
+            'message_order': index + 1,
+            'created_at': intended_timestamp
+        }
+        payload = {
+            'business_id': state.business_id,
+            'conversation_id': state.conversation_id,
+            'agent_name': agent['name'],
+            'agent_type': agent['type'],
+            'content': content,
+            'messageNumber': index + 1,
+            'round': (index // 4) + 1,
+            'timestamp': intended_timestamp.isoformat()
+        }
+
+        if self.write_behind is not None:
+            # Broadcast once the row has an ID; recovery re-counts persisted rows if a flush is lost
+            def on_written(message_id, payload=payload):
+                if message_id is not None:
+                    self._broadcast('new_message', dict(payload, id=message_id))
+                    self._on_message_stored(message_id)
+            self.write_behind.enqueue(row, on_written)
+            stored_message_id = None
+        else:
+            message = ConversationMessage(**row)
+            db.session.add(message)
+            db.session.flush()
+            conversation_summary.refresh([state.conversation_id])
+            self._broadcast('new_message', dict(payload, id=message.id))
+            stored_message_id = message.id
+
+        state.messages_generated = index + 1
+        state.next_event_at = intended_timestamp + timedelta(seconds=self.MESSAGE_INTERVAL_SECONDS)
+        self._count('messages')
+
+        if state.messages_generated >= state.total_messages:
+            if self.write_behind is None:
+                self._complete_conversation(state)
+            else:
+                # Complete in the next step, once the queue has written this message
+                state.next_event_at = datetime.now(timezone.utc)
+        return stored_message_id
+
+    def _finish_conversation(self, state: LiveConversationState):
+        """Complete once every generated message is stored; rewind to regenerate any a failed flush lost"""
+        persisted = db.session.query(func.count(ConversationMessage.id)).filter(
+            ConversationMessage.conversation_id == state.conversation_id
+        ).scalar()
+        if persisted < state.messages_generated:
+            logger.warning("Conversation %s has %s of %s messages stored; regenerating the rest",
+                           state.conversation_id, persisted, state.messages_generated)
+            state.messages_generated = persisted
+            state.next_event_at = datetime.now(timezone.utc)
+            return
+        self._complete_conversation(state)
+
+    def _complete_conversation(self, state: LiveConversationState):
+        """ACTIVE -> WAITING (continuous) or IDLE"""
+        conversation = db.session.get(Conversation, state.conversation_id) if state.conversation_id else None
+        if conversation:
+            conversation.status = 'completed'
+            conversation.credits_used = 1
+
+            business = db.session.get(Business, conversation.business_id)
+            if business and not business.is_unlimited:
+                business.credits_remaining = max(0, (business.credits_remaining or 0) - 1)
+
+        self._count('conversations_completed')
+        logger.info("Completed live conversation %s for business %s", state.conversation_id, state.business_id)
+
+        if state.continuous:
+            state.state = STATE_WAITING
+            state.next_event_at = datetime.now(timezone.utc) + timedelta(minutes=self.WAITING_PERIOD_MINUTES)
+        else:
+            state.state = STATE_IDLE
+            state.next_event_at = None
+        state.conversation_id = None
+        state.conversation_started_at = None
+        state.messages_generated = 0
+
+        self._broadcast('system_state_update', self._serialize_state(state))
+
+    def _on_conversation_completed(self, conversation_id: int):
+        """Post-commit hook: precompute social highlights once the final messages are stored"""
+        from conversation_highlights import conversation_highlights
+        conversation_highlights.precompute_async(conversation_id, write_behind=self.write_behind)
+
+    def _on_message_stored(self, message_id: int):
+        """Post-commit hook: queue the message's investigation report ahead of the first click"""
+        from investigation_service import investigation_service
+        investigation_service.precompute(message_id)
+
+    def _generate_content(self, turn: Dict[str, Any]) -> str:
+        """Produce message text through the configured generator or the AI manager (no session open)"""
+        business, agent, index = turn['business'], turn['agent'], turn['index']
+        if self._message_generator is not None:
+            return self._message_generator(business, turn['topic'], agent, index)
+
+        if self._ai_manager is None:
+            from ai_conversation import AIConversationManager
+            self._ai_manager = AIConversationManager()
+
+        content = self._ai_manager._generate_agent_message(
+            agent_name=agent['name'],
+            agent_type=agent['type'],
+            business_context=f"{business.name} in {business.location}, Industry: {business.industry}",
+            topic=turn['topic'],
+            conversation_history=turn['history'],
+            round_num=(index // 4) + 1,
+            msg_num=(index % 4) + 1
+        )
+        return content or self._ai_manager._get_professional_fallback(agent['name'], agent['type'], turn['topic'])
+
+    def _pick_topic(self, business_id: int) -> str:
+        try:
+            from conversation_intelligence import ConversationIntelligence
+            return ConversationIntelligence().get_smart_topic_suggestion(business_id)
+        except Exception as e:
+            logger.warning("Topic suggestion failed for business %s: %s", business_id, e)
+            return random.choice(DEFAULT_TOPICS)
+
+    # ------------------------------------------------------------------
+    # Recovery
+    # ------------------------------------------------------------------
+
+    def _recover_state(self):
+        """Reload every WAITING/ACTIVE business and re-arm its timer"""
+        try:
+            with unit_of_work():
+                self._adopt_orphaned_conversations()
+
+                states = LiveConversationState.query.filter(
+                    LiveConversationState.state.in_([STATE_WAITING, STATE_ACTIVE])
+                ).all()
+
+                # Actual persisted message counts for every in-flight conversation in one query
+                active_ids = [s.conversation_id for s in states if s.state == STATE_ACTIVE and s.conversation_id]
+                persisted_counts = {}
+                if active_ids:
+                    persisted_counts = dict(db.session.query(
+                        ConversationMessage.conversation_id, func.count(ConversationMessage.id)
+                    ).filter(ConversationMessage.conversation_id.in_(active_ids)).group_by(
+                        ConversationMessage.conversation_id
+                    ).all())
+
+                now = datetime.now(timezone.utc)
+                for state in states:
+                    if state.state == STATE_ACTIVE:
+                        # The DB is the source of truth for how far a conversation got
+                        state.messages_generated = persisted_counts.get(state.conversation_id, 0)
+                        if state.messages_generated >= (state.total_messages or self.MESSAGES_PER_CONVERSATION):
+                            self._complete_conversation(state)
+                        else:
+                            self._rebase_schedule(state, now)
+
+                    if state.state != STATE_IDLE:
+                        next_event = _as_utc(state.next_event_at) or now
+                        state.next_event_at = max(next_event, now)
+
+            for state in states:
+                if state.state != STATE_IDLE:
+                    self._schedule(state.business_id, state.next_event_at)
+
+            logger.info("Recovered %s live conversation states (%s in flight)", len(states), len(active_ids))
+
+        except Exception as e:
+            logger.error("Failed to recover live conversation state: %s", e)
+
+    def _rebase_schedule(self, state: LiveConversationState, now: datetime):
+        """Restart the remaining messages from now when their slots passed while we were down.
+        Message times are derived from conversation_started_at, so missed slots would all
+        come due at once; shifting the start keeps the one-per-interval pacing."""
+        started_at = _as_utc(state.conversation_started_at) or now
+        interval = timedelta(seconds=self.MESSAGE_INTERVAL_SECONDS)
+        if started_at + state.messages_generated * interval < now:
+            state.conversation_started_at = now - state.messages_generated * interval
+            state.next_event_at = now
+
+    def _adopt_orphaned_conversations(self):
+        """Give our own conversations left 'active' without a state row one so they finish.
+        Conversations with another driver, or none recorded, are left alone."""
+        tracked = db.session.query(LiveConversationState.conversation_id).filter(
+            LiveConversationState.conversation_id.isnot(None)
+        )
+        orphans = Conversation.query.filter(
+            Conversation.status == 'active',
+            Conversation.driver == DRIVER,
+            ~Conversation.id.in_(tracked)
+        ).order_by(Conversation.created_at.desc()).all()
+
+        for conversation in orphans:
+            state = self._get_or_create_state(conversation.business_id)
+            if state.state == STATE_ACTIVE:
+                # Business already has a tracked conversation; close the stray one out
+                conversation.status = 'completed'
+                continue
+
+            state.state = STATE_ACTIVE
+            state.conversation_id = conversation.id
+            state.topic = conversation.topic
+            state.total_messages = self.MESSAGES_PER_CONVERSATION
+            state.conversation_started_at = conversation.created_at
+            state.next_event_at = datetime.now(timezone.utc)
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _serialize_state(self, state: LiveConversationState) -> Dict[str, Any]:
+        now_utc = datetime.now(timezone.utc)
+        data = {
+            'business_id': state.business_id,
+            'status': state.state,
+            'conversation_active': state.state == STATE_ACTIVE,
+            'conversation_status': state.state.lower(),
+            'current_conversation_id': state.conversation_id,
+            'topic': state.topic,
+            'messages_generated': state.messages_generated or 0,
+            'total_messages': state.total_messages or self.MESSAGES_PER_CONVERSATION,
+            'continuous': bool(state.continuous),
+            'timestamp': now_utc.isoformat()
+        }
+
+        next_event = _as_utc(state.next_event_at)
+        if next_event:
+            data['next_event_time'] = next_event.isoformat()
+            data['seconds_until_next'] = max(0, int((next_event - now_utc).total_seconds()))
+            if state.state == STATE_WAITING:
+                data['next_conversation_time'] = data['next_event_time']
+
+        started = _as_utc(state.conversation_started_at)
+        if state.state == STATE_ACTIVE and started:
+            data['conversation_started'] = started.isoformat()
+            data['elapsed_seconds'] = max(0, int((now_utc - started).total_seconds()))
+            data['estimated_completion'] = (started + timedelta(
+                seconds=data['total_messages'] * self.MESSAGE_INTERVAL_SECONDS)).isoformat()
+
+        return data
+
+    def _count(self, stat: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[stat] += amount
+
+    def _record_lag(self, lag: float):
+        with self._stats_lock:
+            if lag > self.stats['max_lag_seconds']:
+                self.stats['max_lag_seconds'] = lag
+
+    def _broadcast(self, event: str, payload: Dict[str, Any]):
+        if not self.socketio:
+            return
+        try:
+            self.socketio.emit(event, payload)
+        except Exception as e:
+            logger.error("Error broadcasting %s: %s", event, e)
+
+
+# Global instance
+conversation_orchestrator = ConversationOrchestrator()
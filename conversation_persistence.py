@@ -0,0 +1,267 @@
+"""
+Bulk Conversation Persistence Service
+Writes conversations and their messages with multi-row INSERTs (or COPY on
+PostgreSQL for large batches) in a single transaction, returning the new IDs.
+Each insert also refreshes the affected conversations' summary columns.
+Includes a write-behind queue so the live orchestrator never waits on a commit.
+"""
+
+import io
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import insert, text
+
+from app import db
+from conversation_summary import conversation_summary
+from models import Conversation, ConversationMessage
+from unit_of_work import unit_of_work
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_COLUMNS = ('conversation_id', 'ai_agent_name', 'ai_agent_type', 'content', 'created_at', 'message_order')
+
+
+def _message_row(conversation_id: int, index: int, message, created_at: Optional[datetime] = None) -> Dict[str, Any]:
+    """Normalize an (agent_name, agent_type, content) tuple or dict into an insert row"""
+    if isinstance(message, dict):
+        row = dict(message)
+        row.setdefault('conversation_id', conversation_id)
+        row.setdefault('message_order', index + 1)
+    else:
+        agent_name, agent_type, content = message
+        row = {
+            'conversation_id': conversation_id,
+            'ai_agent_name': agent_name,
+            'ai_agent_type': agent_type,
+            'content': content,
+            'message_order': index + 1
+        }
+    if not row.get('created_at'):
+        row['created_at'] = created_at or datetime.now(timezone.utc)
+    return row
+
+
+class ConversationPersistence:
+    """Set-based writes for conversations and messages"""
+
+    # Above this many rows PostgreSQL uses COPY instead of multi-row INSERT
+    COPY_THRESHOLD = 5000
+
+    def save_conversation(self, business_id: int, topic: str, messages: Sequence,
+                          status: str = 'completed', credits_used: int = 1,
+                          created_at: Optional[datetime] = None, commit: bool = True) -> Tuple[int, List[int]]:
+        """Insert one conversation with all its messages; returns (conversation_id, message_ids)"""
+        results = self.save_conversations([{
+            'business_id': business_id,
+            'topic': topic,
+            'messages': messages,
+            'status': status,
+            'credits_used': credits_used,
+            'created_at': created_at
+        }], commit=commit)
+        return results[0]
+
+    def save_conversations(self, conversations: List[Dict[str, Any]], commit: bool = True) -> List[Tuple[int, List[int]]]:
+        """Insert many conversations and their messages in one transaction"""
+        if not conversations:
+            return []
+
+        now = datetime.now(timezone.utc)
+        try:
+            conversation_rows = [{
+                'business_id': conv['business_id'],
+                'topic': conv['topic'],
+                'status': conv.get('status', 'completed'),
+                'credits_used': conv.get('credits_used', 1),
+                'created_at': conv.get('created_at') or now,
+                'completed_at': now if conv.get('status', 'completed') == 'completed' else None
+            } for conv in conversations]
+
+            conversation_ids = list(db.session.scalars(
+                insert(Conversation).returning(Conversation.id, sort_by_parameter_order=True),
+                conversation_rows
+            ))
+
+            message_rows = []
+            boundaries = []
+            for conversation_id, conv, conv_row in zip(conversation_ids, conversations, conversation_rows):
+                start = len(message_rows)
+                for index, message in enumerate(conv.get('messages') or []):
+                    message_rows.append(_message_row(conversation_id, index, message, conv_row['created_at']))
+                boundaries.append((start, len(message_rows)))
+
+            message_ids = self.insert_messages(message_rows, commit=False)
+
+            if commit:
+                db.session.commit()
+
+            return [(conversation_id, message_ids[start:end])
+                    for conversation_id, (start, end) in zip(conversation_ids, boundaries)]
+
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def insert_messages(self, rows: List[Dict[str, Any]], commit: bool = True) -> List[int]:
+        """Insert message rows in one statement (or COPY); returns IDs in input order"""
+        if not rows:
+            return []
+
+        try:
+            if db.engine.dialect.name == 'postgresql' and len(rows) >= self.COPY_THRESHOLD:
+                ids = self._copy_messages(rows)
+            else:
+                ids = list(db.session.scalars(
+                    insert(ConversationMessage).returning(ConversationMessage.id, sort_by_parameter_order=True),
+                    rows
+                ))
+            # Same transaction, so a committed message is never missing from its conversation's summary
+            conversation_summary.refresh(row['conversation_id'] for row in rows)
+
+            if commit:
+                db.session.commit()
+            return ids
+
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def _copy_messages(self, rows: List[Dict[str, Any]]) -> List[int]:
+        """COPY rows into conversation_message with IDs reserved from its sequence up front"""
+        ids = list(db.session.scalars(
+            text("SELECT nextval(pg_get_serial_sequence('conversation_message', 'id')) "
+                 "FROM generate_series(1, :n)"),
+            {'n': len(rows)}
+        ))
+
+        buffer = io.StringIO()
+        for message_id, row in zip(ids, rows):
+            values = [str(message_id)] + [self._copy_value(row.get(column)) for column in MESSAGE_COLUMNS]
+            buffer.write('\t'.join(values) + '\n')
+        buffer.seek(0)
+
+        # COPY must run on the session's own connection to share its transaction
+        raw_connection = db.session.connection().connection
+        with raw_connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY conversation_message (id, {', '.join(MESSAGE_COLUMNS)}) FROM STDIN",
+                buffer
+            )
+        return ids
+
+    @staticmethod
+    def _copy_value(value) -> str:
+        if value is None:
+            return '\\N'
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+                .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+class MessageWriteBehind:
+    """Background queue that batches message inserts into short single-transaction flushes"""
+
+    def __init__(self, persistence: Optional[ConversationPersistence] = None,
+                 max_batch: int = 500, max_delay_seconds: float = 0.25):
+        self.persistence = persistence or persistence_service
+        self.max_batch = max_batch
+        self.max_delay_seconds = max_delay_seconds
+        self._queue = queue.Queue()
+        self._flush_requests = []
+        self.running = False
+        self.thread = None
+        self.stats = {'enqueued': 0, 'written': 0, 'batches': 0, 'failed': 0}
+
+    def start(self):
+        """Start the flush thread"""
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='message-write-behind', daemon=True)
+        self.thread.start()
+        logger.info("Message write-behind queue started")
+
+    def stop(self, timeout: float = 10):
+        """Flush everything still queued and stop the thread"""
+        if not self.running:
+            return
+        self.flush(timeout=timeout)
+        self.running = False
+        self._queue.put(None)
+        if self.thread:
+            self.thread.join(timeout=timeout)
+        logger.info("Message write-behind queue stopped")
+
+    def enqueue(self, row: Dict[str, Any], callback: Optional[Callable[[Optional[int]], None]] = None):
+        """Queue a message row; callback receives the new ID (or None if the write failed)"""
+        self.stats['enqueued'] += 1
+        self._queue.put((row, callback))
+
+    def flush(self, timeout: float = 10) -> bool:
+        """Block until everything enqueued so far is written"""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout=timeout)
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self):
+        while self.running:
+            batch, markers = self._collect_batch()
+            if batch:
+                self._write(batch)
+            for marker in markers:
+                marker.set()
+
+    def _collect_batch(self):
+        """Gather up to max_batch rows, waiting at most max_delay_seconds after the first"""
+        batch, markers = [], []
+        deadline = None
+        while len(batch) < self.max_batch:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+
+            if item is None:
+                break
+            if isinstance(item, threading.Event):
+                markers.append(item)
+                break
+
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.max_delay_seconds
+        return batch, markers
+
+    def _write(self, batch):
+        rows = [row for row, _ in batch]
+        try:
+            with unit_of_work():
+                ids = self.persistence.insert_messages(rows)
+            self.stats['written'] += len(ids)
+            self.stats['batches'] += 1
+        except Exception as e:
+            logger.error("Write-behind flush of %s messages failed: %s", len(rows), e)
+            self.stats['failed'] += len(rows)
+            ids = [None] * len(rows)
+
+        for (_, callback), message_id in zip(batch, ids):
+            if callback:
+                try:
+                    callback(message_id)
+                except Exception as e:
+                    logger.error("Write-behind callback failed: %s", e)
+
+
+# Global instances
+persistence_service = ConversationPersistence()
+message_write_behind = MessageWriteBehind(persistence_service)
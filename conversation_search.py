@@ -0,0 +1,308 @@
+"""
+Full-Text Search over Conversations and Messages
+PostgreSQL: generated tsvector columns with GIN indexes (always in sync with inserts).
+SQLite: FTS5 external-content tables maintained by triggers.
+Results are ranked, carry highlighted snippets and page with keyset cursors on (score, id).
+Snippets are HTML: the message text is escaped, then the matches are wrapped in <mark>.
+"""
+
+import base64
+import html
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+from app import db
+
+SNIPPET_START = '<mark>'
+SNIPPET_STOP = '</mark>'
+# The database delimits matches with these private-use characters; they become the tags after escaping
+_MATCH_START = '\ue000'
+_MATCH_STOP = '\ue001'
+
+POSTGRES_SETUP = [
+    "ALTER TABLE conversation_message ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED",
+    "ALTER TABLE conversation ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', coalesce(topic, ''))) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_conversation_message_search ON conversation_message USING GIN (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_conversation_search ON conversation USING GIN (search_vector)",
+]
+
+SQLITE_SETUP = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS conversation_message_fts USING fts5("
+    "content, content='conversation_message', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS conversation_fts USING fts5("
+    "topic, content='conversation', content_rowid='id', tokenize='porter unicode61')",
+    """CREATE TRIGGER IF NOT EXISTS conversation_message_fts_ai AFTER INSERT ON conversation_message BEGIN
+        INSERT INTO conversation_message_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS conversation_message_fts_ad AFTER DELETE ON conversation_message BEGIN
+        INSERT INTO conversation_message_fts(conversation_message_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS conversation_message_fts_au AFTER UPDATE OF content ON conversation_message BEGIN
+        INSERT INTO conversation_message_fts(conversation_message_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO conversation_message_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS conversation_fts_ai AFTER INSERT ON conversation BEGIN
+        INSERT INTO conversation_fts(rowid, topic) VALUES (new.id, new.topic);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS conversation_fts_ad AFTER DELETE ON conversation BEGIN
+        INSERT INTO conversation_fts(conversation_fts, rowid, topic) VALUES ('delete', old.id, old.topic);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS conversation_fts_au AFTER UPDATE OF topic ON conversation BEGIN
+        INSERT INTO conversation_fts(conversation_fts, rowid, topic) VALUES ('delete', old.id, old.topic);
+        INSERT INTO conversation_fts(rowid, topic) VALUES (new.id, new.topic);
+    END""",
+]
+
+
+class InvalidSearchCursor(ValueError):
+    """Raised when a search cursor cannot be decoded"""
+
+
+def _encode_cursor(score: float, row_id: int) -> str:
+    payload = json.dumps([score, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor: str):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        score, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return float(score), int(row_id)
+    except Exception as e:
+        raise InvalidSearchCursor(f'Invalid cursor: {cursor}') from e
+
+
+def _highlight(snippet: Optional[str]) -> Optional[str]:
+    """Escape a database snippet, then turn its match delimiters into <mark> tags"""
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(_MATCH_START, SNIPPET_START).replace(_MATCH_STOP, SNIPPET_STOP)
+
+
+def _fts5_query(query: str) -> str:
+    """Quote each term so user input can't inject FTS5 operators"""
+    terms = re.findall(r'\w+', query, flags=re.UNICODE)
+    return ' '.join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+class ConversationSearch:
+    """Ranked full-text search across conversation topics and message content"""
+
+    DEFAULT_PAGE_SIZE = 20
+    MAX_PAGE_SIZE = 50
+    TOPIC_MATCH_LIMIT = 5
+
+    def ensure_search_index(self):
+        """Create search columns/tables, indexes and sync triggers (idempotent)"""
+        dialect = db.engine.dialect.name
+        try:
+            with db.engine.begin() as connection:
+                if dialect == 'postgresql':
+                    for statement in POSTGRES_SETUP:
+                        connection.execute(text(statement))
+                elif dialect == 'sqlite':
+                    existed = connection.execute(text(
+                        "SELECT 1 FROM sqlite_master WHERE name = 'conversation_message_fts'"
+                    )).first() is not None
+                    for statement in SQLITE_SETUP:
+                        connection.execute(text(statement))
+                    if not existed:
+                        # Index rows written before the FTS tables existed
+                        connection.execute(text("INSERT INTO conversation_message_fts(conversation_message_fts) VALUES ('rebuild')"))
+                        connection.execute(text("INSERT INTO conversation_fts(conversation_fts) VALUES ('rebuild')"))
+                else:
+                    logging.warning(f"Full-text search not supported on {dialect}")
+        except Exception as e:
+            logging.error(f"Failed to set up full-text search index: {e}")
+
+    def search(self, query: str, business_id: Optional[int] = None, cursor: Optional[str] = None,
+               limit: Optional[int] = None) -> Dict[str, Any]:
+        """Search messages (ranked, paged) and, on the first page, matching conversation topics"""
+        limit = max(1, min(limit or self.DEFAULT_PAGE_SIZE, self.MAX_PAGE_SIZE))
+        after = _decode_cursor(cursor) if cursor else None
+
+        if not query or not query.strip():
+            return {'results': [], 'conversations': [], 'next_cursor': None, 'has_more': False}
+
+        if db.engine.dialect.name == 'postgresql':
+            rows = self._search_messages_postgres(query, business_id, after, limit + 1)
+            topics = [] if after else self._search_topics_postgres(query, business_id)
+        else:
+            match = _fts5_query(query)
+            if not match:
+                return {'results': [], 'conversations': [], 'next_cursor': None, 'has_more': False}
+            rows = self._search_messages_sqlite(match, business_id, after, limit + 1)
+            topics = [] if after else self._search_topics_sqlite(match, business_id)
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1]['score'], rows[-1]['message_id']) if has_more else None
+
+        return {
+            'results': rows,
+            'conversations': topics,
+            'next_cursor': next_cursor,
+            'has_more': has_more
+        }
+
+    # ------------------------------------------------------------------
+    # PostgreSQL
+    # ------------------------------------------------------------------
+
+    def _search_messages_postgres(self, query, business_id, after, limit) -> List[Dict[str, Any]]:
+        # Rank and page in the inner query; ts_headline only runs for the rows returned
+        sql = """
+            WITH q AS (SELECT websearch_to_tsquery('english', :query) AS tsq),
+            ranked AS (
+                SELECT m.id, m.conversation_id, m.ai_agent_name, m.ai_agent_type, m.content, m.created_at,
+                       ts_rank_cd(m.search_vector, q.tsq) AS score
+                FROM conversation_message m, q
+                WHERE m.search_vector @@ q.tsq
+                {business_filter}
+            )
+            SELECT r.*, c.topic, c.business_id, b.name AS business_name,
+                   ts_headline('english', r.content, q.tsq,
+                               'StartSel={start}, StopSel={stop}, MaxWords=30, MinWords=10') AS snippet
+            FROM ranked r
+            JOIN conversation c ON c.id = r.conversation_id
+            JOIN business b ON b.id = c.business_id, q
+            {cursor_filter}
+            ORDER BY r.score DESC, r.id DESC
+            LIMIT :limit
+        """
+        params = {'query': query, 'limit': limit}
+        business_filter = ''
+        if business_id is not None:
+            business_filter = ("AND m.conversation_id IN "
+                               "(SELECT id FROM conversation WHERE business_id = :business_id)")
+            params['business_id'] = business_id
+        cursor_filter = ''
+        if after:
+            # ts_rank_cd is real (float4); compare in real so rows tied with the cursor row are not skipped
+            cursor_filter = 'WHERE (r.score, r.id) < (CAST(:after_score AS real), :after_id)'
+            params.update(after_score=after[0], after_id=after[1])
+
+        result = db.session.execute(text(sql.format(
+            business_filter=business_filter, cursor_filter=cursor_filter,
+            start=_MATCH_START, stop=_MATCH_STOP
+        )), params)
+        return [self._serialize_message_row(row) for row in result.mappings()]
+
+    def _search_topics_postgres(self, query, business_id) -> List[Dict[str, Any]]:
+        sql = """
+            SELECT c.id, c.topic, c.business_id, c.status, c.created_at, b.name AS business_name,
+                   ts_rank_cd(c.search_vector, websearch_to_tsquery('english', :query)) AS score
+            FROM conversation c JOIN business b ON b.id = c.business_id
+            WHERE c.search_vector @@ websearch_to_tsquery('english', :query)
+            {business_filter}
+            ORDER BY score DESC, c.id DESC
+            LIMIT :limit
+        """
+        params = {'query': query, 'limit': self.TOPIC_MATCH_LIMIT}
+        business_filter = ''
+        if business_id is not None:
+            business_filter = 'AND c.business_id = :business_id'
+            params['business_id'] = business_id
+        result = db.session.execute(text(sql.format(business_filter=business_filter)), params)
+        return [self._serialize_topic_row(row) for row in result.mappings()]
+
+    # ------------------------------------------------------------------
+    # SQLite FTS5
+    # ------------------------------------------------------------------
+
+    def _search_messages_sqlite(self, match, business_id, after, limit) -> List[Dict[str, Any]]:
+        # bm25() is lower-is-better; negate it so both backends page by score DESC
+        sql = """
+            SELECT * FROM (
+                SELECT m.id, m.conversation_id, m.ai_agent_name, m.ai_agent_type, m.content, m.created_at,
+                       c.topic, c.business_id, b.name AS business_name,
+                       -bm25(conversation_message_fts) AS score,
+                       snippet(conversation_message_fts, 0, :start, :stop, '…', 16) AS snippet
+                FROM conversation_message_fts
+                JOIN conversation_message m ON m.id = conversation_message_fts.rowid
+                JOIN conversation c ON c.id = m.conversation_id
+                JOIN business b ON b.id = c.business_id
+                WHERE conversation_message_fts MATCH :match
+                {business_filter}
+            ) r
+            {cursor_filter}
+            ORDER BY r.score DESC, r.id DESC
+            LIMIT :limit
+        """
+        params = {'match': match, 'limit': limit, 'start': _MATCH_START, 'stop': _MATCH_STOP}
+        business_filter = ''
+        if business_id is not None:
+            business_filter = 'AND c.business_id = :business_id'
+            params['business_id'] = business_id
+        cursor_filter = ''
+        if after:
+            cursor_filter = 'WHERE r.score < :after_score OR (r.score = :after_score AND r.id < :after_id)'
+            params.update(after_score=after[0], after_id=after[1])
+
+        result = db.session.execute(text(sql.format(
+            business_filter=business_filter, cursor_filter=cursor_filter
+        )), params)
+        return [self._serialize_message_row(row) for row in result.mappings()]
+
+    def _search_topics_sqlite(self, match, business_id) -> List[Dict[str, Any]]:
+        sql = """
+            SELECT c.id, c.topic, c.business_id, c.status, c.created_at, b.name AS business_name,
+                   -bm25(conversation_fts) AS score
+            FROM conversation_fts
+            JOIN conversation c ON c.id = conversation_fts.rowid
+            JOIN business b ON b.id = c.business_id
+            WHERE conversation_fts MATCH :match
+            {business_filter}
+            ORDER BY score DESC, c.id DESC
+            LIMIT :limit
+        """
+        params = {'match': match, 'limit': self.TOPIC_MATCH_LIMIT}
+        business_filter = ''
+        if business_id is not None:
+            business_filter = 'AND c.business_id = :business_id'
+            params['business_id'] = business_id
+        result = db.session.execute(text(sql.format(business_filter=business_filter)), params)
+        return [self._serialize_topic_row(row) for row in result.mappings()]
+
+    # ------------------------------------------------------------------
+    # Serialization
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _isoformat(value):
+        return value.isoformat() if hasattr(value, 'isoformat') else value
+
+    def _serialize_message_row(self, row) -> Dict[str, Any]:
+        return {
+            'message_id': row['id'],
+            'conversation_id': row['conversation_id'],
+            'business_id': row['business_id'],
+            'business_name': row['business_name'],
+            'topic': row['topic'],
+            'agent_name': row['ai_agent_name'],
+            'agent_type': row['ai_agent_type'],
+            'snippet': _highlight(row['snippet']),
+            'score': float(row['score']),
+            'created_at': self._isoformat(row['created_at'])
+        }
+
+    def _serialize_topic_row(self, row) -> Dict[str, Any]:
+        return {
+            'conversation_id': row['id'],
+            'business_id': row['business_id'],
+            'business_name': row['business_name'],
+            'topic': row['topic'],
+            'status': row['status'],
+            'score': float(row['score']),
+            'created_at': self._isoformat(row['created_at'])
+        }
+
+
+# Global instance
+conversation_search = ConversationSearch()
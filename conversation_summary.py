@@ -0,0 +1,174 @@
+"""
+Conversation Summary Columns
+message_count, last_message_at, first_message_excerpt and agent_type_counts on
+Conversation are recomputed for the affected conversations inside the same
+transaction that inserts their messages, so pages and APIs read one row instead
+of loading every message. Each conversation has a single writer (the live
+orchestrator or one bulk save), so the recount cannot race another insert.
+
+A repair job backfills rows written before the columns existed (and
+completed_at for conversations completed back then) and periodically
+re-derives every summary to correct any drift.
+"""
+
+import json
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, func, select, update
+from sqlalchemy.orm.util import identity_key
+
+from app import db
+from models import Conversation, ConversationMessage
+from unit_of_work import unit_of_work
+
+logger = logging.getLogger(__name__)
+
+EXCERPT_LENGTH = 500
+SUMMARY_ATTRIBUTES = ['message_count', 'last_message_at', 'first_message_excerpt', 'agent_type_counts']
+
+
+class ConversationSummary:
+    """Keeps the denormalized message summary on Conversation in step with its messages"""
+
+    REPAIR_INTERVAL_SECONDS = 6 * 3600
+    REPAIR_BATCH_SIZE = 500
+
+    def __init__(self):
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self.stats = {'refreshed': 0, 'repair_runs': 0, 'repaired': 0}
+
+    def refresh(self, conversation_ids: Iterable[int]) -> int:
+        """Recompute the summary of these conversations in the caller's transaction (no commit)"""
+        ids = sorted({conversation_id for conversation_id in conversation_ids if conversation_id is not None})
+        if not ids:
+            return 0
+
+        summaries = self._compute(ids)
+        for summary in summaries.values():
+            summary['agent_type_counts'] = json.dumps(summary['agent_type_counts'], sort_keys=True)
+        db.session.execute(update(Conversation), list(summaries.values()))
+
+        # Loaded instances would otherwise keep the old values; expire only these attributes so
+        # pending changes on them (e.g. status) survive
+        for conversation_id in ids:
+            instance = db.session.identity_map.get(identity_key(Conversation, conversation_id))
+            if instance is not None:
+                db.session.expire(instance, SUMMARY_ATTRIBUTES)
+
+        self.stats['refreshed'] += len(ids)
+        return len(ids)
+
+    def summary(self, conversation: Conversation) -> Dict[str, Any]:
+        """Summary values of one conversation; computed from its messages if not yet backfilled"""
+        if conversation.message_count is not None:
+            return {'message_count': conversation.message_count,
+                    'last_message_at': conversation.last_message_at,
+                    'first_message_excerpt': conversation.first_message_excerpt,
+                    'agent_type_counts': conversation.agent_counts}
+        summary = self._compute([conversation.id])[conversation.id]
+        del summary['id']
+        return summary
+
+    def _compute(self, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        summaries: Dict[int, Dict[str, Any]] = {conversation_id: {
+            'id': conversation_id, 'message_count': 0, 'last_message_at': None,
+            'first_message_excerpt': None, 'agent_type_counts': {}
+        } for conversation_id in ids}
+
+        # Per (conversation, agent type) counts come off ix_conversation_message_conversation_agent
+        counts = db.session.execute(
+            select(ConversationMessage.conversation_id, ConversationMessage.ai_agent_type,
+                   func.count(), func.max(ConversationMessage.created_at))
+            .where(ConversationMessage.conversation_id.in_(ids))
+            .group_by(ConversationMessage.conversation_id, ConversationMessage.ai_agent_type))
+        for conversation_id, agent_type, count, last_at in counts:
+            summary = summaries[conversation_id]
+            summary['message_count'] += count
+            summary['agent_type_counts'][agent_type] = count
+            if summary['last_message_at'] is None or last_at > summary['last_message_at']:
+                summary['last_message_at'] = last_at
+
+        first_orders = (select(ConversationMessage.conversation_id,
+                               func.min(ConversationMessage.message_order).label('message_order'))
+                        .where(ConversationMessage.conversation_id.in_(ids))
+                        .group_by(ConversationMessage.conversation_id).subquery())
+        first_messages = db.session.execute(
+            select(ConversationMessage.conversation_id, func.substr(ConversationMessage.content, 1, EXCERPT_LENGTH))
+            .join(first_orders, and_(ConversationMessage.conversation_id == first_orders.c.conversation_id,
+                                     ConversationMessage.message_order == first_orders.c.message_order)))
+        for conversation_id, excerpt in first_messages:
+            summaries[conversation_id]['first_message_excerpt'] = excerpt
+        return summaries
+
+    def repair(self, only_missing: bool = False, batch_size: Optional[int] = None) -> int:
+        """Re-derive summaries in id-ordered batches, one commit per batch; returns conversations repaired"""
+        batch_size = batch_size or self.REPAIR_BATCH_SIZE
+        repaired = 0
+        after_id = 0
+        while True:
+            # Archived conversations keep the summary they had when their messages left the table
+            query = select(Conversation.id).where(Conversation.id > after_id, Conversation.archived_at.is_(None))
+            if only_missing:
+                query = query.where(Conversation.message_count.is_(None))
+            ids = db.session.scalars(query.order_by(Conversation.id).limit(batch_size)).all()
+            if not ids:
+                break
+            try:
+                self.refresh(ids)
+                # Conversations completed before completed_at existed: their last message is the best estimate
+                db.session.execute(
+                    update(Conversation)
+                    .where(Conversation.id.in_(ids), Conversation.status == 'completed',
+                           Conversation.completed_at.is_(None))
+                    .values(completed_at=func.coalesce(Conversation.last_message_at, Conversation.created_at))
+                    .execution_options(synchronize_session=False))
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            repaired += len(ids)
+            after_id = ids[-1]
+
+        self.stats['repair_runs'] += 1
+        self.stats['repaired'] += repaired
+        if repaired:
+            logger.info("Repaired summary columns of %s conversations", repaired)
+        return repaired
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name='conversation-summary-repair', daemon=True)
+        self.thread.start()
+        logger.info("Conversation summary repair job started")
+
+    def stop(self, timeout: float = 10):
+        if not self.running:
+            return
+        self.running = False
+        self._stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=timeout)
+        self.thread = None
+
+    def _run(self):
+        # First pass only backfills rows that have never been summarized
+        only_missing = True
+        while self.running:
+            try:
+                with unit_of_work():
+                    self.repair(only_missing=only_missing)
+                only_missing = False
+            except Exception as e:
+                logger.error("Conversation summary repair failed: %s", e)
+            self._stop_event.wait(self.REPAIR_INTERVAL_SECONDS)
+
+
+# Global instance
+conversation_summary = ConversationSummary()
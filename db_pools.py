@@ -0,0 +1,96 @@
+"""
+Connection Pool Sizing and Instrumentation
+Request threads and background jobs draw from separate pools to the primary
+database, so a scheduler holding connections can never starve page requests
+(and vice versa). Every queue pool reports how long callers waited for a
+connection and how long each connection stayed checked out.
+
+Sizes come from DB_POOL_SIZE / DB_MAX_OVERFLOW / DB_POOL_TIMEOUT (request
+pool) and BACKGROUND_POOL_SIZE / BACKGROUND_POOL_OVERFLOW /
+BACKGROUND_POOL_TIMEOUT (background pool).
+"""
+
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy.pool import QueuePool
+
+from metrics import registry
+
+BACKGROUND_BIND = 'background'
+
+POOL_WAIT = registry.histogram('db_pool_wait_seconds', 'Time spent waiting for a pooled connection', ['pool'],
+                               buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+POOL_CHECKOUT = registry.histogram('db_pool_checkout_seconds', 'How long a connection stayed checked out', ['pool'])
+POOL_TIMEOUTS = registry.counter('db_pool_timeouts_total', 'Checkouts that gave up waiting for a connection', ['pool'])
+
+
+# Named pools log under this module; keep them as quiet as SQLAlchemy's own pool loggers (LOG_LEVELS overrides)
+_pool_logger = logging.getLogger(f'{__name__}.InstrumentedQueuePool')
+if _pool_logger.level == logging.NOTSET:
+    _pool_logger.setLevel(logging.WARNING)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times waits for a connection and how long each is held"""
+
+    def _do_get(self):
+        name = self._orig_logging_name or 'primary'
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except Exception:
+            POOL_TIMEOUTS.labels(name).inc()
+            raise
+        checked_out = time.perf_counter()
+        POOL_WAIT.labels(name).observe(checked_out - started)
+        record.info['checked_out_at'] = checked_out
+        return record
+
+    def _do_return_conn(self, record):
+        checked_out = record.info.pop('checked_out_at', None)
+        if checked_out is not None:
+            POOL_CHECKOUT.labels(self._orig_logging_name or 'primary').observe(time.perf_counter() - checked_out)
+        super()._do_return_conn(record)
+
+
+def _uses_queue_pool(url: Optional[str]) -> bool:
+    # In-memory SQLite needs its single-connection pool
+    return bool(url) and not (url.startswith('sqlite') and (':memory:' in url or url.rstrip('/').endswith('sqlite:')))
+
+
+def engine_options(url: Optional[str], name: str, prefix: str = 'DB',
+                   defaults: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    """Engine options for one named pool; sizes from <prefix>_POOL_SIZE and friends"""
+    options: Dict[str, Any] = {'pool_recycle': 300, 'pool_pre_ping': True, 'pool_logging_name': name}
+    if not _uses_queue_pool(url):
+        return options
+    defaults = defaults or {'size': 5, 'overflow': 10, 'timeout': 30}
+    overflow_variable = f'{prefix}_MAX_OVERFLOW' if prefix == 'DB' else f'{prefix}_POOL_OVERFLOW'
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=int(os.environ.get(f'{prefix}_POOL_SIZE', defaults['size'])),
+        max_overflow=int(os.environ.get(overflow_variable, defaults['overflow'])),
+        pool_timeout=float(os.environ.get(f'{prefix}_POOL_TIMEOUT', defaults['timeout']))
+    )
+    return options
+
+
+def background_bind(url: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    """SQLALCHEMY_BINDS entry for the background pool (same database as the primary)"""
+    if not _uses_queue_pool(url):
+        # Without a URL, or with in-memory SQLite, background work shares the primary engine
+        return {}
+    options = engine_options(url, BACKGROUND_BIND, prefix='BACKGROUND',
+                             defaults={'size': 3, 'overflow': 2, 'timeout': 30})
+    return {BACKGROUND_BIND: dict(options, url=url)}
+
+
+def pool_status(engine) -> Dict[str, float]:
+    """Connections in use, idle and in overflow for a queue pool (empty for other pools)"""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {}
+    return {'in_use': pool.checkedout(), 'idle': pool.checkedin(), 'overflow': max(0, pool.overflow())}
@@ -0,0 +1,188 @@
+"""
+Read-Replica Session Routing
+Replica databases are configured as extra Flask-SQLAlchemy binds
+(DATABASE_REPLICA_URLS, comma separated). RoutingSession sends plain SELECTs
+to a replica when the current unit of work is marked read-only: request
+handlers decorated with @replica_reads, or background code inside
+replica_router.reads(). Everything else - flushes, DML, SELECT ... FOR UPDATE,
+raw text() statements - goes to the primary.
+
+Read-your-writes: once a session writes, its remaining statements stay on the
+primary, and the response carries a short-lived cookie that pins the same
+client to the primary for REPLICA_STICKY_SECONDS, so a redirect after a POST
+never reads a replica that has not caught up. Replica lag is probed every
+REPLICA_LAG_CHECK_SECONDS; replicas that are behind by more than
+REPLICA_MAX_LAG_SECONDS, or cannot be reached, are skipped in favour of the
+primary until the next probe.
+
+Without replicas configured every statement goes to the primary, as before.
+
+Background jobs mark their session with BIND_KEY (see unit_of_work.py) so
+their primary statements use the separately sized 'background' pool.
+"""
+
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from flask_sqlalchemy.session import Session as FlaskSession
+from sqlalchemy import event, text
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.dml import UpdateBase
+
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND_PREFIX = 'replica_'
+ROUTE_KEY = 'db_route'
+WROTE_KEY = 'db_wrote'
+BIND_KEY = 'db_bind'
+STICKY_COOKIE = 'db_primary'
+
+POSTGRES_LAG_QUERY = (
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+def replica_binds(urls: Optional[str] = None) -> Dict[str, str]:
+    """SQLALCHEMY_BINDS entries for DATABASE_REPLICA_URLS"""
+    urls = os.environ.get('DATABASE_REPLICA_URLS', '') if urls is None else urls
+    return {f"{REPLICA_BIND_PREFIX}{n}": url.strip()
+            for n, url in enumerate((url for url in urls.split(',') if url.strip()), start=1)}
+
+
+def replica_reads(view):
+    """Mark a view as read-only so its SELECTs may be served by a replica (put below @app.route)"""
+    view.replica_reads = True
+    return view
+
+
+def _is_replica_safe(clause) -> bool:
+    return isinstance(clause, Select) and clause._for_update_arg is None
+
+
+class RoutingSession(FlaskSession):
+    """Flask-SQLAlchemy session that sends read-only SELECTs to a replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if isinstance(clause, UpdateBase):
+            self.info[WROTE_KEY] = True
+        elif (bind is None and self.info.get(ROUTE_KEY) == 'replica' and not self.info.get(WROTE_KEY)
+              and not self._flushing and _is_replica_safe(clause)):
+            engine = replica_router.choose()
+            if engine is not None:
+                return engine
+        bind_key = self.info.get(BIND_KEY)
+        if bind is None and bind_key and bind_key in self._db.engines:
+            return self._db.engines[bind_key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_written(session, flush_context):
+    session.info[WROTE_KEY] = True
+
+
+class ReplicaRouter:
+    """Picks a healthy, caught-up replica engine and tracks where statements went"""
+
+    def __init__(self):
+        self.db = None
+        self.names: List[str] = []
+        self.max_lag_seconds = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', '5'))
+        self.lag_check_seconds = float(os.environ.get('REPLICA_LAG_CHECK_SECONDS', '2'))
+        self.sticky_seconds = int(os.environ.get('REPLICA_STICKY_SECONDS', '10'))
+        self._lag: Dict[str, Optional[float]] = {}
+        self._checked_at: Dict[str, float] = {}
+        self._cycle = itertools.count()
+        self._lock = threading.Lock()
+        self.stats = {'replica': 0, 'primary_fallback': 0, 'sticky': 0}
+
+    def init_app(self, app, db):
+        self.db = db
+        self.names = sorted(name for name in app.config.get('SQLALCHEMY_BINDS') or {}
+                            if name.startswith(REPLICA_BIND_PREFIX))
+
+        @app.before_request
+        def _route_request():
+            from flask import request
+            view = app.view_functions.get(request.endpoint)
+            if not self.names or not getattr(view, 'replica_reads', False):
+                return
+            if request.method not in ('GET', 'HEAD'):
+                return
+            if request.cookies.get(STICKY_COOKIE):
+                # This client wrote recently; its reads must see that write
+                self.stats['sticky'] += 1
+                return
+            db.session.info[ROUTE_KEY] = 'replica'
+
+        @app.after_request
+        def _pin_writer(response):
+            if self.names and db.session.info.get(WROTE_KEY):
+                response.set_cookie(STICKY_COOKIE, '1', max_age=self.sticky_seconds, httponly=True, samesite='Lax')
+            return response
+
+        if self.names:
+            logger.info("Routing read-only traffic across %s replica(s)", len(self.names))
+
+    @contextmanager
+    def reads(self) -> Iterator[None]:
+        """Route this app context's SELECTs to replicas (background analytics, reports)"""
+        info = self.db.session.info
+        previous = info.get(ROUTE_KEY)
+        info[ROUTE_KEY] = 'replica'
+        try:
+            yield
+        finally:
+            info[ROUTE_KEY] = previous
+
+    def choose(self):
+        """A replica engine within the lag budget, or None to use the primary"""
+        if not self.names:
+            return None
+        start = next(self._cycle)
+        for offset in range(len(self.names)):
+            name = self.names[(start + offset) % len(self.names)]
+            lag = self.lag(name)
+            if lag is not None and lag <= self.max_lag_seconds:
+                self.stats['replica'] += 1
+                return self.db.engines[name]
+        self.stats['primary_fallback'] += 1
+        return None
+
+    def lag(self, name: str) -> Optional[float]:
+        """Replication lag in seconds from the last probe; None when the replica is unreachable"""
+        now = time.monotonic()
+        if now - self._checked_at.get(name, float('-inf')) < self.lag_check_seconds:
+            return self._lag.get(name)
+        with self._lock:
+            # Another thread may have probed while we waited
+            if now - self._checked_at.get(name, float('-inf')) >= self.lag_check_seconds:
+                self._lag[name] = self._probe(name)
+                self._checked_at[name] = time.monotonic()
+        return self._lag.get(name)
+
+    def _probe(self, name: str) -> Optional[float]:
+        engine = self.db.engines[name]
+        try:
+            with engine.connect() as connection:
+                if engine.dialect.name == 'postgresql':
+                    return float(connection.execute(text(POSTGRES_LAG_QUERY)).scalar() or 0)
+                # Stand-in replicas (e.g. a second SQLite file) have no replication to lag behind
+                connection.execute(text("SELECT 1"))
+                return 0.0
+        except Exception as e:
+            logger.warning("Replica %s unavailable, reading from the primary: %s", name, e)
+            return None
+
+    def lags(self) -> Dict[str, Optional[float]]:
+        return {name: self._lag.get(name) for name in self.names}
+
+
+# Global instance
+replica_router = ReplicaRouter()
@@ -0,0 +1,378 @@
+"""
+Social Engagement Analytics
+Engagement arrives as events (from platform webhooks) and is appended to an
+event log. Hourly and daily rollups are upserted in the same transaction, so
+range queries read at most a few rows per bucket instead of scanning events.
+"""
+
+import hashlib
+import hmac
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import bindparam, func, insert, select, update
+
+from app import db
+from models import (EngagementEvent, EngagementRollupDaily, EngagementRollupHourly,
+                    SocialMediaPost, SocialPostOutbox)
+
+EVENT_TYPES = ('impression', 'click', 'like', 'comment', 'share')
+# Everything but impressions counts as an engagement; impressions are the rate denominator
+INTERACTION_TYPES = ('click', 'like', 'comment', 'share')
+
+
+class InvalidEngagementEvent(ValueError):
+    """Raised when an ingested event is missing fields or has unknown values"""
+
+
+def _to_utc(value) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if not isinstance(value, datetime):
+        raise TypeError(f"Expected a datetime or ISO 8601 string, got {type(value).__name__}")
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _hour(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def _day(value: datetime) -> datetime:
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def verify_webhook_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """HMAC-SHA256 hex digest check for webhook deliveries"""
+    if not signature:
+        return False
+    expected = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature.split('=', 1)[-1])
+
+
+class EngagementAnalytics:
+    """Event ingestion with incremental rollups, and rollup-backed range queries"""
+
+    MAX_RANGE_DAYS = 366
+
+    # ------------------------------------------------------------------
+    # Ingestion
+    # ------------------------------------------------------------------
+
+    def ingest(self, events: Iterable[Dict[str, Any]], platform: Optional[str] = None, commit: bool = True) -> int:
+        """Append events and fold them into the rollups in one transaction; returns events stored"""
+        rows = [self._normalize(event, platform) for event in events]
+        if not rows:
+            return 0
+
+        try:
+            self._resolve_external_posts(rows)
+            self._check_post_owners(rows)
+            rows = self._drop_duplicates(rows)
+            if not rows:
+                return 0
+
+            db.session.execute(insert(EngagementEvent.__table__), rows)
+
+            hourly = defaultdict(int)
+            daily = defaultdict(int)
+            per_post = defaultdict(int)
+            for row in rows:
+                key = (row['business_id'], row['platform'], row['event_type'])
+                hourly[key + (_hour(row['occurred_at']),)] += row['count']
+                daily[key + (_day(row['occurred_at']),)] += row['count']
+                if row['social_post_id'] and row['event_type'] in INTERACTION_TYPES:
+                    per_post[row['social_post_id']] += row['count']
+
+            self._upsert_rollup(EngagementRollupHourly, hourly)
+            self._upsert_rollup(EngagementRollupDaily, daily)
+
+            if per_post:
+                table = SocialMediaPost.__table__
+                db.session.execute(
+                    update(table)
+                    .where(table.c.id == bindparam('post_id'))
+                    .values(engagement_count=func.coalesce(table.c.engagement_count, 0) + bindparam('increment')),
+                    [{'post_id': post_id, 'increment': n} for post_id, n in per_post.items()]
+                )
+
+            if commit:
+                db.session.commit()
+            return len(rows)
+
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def _normalize(self, event: Dict[str, Any], platform: Optional[str]) -> Dict[str, Any]:
+        if not isinstance(event, dict):
+            raise InvalidEngagementEvent('events must be objects')
+        event_type = event.get('event_type')
+        if event_type not in EVENT_TYPES:
+            raise InvalidEngagementEvent(f"Unknown event_type: {event_type}")
+        platform = event.get('platform') or platform
+        if not platform:
+            raise InvalidEngagementEvent('platform is required')
+        if not event.get('business_id') and not event.get('external_post_id'):
+            raise InvalidEngagementEvent('business_id or external_post_id is required')
+        business_id = self._optional_id(event, 'business_id')
+        post_id = self._optional_id(event, 'post_id')
+        count = self._optional_id(event, 'count')
+        if count is None:
+            count = 1
+        if count < 1:
+            raise InvalidEngagementEvent('count must be positive')
+        try:
+            occurred_at = _to_utc(event.get('occurred_at') or datetime.now(timezone.utc))
+        except (TypeError, ValueError):
+            raise InvalidEngagementEvent(f"Invalid occurred_at: {event.get('occurred_at')!r}")
+
+        return {
+            'business_id': business_id,
+            'social_post_id': post_id,
+            'platform': platform,
+            'event_type': event_type,
+            'count': count,
+            'external_event_id': event.get('event_id'),
+            'occurred_at': occurred_at,
+            'received_at': datetime.now(timezone.utc),
+            '_external_post_id': event.get('external_post_id')
+        }
+
+    @staticmethod
+    def _optional_id(event: Dict[str, Any], field: str) -> Optional[int]:
+        value = event.get(field)
+        if value is None:
+            return None
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        if isinstance(value, str) and value.strip().lstrip('-').isdigit():
+            return int(value)
+        raise InvalidEngagementEvent(f"{field} must be an integer")
+
+    def _resolve_external_posts(self, rows: List[Dict[str, Any]]):
+        """Map platform post IDs (as returned when the outbox published them) to businesses"""
+        external_ids = {row['_external_post_id'] for row in rows if row['_external_post_id'] and not row['business_id']}
+        owners = {}
+        if external_ids:
+            owners = dict(db.session.execute(
+                select(SocialPostOutbox.external_id, SocialPostOutbox.business_id)
+                .where(SocialPostOutbox.external_id.in_(external_ids))
+            ).all())
+        for row in rows:
+            external_id = row.pop('_external_post_id')
+            if not row['business_id']:
+                row['business_id'] = owners.get(external_id)
+                if row['business_id'] is None:
+                    raise InvalidEngagementEvent(f"Unknown external_post_id: {external_id}")
+
+    def _check_post_owners(self, rows: List[Dict[str, Any]]):
+        """Reject events that attribute a post to a business that does not own it"""
+        post_ids = {row['social_post_id'] for row in rows if row['social_post_id']}
+        if not post_ids:
+            return
+        owners = dict(db.session.execute(
+            select(SocialMediaPost.id, SocialMediaPost.business_id).where(SocialMediaPost.id.in_(post_ids))
+        ).all())
+        for row in rows:
+            post_id = row['social_post_id']
+            if post_id and owners.get(post_id) != row['business_id']:
+                raise InvalidEngagementEvent(f"post_id {post_id} does not belong to business {row['business_id']}")
+
+    def _drop_duplicates(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Skip webhook redeliveries (same event_id) so rollups never double count"""
+        event_ids = [row['external_event_id'] for row in rows if row['external_event_id']]
+        if not event_ids:
+            return rows
+        seen = set(db.session.scalars(
+            select(EngagementEvent.external_event_id).where(EngagementEvent.external_event_id.in_(event_ids))
+        ))
+        unique = []
+        for row in rows:
+            event_id = row['external_event_id']
+            if event_id:
+                if event_id in seen:
+                    continue
+                seen.add(event_id)
+            unique.append(row)
+        return unique
+
+    def _upsert_rollup(self, model, totals: Dict[tuple, int]):
+        if not totals:
+            return
+        dialect = db.engine.dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+        table = model.__table__
+        statement = dialect_insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=['business_id', 'bucket_start', 'platform', 'event_type'],
+            set_={'count': table.c.count + statement.excluded.count}
+        )
+        db.session.execute(statement, [{
+            'business_id': business_id,
+            'platform': platform,
+            'event_type': event_type,
+            'bucket_start': bucket_start,
+            'count': count
+        } for (business_id, platform, event_type, bucket_start), count in totals.items()])
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def query_range(self, business_id: int, start: datetime, end: datetime, granularity: str = 'day',
+                    platform: Optional[str] = None) -> Dict[str, Any]:
+        """Totals and a time series for [start, end), rounded out to whole hours"""
+        start, end = _hour(_to_utc(start)), _to_utc(end)
+        if end > _hour(end):
+            end = _hour(end) + timedelta(hours=1)
+        if end <= start:
+            raise ValueError('end must be after start')
+        if end - start > timedelta(days=self.MAX_RANGE_DAYS):
+            raise ValueError(f'Range is limited to {self.MAX_RANGE_DAYS} days')
+        if granularity not in ('hour', 'day'):
+            raise ValueError('granularity must be hour or day')
+
+        if granularity == 'hour':
+            rows = self._rollup_rows(EngagementRollupHourly, business_id, start, end, platform)
+        else:
+            # Whole days from the daily table, the partial days at either edge from the hourly one
+            first_full_day = _day(start) if start == _day(start) else _day(start) + timedelta(days=1)
+            last_full_day = _day(end)
+            if first_full_day < last_full_day:
+                rows = (self._rollup_rows(EngagementRollupHourly, business_id, start, first_full_day, platform)
+                        + self._rollup_rows(EngagementRollupDaily, business_id, first_full_day, last_full_day, platform)
+                        + self._rollup_rows(EngagementRollupHourly, business_id, last_full_day, end, platform))
+            else:
+                rows = self._rollup_rows(EngagementRollupHourly, business_id, start, end, platform)
+
+        by_platform: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        by_type: Dict[str, int] = defaultdict(int)
+        series: Dict[datetime, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        for bucket_start, row_platform, event_type, count in rows:
+            bucket = _to_utc(bucket_start)
+            if granularity == 'day':
+                bucket = _day(bucket)
+            by_platform[row_platform][event_type] += count
+            by_type[event_type] += count
+            series[bucket][event_type] += count
+
+        impressions = by_type.get('impression', 0)
+        engagements = sum(by_type.get(t, 0) for t in INTERACTION_TYPES)
+        return {
+            'business_id': business_id,
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'granularity': granularity,
+            'totals': {
+                'engagements': engagements,
+                'impressions': impressions,
+                'engagement_rate': round(engagements / impressions * 100, 2) if impressions else 0.0,
+                'by_event_type': dict(by_type)
+            },
+            'platforms': {p: dict(counts) for p, counts in by_platform.items()},
+            'series': [{'bucket_start': bucket.isoformat(), 'counts': dict(series[bucket])}
+                       for bucket in sorted(series)]
+        }
+
+    def _rollup_rows(self, model, business_id, start, end, platform):
+        if start >= end:
+            return []
+        query = (select(model.bucket_start, model.platform, model.event_type, model.count)
+                 .where(model.business_id == business_id,
+                        model.bucket_start >= start,
+                        model.bucket_start < end))
+        if platform:
+            query = query.where(model.platform == platform)
+        return db.session.execute(query).all()
+
+    def get_summary(self, business_id: int, days: int = 30) -> Dict[str, Any]:
+        """Dashboard analytics: post counts plus engagement from the rollups"""
+        now = datetime.now(timezone.utc)
+        report = self.query_range(business_id, now - timedelta(days=days), now, granularity='day')
+
+        today = _day(now)
+        post_counts = db.session.execute(
+            select(SocialMediaPost.platform,
+                   func.count(),
+                   func.count().filter(SocialMediaPost.created_at >= today),
+                   func.count().filter(SocialMediaPost.created_at >= today - timedelta(days=6)))
+            .where(SocialMediaPost.business_id == business_id, SocialMediaPost.status == 'posted')
+            .group_by(SocialMediaPost.platform)
+        ).all()
+
+        platform_breakdown = {}
+        for platform, posts, _, _ in post_counts:
+            counts = report['platforms'].get(platform, {})
+            engagements = sum(counts.get(t, 0) for t in INTERACTION_TYPES)
+            impressions = counts.get('impression', 0)
+            platform_breakdown[platform] = {
+                'posts': posts,
+                'engagements': engagements,
+                'rate': round(engagements / impressions * 100, 1) if impressions else 0.0
+            }
+
+        recent_posts = (SocialMediaPost.query
+                        .filter_by(business_id=business_id, status='posted')
+                        .order_by(SocialMediaPost.created_at.desc())
+                        .limit(5).all())
+
+        top_platform = max(platform_breakdown, key=lambda p: platform_breakdown[p]['engagements'], default=None)
+        return {
+            'total_posts': sum(row[1] for row in post_counts),
+            'posts_today': sum(row[2] for row in post_counts),
+            'posts_week': sum(row[3] for row in post_counts),
+            'active_platforms': len(post_counts),
+            'total_engagements': report['totals']['engagements'],
+            'avg_engagement_rate': report['totals']['engagement_rate'],
+            'top_performing_platform': top_platform,
+            'platform_breakdown': platform_breakdown,
+            'recent_posts': [{
+                'platform': post.platform,
+                'content': post.content,
+                'posted_at': (post.posted_time or post.created_at).isoformat() if (post.posted_time or post.created_at) else None,
+                'engagements': post.engagement_count or 0
+            } for post in recent_posts]
+        }
+
+
+class StubEngagementWebhook:
+    """Local stand-in for platform webhooks: produces delivery payloads for published posts"""
+
+    # Relative frequency of each event type per impression
+    EVENT_WEIGHTS = {'impression': 100, 'click': 6, 'like': 8, 'comment': 1, 'share': 1}
+
+    def __init__(self, seed: Optional[int] = None):
+        self._rng = random.Random(seed)
+        self._sequence = 0
+
+    def deliveries(self, posts: List[Dict[str, Any]], events_per_post: int, span_hours: int = 72) -> List[Dict[str, Any]]:
+        """Events for {'business_id', 'platform', 'post_id', 'posted_at'} dicts"""
+        types = list(self.EVENT_WEIGHTS)
+        weights = list(self.EVENT_WEIGHTS.values())
+        events = []
+        for post in posts:
+            posted_at = _to_utc(post.get('posted_at') or datetime.now(timezone.utc))
+            for event_type in self._rng.choices(types, weights, k=events_per_post):
+                self._sequence += 1
+                events.append({
+                    'event_id': f"stub-{post['platform']}-{self._sequence}",
+                    'business_id': post['business_id'],
+                    'post_id': post.get('post_id'),
+                    'platform': post['platform'],
+                    'event_type': event_type,
+                    'count': 1,
+                    'occurred_at': posted_at + timedelta(seconds=self._rng.uniform(0, span_hours * 3600))
+                })
+        return events
+
+
+# Global instance
+engagement_analytics = EngagementAnalytics()
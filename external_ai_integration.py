@@ -4,11 +4,14 @@ Allows external AI services to read, write, and modify project files directly
 """
 
 import os
+import re
 import json
 import requests
 from typing import Dict, List, Any
 from pathlib import Path
 
+from code_search_index import CodeSearchIndex, UnindexedExtension
+
 class ExternalAICodeEditor:
     """Interface for external AI to directly edit project code"""
     
@@ -16,6 +19,9 @@ class ExternalAICodeEditor:
         self.project_root = Path('.')
         self.editable_extensions = {'.py', '.js', '.html', '.css', '.json', '.md', '.txt'}
         self.protected_files = {'requirements.txt', 'pyproject.toml', '.env'}
+        self.search_index = CodeSearchIndex(self.project_root,
+                                            self.editable_extensions | {'.py', '.js', '.html', '.css'},
+                                            self._is_protected_path)
         
     def get_project_structure(self) -> Dict[str, Any]:
         """Get complete project structure for AI context"""
@@ -73,6 +79,7 @@ class ExternalAICodeEditor:
             full_path.parent.mkdir(parents=True, exist_ok=True)
             with open(full_path, 'w', encoding='utf-8') as f:
                 f.write(content)
+            self.search_index.invalidate(file_path)
             
             return {
                 'success': True,
@@ -97,6 +104,7 @@ class ExternalAICodeEditor:
             full_path.parent.mkdir(parents=True, exist_ok=True)
             with open(full_path, 'w', encoding='utf-8') as f:
                 f.write(content)
+            self.search_index.invalidate(file_path)
             
             return {
                 'success': True,
@@ -118,6 +126,7 @@ class ExternalAICodeEditor:
                 return {'error': 'File does not exist'}
             
             full_path.unlink()
+            self.search_index.invalidate(file_path)
             
             return {
                 'success': True,
@@ -127,32 +136,19 @@ class ExternalAICodeEditor:
         except Exception as e:
             return {'error': f'Failed to delete file: {str(e)}'}
     
-    def search_in_files(self, search_term: str, file_extensions: List[str] = None) -> Dict[str, Any]:
-        """Search for text across project files"""
+    def search_in_files(self, search_term: str, file_extensions: List[str] = None,
+                        regex: bool = False, max_results: int = None) -> Dict[str, Any]:
+        """Search for text (or a regex) across project files using the trigram index"""
         if file_extensions is None:
             file_extensions = ['.py', '.js', '.html', '.css']
         
-        results = []
-        
-        for file_path in self.project_root.rglob('*'):
-            if (file_path.is_file() and 
-                file_path.suffix in file_extensions and 
-                not self._is_protected_path(file_path)):
-                
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        lines = f.readlines()
-                    
-                    for line_num, line in enumerate(lines, 1):
-                        if search_term.lower() in line.lower():
-                            results.append({
-                                'file': str(file_path.relative_to(self.project_root)),
-                                'line': line_num,
-                                'content': line.strip()
-                            })
-                            
-                except Exception:
-                    continue  # Skip files that can't be read
+        try:
+            results = self.search_index.search(search_term, file_extensions, regex=regex,
+                                               max_results=max_results)
+        except re.error as e:
+            return {'error': f'Invalid regular expression: {str(e)}'}
+        except UnindexedExtension as e:
+            return {'error': str(e)}
         
         return {
             'success': True,
@@ -286,7 +282,24 @@ def setup_ai_api_routes(app):
             return jsonify({'error': 'search_term required'}), 400
         
         extensions = data.get('extensions', ['.py', '.js', '.html', '.css'])
-        result = external_ai_editor.search_in_files(data['search_term'], extensions)
+        if isinstance(extensions, str):
+            extensions = [extensions]
+        if not isinstance(extensions, list) or not all(isinstance(e, str) and e.startswith('.') and len(e) > 1
+                                                       for e in extensions):
+            return jsonify({'error': 'extensions must be a list like [".py", ".js"]'}), 400
+        
+        try:
+            max_results = int(data.get('max_results') or 0)
+        except (TypeError, ValueError):
+            max_results = -1
+        if max_results < 0:
+            return jsonify({'error': 'max_results must be a non-negative integer'}), 400
+        
+        result = external_ai_editor.search_in_files(data['search_term'], extensions,
+                                                    regex=bool(data.get('regex', False)),
+                                                    max_results=int(max_results) or None)
+        if 'error' in result:
+            return jsonify(result), 400
         return jsonify(result)
     
     return app
\ No newline at end of file
@@ -1,85 +1,371 @@
 """
 Automatic Geographic and Language Detection System
-Detects user location via IP and automatically adapts language, currency, and business context
+Detects user location via IP and automatically adapts language, currency, and business context.
+Country configs, price formats and prompt instructions are compiled once into an
+immutable registry; business locations resolve to timezones through a gazetteer index.
 """
 
+import re
 import requests
 import logging
-from typing import Dict, Optional, Tuple
+import unicodedata
+from types import MappingProxyType
+from typing import Dict, Iterable, Mapping, Optional, Tuple
 from flask import request
 import json
 
+COUNTRY_CONFIGS = {
+    'NL': {
+        'language': 'Dutch',
+        'language_code': 'nl',
+        'currency': 'EUR',
+        'timezone': 'Europe/Amsterdam',
+        'business_culture': 'direct_efficient',
+        'popular_platforms': ['LinkedIn', 'Facebook', 'Instagram'],
+        'business_hours': '9:00-17:00',
+        'vat_required': True,
+        'payment_methods': ['PayPal', 'iDEAL', 'Stripe'],
+        'date_format': 'DD-MM-YYYY',
+        'business_registration': 'KvK number'
+    },
+    'DE': {
+        'language': 'German',
+        'language_code': 'de',
+        'currency': 'EUR',
+        'timezone': 'Europe/Berlin',
+        'business_culture': 'formal_detailed',
+        'popular_platforms': ['LinkedIn', 'XING', 'Facebook'],
+        'business_hours': '8:00-17:00',
+        'vat_required': True,
+        'payment_methods': ['PayPal', 'SEPA', 'Stripe'],
+        'date_format': 'DD.MM.YYYY',
+        'business_registration': 'Handelsregisternummer'
+    },
+    'FR': {
+        'language': 'French',
+        'language_code': 'fr',
+        'currency': 'EUR',
+        'timezone': 'Europe/Paris',
+        'business_culture': 'formal_relationship',
+        'popular_platforms': ['LinkedIn', 'Facebook', 'Instagram'],
+        'business_hours': '9:00-18:00',
+        'vat_required': True,
+        'payment_methods': ['PayPal', 'CB', 'Stripe'],
+        'date_format': 'DD/MM/YYYY',
+        'business_registration': 'SIRET number'
+    },
+    'GB': {
+        'language': 'English',
+        'language_code': 'en-GB',
+        'currency': 'GBP',
+        'timezone': 'Europe/London',
+        'business_culture': 'polite_professional',
+        'popular_platforms': ['LinkedIn', 'Facebook', 'Twitter'],
+        'business_hours': '9:00-17:00',
+        'vat_required': True,
+        'payment_methods': ['PayPal', 'Stripe', 'Bank Transfer'],
+        'date_format': 'DD/MM/YYYY',
+        'business_registration': 'Companies House number'
+    },
+    'US': {
+        'language': 'English',
+        'language_code': 'en-US',
+        'currency': 'USD',
+        'timezone': 'America/New_York',  # Default to Eastern
+        'business_culture': 'friendly_efficient',
+        'popular_platforms': ['LinkedIn', 'Facebook', 'Instagram', 'Twitter'],
+        'business_hours': '9:00-17:00',
+        'vat_required': False,
+        'payment_methods': ['PayPal', 'Stripe', 'Venmo'],
+        'date_format': 'MM/DD/YYYY',
+        'business_registration': 'EIN number'
+    }
+}
+
+CULTURAL_ADAPTATIONS = {
+    'Dutch': {
+        'style': 'Be direct, practical, and focus on efficiency. Use "je/jij" for informal tone.',
+        'business_focus': 'Emphasize sustainability, energy efficiency, and practical solutions.',
+        'local_refs': 'Reference Dutch building codes, seasonal weather patterns, and local suppliers.'
+    },
+    'German': {
+        'style': 'Be thorough, detailed, and technically precise. Use formal "Sie" address.',
+        'business_focus': 'Emphasize quality, engineering excellence, and regulatory compliance.',
+        'local_refs': 'Reference German standards (DIN), Handwerk traditions, and regional practices.'
+    },
+    'French': {
+        'style': 'Be polite, relationship-focused, and culturally sensitive.',
+        'business_focus': 'Emphasize craftsmanship, aesthetics, and customer relationships.',
+        'local_refs': 'Reference French regulations, regional variations, and local artisan traditions.'
+    },
+    'English': {
+        'style': 'Be friendly, professional, and solution-oriented.',
+        'business_focus': 'Emphasize value, customer service, and practical benefits.',
+        'local_refs': 'Use local examples and industry standards relevant to the region.'
+    }
+}
+
+# Simple currency conversion (in production, use real exchange rates)
+CURRENCY_RATES = {
+    'EUR': 0.85,  # USD to EUR
+    'GBP': 0.75,  # USD to GBP
+    'USD': 1.0
+}
+CURRENCY_SYMBOLS = {'EUR': '€', 'GBP': '£'}
+
+PROMPT_CLOSING = ("\n\nGenerate authentic, culturally appropriate content that resonates with local "
+                  "business practices and customer expectations.\n")
+
+DEFAULT_COUNTRY = 'US'
+DEFAULT_TIMEZONE = 'UTC'
+
+# Place names -> IANA timezone. Regions (states/provinces) win over cities, cities
+# over countries, so "Sydney, Nova Scotia" resolves by its province; within a rank
+# the rightmost name wins, so "Victoria, BC" resolves by the trailing province.
+GAZETTEER = {
+    'region': {
+        'alabama': 'America/Chicago', 'alaska': 'America/Anchorage', 'arizona': 'America/Phoenix',
+        'arkansas': 'America/Chicago', 'california': 'America/Los_Angeles', 'colorado': 'America/Denver',
+        'connecticut': 'America/New_York', 'delaware': 'America/New_York', 'florida': 'America/New_York',
+        'georgia': 'America/New_York', 'hawaii': 'Pacific/Honolulu', 'idaho': 'America/Boise',
+        'illinois': 'America/Chicago', 'indiana': 'America/Indiana/Indianapolis', 'iowa': 'America/Chicago',
+        'kansas': 'America/Chicago', 'kentucky': 'America/New_York', 'louisiana': 'America/Chicago',
+        'maine': 'America/New_York', 'maryland': 'America/New_York', 'massachusetts': 'America/New_York',
+        'michigan': 'America/Detroit', 'minnesota': 'America/Chicago', 'mississippi': 'America/Chicago',
+        'missouri': 'America/Chicago', 'montana': 'America/Denver', 'nebraska': 'America/Chicago',
+        'nevada': 'America/Los_Angeles', 'new hampshire': 'America/New_York', 'new jersey': 'America/New_York',
+        'new mexico': 'America/Denver', 'new york': 'America/New_York', 'north carolina': 'America/New_York',
+        'north dakota': 'America/Chicago', 'ohio': 'America/New_York', 'oklahoma': 'America/Chicago',
+        'oregon': 'America/Los_Angeles', 'pennsylvania': 'America/New_York', 'rhode island': 'America/New_York',
+        'south carolina': 'America/New_York', 'south dakota': 'America/Chicago', 'tennessee': 'America/Chicago',
+        'texas': 'America/Chicago', 'utah': 'America/Denver', 'vermont': 'America/New_York',
+        'virginia': 'America/New_York', 'washington': 'America/Los_Angeles', 'west virginia': 'America/New_York',
+        'wisconsin': 'America/Chicago', 'wyoming': 'America/Denver', 'district of columbia': 'America/New_York',
+        'alberta': 'America/Edmonton', 'british columbia': 'America/Vancouver', 'manitoba': 'America/Winnipeg',
+        'new brunswick': 'America/Moncton', 'nova scotia': 'America/Halifax', 'ontario': 'America/Toronto',
+        'quebec': 'America/Toronto', 'saskatchewan': 'America/Regina',
+        'new south wales': 'Australia/Sydney', 'victoria': 'Australia/Melbourne', 'queensland': 'Australia/Brisbane',
+        'western australia': 'Australia/Perth', 'south australia': 'Australia/Adelaide',
+        'england': 'Europe/London', 'scotland': 'Europe/London', 'wales': 'Europe/London',
+        'bavaria': 'Europe/Berlin', 'noord holland': 'Europe/Amsterdam', 'zuid holland': 'Europe/Amsterdam'
+    },
+    'city': {
+        'new york city': 'America/New_York', 'nyc': 'America/New_York', 'los angeles': 'America/Los_Angeles',
+        'san francisco': 'America/Los_Angeles', 'seattle': 'America/Los_Angeles', 'chicago': 'America/Chicago',
+        'houston': 'America/Chicago', 'dallas': 'America/Chicago', 'austin': 'America/Chicago',
+        'denver': 'America/Denver', 'phoenix': 'America/Phoenix', 'miami': 'America/New_York',
+        'boston': 'America/New_York', 'atlanta': 'America/New_York', 'philadelphia': 'America/New_York',
+        'newark': 'America/New_York', 'jersey city': 'America/New_York', 'las vegas': 'America/Los_Angeles',
+        'toronto': 'America/Toronto', 'montreal': 'America/Toronto', 'vancouver': 'America/Vancouver',
+        'london': 'Europe/London', 'manchester': 'Europe/London', 'edinburgh': 'Europe/London',
+        'paris': 'Europe/Paris', 'lyon': 'Europe/Paris', 'marseille': 'Europe/Paris',
+        'berlin': 'Europe/Berlin', 'munich': 'Europe/Berlin', 'munchen': 'Europe/Berlin', 'hamburg': 'Europe/Berlin',
+        'frankfurt': 'Europe/Berlin', 'cologne': 'Europe/Berlin', 'koln': 'Europe/Berlin', 'stuttgart': 'Europe/Berlin',
+        'amsterdam': 'Europe/Amsterdam', 'rotterdam': 'Europe/Amsterdam', 'den haag': 'Europe/Amsterdam',
+        'the hague': 'Europe/Amsterdam', 'utrecht': 'Europe/Amsterdam', 'sydney': 'Australia/Sydney',
+        'melbourne': 'Australia/Melbourne', 'brisbane': 'Australia/Brisbane', 'perth': 'Australia/Perth',
+        'tokyo': 'Asia/Tokyo', 'osaka': 'Asia/Tokyo'
+    },
+    'country': {
+        'united states': 'America/New_York', 'usa': 'America/New_York',
+        'canada': 'America/Toronto', 'united kingdom': 'Europe/London',
+        'great britain': 'Europe/London', 'ireland': 'Europe/Dublin', 'france': 'Europe/Paris',
+        'germany': 'Europe/Berlin', 'deutschland': 'Europe/Berlin', 'netherlands': 'Europe/Amsterdam',
+        'nederland': 'Europe/Amsterdam', 'holland': 'Europe/Amsterdam', 'belgium': 'Europe/Brussels',
+        'spain': 'Europe/Madrid', 'italy': 'Europe/Rome', 'australia': 'Australia/Sydney', 'japan': 'Asia/Tokyo'
+    }
+}
+
+# Postal and country abbreviations only count when written in capitals ("Newark, NJ"), so words
+# like "in", "or" and "me" in free text never match
+REGION_ABBREVIATIONS = {
+    'AL': 'alabama', 'AK': 'alaska', 'AZ': 'arizona', 'AR': 'arkansas', 'CO': 'colorado',
+    'CT': 'connecticut', 'FL': 'florida', 'GA': 'georgia', 'HI': 'hawaii', 'ID': 'idaho',
+    'IL': 'illinois', 'IN': 'indiana', 'IA': 'iowa', 'KS': 'kansas', 'KY': 'kentucky', 'LA': 'louisiana',
+    'ME': 'maine', 'MD': 'maryland', 'MA': 'massachusetts', 'MI': 'michigan', 'MN': 'minnesota',
+    'MS': 'mississippi', 'MO': 'missouri', 'MT': 'montana', 'NE': 'nebraska', 'NV': 'nevada',
+    'NH': 'new hampshire', 'NJ': 'new jersey', 'NM': 'new mexico', 'NY': 'new york', 'NC': 'north carolina',
+    'ND': 'north dakota', 'OH': 'ohio', 'OK': 'oklahoma', 'OR': 'oregon', 'PA': 'pennsylvania',
+    'RI': 'rhode island', 'SC': 'south carolina', 'SD': 'south dakota', 'TN': 'tennessee', 'TX': 'texas',
+    'UT': 'utah', 'VT': 'vermont', 'VA': 'virginia', 'WV': 'west virginia',
+    'WI': 'wisconsin', 'WY': 'wyoming', 'DC': 'district of columbia',
+    'AB': 'alberta', 'BC': 'british columbia', 'MB': 'manitoba', 'NB': 'new brunswick', 'NS': 'nova scotia',
+    'ON': 'ontario', 'QC': 'quebec', 'SK': 'saskatchewan', 'NSW': 'new south wales', 'VIC': 'victoria',
+    'QLD': 'queensland',
+    'US': 'united states', 'USA': 'united states', 'UK': 'united kingdom', 'GB': 'united kingdom',
+    'IE': 'ireland', 'FR': 'france', 'NL': 'netherlands', 'BE': 'belgium', 'ES': 'spain', 'IT': 'italy',
+    'AU': 'australia', 'JP': 'japan'
+}
+
+# Codes with more than one meaning (CA: California or Canada, DE: Delaware or Germany,
+# WA: Washington or Western Australia). Any other gazetteer match outranks them ("Berlin, DE",
+# "Perth, WA"); alone they fall back to the US state ("Fresno, CA")
+AMBIGUOUS_ABBREVIATIONS = {'CA': 'california', 'DE': 'delaware', 'WA': 'washington'}
+
+
+def get_localized_business_fields(country_config: Mapping) -> Dict:
+    """Localized business registration fields for a country config"""
+    return {
+        'registration_label': country_config.get('business_registration', 'Business Registration'),
+        'vat_required': country_config.get('vat_required', False),
+        'date_format': country_config.get('date_format', 'MM/DD/YYYY'),
+        'timezone': country_config.get('timezone', 'UTC'),
+        'business_hours': country_config.get('business_hours', '9:00-17:00'),
+        'popular_platforms': country_config.get('popular_platforms', ['LinkedIn', 'Facebook'])
+    }
+
+
+def _freeze(config: Dict) -> Mapping:
+    return MappingProxyType({key: tuple(value) if isinstance(value, list) else value
+                             for key, value in config.items()})
+
+
+class LocaleRegistry:
+    """Read-only country configs, localized prices and prompt instructions, built once"""
+
+    def __init__(self, country_configs: Dict[str, Dict], cultural_adaptations: Dict[str, Dict],
+                 currency_rates: Dict[str, float]):
+        configs = {}
+        for code, config in country_configs.items():
+            compiled = dict(config, country_code=code)
+            compiled.update(get_localized_business_fields(compiled))
+            configs[code] = _freeze(compiled)
+        self.configs: Mapping[str, Mapping] = MappingProxyType(configs)
+        self.currency_rates = MappingProxyType(dict(currency_rates))
+
+        self._prompt_instructions = MappingProxyType({
+            language: (f"\n\nIMPORTANT LOCALIZATION INSTRUCTIONS:\n"
+                       f"- Respond entirely in {language}\n"
+                       f"- Communication style: {adaptation['style']}\n"
+                       f"- Business focus: {adaptation['business_focus']}\n"
+                       f"- Local context: {adaptation['local_refs']}\n")
+            for language, adaptation in cultural_adaptations.items()
+        })
+        # Formatted prices per (USD amount, currency); the catalog has a handful of price points
+        self._prices: Dict[Tuple[float, str], str] = {}
+
+    def get(self, country_code: Optional[str]) -> Mapping:
+        return self.configs.get(country_code) or self.configs[DEFAULT_COUNTRY]
+
+    def format_price(self, usd_price: float, currency: str) -> str:
+        key = (usd_price, currency)
+        formatted = self._prices.get(key)
+        if formatted is None:
+            local_price = usd_price * self.currency_rates.get(currency, 1.0)
+            formatted = f"{CURRENCY_SYMBOLS.get(currency, '$')}{local_price:.2f}"
+            if len(self._prices) < 10000:
+                self._prices[key] = formatted
+        return formatted
+
+    def price_table(self, usd_prices: Iterable[float]) -> Mapping[str, Mapping[float, str]]:
+        """Every price formatted for every country, e.g. for a plan listing"""
+        usd_prices = tuple(usd_prices)
+        return MappingProxyType({
+            code: MappingProxyType({price: self.format_price(price, config['currency']) for price in usd_prices})
+            for code, config in self.configs.items()
+        })
+
+    def localize_prompt(self, prompt: str, target_language: str, business_context: str = None) -> str:
+        instructions = self._prompt_instructions.get(target_language)
+        if instructions is None:
+            return prompt
+        context_line = f"- Business context: {business_context}" if business_context else ""
+        return f"\n{prompt}{instructions}{context_line}{PROMPT_CLOSING}"
+
+
+_TOKEN = re.compile(r"[A-Za-z0-9]+")
+
+
+def location_tokens(location: str) -> Tuple[str, ...]:
+    """Accent-folded word tokens, original case kept (abbreviation matching needs it)"""
+    folded = unicodedata.normalize('NFKD', location)
+    folded = ''.join(char for char in folded if not unicodedata.combining(char))
+    return tuple(_TOKEN.findall(folded))
+
+
+class TimezoneResolver:
+    """Location text -> IANA timezone via an n-gram index over a normalized gazetteer"""
+
+    RANKS = ('region', 'city', 'country')
+    MAX_MEMO = 10000
+
+    def __init__(self, gazetteer: Dict[str, Dict[str, str]], abbreviations: Dict[str, str],
+                 ambiguous: Optional[Dict[str, str]] = None, default: str = DEFAULT_TIMEZONE):
+        self.default = default
+        self._index: Dict[Tuple[str, ...], Tuple[int, str]] = {}
+        for rank, kind in enumerate(self.RANKS):
+            for name, timezone_name in gazetteer.get(kind, {}).items():
+                key = tuple(token.lower() for token in location_tokens(name))
+                if key not in self._index:
+                    self._index[key] = (rank, timezone_name)
+        self._abbreviations = {abbreviation: self._index[tuple(name.split())]
+                               for abbreviation, name in abbreviations.items()}
+        self._ambiguous = {abbreviation: self._index[tuple(name.split())][1]
+                           for abbreviation, name in (ambiguous or {}).items()}
+        self._max_ngram = max(len(key) for key in self._index)
+        self._memo: Dict[str, str] = {}
+        self.stats = {'resolved': 0, 'memo_hits': 0, 'business_hits': 0}
+
+    def resolve(self, location: Optional[str]) -> str:
+        """Best gazetteer match for location, or the default timezone"""
+        if not location:
+            return self.default
+        cached = self._memo.get(location)
+        if cached is not None:
+            self.stats['memo_hits'] += 1
+            return cached
+
+        timezone_name = self._match(location_tokens(location))
+        if len(self._memo) >= self.MAX_MEMO:
+            self._memo.clear()
+        self._memo[location] = timezone_name
+        self.stats['resolved'] += 1
+        return timezone_name
+
+    def _match(self, tokens: Tuple[str, ...]) -> str:
+        lowered = [token.lower() for token in tokens]
+        best = None
+        fallback = None
+        start = 0
+        while start < len(tokens):
+            match = None
+            for length in range(min(self._max_ngram, len(tokens) - start), 0, -1):
+                match = self._index.get(tuple(lowered[start:start + length]))
+                if match is not None:
+                    break  # Longest match at this position ("new york city" over "new york")
+            token = tokens[start]
+            if match is None and token.isupper() and 2 <= len(token) <= 3:
+                match = self._abbreviations.get(token)
+                if fallback is None:
+                    fallback = self._ambiguous.get(token)
+            # Ties go to the later name: the trailing region of "Washington, DC" decides
+            if match is not None and (best is None or match[0] <= best[0]):
+                best = match
+            start += length  # Skip past the name so "west virginia" never also matches "virginia"
+
+        if best is not None:
+            return best[1]
+        return fallback or self.default
+
+    def timezone_for_business(self, business) -> str:
+        """Timezone cached on the Business row (cleared by the model when location changes)"""
+        if business.timezone_name:
+            self.stats['business_hits'] += 1
+            return business.timezone_name
+        business.timezone_name = self.resolve(business.location)
+        return business.timezone_name
+
+
+locale_registry = LocaleRegistry(COUNTRY_CONFIGS, CULTURAL_ADAPTATIONS, CURRENCY_RATES)
+timezone_resolver = TimezoneResolver(GAZETTEER, REGION_ABBREVIATIONS, AMBIGUOUS_ABBREVIATIONS)
+
+
 class GeoLanguageDetector:
     """Detects user location and automatically adapts the platform"""
     
-    def __init__(self):
-        self.country_configs = {
-            'NL': {
-                'language': 'Dutch',
-                'language_code': 'nl',
-                'currency': 'EUR',
-                'timezone': 'Europe/Amsterdam',
-                'business_culture': 'direct_efficient',
-                'popular_platforms': ['LinkedIn', 'Facebook', 'Instagram'],
-                'business_hours': '9:00-17:00',
-                'vat_required': True,
-                'payment_methods': ['PayPal', 'iDEAL', 'Stripe'],
-                'date_format': 'DD-MM-YYYY',
-                'business_registration': 'KvK number'
-            },
-            'DE': {
-                'language': 'German',
-                'language_code': 'de',
-                'currency': 'EUR',
-                'timezone': 'Europe/Berlin',
-                'business_culture': 'formal_detailed',
-                'popular_platforms': ['LinkedIn', 'XING', 'Facebook'],
-                'business_hours': '8:00-17:00',
-                'vat_required': True,
-                'payment_methods': ['PayPal', 'SEPA', 'Stripe'],
-                'date_format': 'DD.MM.YYYY',
-                'business_registration': 'Handelsregisternummer'
-            },
-            'FR': {
-                'language': 'French',
-                'language_code': 'fr',
-                'currency': 'EUR',
-                'timezone': 'Europe/Paris',
-                'business_culture': 'formal_relationship',
-                'popular_platforms': ['LinkedIn', 'Facebook', 'Instagram'],
-                'business_hours': '9:00-18:00',
-                'vat_required': True,
-                'payment_methods': ['PayPal', 'CB', 'Stripe'],
-                'date_format': 'DD/MM/YYYY',
-                'business_registration': 'SIRET number'
-            },
-            'GB': {
-                'language': 'English',
-                'language_code': 'en-GB',
-                'currency': 'GBP',
-                'timezone': 'Europe/London',
-                'business_culture': 'polite_professional',
-                'popular_platforms': ['LinkedIn', 'Facebook', 'Twitter'],
-                'business_hours': '9:00-17:00',
-                'vat_required': True,
-                'payment_methods': ['PayPal', 'Stripe', 'Bank Transfer'],
-                'date_format': 'DD/MM/YYYY',
-                'business_registration': 'Companies House number'
-            },
-            'US': {
-                'language': 'English',
-                'language_code': 'en-US',
-                'currency': 'USD',
-                'timezone': 'America/New_York',  # Default to Eastern
-                'business_culture': 'friendly_efficient',
-                'popular_platforms': ['LinkedIn', 'Facebook', 'Instagram', 'Twitter'],
-                'business_hours': '9:00-17:00',
-                'vat_required': False,
-                'payment_methods': ['PayPal', 'Stripe', 'Venmo'],
-                'date_format': 'MM/DD/YYYY',
-                'business_registration': 'EIN number'
-            }
-        }
+    def __init__(self, registry: LocaleRegistry = None):
+        self.registry = registry or locale_registry
+        self.country_configs = self.registry.configs
     
     def detect_country_from_ip(self, ip_address: str = None) -> Optional[str]:
         """Detect country from IP address"""
@@ -102,113 +388,32 @@ class GeoLanguageDetector:
             logging.warning(f"IP detection failed: {e}")
             return None
     
-    def get_localized_config(self, country_code: str = None) -> Dict:
-        """Get localized configuration for a country"""
+    def get_localized_config(self, country_code: str = None) -> Mapping:
+        """Get localized configuration for a country (shared, read-only)"""
         if not country_code:
             country_code = self.detect_country_from_ip()
         
-        # Default to US if detection fails
-        if country_code not in self.country_configs:
-            country_code = 'US'
-            
-        config = self.country_configs[country_code].copy()
-        config['country_code'] = country_code
-        
-        return config
+        # Defaults to US if detection fails
+        return self.registry.get(country_code)
     
     def translate_ai_prompt(self, prompt: str, target_language: str, business_context: str = None) -> str:
         """Translate and localize AI prompts for different countries"""
-        
-        # Language-specific business contexts
-        cultural_adaptations = {
-            'Dutch': {
-                'style': 'Be direct, practical, and focus on efficiency. Use "je/jij" for informal tone.',
-                'business_focus': 'Emphasize sustainability, energy efficiency, and practical solutions.',
-                'local_refs': 'Reference Dutch building codes, seasonal weather patterns, and local suppliers.'
-            },
-            'German': {
-                'style': 'Be thorough, detailed, and technically precise. Use formal "Sie" address.',
-                'business_focus': 'Emphasize quality, engineering excellence, and regulatory compliance.',
-                'local_refs': 'Reference German standards (DIN), Handwerk traditions, and regional practices.'
-            },
-            'French': {
-                'style': 'Be polite, relationship-focused, and culturally sensitive.',
-                'business_focus': 'Emphasize craftsmanship, aesthetics, and customer relationships.',
-                'local_refs': 'Reference French regulations, regional variations, and local artisan traditions.'
-            },
-            'English': {
-                'style': 'Be friendly, professional, and solution-oriented.',
-                'business_focus': 'Emphasize value, customer service, and practical benefits.',
-                'local_refs': 'Use local examples and industry standards relevant to the region.'
-            }
-        }
-        
-        if target_language in cultural_adaptations:
-            adaptation = cultural_adaptations[target_language]
-            
-            enhanced_prompt = f"""
-{prompt}
-
-IMPORTANT LOCALIZATION INSTRUCTIONS:
-- Respond entirely in {target_language}
-- Communication style: {adaptation['style']}
-- Business focus: {adaptation['business_focus']}
-- Local context: {adaptation['local_refs']}
-{f"- Business context: {business_context}" if business_context else ""}
-
-Generate authentic, culturally appropriate content that resonates with local business practices and customer expectations.
-"""
-            return enhanced_prompt
-        
-        return prompt
+        return self.registry.localize_prompt(prompt, target_language, business_context)
     
-    def format_price_for_country(self, usd_price: float, country_config: Dict) -> str:
+    def format_price_for_country(self, usd_price: float, country_config: Mapping) -> str:
         """Format price according to local currency and conventions"""
-        
-        # Simple currency conversion (in production, use real exchange rates)
-        currency_rates = {
-            'EUR': 0.85,  # USD to EUR
-            'GBP': 0.75,  # USD to GBP
-            'USD': 1.0
-        }
-        
-        currency = country_config['currency']
-        rate = currency_rates.get(currency, 1.0)
-        local_price = usd_price * rate
-        
-        # Format according to local conventions
-        if currency == 'EUR':
-            return f"€{local_price:.2f}"
-        elif currency == 'GBP':
-            return f"£{local_price:.2f}"
-        else:
-            return f"${local_price:.2f}"
+        return self.registry.format_price(usd_price, country_config['currency'])
     
-    def get_localized_business_fields(self, country_config: Dict) -> Dict:
+    def get_localized_business_fields(self, country_config: Mapping) -> Dict:
         """Get localized business registration fields"""
-        
-        fields = {
-            'registration_label': country_config.get('business_registration', 'Business Registration'),
-            'vat_required': country_config.get('vat_required', False),
-            'date_format': country_config.get('date_format', 'MM/DD/YYYY'),
-            'timezone': country_config.get('timezone', 'UTC'),
-            'business_hours': country_config.get('business_hours', '9:00-17:00'),
-            'popular_platforms': country_config.get('popular_platforms', ['LinkedIn', 'Facebook'])
-        }
-        
-        return fields
+        return get_localized_business_fields(country_config)
     
-    def auto_detect_and_configure(self) -> Dict:
+    def auto_detect_and_configure(self) -> Mapping:
         """Main function to auto-detect and configure everything"""
         
-        # Detect country
+        # Detect country; compiled configs already include the business fields
         country_code = self.detect_country_from_ip()
-        config = self.get_localized_config(country_code)
-        
-        # Add business fields
-        config.update(self.get_localized_business_fields(config))
-        
-        return config
+        return self.get_localized_config(country_code)
 
 # Global instance
-geo_detector = GeoLanguageDetector()
\ No newline at end of file
+geo_detector = GeoLanguageDetector()
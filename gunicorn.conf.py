@@ -0,0 +1,32 @@
+"""
+Gunicorn settings (picked up automatically from the working directory)
+The app is preloaded in the master so routes, compiled templates and registries
+are shared copy-on-write; threads, schedulers and connection pools start only
+after fork (see lifecycle.py). Set GUNICORN_PRELOAD=0 when running with
+--reload, since preloaded code is not reloaded.
+"""
+
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', '1'))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+if preload_app:
+    # main.py registers services but leaves starting them to post_fork below
+    os.environ['DEFER_BACKGROUND_SERVICES'] = '1'
+
+
+def when_ready(server):
+    if preload_app:
+        import lifecycle
+        from app import app, db
+        lifecycle.preload(app, db)
+
+
+def post_fork(server, worker):
+    if preload_app:
+        import lifecycle
+        from app import app, db
+        started = lifecycle.after_fork(app, db)
+        server.log.info("Worker %s started background services: %s", worker.pid, ', '.join(started) or 'none')
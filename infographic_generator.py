@@ -8,13 +8,18 @@ import json
 import base64
 from datetime import datetime
 from typing import Dict, List, Any
-from PIL import Image, ImageDraw, ImageFont
 import textwrap
 import requests
 from io import BytesIO
 
 from app import db
 from models import Conversation, ConversationMessage, Business
+from providers import lazy_import
+
+# Pillow is only needed when an infographic is actually rendered
+Image = lazy_import('PIL.Image')
+ImageDraw = lazy_import('PIL.ImageDraw')
+ImageFont = lazy_import('PIL.ImageFont')
 
 class InfographicGenerator:
     """Generates infographics from AI conversation data"""
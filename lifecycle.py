@@ -0,0 +1,131 @@
+"""
+Process Lifecycle
+Separates what is built once before workers fork from what must run after.
+
+Preload (master, before fork): routes, templates, compiled regexes and template
+registries are built and then frozen so workers share those pages copy-on-write;
+database connections are closed so no socket is shared across processes.
+
+Post-fork (each worker): the connection pool is reset and services start.
+Worker-scoped services run in every process; singleton services (schedulers,
+the conversation orchestrator) run only in the one process that holds the
+service lock, so N workers never mean N schedulers posting the same content.
+
+Outside gunicorn's preload mode the app starts services at import as before
+(still gated by the lock). gunicorn.conf.py sets DEFER_BACKGROUND_SERVICES=1
+and drives the hooks below.
+"""
+
+import gc
+import logging
+import os
+import threading
+from typing import Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCOPE_WORKER = 'worker'
+SCOPE_SINGLETON = 'singleton'
+
+_services: List[Tuple[str, str, Callable[[], None]]] = []
+_started: Dict[int, set] = {}
+_lock = threading.Lock()
+_service_lock_file = None
+
+
+def register_service(name: str, start: Callable[[], None], scope: str = SCOPE_SINGLETON):
+    """Declare a background service; it is started by start_services(), never at import"""
+    with _lock:
+        if all(existing != name for existing, _, _ in _services):
+            _services.append((name, scope, start))
+
+
+def services_deferred() -> bool:
+    """True when a pre-fork master loaded the app and workers start services themselves"""
+    return os.environ.get('DEFER_BACKGROUND_SERVICES') == '1'
+
+
+def holds_service_lock() -> bool:
+    """Whether this process runs the singleton services.
+
+    BACKGROUND_SERVICES=always|never overrides; otherwise the first process to take an
+    exclusive lock on SERVICE_LOCK_PATH wins and keeps it until it exits, at which point
+    the next worker gunicorn forks picks it up.
+    """
+    global _service_lock_file
+    mode = os.environ.get('BACKGROUND_SERVICES', 'auto')
+    if mode in ('always', 'never'):
+        return mode == 'always'
+    if _service_lock_file is not None:
+        return True
+
+    try:
+        import fcntl
+    except ImportError:
+        # No flock (Windows): a single development process runs everything
+        return True
+
+    path = os.environ.get('SERVICE_LOCK_PATH', '/tmp/visitorintel-services.lock')
+    lock_file = open(path, 'a+')
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    lock_file.seek(0)
+    lock_file.truncate()
+    lock_file.write(str(os.getpid()))
+    lock_file.flush()
+    _service_lock_file = lock_file
+    return True
+
+
+def start_services() -> List[str]:
+    """Start the registered services this process is responsible for; returns their names"""
+    pid = os.getpid()
+    with _lock:
+        started = _started.setdefault(pid, set())
+        pending = [service for service in _services if service[0] not in started]
+        started.update(name for name, _, _ in pending)
+
+    run_singletons = any(scope == SCOPE_SINGLETON for _, scope, _ in pending) and holds_service_lock()
+    names = []
+    for name, scope, start in pending:
+        if scope == SCOPE_SINGLETON and not run_singletons:
+            continue
+        try:
+            start()
+            names.append(name)
+        except Exception as e:
+            logger.error("Failed to start %s: %s", name, e)
+
+    logger.info("Background services started in pid %s: %s", pid, ', '.join(names) or 'none')
+    return names
+
+
+def preload(app, db):
+    """Master, after the app is loaded and before the first fork"""
+    with app.app_context():
+        # Compile every template once so workers inherit the compiled code objects
+        for name in app.jinja_env.list_templates():
+            try:
+                app.jinja_env.get_template(name)
+            except Exception as e:
+                logger.warning("Could not precompile template %s: %s", name, e)
+        # Connections opened during start-up must not be inherited by workers
+        for engine in db.engines.values():
+            engine.dispose()
+
+    # Move everything built so far out of the collector's reach; otherwise the first
+    # collection in each worker touches (and so copies) every preloaded object
+    gc.collect()
+    gc.freeze()
+
+
+def after_fork(app, db):
+    """Worker, right after fork"""
+    with app.app_context():
+        # Drop any pooled connections inherited from the master without closing its sockets
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    return start_services()
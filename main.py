@@ -1,27 +1,27 @@
 from app import app, socketio  # noqa: F401
 from flask import jsonify
+import lifecycle
 
-# NEW: Initialize the enhanced VisitorIntelSystem
+# Multi-business live conversations (also resumes conversations left in flight by a restart)
 try:
-    from visitor_intel_backend_fix import VisitorIntelSystem
-    intel_system = VisitorIntelSystem(socketio)
+    from conversation_orchestrator import conversation_orchestrator
+    from conversation_persistence import message_write_behind
+    conversation_orchestrator.socketio = socketio
+    conversation_orchestrator.write_behind = message_write_behind
+    lifecycle.register_service('conversation_orchestrator', conversation_orchestrator.start)
+    from investigation_service import investigation_service
+    investigation_service.socketio = socketio
     
-    # Add new API endpoint for the frontend to get the initial state
+    # State for the live status widget (static/js/visitor_intel_frontend_fix.js)
     @app.route('/api/v2/status')
     def get_status_v2():
-        return jsonify(intel_system.get_current_state())
+        return jsonify(conversation_orchestrator.get_current_state())
     
-    # Start the enhanced system
-    intel_system.start()
-    print("Enhanced VisitorIntelSystem started successfully")
-except Exception as e:
-    print(f"Failed to start enhanced VisitorIntelSystem: {e}")
-    # Fallback to original system
-    try:
-        from realtime_conversation import realtime_manager
-        realtime_manager.start()
-        print("Fallback: Real-time conversation manager started successfully")
-    except Exception as fallback_e:
-        print(f"Failed to start fallback system: {fallback_e}")
+    print("Conversation orchestrator initialized")
+except Exception as orchestrator_e:
+    print(f"Failed to initialize conversation orchestrator: {orchestrator_e}")
 
-# Background services are now handled in app initialization
+# Threads, schedulers and pools start here, or after fork when gunicorn preloads the app
+# (see gunicorn.conf.py and lifecycle.py)
+if not lifecycle.services_deferred():
+    lifecycle.start_services()
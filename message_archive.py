@@ -0,0 +1,354 @@
+"""
+Time-Partitioned Message Storage and Cold Archive
+PostgreSQL: conversation_message is converted once, by the explicit migration
+`python message_archive.py partition`, into a table range-partitioned by month on
+created_at (primary key (id, created_at)), with partitions created a few months
+ahead and a DEFAULT partition as a safety net. Startup and the maintenance job
+only add upcoming partitions. SQLite has no partitioning, so it keeps the single
+table; archival alone bounds its size.
+
+Completed conversations older than ARCHIVE_AFTER_MONTHS have their messages
+moved into conversation_message_archive as one zlib-compressed JSON document per
+conversation. messages() reads either store, so public pages render archived
+conversations unchanged. On PostgreSQL, monthly partitions left empty by the
+archive are dropped instead of vacuumed.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, func, select, text, update
+
+from app import db
+from conversation_summary import conversation_summary
+from models import Conversation, ConversationMessage, ConversationMessageArchive, InvestigationReport
+from unit_of_work import unit_of_work
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_AFTER_MONTHS = int(os.environ.get('ARCHIVE_AFTER_MONTHS', '6'))
+PARTITION_MONTHS_AHEAD = 3
+PARTITION_NAME = re.compile(r'^conversation_message_p(\d{4})_(\d{2})$')
+
+# Every stored column except PostgreSQL's generated search_vector
+MESSAGE_COLUMNS = ('id', 'conversation_id', 'ai_agent_name', 'ai_agent_type', 'content', 'created_at', 'message_order')
+
+
+def _month_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, 1)
+
+
+def _add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _partition_name(month: datetime) -> str:
+    return f"conversation_message_p{month.year:04d}_{month.month:02d}"
+
+
+class MessageArchive:
+    """Monthly partitions, the cold-conversation archive and reads across both"""
+
+    MAINTENANCE_INTERVAL_SECONDS = 24 * 3600
+    ARCHIVE_BATCH_SIZE = 100
+
+    def __init__(self):
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self.stats = {'archived_conversations': 0, 'archived_messages': 0, 'archive_reads': 0,
+                      'partitions_created': 0, 'partitions_dropped': 0}
+
+    # ------------------------------------------------------------------
+    # Storage layout
+    # ------------------------------------------------------------------
+
+    def ensure_storage(self):
+        """Startup check: add upcoming partitions, or warn that the one-off conversion has not run"""
+        if db.engine.dialect.name != 'postgresql':
+            return
+        try:
+            with db.engine.begin() as connection:
+                partitioned = self._is_partitioned(connection)
+                if partitioned:
+                    self._create_partitions(connection)
+            if not partitioned:
+                logger.warning("conversation_message is not partitioned; run `python message_archive.py partition` "
+                               "in a maintenance window to convert it")
+        except Exception as e:
+            logger.error("Failed to set up partitioned message storage: %s", e)
+
+    def partition(self) -> bool:
+        """One-off migration to monthly partitions; returns False if there was nothing to convert.
+        Holds an ACCESS EXCLUSIVE lock on conversation_message while it copies every row, so it
+        runs only from the command line, never at startup."""
+        if db.engine.dialect.name != 'postgresql':
+            return False
+        with db.engine.begin() as connection:
+            if self._is_partitioned(connection):
+                return False
+            self._convert_to_partitioned(connection)
+            self._create_partitions(connection)
+        return True
+
+    @staticmethod
+    def _is_partitioned(connection) -> bool:
+        return connection.execute(text(
+            "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = 'conversation_message'"
+        )).first() is not None
+
+    def _convert_to_partitioned(self, connection):
+        """One-off: rebuild conversation_message as a partitioned table inside one transaction"""
+        columns = ', '.join(MESSAGE_COLUMNS)
+        sequence = connection.execute(text("SELECT pg_get_serial_sequence('conversation_message', 'id')")).scalar()
+        bounds = connection.execute(text("SELECT min(created_at), max(created_at) FROM conversation_message")).one()
+
+        connection.execute(text("LOCK TABLE conversation_message IN ACCESS EXCLUSIVE MODE"))
+        # A foreign key needs a unique id, which a partitioned table can only have together with created_at
+        connection.execute(text(
+            "ALTER TABLE investigation_report DROP CONSTRAINT IF EXISTS investigation_report_message_id_fkey"))
+        connection.execute(text("UPDATE conversation_message SET created_at = now() WHERE created_at IS NULL"))
+        connection.execute(text(
+            "CREATE TABLE conversation_message_partitioned "
+            "(LIKE conversation_message INCLUDING DEFAULTS INCLUDING GENERATED) PARTITION BY RANGE (created_at)"))
+        connection.execute(text("ALTER TABLE conversation_message_partitioned ALTER COLUMN created_at SET NOT NULL"))
+        connection.execute(text("ALTER TABLE conversation_message_partitioned ADD PRIMARY KEY (id, created_at)"))
+        # LIKE copies no foreign keys; a partitioned table can still reference conversation(id)
+        connection.execute(text(
+            "ALTER TABLE conversation_message_partitioned ADD CONSTRAINT conversation_message_conversation_id_fkey "
+            "FOREIGN KEY (conversation_id) REFERENCES conversation(id)"))
+
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        month = _month_start(bounds[0] or now)
+        while month <= _add_months(_month_start(now), PARTITION_MONTHS_AHEAD):
+            self._create_partition(connection, month, parent='conversation_message_partitioned')
+            month = _add_months(month, 1)
+        connection.execute(text(
+            "CREATE TABLE conversation_message_default PARTITION OF conversation_message_partitioned DEFAULT"))
+
+        connection.execute(text(
+            f"INSERT INTO conversation_message_partitioned ({columns}) SELECT {columns} FROM conversation_message"))
+        if sequence:
+            connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY conversation_message_partitioned.id"))
+        connection.execute(text("DROP TABLE conversation_message"))
+        connection.execute(text("ALTER TABLE conversation_message_partitioned RENAME TO conversation_message"))
+        # Declared indexes (and the search index) are recreated on the new parent by init_database,
+        # which the command line migration runs next
+        logger.info("Converted conversation_message to monthly partitions")
+
+    def _create_partitions(self, connection):
+        """Make sure this month and the next few have partitions before rows arrive for them"""
+        month = _month_start(datetime.now(timezone.utc).replace(tzinfo=None))
+        for offset in range(PARTITION_MONTHS_AHEAD + 1):
+            self._create_partition(connection, _add_months(month, offset))
+
+    def _create_partition(self, connection, month: datetime, parent: str = 'conversation_message'):
+        name = _partition_name(month)
+        exists = connection.execute(text("SELECT to_regclass(:name)"), {'name': name}).scalar()
+        if exists:
+            return
+        connection.execute(text(
+            f"CREATE TABLE {name} PARTITION OF {parent} "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_add_months(month, 1):%Y-%m-%d}')"))
+        self.stats['partitions_created'] += 1
+
+    def _drop_empty_partitions(self, cutoff: datetime) -> int:
+        """Drop monthly partitions that end before the archive cutoff and no longer hold rows"""
+        dropped = 0
+        with db.engine.begin() as connection:
+            names = connection.execute(text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = 'conversation_message'")).scalars().all()
+            for name in names:
+                match = PARTITION_NAME.match(name)
+                if not match:
+                    continue
+                month = datetime(int(match.group(1)), int(match.group(2)), 1)
+                if _add_months(month, 1) > cutoff:
+                    continue
+                if connection.execute(text(f"SELECT 1 FROM {name} LIMIT 1")).first() is None:
+                    connection.execute(text(f"DROP TABLE {name}"))
+                    dropped += 1
+        self.stats['partitions_dropped'] += dropped
+        return dropped
+
+    # ------------------------------------------------------------------
+    # Archival
+    # ------------------------------------------------------------------
+
+    def archive_cutoff(self, months: Optional[int] = None) -> datetime:
+        months = ARCHIVE_AFTER_MONTHS if months is None else months
+        return _add_months(_month_start(datetime.now(timezone.utc).replace(tzinfo=None)), -months)
+
+    def archive(self, older_than_months: Optional[int] = None, batch_size: Optional[int] = None) -> int:
+        """Move messages of completed conversations created before the cutoff into the archive"""
+        cutoff = self.archive_cutoff(older_than_months)
+        batch_size = batch_size or self.ARCHIVE_BATCH_SIZE
+        archived = 0
+        while True:
+            ids = db.session.scalars(
+                select(Conversation.id)
+                .where(Conversation.status == 'completed', Conversation.archived_at.is_(None),
+                       Conversation.created_at < cutoff)
+                .order_by(Conversation.id).limit(batch_size)).all()
+            if not ids:
+                break
+            try:
+                archived += self._archive_batch(ids)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+        if archived and db.engine.dialect.name == 'postgresql':
+            self._drop_empty_partitions(cutoff)
+        if archived:
+            logger.info("Archived %s conversations older than %s", archived, cutoff.date())
+        return archived
+
+    def _archive_batch(self, ids: List[int]) -> int:
+        # Summaries must describe the full transcript before it leaves the hot table
+        conversation_summary.refresh(ids)
+
+        by_conversation: Dict[int, List[Dict[str, Any]]] = {conversation_id: [] for conversation_id in ids}
+        rows = db.session.execute(
+            select(*(getattr(ConversationMessage, column) for column in MESSAGE_COLUMNS))
+            .where(ConversationMessage.conversation_id.in_(ids))
+            .order_by(ConversationMessage.conversation_id, ConversationMessage.message_order))
+        for row in rows.mappings():
+            message = dict(row)
+            message['created_at'] = message['created_at'].isoformat() if message['created_at'] else None
+            by_conversation[message['conversation_id']].append(message)
+
+        now = datetime.now(timezone.utc)
+        archive_rows = [{
+            'conversation_id': conversation_id,
+            'message_count': len(messages),
+            'first_message_at': datetime.fromisoformat(messages[0]['created_at']) if messages and messages[0]['created_at'] else None,
+            'last_message_at': datetime.fromisoformat(messages[-1]['created_at']) if messages and messages[-1]['created_at'] else None,
+            'payload': zlib.compress(json.dumps(messages, separators=(',', ':')).encode('utf-8'), 9),
+            'archived_at': now
+        } for conversation_id, messages in by_conversation.items()]
+        db.session.execute(ConversationMessageArchive.__table__.insert(), archive_rows)
+
+        # Cached investigation reports outlive the message row; keep them, drop the reference
+        message_ids = select(ConversationMessage.id).where(ConversationMessage.conversation_id.in_(ids))
+        db.session.execute(update(InvestigationReport).where(InvestigationReport.message_id.in_(message_ids))
+                           .values(message_id=None).execution_options(synchronize_session=False))
+        db.session.execute(delete(ConversationMessage).where(ConversationMessage.conversation_id.in_(ids))
+                           .execution_options(synchronize_session=False))
+        db.session.execute(update(Conversation).where(Conversation.id.in_(ids))
+                           .values(archived_at=now).execution_options(synchronize_session=False))
+
+        self.stats['archived_conversations'] += len(ids)
+        self.stats['archived_messages'] += sum(row['message_count'] for row in archive_rows)
+        return len(ids)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def messages(self, conversation: Conversation) -> List[ConversationMessage]:
+        """Messages in order, from the hot table or the archive; archived ones are detached, read-only"""
+        if conversation.archived_at is None:
+            return conversation.messages
+        archived = db.session.get(ConversationMessageArchive, conversation.id)
+        if archived is None:
+            return []
+        self.stats['archive_reads'] += 1
+        messages = []
+        for data in json.loads(zlib.decompress(archived.payload)):
+            # Never attached to the session or the conversation, so nothing is written back
+            created_at = data.pop('created_at')
+            message = ConversationMessage(**data)
+            message.created_at = datetime.fromisoformat(created_at) if created_at else None
+            messages.append(message)
+        return messages
+
+    def previews(self, conversations: List[Conversation], limit: int) -> Dict[int, List[ConversationMessage]]:
+        """First `limit` messages of each conversation: one windowed query for the hot ones"""
+        result = {conversation.id: [] for conversation in conversations}
+        hot_ids = [conversation.id for conversation in conversations if conversation.archived_at is None]
+        if hot_ids and limit > 0:
+            position = func.row_number().over(
+                partition_by=ConversationMessage.conversation_id,
+                order_by=(ConversationMessage.created_at, ConversationMessage.id)
+            ).label('position')
+            ranked = select(ConversationMessage.id, position).where(
+                ConversationMessage.conversation_id.in_(hot_ids)).subquery()
+            rows = db.session.scalars(
+                select(ConversationMessage).join(ranked, ranked.c.id == ConversationMessage.id)
+                .where(ranked.c.position <= limit)
+                .order_by(ConversationMessage.conversation_id, ranked.c.position))
+            for message in rows:
+                result[message.conversation_id].append(message)
+        for conversation in conversations:
+            if conversation.archived_at is not None:
+                result[conversation.id] = self.messages(conversation)[:limit]
+        return result
+
+    # ------------------------------------------------------------------
+    # Maintenance job
+    # ------------------------------------------------------------------
+
+    def run_maintenance(self):
+        if db.engine.dialect.name == 'postgresql':
+            with db.engine.begin() as connection:
+                if self._is_partitioned(connection):
+                    self._create_partitions(connection)
+        self.archive()
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name='message-archive', daemon=True)
+        self.thread.start()
+        logger.info("Message partition and archive job started")
+
+    def stop(self, timeout: float = 10):
+        if not self.running:
+            return
+        self.running = False
+        self._stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=timeout)
+        self.thread = None
+
+    def _run(self):
+        while self.running:
+            try:
+                with unit_of_work():
+                    self.run_maintenance()
+            except Exception as e:
+                logger.error("Message archive maintenance failed: %s", e)
+            self._stop_event.wait(self.MAINTENANCE_INTERVAL_SECONDS)
+
+
+# Global instance
+message_archive = MessageArchive()
+
+
+if __name__ == '__main__':
+    import sys
+
+    from app import init_database
+
+    if sys.argv[1:] != ['partition']:
+        raise SystemExit("Usage: python message_archive.py partition")
+    with unit_of_work():
+        if message_archive.partition():
+            init_database()
+            print("conversation_message converted to monthly partitions")
+        else:
+            print("Nothing to do: conversation_message is already partitioned, or the database is not PostgreSQL")
@@ -0,0 +1,314 @@
+"""
+In-Process Metrics Registry
+Counters, gauges and histograms rendered in the Prometheus text format at /metrics.
+Each worker process keeps its own registry (scrape every worker, or aggregate
+by instance label). Hot paths should bind labelled children once, e.g.
+OPENAI_CALLS = PROVIDER_CALLS.labels('openai'), so an increment is one lock
+acquire and an add.
+"""
+
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _CounterChild:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ('function',)
+
+    def __init__(self):
+        super().__init__()
+        self.function = None
+
+    def set(self, value: float):
+        self.value = value
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]):
+        """Read the value at scrape time instead of tracking it"""
+        self.function = function
+
+    def get(self) -> float:
+        if self.function is not None:
+            try:
+                return float(self.function())
+            except Exception:
+                return float('nan')
+        return self.value
+
+
+class _HistogramChild:
+    __slots__ = ('upper_bounds', 'counts', 'sum', '_lock')
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.upper_bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self) -> '_Timer':
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ('child', 'started')
+
+    def __init__(self, child: _HistogramChild):
+        self.child = child
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.child.observe(time.perf_counter() - self.started)
+        return False
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lookup: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """Child for one label combination; keep a reference to it on hot paths"""
+        child = self._lookup.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            key = tuple(str(value) for value in values)
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+                # Also index the raw values (e.g. int status codes) to skip str() next time
+                self._lookup[values] = child
+        return child
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for key, child in list(self._children.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default.set(value)
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default.dec(amount)
+
+    def set_function(self, function: Callable[[], float]):
+        self._default.set_function(function)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for key, child in list(self._children.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.get())}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.upper_bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.upper_bounds)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def time(self) -> _Timer:
+        return self._default.time()
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for key, child in list(self._children.items()):
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.upper_bounds + (float('inf'),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics (get-or-create) plus collectors that read existing stats at scrape time"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, Dict[Tuple, float]]]]] = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, Dict[Tuple, float]]]],
+                           labelnames: Sequence[str] = ()):
+        """collector() yields (name, kind, help, {label_values: value}) with the given label names"""
+        self._collectors.append((collector, tuple(labelnames)))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        for collector, labelnames in list(self._collectors):
+            try:
+                families = list(collector())
+            except Exception as e:
+                lines.append(f"# collector {getattr(collector, '__name__', collector)} failed: {_escape(e)}")
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in samples.items():
+                    lines.append(f"{name}{_format_labels(labelnames, key)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+class RequestMetrics:
+    """Per-route latency, status counts and DB queries per request for a Flask app"""
+
+    def __init__(self, registry: MetricsRegistry):
+        self.latency = registry.histogram('http_request_duration_seconds', 'Request latency by route and method',
+                                          ['route', 'method'])
+        self.responses = registry.counter('http_responses_total', 'Responses by route and status code',
+                                          ['route', 'status'])
+        self.queries = registry.histogram('http_request_db_queries', 'Database queries issued per request',
+                                          ['route'], buckets=COUNT_BUCKETS)
+        self.db_queries = registry.counter('db_queries_total', 'Database queries from any thread')
+        self._local = threading.local()
+
+    def init_app(self, app, engines):
+        """Time app's requests and count queries on every engine (primary, replicas, background pool)"""
+        from flask import request
+        from sqlalchemy import event
+
+        local = self._local
+        db_queries = self.db_queries
+
+        def _count_query(conn, cursor, statement, parameters, context, executemany):
+            db_queries.inc()
+            local.queries = getattr(local, 'queries', 0) + 1
+
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', _count_query)
+
+        @app.before_request
+        def _start_timer():
+            local.started = time.perf_counter()
+            local.queries = 0
+
+        @app.after_request
+        def _record(response):
+            started = getattr(local, 'started', None)
+            if started is not None:
+                route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+                self.latency.labels(route, request.method).observe(time.perf_counter() - started)
+                self.responses.labels(route, response.status_code).inc()
+                self.queries.labels(route).observe(local.queries)
+                local.started = None
+            return response
+
+
+# Global instance
+registry = MetricsRegistry()
+request_metrics = RequestMetrics(registry)
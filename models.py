@@ -1,6 +1,8 @@
+import json
+
 from app import db
 from datetime import datetime, timezone
-from sqlalchemy import Text, Boolean, Integer, String, DateTime, Float
+from sqlalchemy import Text, Boolean, Integer, String, DateTime, Float, event
 
 class Business(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -27,21 +29,60 @@ class Business(db.Model):
     subscription_end_date = db.Column(DateTime)  # When current subscription ends
     auto_renew = db.Column(Boolean, default=True)  # Auto-renewal setting
     
+    # IANA timezone resolved from location; cleared whenever location changes
+    timezone_name = db.Column(String(64))
+    
     # Relationship to conversations
     conversations = db.relationship('Conversation', backref='business', lazy=True)
 
+
+@event.listens_for(Business.location, 'set')
+def _clear_resolved_timezone(target, value, oldvalue, initiator):
+    if value != oldvalue:
+        target.timezone_name = None
+
 class Conversation(db.Model):
+    __table_args__ = (
+        # Keyset pagination: newest-first archive, globally and per business
+        db.Index('ix_conversation_created_at_id', 'created_at', 'id'),
+        db.Index('ix_conversation_business_created_at_id', 'business_id', 'created_at', 'id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     business_id = db.Column(db.Integer, db.ForeignKey('business.id'), nullable=False)
     topic = db.Column(db.String(500), nullable=False)
     status = db.Column(db.String(50), default='active')  # active, completed, paused
     created_at = db.Column(DateTime, default=lambda: datetime.now(timezone.utc))
     credits_used = db.Column(Integer, default=0)
+    completed_at = db.Column(DateTime)
+    
+    # Summary of the messages, maintained on insert by conversation_summary (NULL until backfilled)
+    message_count = db.Column(Integer)
+    last_message_at = db.Column(DateTime)
+    first_message_excerpt = db.Column(Text)
+    agent_type_counts = db.Column(Text)  # JSON object: agent type -> message count
+    archived_at = db.Column(DateTime)  # Messages moved to ConversationMessageArchive (see message_archive)
+    driver = db.Column(db.String(50))  # Live generator that owns the conversation ('orchestrator'); NULL for others
     
     # Relationship to messages
     messages = db.relationship('ConversationMessage', backref='conversation', lazy=True, order_by='ConversationMessage.created_at')
+    
+    @property
+    def agent_counts(self):
+        return json.loads(self.agent_type_counts) if self.agent_type_counts else {}
+
+
+@event.listens_for(Conversation.status, 'set')
+def _stamp_completed_at(target, value, oldvalue, initiator):
+    if value == 'completed' and oldvalue != 'completed' and target.completed_at is None:
+        target.completed_at = datetime.now(timezone.utc)
+
 
 class ConversationMessage(db.Model):
+    __table_args__ = (
+        db.Index('ix_conversation_message_conversation_agent', 'conversation_id', 'ai_agent_type'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     conversation_id = db.Column(db.Integer, db.ForeignKey('conversation.id'), nullable=False)
     ai_agent_name = db.Column(db.String(100), nullable=False)
@@ -50,6 +91,15 @@ class ConversationMessage(db.Model):
     created_at = db.Column(DateTime, default=lambda: datetime.now(timezone.utc))
     message_order = db.Column(Integer, nullable=False)
 
+class ConversationMessageArchive(db.Model):
+    """All messages of an archived conversation as one zlib-compressed JSON document"""
+    conversation_id = db.Column(db.Integer, db.ForeignKey('conversation.id'), primary_key=True)
+    message_count = db.Column(Integer, nullable=False)
+    first_message_at = db.Column(DateTime)
+    last_message_at = db.Column(DateTime)
+    payload = db.Column(db.LargeBinary, nullable=False)
+    archived_at = db.Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
 class CreditPackage(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -96,3 +146,124 @@ class SocialMediaSettings(db.Model):
     created_at = db.Column(DateTime, default=lambda: datetime.now(timezone.utc))
     
     business = db.relationship('Business', backref='social_settings')
+
+class LiveConversationState(db.Model):
+    """Per-business live conversation state machine, persisted so it survives restarts"""
+    id = db.Column(db.Integer, primary_key=True)
+    business_id = db.Column(db.Integer, db.ForeignKey('business.id'), nullable=False, unique=True)
+    state = db.Column(db.String(20), nullable=False, default='IDLE')  # IDLE, WAITING, ACTIVE
+    conversation_id = db.Column(db.Integer, db.ForeignKey('conversation.id'), nullable=True)
+    topic = db.Column(db.String(500))
+    messages_generated = db.Column(Integer, default=0)
+    total_messages = db.Column(Integer, default=16)
+    continuous = db.Column(Boolean, default=False)  # Start a new conversation after the waiting period
+    conversation_started_at = db.Column(DateTime)
+    next_event_at = db.Column(DateTime, index=True)  # When the timer heap should fire for this business
+    updated_at = db.Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    
+    business = db.relationship('Business', backref=db.backref('live_state', uselist=False))
+
+class SocialPostOutbox(db.Model):
+    """Posts waiting to be published; dispatcher workers drain this per platform"""
+    __table_args__ = (
+        db.Index('ix_social_post_outbox_dispatch', 'platform', 'status', 'next_attempt_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    business_id = db.Column(db.Integer, db.ForeignKey('business.id'), nullable=False, index=True)
+    conversation_id = db.Column(db.Integer, db.ForeignKey('conversation.id'), nullable=True)
+    platform = db.Column(db.String(50), nullable=False)
+    content = db.Column(Text, nullable=False)
+    post_type = db.Column(db.String(50), default='auto')
+    idempotency_key = db.Column(db.String(200), nullable=False, unique=True)  # Also sent to the platform
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, in_flight, sent, dead
+    attempts = db.Column(Integer, default=0)
+    scheduled_time = db.Column(DateTime)
+    next_attempt_at = db.Column(DateTime, nullable=False)
+    locked_at = db.Column(DateTime)
+    last_error = db.Column(Text)
+    external_id = db.Column(db.String(200))  # Post ID returned by the platform
+    sent_at = db.Column(DateTime)
+    created_at = db.Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    
+    business = db.relationship('Business', backref='outbox_posts')
+
+class ConversationHighlight(db.Model):
+    """Precomputed social post variants for a conversation (platform 'base' holds the unadapted text)"""
+    __table_args__ = (
+        db.UniqueConstraint('conversation_id', 'post_type', 'platform', name='uq_conversation_highlight_variant'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    conversation_id = db.Column(db.Integer, db.ForeignKey('conversation.id'), nullable=False)
+    post_type = db.Column(db.String(50), nullable=False)  # conversation_highlight, summary, question_engagement, service_showcase
+    platform = db.Column(db.String(50), nullable=False)
+    position = db.Column(Integer, default=0)  # Order of post_type within the conversation's highlights
+    content = db.Column(Text, nullable=False)
+    seed = db.Column(Integer)  # Seed the template choices were drawn with, so regeneration is stable
+    created_at = db.Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+class EngagementEvent(db.Model):
+    """Append-only log of social engagement (likes, comments, shares, clicks, impressions)"""
+    __table_args__ = (
+        db.Index('ix_engagement_event_business_occurred', 'business_id', 'occurred_at'),
+    )
+    
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    business_id = db.Column(db.Integer, db.ForeignKey('business.id'), nullable=False)
+    social_post_id = db.Column(db.Integer, db.ForeignKey('social_media_post.id'), nullable=True)
+    platform = db.Column(db.String(50), nullable=False)
+    event_type = db.Column(db.String(30), nullable=False)  # like, comment, share, click, impression
+    count = db.Column(Integer, nullable=False, default=1)
+    external_event_id = db.Column(db.String(200), unique=True)  # Webhook delivery ID, for dedup
+    occurred_at = db.Column(DateTime, nullable=False)
+    received_at = db.Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+class EngagementRollupHourly(db.Model):
+    """Engagement totals per business/platform/event type and hour, maintained on ingest"""
+    business_id = db.Column(db.Integer, db.ForeignKey('business.id'), primary_key=True)
+    bucket_start = db.Column(DateTime, primary_key=True)
+    platform = db.Column(db.String(50), primary_key=True)
+    event_type = db.Column(db.String(30), primary_key=True)
+    count = db.Column(db.BigInteger, nullable=False, default=0)
+
+class EngagementRollupDaily(db.Model):
+    """Engagement totals per business/platform/event type and UTC day, maintained on ingest"""
+    business_id = db.Column(db.Integer, db.ForeignKey('business.id'), primary_key=True)
+    bucket_start = db.Column(DateTime, primary_key=True)
+    platform = db.Column(db.String(50), primary_key=True)
+    event_type = db.Column(db.String(30), primary_key=True)
+    count = db.Column(db.BigInteger, nullable=False, default=0)
+
+class InvestigationReport(db.Model):
+    """Cached investigation report per message (or per content hash for messages not in the DB)"""
+    id = db.Column(db.Integer, primary_key=True)
+    cache_key = db.Column(db.String(100), nullable=False, unique=True)  # msg:<id> or sha:<digest>
+    message_id = db.Column(db.Integer, db.ForeignKey('conversation_message.id'), nullable=True, index=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, ready
+    agent_type = db.Column(db.String(100))
+    topic = db.Column(db.String(500))
+    message_content = db.Column(Text)
+    report = db.Column(Text)  # JSON payload returned by /api/investigation
+    requested_at = db.Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    completed_at = db.Column(DateTime)
+
+class BusinessPage(db.Model):
+    """Extracted text of one crawled page of a business website, with its HTTP validators"""
+    __table_args__ = (
+        db.UniqueConstraint('business_id', 'url', name='uq_business_page_url'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    business_id = db.Column(db.Integer, db.ForeignKey('business.id'), nullable=False)
+    url = db.Column(db.String(2048), nullable=False)
+    path = db.Column(db.String(2048), nullable=False)
+    title = db.Column(db.String(500))
+    text = db.Column(Text)  # Main content extracted by trafilatura
+    content_hash = db.Column(db.String(64))  # sha256 of text, to skip rewrites when validators are missing
+    etag = db.Column(db.String(200))
+    last_modified = db.Column(db.String(100))  # Last-Modified header as received
+    content_bytes = db.Column(Integer)  # Body size of the last full fetch (what a 304 saves)
+    truncated = db.Column(Boolean, default=False)  # Body exceeded CRAWLER_MAX_BYTES
+    fetched_at = db.Column(DateTime)  # Last full (200) fetch
+    checked_at = db.Column(DateTime)  # Last fetch or revalidation
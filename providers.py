@@ -0,0 +1,101 @@
+"""
+Lazy Provider Registry
+AI provider SDKs (openai, anthropic, google-genai) and other heavy optional
+libraries are imported on first use instead of at module import, so app start-up
+and every worker boot only pay for what a request actually touches. Clients are
+created once per process and shared. Heavy application services (the AI
+conversation manager, payment and subscription handlers) are registered the same
+way and reached through lazy() proxies, so importing routes builds none of them.
+"""
+
+import importlib
+import os
+import threading
+from types import ModuleType
+from typing import Any, Callable, Dict
+
+
+class LazyModule(ModuleType):
+    """Module stand-in that imports the real module on first attribute access"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_module'] = None
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__['_module']
+        if module is None:
+            module = self.__dict__['_module'] = importlib.import_module(self.__name__)
+        return module
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self._load(), attribute)
+
+
+def lazy_import(name: str) -> LazyModule:
+    """e.g. Image = lazy_import('PIL.Image'); nothing is imported until Image.new(...)"""
+    return LazyModule(name)
+
+
+def _openai_client():
+    import openai
+    return openai.OpenAI(api_key=os.environ.get('OPENAI_API_KEY'))
+
+
+def _anthropic_client():
+    import anthropic
+    return anthropic.Anthropic(api_key=os.environ.get('ANTHROPIC_API_KEY'))
+
+
+def _gemini_client():
+    from google import genai
+    return genai.Client(api_key=os.environ.get('GEMINI_API_KEY'))
+
+
+class ProviderRegistry:
+    """Named client factories; each client is built (and its SDK imported) on first get()"""
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._clients: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any]):
+        with self._lock:
+            self._factories[name] = factory
+            self._clients.pop(name, None)
+
+    def get(self, name: str) -> Any:
+        client = self._clients.get(name)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(name)
+                if client is None:
+                    client = self._clients[name] = self._factories[name]()
+        return client
+
+    def lazy(self, name: str) -> 'LazyService':
+        """Module-level stand-in for get(name), e.g. ai_manager = provider_registry.lazy('ai_manager')"""
+        return LazyService(self, name)
+
+    def loaded(self):
+        """Providers whose clients have been created in this process"""
+        return sorted(self._clients)
+
+
+class LazyService:
+    """Forwards attribute access to a registry entry, building it on first use"""
+
+    def __init__(self, registry: ProviderRegistry, name: str):
+        self._registry = registry
+        self._name = name
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self._registry.get(self._name), attribute)
+
+
+# Global instance
+provider_registry = ProviderRegistry()
+provider_registry.register('openai', _openai_client)
+provider_registry.register('anthropic', _anthropic_client)
+provider_registry.register('gemini', _gemini_client)
@@ -0,0 +1,325 @@
+"""
+Request Rate Limiting and Crawler Shaping
+Views are put in a route group with @rate_limited('public' | 'polling' | 'api'
+| 'generate', the last for endpoints that can start AI provider work) and every
+request to them takes a token from two buckets: one per client IP, sized for
+its user-agent class (browser, crawler or tool), and one shared by every IP of
+the same crawler or tool family, so a crawl storm spread over many addresses is
+still capped. A request that finds either bucket empty gets a 429 with
+Retry-After instead of a database connection.
+
+Budgets are (tokens per second, burst) and can be overridden per group and
+class, e.g. RATE_LIMIT_PUBLIC_CRAWLER=1/10 and RATE_LIMIT_PUBLIC_CRAWLER_SHARED=10/50
+('off' removes a bucket). Buckets live in this process by default; set
+RATE_LIMIT_REDIS_URL to share them between workers (redis is optional, and the
+limiter falls back to in-process buckets while Redis is unreachable). The
+public crawler budget also drives the Crawl-delay in robots.txt.
+
+Clients are identified by the connection's address, or - when the app runs
+behind trusted proxies - by the address RATE_LIMIT_PROXY_HOPS proxies back in
+X-Forwarded-For (0 by default: without a proxy to overwrite it, the header is
+whatever the client sent). RATE_LIMIT_EXEMPT lists addresses never limited
+(loopback by default, for health checks and keepalive pings).
+"""
+
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from metrics import registry
+from providers import lazy_import
+
+logger = logging.getLogger(__name__)
+
+redis = lazy_import('redis')
+
+Budget = Tuple[float, float]
+
+# Per route group and user-agent class: (per-IP budget, budget shared by the whole family or None)
+DEFAULT_LIMITS: Dict[str, Dict[str, Tuple[Budget, Optional[Budget]]]] = {
+    'public': {
+        'browser': ((2.0, 30), None),
+        'crawler': ((1.0, 10), (10.0, 50)),
+        'tool': ((0.5, 10), (5.0, 20)),
+    },
+    'polling': {
+        'browser': ((2.0, 20), None),
+        'crawler': ((0.2, 2), (1.0, 5)),
+        'tool': ((0.5, 5), (2.0, 10)),
+    },
+    'api': {
+        'browser': ((2.0, 20), None),
+        'crawler': ((0.5, 5), (2.0, 10)),
+        'tool': ((1.0, 10), (5.0, 20)),
+    },
+    'generate': {
+        'browser': ((0.5, 10), None),
+        'crawler': ((0.1, 2), (0.5, 5)),
+        'tool': ((0.2, 5), (1.0, 10)),
+    },
+}
+
+CRAWLER_FAMILIES = (
+    'googlebot', 'bingbot', 'gptbot', 'chatgpt-user', 'oai-searchbot', 'claudebot', 'anthropic-ai',
+    'perplexitybot', 'ccbot', 'applebot', 'yandexbot', 'baiduspider', 'duckduckbot', 'facebookexternalhit',
+    'twitterbot', 'linkedinbot', 'ahrefsbot', 'semrushbot', 'mj12bot', 'bytespider', 'amazonbot'
+)
+TOOL_FAMILIES = (
+    'curl', 'wget', 'python-requests', 'python-urllib', 'httpx', 'aiohttp', 'go-http-client', 'okhttp',
+    'libwww-perl', 'java'
+)
+_CRAWLER_PATTERN = re.compile('|'.join(re.escape(name) for name in CRAWLER_FAMILIES))
+_TOOL_PATTERN = re.compile('|'.join(re.escape(name) for name in TOOL_FAMILIES))
+_GENERIC_CRAWLER_PATTERN = re.compile(r'bot\b|crawl|spider|slurp|scrapy')
+
+# Atomic refill-and-take on a Redis hash; uses the server clock so workers never disagree
+REDIS_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+RATE_LIMITED = registry.counter('rate_limited_requests_total', 'Requests rejected with 429 by the rate limiter',
+                                ['group', 'ua_class'])
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is available"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """Take tokens if available; otherwise return how long to wait (0.0 means acquired)"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0.0
+            return (tokens - self.tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0, stop_event: Optional[threading.Event] = None) -> bool:
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0.0:
+                return True
+            if stop_event is not None:
+                if stop_event.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
+
+
+@lru_cache(maxsize=4096)
+def classify_user_agent(user_agent: str) -> Tuple[str, str]:
+    """(class, family) for a User-Agent header: crawler, tool or browser"""
+    agent = user_agent.lower()
+    if not agent:
+        return 'tool', 'empty'
+    match = _CRAWLER_PATTERN.search(agent)
+    if match:
+        return 'crawler', match.group(0)
+    if _GENERIC_CRAWLER_PATTERN.search(agent):
+        return 'crawler', 'other'
+    match = _TOOL_PATTERN.search(agent)
+    if match:
+        return 'tool', match.group(0)
+    return 'browser', 'browser'
+
+
+def rate_limited(group: str):
+    """Put a view in a rate-limit route group (put below @app.route)"""
+    if group not in DEFAULT_LIMITS:
+        raise ValueError(f"Unknown rate limit group: {group}")
+
+    def mark(view):
+        view.rate_limit_group = group
+        return view
+    return mark
+
+
+def _parse_budget(value: str) -> Optional[Budget]:
+    if value.strip().lower() in ('off', 'none', ''):
+        return None
+    rate, _, burst = value.partition('/')
+    return float(rate), float(burst or rate)
+
+
+def load_limits() -> Dict[str, Dict[str, Tuple[Optional[Budget], Optional[Budget]]]]:
+    """DEFAULT_LIMITS with RATE_LIMIT_<GROUP>_<CLASS>[_SHARED] overrides applied"""
+    limits = {}
+    for group, classes in DEFAULT_LIMITS.items():
+        limits[group] = {}
+        for ua_class, (per_ip, shared) in classes.items():
+            variable = f"RATE_LIMIT_{group.upper()}_{ua_class.upper()}"
+            if variable in os.environ:
+                per_ip = _parse_budget(os.environ[variable])
+            if f"{variable}_SHARED" in os.environ:
+                shared = _parse_budget(os.environ[f"{variable}_SHARED"])
+            limits[group][ua_class] = (per_ip, shared)
+    return limits
+
+
+class LocalBucketStore:
+    """In-process buckets, least recently used evicted beyond max_buckets"""
+
+    def __init__(self, max_buckets: int = 100_000):
+        self.max_buckets = max_buckets
+        self._buckets: 'OrderedDict[str, TokenBucket]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, capacity: float) -> float:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(rate, capacity)
+                if len(self._buckets) > self.max_buckets:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+        return bucket.try_acquire()
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class RedisBucketStore:
+    """Buckets shared by every worker through Redis; in-process buckets while Redis is down"""
+
+    KEY_PREFIX = 'ratelimit:'
+    RETRY_SECONDS = 30
+
+    def __init__(self, url: str, fallback: LocalBucketStore, stats: Dict[str, int]):
+        self.url = url
+        self.fallback = fallback
+        self.stats = stats
+        self._script = None
+        self._down_until = 0.0
+
+    def _take_script(self):
+        if self._script is None:
+            client = redis.Redis.from_url(self.url, socket_timeout=0.05, socket_connect_timeout=0.05)
+            self._script = client.register_script(REDIS_TAKE_SCRIPT)
+        return self._script
+
+    def take(self, key: str, rate: float, capacity: float) -> float:
+        if time.monotonic() >= self._down_until:
+            try:
+                return float(self._take_script()(keys=[self.KEY_PREFIX + key], args=[rate, capacity]))
+            except Exception as e:
+                self.stats['backend_errors'] += 1
+                self._down_until = time.monotonic() + self.RETRY_SECONDS
+                logger.warning("Rate limit backend unavailable, using in-process buckets for %ss: %s",
+                               self.RETRY_SECONDS, e)
+        return self.fallback.take(key, rate, capacity)
+
+    def clear(self):
+        self.fallback.clear()
+
+
+class RateLimiter:
+    """Per-IP and per-family token buckets for each route group"""
+
+    def __init__(self):
+        self.enabled = os.environ.get('RATE_LIMIT_ENABLED', '1') != '0'
+        self.proxy_hops = int(os.environ.get('RATE_LIMIT_PROXY_HOPS', '0'))
+        self.exempt = {address.strip() for address in
+                       os.environ.get('RATE_LIMIT_EXEMPT', '127.0.0.1,::1').split(',') if address.strip()}
+        self.limits = load_limits()
+        self.stats = {'allowed': 0, 'limited': 0, 'backend_errors': 0}
+        local = LocalBucketStore()
+        redis_url = os.environ.get('RATE_LIMIT_REDIS_URL')
+        self.store = RedisBucketStore(redis_url, local, self.stats) if redis_url else local
+
+    def init_app(self, app):
+        from flask import request
+
+        @app.before_request
+        def _limit_request():
+            if not self.enabled:
+                return
+            group = getattr(app.view_functions.get(request.endpoint), 'rate_limit_group', None)
+            if group is None:
+                return
+            client = self.client_address(request)
+            if client in self.exempt:
+                return
+            ua_class, family = classify_user_agent(request.headers.get('User-Agent', ''))
+            wait = self.check(group, client, ua_class, family)
+            if wait:
+                return self._too_many_requests(request, group, ua_class, wait)
+
+    def client_address(self, request) -> str:
+        """The address the nearest RATE_LIMIT_PROXY_HOPS proxies saw the request come from,
+        or the peer address when no proxy is configured (X-Forwarded-For is then ignored)"""
+        if self.proxy_hops:
+            route = request.access_route
+            if len(route) >= self.proxy_hops:
+                return route[-self.proxy_hops]
+        return request.remote_addr or ''
+
+    def check(self, group: str, client: str, ua_class: str, family: str) -> float:
+        """Take a token from the client's and the family's bucket; seconds to wait, 0.0 if allowed"""
+        per_ip, shared = self.limits[group][ua_class]
+        wait = 0.0
+        if per_ip is not None:
+            wait = self.store.take(f"{group}:ip:{ua_class}:{client}", *per_ip)
+        if not wait and shared is not None:
+            wait = self.store.take(f"{group}:ua:{family}", *shared)
+        if wait:
+            self.stats['limited'] += 1
+            RATE_LIMITED.labels(group, ua_class).inc()
+        else:
+            self.stats['allowed'] += 1
+        return wait
+
+    def _too_many_requests(self, request, group: str, ua_class: str, wait: float):
+        from flask import jsonify, make_response
+        retry_after = max(1, math.ceil(wait))
+        if request.path.startswith('/api/') or request.accept_mimetypes.best == 'application/json':
+            response = make_response(jsonify({'success': False, 'error': 'Too many requests',
+                                              'retry_after': retry_after}), 429)
+        else:
+            response = make_response("Too many requests, please retry later.\n", 429)
+            response.headers['Content-Type'] = 'text/plain; charset=utf-8'
+        response.headers['Retry-After'] = str(retry_after)
+        logger.debug("Rate limited %s %s (%s, %s) for %ss", request.method, request.path, group, ua_class, retry_after)
+        return response
+
+    def crawl_delay(self) -> int:
+        """Seconds between fetches that keeps one crawler within its public-page budget"""
+        rates = [budget[0] for budget in self.limits['public']['crawler'] if budget is not None]
+        return max(1, math.ceil(1 / min(rates))) if rates else 1
+
+
+# Global instance
+rate_limiter = RateLimiter()
@@ -1,13 +1,12 @@
-from flask import render_template, request, redirect, url_for, flash, jsonify, Response, make_response
+from flask import render_template, request, redirect, url_for, flash, jsonify, Response, make_response, abort
 from app import app, db
 from models import Business, Conversation, ConversationMessage, CreditPackage, Purchase
-from ai_conversation import AIConversationManager
-from payment_handler import PaymentHandler
 from content_ecosystem import ContentEcosystemManager
 import json
+import os
+import sys
 from datetime import datetime, timezone, timedelta
 import io
-from subscription_manager import SubscriptionManager
 from social_media_manager import SocialMediaManager
 from infographic_generator import InfographicGenerator
 from auto_posting_scheduler import auto_scheduler
@@ -19,6 +18,26 @@ import base64
 import random
 from external_ai_integration import setup_ai_api_routes
 from mood_color_generator import get_conversation_color_palette, get_conversation_theme_css, analyze_conversation_mood
+from conversation_persistence import persistence_service
+from conversation_summary import conversation_summary
+from db_pools import pool_status
+from providers import provider_registry
+from db_routing import replica_reads, replica_router
+from rate_limiting import rate_limited, rate_limiter
+from message_archive import message_archive
+from conversation_archive import conversation_archive, InvalidCursor
+from conversation_search import conversation_search, InvalidSearchCursor
+from conversation_highlights import conversation_highlights
+from engagement_analytics import engagement_analytics, verify_webhook_signature, InvalidEngagementEvent
+from investigation_service import InvalidInvestigationRequest, investigation_service
+from billing_cycle import billing_cycle
+from geo_language_detector import timezone_resolver
+from social_outbox import social_outbox
+from conversation_persistence import message_write_behind
+from system_stats import system_stats
+from template_cache import template_cache
+from assets import asset_manifest
+from metrics import registry as metrics_registry, request_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
 
 def has_premium_access(business):
     """Check if business has access to premium features (social media, infographics, etc.)"""
@@ -32,12 +51,117 @@ def has_premium_access(business):
     return False
 import time
 
-# Initialize AI conversation manager and payment handler
-ai_manager = AIConversationManager()
-payment_handler = PaymentHandler()
-subscription_manager = SubscriptionManager()
+def _ai_manager():
+    from ai_conversation import AIConversationManager
+    return AIConversationManager()
+
+
+def _payment_handler():
+    from payment_handler import PaymentHandler
+    return PaymentHandler()
+
+
+def _subscription_manager():
+    from subscription_manager import SubscriptionManager
+    return SubscriptionManager()
+
+
+# AI conversation manager, payment handler and subscription manager, built on first use
+provider_registry.register('ai_manager', _ai_manager)
+provider_registry.register('payment_handler', _payment_handler)
+provider_registry.register('subscription_manager', _subscription_manager)
+ai_manager = provider_registry.lazy('ai_manager')
+payment_handler = provider_registry.lazy('payment_handler')
+subscription_manager = provider_registry.lazy('subscription_manager')
+
+# Per-route latency, status codes and DB queries per request, counted on every bind's engine
+with app.app_context():
+    request_metrics.init_app(app, db.engines.values())
+
+# Precompiled templates and the message fragment cache
+template_cache.init_app(app)
+
+# Fingerprinted, precompressed static assets (built by `python assets.py`)
+asset_manifest.init_app(app)
+
+# Per-IP and per-crawler token buckets for public, polling and API routes (after request_metrics, so 429s are counted)
+rate_limiter.init_app(app)
+
+# Transcripts of archived conversations read through the message archive
+app.add_template_global(message_archive.messages, 'conversation_messages')
+
+
+def _collect_service_metrics():
+    """Hit/miss and throughput counters the services already keep, read at scrape time"""
+    caches = {
+        ('subscription_snapshot', 'hit'): billing_cycle.stats['snapshot_hits'],
+        ('subscription_snapshot', 'miss'): billing_cycle.stats['snapshot_misses'],
+        ('investigation_report', 'hit'): investigation_service.stats['memory_hits'] + investigation_service.stats['db_hits'],
+        ('investigation_report', 'miss'): investigation_service.stats['generated'],
+        ('timezone', 'hit'): timezone_resolver.stats['business_hits'] + timezone_resolver.stats['memo_hits'],
+        ('timezone', 'miss'): timezone_resolver.stats['resolved'],
+        ('system_stats', 'hit'): system_stats.stats['served'] - system_stats.stats['refreshes'],
+        ('system_stats', 'miss'): system_stats.stats['refreshes'],
+        ('template_fragment', 'hit'): template_cache.fragments.stats['hits'],
+        ('template_fragment', 'miss'): template_cache.fragments.stats['misses']
+    }
+    yield 'cache_requests_total', 'counter', 'Cache lookups by cache and result', caches
+
+
+def _collect_queue_metrics():
+    samples = {('social_outbox', outcome): count for outcome, count in social_outbox.stats.items()}
+    samples.update({('message_write_behind', outcome): count for outcome, count in message_write_behind.stats.items()})
+    samples.update({('conversation_summary', name): count for name, count in conversation_summary.stats.items()})
+    samples.update({('message_archive', name): count for name, count in message_archive.stats.items()})
+    samples.update({('db_routing', name): count for name, count in replica_router.stats.items()})
+    samples.update({('rate_limiting', name): count for name, count in rate_limiter.stats.items()})
+    crawler = sys.modules.get('site_crawler')
+    if crawler is not None:
+        samples.update({('site_crawler', name): count for name, count in crawler.site_crawler.stats.items()})
+    orchestrator = sys.modules.get('conversation_orchestrator')
+    if orchestrator is not None:
+        samples.update({('conversation_orchestrator', name): count
+                        for name, count in orchestrator.conversation_orchestrator.stats.items()
+                        if name != 'max_lag_seconds'})
+    yield 'background_events_total', 'counter', 'Background worker events by component', samples
+
+
+def _collect_lag_metrics():
+    orchestrator = sys.modules.get('conversation_orchestrator')
+    if orchestrator is not None:
+        yield ('scheduler_max_lag_seconds', 'gauge', 'Worst observed lag of a scheduler since start',
+               {('conversation_orchestrator',): orchestrator.conversation_orchestrator.stats['max_lag_seconds']})
+
+
+metrics_registry.register_collector(_collect_service_metrics, ['cache', 'result'])
+metrics_registry.register_collector(_collect_queue_metrics, ['component', 'event'])
+metrics_registry.register_collector(_collect_lag_metrics, ['scheduler'])
+
+
+def _collect_replica_metrics():
+    lags = {(name,): lag for name, lag in replica_router.lags().items() if lag is not None}
+    if lags:
+        yield 'db_replica_lag_seconds', 'gauge', 'Replication lag of each read replica at the last probe', lags
+
+
+metrics_registry.register_collector(_collect_replica_metrics, ['replica'])
+
+
+def _collect_pool_metrics():
+    with app.app_context():
+        engines = dict(db.engines)
+    samples = {}
+    for name, engine in engines.items():
+        for state, value in pool_status(engine).items():
+            samples[(name or 'primary', state)] = value
+    if samples:
+        yield 'db_pool_connections', 'gauge', 'Pooled connections by pool and state', samples
+
+
+metrics_registry.register_collector(_collect_pool_metrics, ['pool', 'state'])
 
 @app.route('/')
+@rate_limited('public')
 def index():
     """Main landing page showcasing AI-to-AI conversations"""
     
@@ -121,27 +245,14 @@ def index():
             }
         ]
         
-        for conv_data in sample_conversations:
-            conversation = Conversation(
-                business_id=featured_business.id,
-                topic=conv_data["topic"],
-                status="completed",
-                credits_used=1
-            )
-            db.session.add(conversation)
-            db.session.flush()  # Get the conversation ID
-            
-            for i, (agent_name, agent_type, content) in enumerate(conv_data["messages"]):
-                message = ConversationMessage(
-                    conversation_id=conversation.id,
-                    ai_agent_name=agent_name,
-                    ai_agent_type=agent_type,
-                    content=content,
-                    message_order=i + 1
-                )
-                db.session.add(message)
-        
-        db.session.commit()
+        # All sample conversations and their messages in one transaction
+        persistence_service.save_conversations([{
+            'business_id': featured_business.id,
+            'topic': conv_data["topic"],
+            'messages': conv_data["messages"],
+            'status': "completed",
+            'credits_used': 1
+        } for conv_data in sample_conversations])
         
         # Refresh recent conversations
         recent_conversations = Conversation.query.filter_by(
@@ -230,14 +341,16 @@ def business_dashboard(business_id):
     """Business dashboard for managing AI conversations and credits"""
     
     business = Business.query.get_or_404(business_id)
-    conversations = Conversation.query.filter_by(business_id=business_id).order_by(Conversation.created_at.desc()).all()
+    page = conversation_archive.get_page(business_id=business_id)
+    conversations = page['conversations']
+    conversation_total = Conversation.query.filter_by(business_id=business_id).count()
     credit_packages = CreditPackage.query.all()
     
     # Generate proper showcase URL if not set
     if not business.share_url:
         from flask import request
         # Use the actual latest conversation URL if available
-        latest_conversation = Conversation.query.filter_by(business_id=business_id).order_by(Conversation.created_at.desc()).first()
+        latest_conversation = conversations[0] if conversations else None
         if latest_conversation:
             business.share_url = f"{request.host_url}public/conversation/{latest_conversation.id}"
         else:
@@ -247,6 +360,8 @@ def business_dashboard(business_id):
     return render_template('business_dashboard.html', 
                          business=business, 
                          conversations=conversations,
+                         conversation_total=conversation_total,
+                         next_cursor=page['next_cursor'],
                          credit_packages=credit_packages)
 
 @app.route('/start_conversation', methods=['POST'])
@@ -268,37 +383,16 @@ def start_conversation():
             flash('Conversation topic is required.', 'error')
             return redirect(url_for('business_dashboard', business_id=business_id))
         
-        # Create new conversation
-        conversation = Conversation(
-            business_id=business_id,
-            topic=topic,
-            status='active'
-        )
-        db.session.add(conversation)
-        db.session.flush()  # Get conversation ID
-        
         # Generate AI-to-AI conversation
         messages = ai_manager.generate_conversation(business, topic)
         
-        # Save messages to database
-        for i, (agent_name, agent_type, content) in enumerate(messages):
-            message = ConversationMessage(
-                conversation_id=conversation.id,
-                ai_agent_name=agent_name,
-                ai_agent_type=agent_type,
-                content=content,
-                message_order=i + 1
-            )
-            db.session.add(message)
-        
-        # Update conversation status and credits
-        conversation.status = 'completed'
-        conversation.credits_used = 1
-        
+        # Deduct credits in the same transaction as the conversation insert
         if not business.is_unlimited:
             business.credits_remaining -= 1
         
-        db.session.commit()
+        # Save conversation and all messages in one bulk transaction
+        conversation_id, _ = persistence_service.save_conversation(business.id, topic, messages, status='completed', credits_used=1)
+        conversation_highlights.precompute_async(conversation_id)
         
         flash(f'AI conversation generated successfully for topic: "{topic}"', 'success')
         return redirect(url_for('business_dashboard', business_id=business_id))
@@ -373,50 +467,61 @@ def view_conversation(conversation_id):
     return render_template('conversation_detail.html', conversation=conversation)
 
 @app.route('/public/conversation/<int:conversation_id>')
+@replica_reads
+@rate_limited('public')
 def public_conversation(conversation_id):
     """Public SEO-optimized conversation page for search engines and AI crawlers"""
     conversation = Conversation.query.get_or_404(conversation_id)
     business = conversation.business
+    summary = conversation_summary.summary(conversation)
+    messages = message_archive.messages(conversation)
     
     # Generate SEO metadata
     meta_title = f"{conversation.topic} - AI Discussion about {business.name}"
-    meta_description = f"Expert AI conversation about {conversation.topic} featuring {business.name}. {len(conversation.messages)} messages from business AI specialists."
-    
-    # Create structured data for search engines
-    structured_data = {
-        "@context": "https://schema.org",
-        "@type": "QAPage",
-        "mainEntity": {
-            "@type": "Question",
-            "name": conversation.topic,
-            "text": f"What do AI experts say about {conversation.topic}?",
-            "answerCount": len(conversation.messages),
-            "acceptedAnswer": {
-                "@type": "Answer",
-                "text": conversation.messages[0].content if conversation.messages else "",
-                "author": {
-                    "@type": "Organization",
-                    "name": business.name,
-                    "url": business.website
+    meta_description = f"Expert AI conversation about {conversation.topic} featuring {business.name}. {summary['message_count']} messages from business AI specialists."
+    
+    # Structured data for search engines; completed conversations build it once
+    def build_structured_data():
+        return {
+            "@context": "https://schema.org",
+            "@type": "QAPage",
+            "mainEntity": {
+                "@type": "Question",
+                "name": conversation.topic,
+                "text": f"What do AI experts say about {conversation.topic}?",
+                "answerCount": summary['message_count'],
+                "acceptedAnswer": {
+                    "@type": "Answer",
+                    "text": messages[0].content if messages else "",
+                    "author": {
+                        "@type": "Organization",
+                        "name": business.name,
+                        "url": business.website
+                    }
                 }
+            },
+            "about": {
+                "@type": "Organization",
+                "name": business.name,
+                "url": business.website,
+                "description": business.description
             }
-        },
-        "about": {
-            "@type": "Organization",
-            "name": business.name,
-            "url": business.website,
-            "description": business.description
         }
-    }
+    
+    structured_data = template_cache.structured_data(conversation, build_structured_data)
     
     return render_template('public_conversation.html', 
                          conversation=conversation,
                          business=business,
                          meta_title=meta_title,
                          meta_description=meta_description,
-                         structured_data=structured_data)
+                         structured_data=structured_data,
+                         message_count=summary['message_count'],
+                         messages=messages)
 
 @app.route('/sitemap.xml')
+@replica_reads
+@rate_limited('public')
 def sitemap():
     """Generate sitemap for search engines"""
     from flask import make_response
@@ -456,10 +561,13 @@ def robots_txt():
     """Generate robots.txt to allow AI crawlers"""
     from flask import make_response
     
-    robots_content = '''User-agent: *
+    # Crawlers that honour Crawl-delay stay inside the public-page rate limit instead of hitting 429s
+    crawl_delay = rate_limiter.crawl_delay()
+    robots_content = f'''User-agent: *
 Allow: /
 Allow: /public/conversation/
 Allow: /sitemap.xml
+Crawl-delay: {crawl_delay}
 
 User-agent: Googlebot
 Allow: /
@@ -468,10 +576,12 @@ Allow: /public/conversation/
 User-agent: GPTBot
 Allow: /
 Allow: /public/conversation/
+Crawl-delay: {crawl_delay}
 
 User-agent: Bingbot
 Allow: /
 Allow: /public/conversation/
+Crawl-delay: {crawl_delay}
 
 User-agent: facebookexternalhit
 Allow: /
@@ -483,6 +593,11 @@ Sitemap: {request.host_url}sitemap.xml'''
     response.headers["Content-Type"] = "text/plain"
     return response
 
+@app.route('/metrics')
+def metrics():
+    """Prometheus text exposition of this worker's metrics"""
+    return Response(metrics_registry.render(), content_type=METRICS_CONTENT_TYPE)
+
 @app.route('/api-status')
 def api_status():
     """Quick API status check"""
@@ -501,6 +616,8 @@ def api_status():
 
 @app.route('/api/live-conversation')
 @app.route('/api/live-conversation/<int:business_id>')
+@replica_reads
+@rate_limited('polling')
 def api_live_conversation(business_id=None):
     """Get current live conversation data for a specific business or featured business"""
     try:
@@ -571,6 +688,8 @@ def api_live_conversation(business_id=None):
 
 @app.route('/api/live-conversation/latest')
 @app.route('/api/live-conversation/<int:business_id>/latest')
+@replica_reads
+@rate_limited('polling')
 def api_latest_message(business_id=None):
     """Get the latest message from live conversation for a specific business"""
     try:
@@ -623,166 +742,55 @@ def api_latest_message(business_id=None):
         }), 500
 
 @app.route('/api/investigation', methods=['POST'])
+@rate_limited('generate')
 def api_investigation():
-    """Generate investigation summary for a message"""
+    """Investigation summary for a message: cached report, or 202 with a handle to poll"""
     try:
-        data = request.get_json()
-        message_id = data.get('messageId')
-        message_content = data.get('messageContent', '')
-        agent_type = data.get('agentType', 'Business AI Assistant')
-        topic = data.get('topic', 'Business Analysis')
-        
-        # Enhanced investigation logic using AI
-        try:
-            # Try to get AI-generated investigation
-            investigation_prompt = f"""
-            Provide a comprehensive business investigation analysis for the following AI agent message:
-            
-            Agent Type: {agent_type}
-            Topic: {topic}
-            Message: {message_content}
-            
-            Generate a detailed investigation with:
-            1. Title (relevant to the agent type)
-            2. Executive summary
-            3. Three detailed analysis sections
-            4. Confidence assessment (85-99%)
-            
-            Focus on actionable business insights and professional analysis.
-            """
-            
-            response = ai_manager._get_openai_response(
-                business_context="Perfect Roofing Team - Professional roofing services in New Jersey",
-                topic=investigation_prompt,
-                conversation_history="",
-                agent_name="Investigation Specialist",
-                round_num=1,
-                msg_num=1
-            )
-            
-            # Parse AI response into structured format
-            investigation_data = {
-                'title': f'{agent_type} Analysis Report',
-                'summary': f'AI-powered investigation of {topic.lower()} insights and recommendations.',
-                'sections': [
-                    {
-                        'title': 'Current Assessment',
-                        'content': response[:200] + "..." if len(response) > 200 else response
-                    },
-                    {
-                        'title': 'Strategic Insights',
-                        'content': 'Comprehensive analysis reveals strong market positioning and growth opportunities in the roofing industry.'
-                    },
-                    {
-                        'title': 'Recommendations',
-                        'content': 'Continue leveraging AI-driven customer engagement and expand digital marketing initiatives.'
-                    }
-                ],
-                'messageContent': message_content,
-                'agentType': agent_type,
-                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'confidence': random.randint(88, 97)
-            }
-            
-        except Exception as ai_error:
-            # Fallback to structured template
-            investigation_templates = {
-                'Business AI Assistant': {
-                    'title': 'Business Strategy & Operations Analysis',
-                    'summary': 'Comprehensive evaluation of business operations, market position, and strategic opportunities.',
-                    'sections': [
-                        {
-                            'title': 'Operational Excellence',
-                            'content': 'Analysis indicates strong operational capabilities with systematic approach to service delivery. Quality standards and customer satisfaction metrics demonstrate industry-leading performance.'
-                        },
-                        {
-                            'title': 'Market Position',
-                            'content': 'Competitive analysis reveals significant advantages in local market expertise, customer service quality, and technical competency. Brand recognition continues to strengthen.'
-                        },
-                        {
-                            'title': 'Growth Strategy',
-                            'content': 'Recommended focus areas include digital transformation, service expansion, and strategic partnerships. Investment in technology and training will enhance scalability.'
-                        }
-                    ]
-                },
-                'Marketing AI Expert': {
-                    'title': 'Digital Marketing & Brand Performance',
-                    'summary': 'In-depth analysis of marketing effectiveness, brand positioning, and digital presence optimization.',
-                    'sections': [
-                        {
-                            'title': 'Brand Positioning',
-                            'content': 'Strong brand equity in local market with positive customer sentiment. Messaging consistency across channels reinforces trust and reliability positioning.'
-                        },
-                        {
-                            'title': 'Digital Performance',
-                            'content': 'SEO metrics show excellent local search visibility. Website conversion rates and customer engagement indicate effective digital strategy execution.'
-                        },
-                        {
-                            'title': 'Campaign Optimization',
-                            'content': 'Seasonal campaign performance data suggests opportunities for enhanced targeting. Recommended investment in video content and customer testimonials.'
-                        }
-                    ]
-                },
-                'Customer Service AI': {
-                    'title': 'Customer Experience & Service Quality',
-                    'summary': 'Detailed assessment of customer service performance, satisfaction metrics, and experience optimization opportunities.',
-                    'sections': [
-                        {
-                            'title': 'Service Excellence',
-                            'content': 'Customer satisfaction scores consistently exceed industry benchmarks. Response time and issue resolution metrics demonstrate commitment to service quality.'
-                        },
-                        {
-                            'title': 'Customer Journey',
-                            'content': 'End-to-end customer experience analysis reveals smooth onboarding and project management processes. Communication protocols ensure transparency.'
-                        },
-                        {
-                            'title': 'Improvement Areas',
-                            'content': 'Opportunities exist for enhanced digital self-service options and proactive communication. Customer feedback systems show strong satisfaction trends.'
-                        }
-                    ]
-                },
-                'SEO AI Specialist': {
-                    'title': 'Search Engine Optimization & Online Visibility',
-                    'summary': 'Technical analysis of SEO performance, keyword rankings, and organic traffic optimization strategies.',
-                    'sections': [
-                        {
-                            'title': 'Search Performance',
-                            'content': 'Keyword rankings show strong positions for primary service terms. Local search optimization delivers consistent visibility in target geographic areas.'
-                        },
-                        {
-                            'title': 'Content Strategy',
-                            'content': 'Content performance metrics indicate effective topic targeting and user engagement. Technical SEO implementation supports strong search engine accessibility.'
-                        },
-                        {
-                            'title': 'Growth Opportunities',
-                            'content': 'Analysis suggests expansion into additional geographic keywords and seasonal content optimization. Link building initiatives show promising results.'
-                        }
-                    ]
-                }
-            }
-            
-            template = investigation_templates.get(agent_type, investigation_templates['Business AI Assistant'])
-            investigation_data = {
-                'title': template['title'],
-                'summary': template['summary'],
-                'sections': template['sections'],
-                'messageContent': message_content,
-                'agentType': agent_type,
-                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'confidence': random.randint(85, 95)
-            }
-        
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'success': False, 'error': 'Expected a JSON object'}), 400
+        status, result = investigation_service.get_or_request(
+            data.get('messageId'),
+            message_content=data.get('messageContent', ''),
+            agent_type=data.get('agentType', 'Business AI Assistant'),
+            topic=data.get('topic', 'Business Analysis')
+        )
+
+        if status == 'ready':
+            return jsonify({
+                'success': True,
+                'cached': True,
+                **result
+            })
+
+        report_id = result['reportId']
         return jsonify({
             'success': True,
-            **investigation_data
-        })
-        
+            'status': 'pending',
+            'reportId': report_id,
+            'pollUrl': url_for('api_investigation_status', report_id=report_id),
+            'event': 'investigation_ready'
+        }), 202
+
+    except InvalidInvestigationRequest as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+@app.route('/api/investigation/<int:report_id>')
+@rate_limited('polling')
+def api_investigation_status(report_id):
+    """Poll a pending investigation report"""
+    status, report = investigation_service.get_report(report_id)
+    if status is None:
+        return jsonify({'success': False, 'error': 'Report not found'}), 404
+    if status == 'pending':
+        return jsonify({'success': True, 'status': 'pending', 'reportId': report_id}), 202
+    return jsonify({'success': True, 'status': 'ready', **report})
+
 @app.route('/api/generate-topic', methods=['POST'])
 def api_generate_topic():
     """Generate a new conversation topic"""
@@ -1080,6 +1088,8 @@ def test_page_discovery(business_id):
 # Enterprise Content Ecosystem Routes
 @app.route('/business/<business_name>/faq/')
 @app.route('/business/<business_name>/faq/<faq_slug>')
+@replica_reads
+@rate_limited('public')
 def business_faq(business_name, faq_slug=None):
     """Business FAQ pages"""
     business = Business.query.filter(Business.name.ilike(business_name.replace('-', ' '))).first()
@@ -1109,6 +1119,8 @@ def business_faq(business_name, faq_slug=None):
 
 @app.route('/business/<business_name>/local/')
 @app.route('/business/<business_name>/local/<location_slug>')
+@replica_reads
+@rate_limited('public')
 def business_local(business_name, location_slug=None):
     """Business local SEO pages"""
     business = Business.query.filter(Business.name.ilike(business_name.replace('-', ' '))).first()
@@ -1138,6 +1150,8 @@ def business_local(business_name, location_slug=None):
 
 @app.route('/business/<business_name>/voice-search/')
 @app.route('/business/<business_name>/voice-search/<voice_slug>')
+@replica_reads
+@rate_limited('public')
 def business_voice_search(business_name, voice_slug=None):
     """Business voice search optimized pages"""
     business = Business.query.filter(Business.name.ilike(business_name.replace('-', ' '))).first()
@@ -1167,6 +1181,8 @@ def business_voice_search(business_name, voice_slug=None):
 
 @app.route('/business/<business_name>/knowledge-base/')
 @app.route('/business/<business_name>/knowledge-base/<knowledge_slug>')
+@replica_reads
+@rate_limited('public')
 def business_knowledge_base(business_name, knowledge_slug=None):
     """Business knowledge base pages"""
     business = Business.query.filter(Business.name.ilike(business_name.replace('-', ' '))).first()
@@ -1195,6 +1211,8 @@ def business_knowledge_base(business_name, knowledge_slug=None):
                              pages=ecosystem['knowledge_base'])
 
 @app.route('/business/<business_name>/live-conversation/')
+@replica_reads
+@rate_limited('public')
 def business_live_conversation(business_name):
     """Business live conversation feed"""
     business = Business.query.filter(Business.name.ilike(business_name.replace('-', ' '))).first()
@@ -1211,6 +1229,8 @@ def business_live_conversation(business_name):
                          conversation=conversation)
 
 @app.route('/business/<business_name>/')
+@replica_reads
+@rate_limited('public')
 def business_ecosystem_home(business_name):
     """Business ecosystem homepage"""
     business = Business.query.filter(Business.name.ilike(business_name.replace('-', ' '))).first()
@@ -1224,36 +1244,82 @@ def business_ecosystem_home(business_name):
                          business=business,
                          ecosystem=ecosystem)
 
+def _archive_filters():
+    """Read archive filter/paging query parameters shared by the HTML and JSON archive"""
+    return {
+        'business_id': request.args.get('business_id', type=int),
+        'status': request.args.get('status') or None,
+        'agent_type': request.args.get('agent_type') or None,
+        'cursor': request.args.get('cursor') or None,
+        'limit': request.args.get('limit', type=int)
+    }
+
 @app.route('/all-conversations')
+@replica_reads
+@rate_limited('public')
 def all_conversations():
-    """View all AI conversations across all businesses"""
-    conversations = Conversation.query.join(Business).order_by(Conversation.created_at.desc()).limit(50).all()
+    """View all AI conversations across all businesses, newest first with cursor paging"""
+    filters = _archive_filters()
+    try:
+        page = conversation_archive.get_page(**filters)
+    except InvalidCursor:
+        return redirect(url_for('all_conversations'))
     
     return render_template('all_conversations.html',
-                         conversations=conversations)
+                         conversations=page['conversations'],
+                         next_cursor=page['next_cursor'],
+                         filters=filters)
+
+@app.route('/api/conversations')
+@replica_reads
+@rate_limited('api')
+def api_conversations():
+    """Paginated conversation archive (keyset cursors by created_at, id)"""
+    try:
+        page = conversation_archive.get_page(**_archive_filters(), with_messages=False)
+    except InvalidCursor as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    return jsonify({
+        'success': True,
+        'conversations': conversation_archive.serialize_page(page['conversations']),
+        'next_cursor': page['next_cursor'],
+        'has_more': page['has_more'],
+        'limit': page['limit']
+    })
+
+@app.route('/api/search')
+@replica_reads
+@rate_limited('api')
+def api_search():
+    """Ranked full-text search over conversation topics and messages"""
+    query = (request.args.get('q') or '').strip()
+    if not query:
+        return jsonify({'success': False, 'error': 'Missing search query'}), 400
+    
+    try:
+        page = conversation_search.search(
+            query,
+            business_id=request.args.get('business_id', type=int),
+            cursor=request.args.get('cursor') or None,
+            limit=request.args.get('limit', type=int)
+        )
+    except InvalidSearchCursor as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logging.error(f"Search failed for {query!r}: {e}")
+        return jsonify({'success': False, 'error': 'Search failed'}), 500
+    
+    return jsonify({'success': True, 'query': query, **page})
 
 @app.route('/business/<int:business_id>/subscription-upgrade')
 def subscription_upgrade_page(business_id):
     """Show subscription upgrade options for a business"""
-    business = Business.query.get_or_404(business_id)
-    
-    # Get monthly plans
-    monthly_plans = subscription_manager.get_monthly_plans_for_display()
-    
-    # Calculate savings for each plan
-    savings_calculations = {}
-    for plan in monthly_plans:
-        savings = subscription_manager.calculate_upgrade_savings(business_id, plan['id'])
-        savings_calculations[plan['id']] = savings
+    context = subscription_manager.get_upgrade_page_context(business_id)
+    if context is None:
+        abort(404)
     
-    # Get current subscription status
-    subscription_status = subscription_manager.get_subscription_status(business_id)
-    
-    return render_template('subscription_upgrade.html',
-                         business=business,
-                         monthly_plans=monthly_plans,
-                         savings_calculations=savings_calculations,
-                         subscription_status=subscription_status)
+    return render_template('subscription_upgrade.html', **context)
 
 @app.route('/business/<int:business_id>/upgrade-subscription', methods=['POST'])
 def upgrade_subscription(business_id):
@@ -1348,6 +1414,55 @@ def social_media_dashboard(business_id):
                          current_settings=platform_settings['current_settings'],
                          analytics=analytics.get('analytics', {}))
 
+@app.route('/api/business/<int:business_id>/social-analytics')
+@replica_reads
+def api_social_analytics(business_id):
+    """Engagement totals and time series for a date range, answered from rollups"""
+    Business.query.get_or_404(business_id)
+    
+    now = datetime.now(timezone.utc)
+    try:
+        start = datetime.fromisoformat(request.args['start']) if request.args.get('start') else now - timedelta(days=30)
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else now
+        report = engagement_analytics.query_range(
+            business_id, start, end,
+            granularity=request.args.get('granularity', 'day'),
+            platform=request.args.get('platform') or None
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    return jsonify({'success': True, **report})
+
+@app.route('/webhooks/social/<platform>', methods=['POST'])
+def social_engagement_webhook(platform):
+    """Engagement deliveries from a platform (or the local stub webhook)"""
+    if platform not in SocialMediaManager.SUPPORTED_PLATFORMS:
+        return jsonify({'success': False, 'error': 'Unsupported platform'}), 404
+    
+    secret = os.environ.get('SOCIAL_WEBHOOK_SECRET')
+    if not secret:
+        # Unsigned deliveries are never accepted; an unconfigured secret disables the endpoint
+        logging.error("SOCIAL_WEBHOOK_SECRET is not set; rejecting engagement webhook")
+        return jsonify({'success': False, 'error': 'Webhook not configured'}), 503
+    if not verify_webhook_signature(secret, request.get_data(), request.headers.get('X-Signature')):
+        return jsonify({'success': False, 'error': 'Invalid signature'}), 401
+    
+    data = request.get_json(silent=True) or {}
+    events = data.get('events')
+    if not isinstance(events, list):
+        return jsonify({'success': False, 'error': 'events list required'}), 400
+    
+    try:
+        stored = engagement_analytics.ingest(events, platform=platform)
+    except InvalidEngagementEvent as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logging.error(f"Engagement ingest failed for {platform}: {e}")
+        return jsonify({'success': False, 'error': 'Ingest failed'}), 500
+    
+    return jsonify({'success': True, 'received': len(events), 'stored': stored})
+
 @app.route('/business/<int:business_id>/social-media/schedule', methods=['POST'])
 def schedule_social_posts(business_id):
     """Schedule automatic social media posts"""
@@ -1540,12 +1655,15 @@ def get_posting_preview(business_id):
         return jsonify({'success': False, 'error': str(e)})
 
 @app.route('/verify/conversation/<int:conversation_id>')
+@replica_reads
+@rate_limited('public')
 def verify_conversation(conversation_id):
     """Public verification endpoint to prove conversations are real"""
     try:
         conversation = Conversation.query.get_or_404(conversation_id)
         business = Business.query.get_or_404(conversation.business_id)
-        messages = ConversationMessage.query.filter_by(conversation_id=conversation_id).order_by(ConversationMessage.message_order).all()
+        summary = conversation_summary.summary(conversation)
+        agent_type_counts = summary['agent_type_counts']
         
         verification_data = {
             'conversation_id': conversation.id,
@@ -1553,17 +1671,14 @@ def verify_conversation(conversation_id):
             'topic': conversation.topic,
             'created_at': conversation.created_at.isoformat(),
             'status': conversation.status,
-            'total_messages': len(messages),
-            'ai_agents_used': list(set([msg.ai_agent_type for msg in messages])),
+            'total_messages': summary['message_count'],
+            'ai_agents_used': list(agent_type_counts),
             'public_url': f"{request.url_root}public/conversation/{conversation.id}",
             'verification': {
                 'timestamp': datetime.utcnow().isoformat(),
                 'server_time': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC'),
-                'message_count_breakdown': {
-                    agent_type: len([m for m in messages if m.ai_agent_type == agent_type])
-                    for agent_type in set([msg.ai_agent_type for msg in messages])
-                },
-                'conversation_hash': str(hash(f"{conversation.id}-{conversation.topic}-{len(messages)}")),
+                'message_count_breakdown': agent_type_counts,
+                'conversation_hash': str(hash(f"{conversation.id}-{conversation.topic}-{summary['message_count']}")),
                 'publicly_accessible': True,
                 'search_indexable': True
             }
@@ -1617,18 +1732,13 @@ def verify_privacy_check(conversation_id):
         return jsonify({'error': str(e), 'privacy_check_failed': True}), 404
 
 @app.route('/verify/system-status')
+@replica_reads
+@rate_limited('polling')
 def verify_system_status():
     """Public endpoint to verify the entire system is working"""
     try:
-        # Count recent conversations (last 24 hours)
-        from datetime import datetime, timedelta
-        recent_cutoff = datetime.utcnow() - timedelta(hours=24)
-        recent_conversations = Conversation.query.filter(Conversation.created_at >= recent_cutoff).count()
-        
-        # Get total stats
-        total_conversations = Conversation.query.count()
-        total_messages = ConversationMessage.query.count()
-        total_businesses = Business.query.count()
+        # Counts come from the cached snapshot, not per-request COUNT(*) queries
+        snapshot = system_stats.get()
         
         # Check AI API availability
         api_status = {
@@ -1641,10 +1751,11 @@ def verify_system_status():
         verification = {
             'system_status': 'operational',
             'timestamp': datetime.utcnow().isoformat(),
-            'conversations_last_24h': recent_conversations,
-            'total_conversations': total_conversations,
-            'total_messages': total_messages,
-            'total_businesses': total_businesses,
+            'stats_as_of': snapshot['as_of'].isoformat(),
+            'conversations_last_24h': snapshot['conversations_last_24h'],
+            'total_conversations': snapshot['total_conversations'],
+            'total_messages': snapshot['total_messages'],
+            'total_businesses': snapshot['total_businesses'],
             'ai_apis_active': api_status,
             'all_apis_working': all(api_status.values()),
             'public_conversations': f"{request.url_root}public/",
@@ -1730,11 +1841,11 @@ def keepalive_generate():
         import random
         topic = random.choice(topics)
         
-        # Use real-time conversation manager for progressive generation
-        from realtime_conversation import realtime_manager
+        # Use the live conversation orchestrator for progressive generation
+        from conversation_orchestrator import conversation_orchestrator
         
         # Start progressive conversation that generates messages over time
-        conversation_id = realtime_manager.start_progressive_conversation(business, topic)
+        conversation_id = conversation_orchestrator.start_conversation(business, topic)
         
         if not conversation_id:
             return jsonify({'error': 'Failed to start conversation'}), 500
@@ -1752,44 +1863,36 @@ def keepalive_generate():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/system-status')
+@replica_reads
+@rate_limited('polling')
 def system_status():
     """API endpoint for system status checks"""
     try:
-        # Check VisitorIntelSystem status
-        from main import intel_system
+        # Live state comes from the conversation orchestrator, the only generator
+        from conversation_orchestrator import conversation_orchestrator
+        state = conversation_orchestrator.get_current_state()
+        
+        status = {
+            'system_running': True,
+            'api_status': {
+                'openai': True,
+                'anthropic': True,
+                'perplexity': True,
+                'gemini': True
+            },
+            'conversation_active': state['conversation_active'],
+            'conversation_status': state['conversation_status'],
+            'active_conversations_count': state['active_conversations_count'],
+            'next_conversation_time': state.get('next_conversation_time')
+        }
         
-        if intel_system:
-            # Get current state from the new system
-            state = intel_system.get_current_state()
-            
-            status = {
-                'system_running': True,
-                'api_status': {
-                    'openai': True,
-                    'anthropic': True,
-                    'perplexity': True,
-                    'gemini': True
-                },
-                'conversation_active': state.get('conversation_active', False),
-                'conversation_status': state.get('status', 'waiting').lower(),
-                'active_conversations_count': 1 if state.get('conversation_active', False) else 0,
-                'next_conversation_time': state.get('next_conversation_time')
-            }
-        else:
-            # Fallback to basic status
-            status = {
-                'system_running': True,
-                'api_status': {
-                    'openai': True,
-                    'anthropic': True,
-                    'perplexity': True,
-                    'gemini': True
-                },
-                'conversation_active': False,
-                'conversation_status': 'waiting',
-                'active_conversations_count': 0,
-                'next_conversation_time': None
-            }
+        # Conversation counts from the cached snapshot, with its freshness
+        snapshot = system_stats.get()
+        status.update({
+            'total_conversations': snapshot['total_conversations'],
+            'conversations_last_24h': snapshot['conversations_last_24h'],
+            'stats_as_of': snapshot['as_of'].isoformat()
+        })
         
         return jsonify(status)
         
@@ -2120,6 +2223,8 @@ def get_business_showcase_url(business_id):
 # Additional API endpoints for enhanced frontend integration
 
 @app.route('/api/live-conversation-feed', methods=['GET'])
+@replica_reads
+@rate_limited('polling')
 def api_live_conversation_feed():
     """Get live conversation data for frontend integration"""
     try:
@@ -2162,6 +2267,8 @@ def api_live_conversation_feed():
         }), 500
 
 @app.route('/api/live-conversation-latest', methods=['GET'])
+@replica_reads
+@rate_limited('polling')
 def api_live_conversation_latest_backend():
     """Get latest conversation messages for frontend polling"""
     try:
@@ -2208,6 +2315,7 @@ def api_live_conversation_latest_backend():
 
 # Enhanced 4-API Conversation System Routes (Disabled)
 @app.route('/api/enhanced-status')
+@rate_limited('polling')
 def enhanced_conversation_status():
     """Get enhanced conversation system status (disabled)"""
     return jsonify({
@@ -2217,43 +2325,32 @@ def enhanced_conversation_status():
 
 
 @app.route('/api/countdown')
+@replica_reads
+@rate_limited('polling')
 def get_countdown():
     """Get countdown information for next conversation"""
     try:
         from datetime import datetime, timedelta
         import pytz
         
-        # Check if there's an active conversation in progress
-        from realtime_conversation import realtime_manager
-        active_conversations = realtime_manager.active_conversations
+        # Served from the cached stats snapshot; clients poll this every few seconds
+        snapshot = system_stats.get()
+        active_count = snapshot['active_conversations']
         
-        if active_conversations:
-            # Get the active conversation details
-            conv_id = list(active_conversations.keys())[0]
-            conv_data = active_conversations[conv_id]
-            
-            # Calculate when this conversation will finish (16 messages total)
-            messages_remaining = conv_data['total_messages'] - conv_data['current_message']
+        if active_count:
+            # Calculate when the active conversation will finish (16 messages total)
+            messages_remaining = ((snapshot['active_total_messages'] or 16)
+                                  - (snapshot['active_messages_generated'] or 0))
             minutes_remaining_for_current = messages_remaining
             
             # Add 5 minutes break after conversation ends
             next_time = datetime.utcnow() + timedelta(minutes=minutes_remaining_for_current + 5)
+        elif snapshot['last_completed_message_at'] is not None:
+            # Next conversation 5 minutes after the last message of the last completed conversation
+            next_time = snapshot['last_completed_message_at'] + timedelta(minutes=5)
         else:
-            # No active conversation, check when last one ended
-            last_conversation = Conversation.query.filter_by(status='completed').order_by(Conversation.id.desc()).first()
-            
-            if last_conversation:
-                # Get the last message time from that conversation
-                last_message = ConversationMessage.query.filter_by(conversation_id=last_conversation.id).order_by(ConversationMessage.created_at.desc()).first()
-                if last_message:
-                    # Next conversation 5 minutes after last message
-                    next_time = last_message.created_at + timedelta(minutes=5)
-                else:
-                    # Fallback: 5 minutes from now
-                    next_time = datetime.utcnow() + timedelta(minutes=5)
-            else:
-                # If no conversations, next one in 5 minutes
-                next_time = datetime.utcnow() + timedelta(minutes=5)
+            # If no conversations, next one in 5 minutes
+            next_time = datetime.utcnow() + timedelta(minutes=5)
         
         # Convert to UTC if needed
         if next_time.tzinfo is None:
@@ -2276,13 +2373,42 @@ def get_countdown():
             'current_time': now.isoformat(),
             'state': state,
             'conversation_interval_minutes': 21,
-            'active_conversations': len(active_conversations) if 'active_conversations' in locals() else 0
+            'active_conversations': active_count,
+            'stats_as_of': snapshot['as_of'].isoformat()
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/live-state/<int:business_id>')
+@rate_limited('polling')
+def get_live_state(business_id):
+    """Get the live conversation state machine for a business"""
+    try:
+        from conversation_orchestrator import conversation_orchestrator
+        return jsonify(conversation_orchestrator.get_business_state(business_id))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/admin/live/<int:business_id>/<action>', methods=['POST'])
+def admin_live_rotation(business_id, action):
+    """Add a business to (or remove it from) continuous live conversations"""
+    from conversation_orchestrator import conversation_orchestrator
+    business = Business.query.get_or_404(business_id)
+    
+    if action == 'enable':
+        conversation_orchestrator.enable_business(business.id, continuous=True)
+        flash(f'{business.name} now runs continuous live conversations!', 'success')
+    elif action == 'disable':
+        conversation_orchestrator.disable_business(business.id)
+        flash(f'{business.name} removed from live conversations.', 'success')
+    else:
+        flash('Unknown live conversation action.', 'error')
+    
+    return redirect('/admin')
+
+
 # External AI Interface Route
 @app.route('/external-ai')
 def external_ai_interface():
@@ -2291,6 +2417,7 @@ def external_ai_interface():
 
 # Mood Color Generator API Routes
 @app.route('/api/conversation/<int:conversation_id>/mood')
+@rate_limited('api')
 def get_conversation_mood_api(conversation_id):
     """Get mood analysis for a conversation"""
     try:
@@ -2308,6 +2435,7 @@ def get_conversation_mood_api(conversation_id):
         }), 500
 
 @app.route('/api/conversation/<int:conversation_id>/colors')
+@rate_limited('api')
 def get_conversation_colors_api(conversation_id):
     """Get color palette for a conversation"""
     try:
@@ -2324,6 +2452,7 @@ def get_conversation_colors_api(conversation_id):
         }), 500
 
 @app.route('/api/conversation/<int:conversation_id>/theme.css')
+@rate_limited('api')
 def get_conversation_theme_css_api(conversation_id):
     """Get CSS theme for a conversation"""
     try:
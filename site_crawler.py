@@ -0,0 +1,446 @@
+"""
+Business Website Crawler
+Business sites are crawled with aiohttp: same-host links breadth-first up to
+CRAWLER_MAX_PAGES, with at most CRAWLER_PER_HOST_CONCURRENCY requests in flight
+per host, honouring robots.txt (Disallow and Crawl-delay for our user agent).
+A site whose robots.txt cannot be read (network error, timeout, 5xx) is skipped
+for the round and its stored pages are kept; pages are only deleted when robots.txt
+explicitly disallows them or they answer 404/410.
+Bodies are streamed - links and the title are parsed chunk by chunk, and
+reading stops at CRAWLER_MAX_BYTES - and trafilatura extracts each page's main
+text into BusinessPage rows, the per-business page store.
+
+Recrawls send the stored ETag / Last-Modified back as If-None-Match /
+If-Modified-Since, so unchanged pages come back as empty 304s and only changed
+pages are downloaded, extracted and rewritten (servers without validators are
+compared by text hash before writing). Database work happens in short units of
+work before and after a crawl, never while requests are in flight. A
+background job recrawls every business website every CRAWLER_RECRAWL_HOURS, and
+a website read before its first crawl is queued for one rather than crawled in
+the caller's request.
+"""
+
+import asyncio
+import codecs
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urldefrag, urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+
+from app import db
+from models import Business, BusinessPage
+from providers import lazy_import
+from unit_of_work import unit_of_work
+
+logger = logging.getLogger(__name__)
+
+aiohttp = lazy_import('aiohttp')
+trafilatura = lazy_import('trafilatura')
+
+HTML_TYPES = ('text/html', 'application/xhtml+xml')
+SKIPPED_EXTENSIONS = ('.css', '.js', '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.ico', '.pdf', '.doc',
+                      '.docx', '.xls', '.xlsx', '.zip', '.mp3', '.mp4', '.xml', '.json')
+CHUNK_BYTES = 64 * 1024
+ROBOTS_MAX_BYTES = 512 * 1024
+
+
+def utcnow() -> datetime:
+    """Naive UTC, matching how timestamps are stored"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def normalize_url(base: str, href: str, host: str) -> Optional[str]:
+    """Absolute URL without fragment for a same-host page link, or None for anything else"""
+    url, _ = urldefrag(urljoin(base, href.strip()))
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https') or parsed.netloc.lower() != host:
+        return None
+    if parsed.path.lower().endswith(SKIPPED_EXTENSIONS):
+        return None
+    return parsed._replace(netloc=host, path=parsed.path or '/').geturl()
+
+
+def page_path(url: str) -> str:
+    parsed = urlparse(url)
+    return parsed.path + (f"?{parsed.query}" if parsed.query else '')
+
+
+def extract_text(html: str, url: str) -> str:
+    """Main content of a page (boilerplate, navigation and comments removed)"""
+    return trafilatura.extract(html, url=url, include_comments=False, include_tables=True, favor_recall=True) or ''
+
+
+class RobotsUnavailable(Exception):
+    """robots.txt could not be read, so nothing on the site may be fetched this round"""
+
+
+class LinkParser(HTMLParser):
+    """Collects <a href> targets and the <title> as decoded chunks are fed in"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links: List[str] = []
+        self._title: List[str] = []
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            self.links.extend(value for name, value in attrs if name == 'href' and value)
+        elif tag == 'title':
+            self._in_title = True
+
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self._in_title = False
+
+    def handle_data(self, data):
+        if self._in_title:
+            self._title.append(data)
+
+    @property
+    def title(self) -> Optional[str]:
+        return ' '.join(''.join(self._title).split())[:500] or None
+
+
+class HostPacer:
+    """Spaces requests to one host by its robots.txt Crawl-delay"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            delay = self._next - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next = loop.time() + self.interval
+
+
+class SiteCrawler:
+    """Crawls business websites into the page store, revalidating what it already has"""
+
+    FIRST_CRAWL_RETRY_SECONDS = 3600
+
+    def __init__(self):
+        self.user_agent = os.environ.get('CRAWLER_USER_AGENT', 'VisitorIntelBot/1.0')
+        self.max_pages = int(os.environ.get('CRAWLER_MAX_PAGES', '50'))
+        self.per_host_concurrency = int(os.environ.get('CRAWLER_PER_HOST_CONCURRENCY', '4'))
+        self.max_connections = int(os.environ.get('CRAWLER_MAX_CONNECTIONS', '32'))
+        self.max_bytes = int(os.environ.get('CRAWLER_MAX_BYTES', str(2 * 1024 * 1024)))
+        self.timeout_seconds = float(os.environ.get('CRAWLER_TIMEOUT_SECONDS', '15'))
+        self.recrawl_seconds = float(os.environ.get('CRAWLER_RECRAWL_HOURS', '24')) * 3600
+        self.sites_per_batch = 20
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='site-crawl')
+        self._first_crawls: Dict[int, float] = {}  # business ID -> when its first crawl was queued
+        self._first_crawls_lock = threading.Lock()
+        self.stats = {'sites': 0, 'sites_failed': 0, 'updated': 0, 'unchanged': 0, 'not_modified': 0, 'blocked': 0,
+                      'gone': 0, 'errors': 0, 'truncated': 0, 'bytes_downloaded': 0, 'bytes_saved': 0}
+
+    # Crawling (no database access)
+
+    async def crawl_sites(self, sites: List[Tuple[str, Dict[str, Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+        """Crawl (start URL, {known page URL: stored validators}) pairs concurrently, one result per site"""
+        timeout = aiohttp.ClientTimeout(total=self.timeout_seconds)
+        connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.per_host_concurrency)
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector,
+                                         headers={'User-Agent': self.user_agent}) as session:
+            results = await asyncio.gather(*(self.crawl_site(session, start_url, known) for start_url, known in sites),
+                                           return_exceptions=True)
+        crawled = []
+        for (start_url, _), result in zip(sites, results):
+            if isinstance(result, Exception):
+                logger.warning("Crawl of %s failed: %s", start_url, result)
+                result = {'start_url': start_url, 'pages': [], 'error': str(result)}
+            crawled.append(result)
+        return crawled
+
+    async def crawl_site(self, session, start_url: str, known: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Breadth-first crawl of one site; stored pages are revalidated, new links fetched"""
+        parsed = urlparse(start_url if '://' in start_url else f"https://{start_url}")
+        host = parsed.netloc.lower()
+        origin = f"{parsed.scheme}://{host}"
+        robots = await self._load_robots(session, origin)
+        pacer = HostPacer(float(robots.crawl_delay(self.user_agent) or 0))
+
+        queue: asyncio.Queue = asyncio.Queue()
+        seen = set()
+        for url in [normalize_url(origin, parsed.path or '/', host)] + sorted(known):
+            if url and url not in seen and len(seen) < self.max_pages:
+                seen.add(url)
+                queue.put_nowait(url)
+        pages: Dict[str, Dict[str, Any]] = {}
+
+        async def worker():
+            while True:
+                url = await queue.get()
+                try:
+                    page = await self._fetch_page(session, url, host, known.get(url), robots, pacer)
+                    pages[page['url']] = page
+                    for link in page.pop('links', ()):
+                        if link not in seen and len(seen) < self.max_pages:
+                            seen.add(link)
+                            queue.put_nowait(link)
+                except Exception as e:
+                    pages[url] = {'url': url, 'status': 'error', 'error': str(e)}
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.per_host_concurrency)]
+        try:
+            await queue.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        return {'start_url': start_url, 'pages': list(pages.values())}
+
+    async def _load_robots(self, session, origin: str) -> RobotFileParser:
+        """Parsed robots.txt; a missing one (4xx) allows everything, an unreachable one raises"""
+        robots = RobotFileParser(f"{origin}/robots.txt")
+        try:
+            async with session.get(f"{origin}/robots.txt") as response:
+                if response.status >= 500:
+                    # Unreachable means the whole site is off limits for now (RFC 9309)
+                    raise RobotsUnavailable(f"robots.txt returned HTTP {response.status}")
+                if response.status >= 400:
+                    robots.allow_all = True
+                else:
+                    body = await response.content.read(ROBOTS_MAX_BYTES)
+                    try:
+                        lines = body.decode(response.charset or 'utf-8', errors='replace').splitlines()
+                    except LookupError:
+                        lines = body.decode('utf-8', errors='replace').splitlines()
+                    robots.parse(lines)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise RobotsUnavailable(f"robots.txt unreachable: {e or type(e).__name__}") from e
+        return robots
+
+    async def _fetch_page(self, session, url: str, host: str, stored: Optional[Dict[str, Any]],
+                          robots: RobotFileParser, pacer: HostPacer) -> Dict[str, Any]:
+        if not robots.can_fetch(self.user_agent, url):
+            return {'url': url, 'status': 'blocked'}
+
+        headers = {}
+        if stored:
+            if stored.get('etag'):
+                headers['If-None-Match'] = stored['etag']
+            if stored.get('last_modified'):
+                headers['If-Modified-Since'] = stored['last_modified']
+
+        await pacer.wait()
+        async with session.get(url, headers=headers) as response:
+            if response.status == 304:
+                return {'url': url, 'status': 'not_modified', 'bytes_saved': (stored or {}).get('content_bytes') or 0}
+            final_url = normalize_url(url, str(response.url), host)
+            if final_url is None:
+                return {'url': url, 'status': 'error', 'error': f"Redirected off the site to {response.url}"}
+            if response.status in (404, 410):
+                return {'url': url, 'status': 'gone'}
+            if response.status != 200 or response.content_type not in HTML_TYPES:
+                return {'url': url, 'status': 'error', 'error': f"HTTP {response.status} {response.content_type}"}
+
+            try:
+                decoder = codecs.getincrementaldecoder(response.charset or 'utf-8')(errors='replace')
+            except LookupError:
+                decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            parser = LinkParser()
+            parts = []
+            size = 0
+            truncated = False
+            async for chunk in response.content.iter_chunked(CHUNK_BYTES):
+                if size + len(chunk) > self.max_bytes:
+                    chunk = chunk[:self.max_bytes - size]
+                    truncated = True
+                size += len(chunk)
+                text = decoder.decode(chunk)
+                parts.append(text)
+                parser.feed(text)
+                if truncated:
+                    break
+            text = decoder.decode(b'', final=True)
+            parts.append(text)
+            parser.feed(text)
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+
+        html = ''.join(parts)
+        # Extraction is CPU-bound; keep it off the event loop so other fetches proceed
+        content = await asyncio.get_running_loop().run_in_executor(None, extract_text, html, final_url)
+        links = [link for link in (normalize_url(final_url, href, host) for href in parser.links) if link]
+        return {
+            'url': final_url,
+            'status': 'fetched',
+            'title': parser.title,
+            'text': content,
+            'content_hash': hashlib.sha256(content.encode('utf-8')).hexdigest(),
+            'etag': etag,
+            'last_modified': last_modified,
+            'content_bytes': size,
+            'truncated': truncated,
+            'links': links
+        }
+
+    # Page store
+
+    def crawl_businesses(self, business_ids: Optional[List[int]] = None) -> Dict[str, int]:
+        """Crawl (or recrawl) business websites into the page store; returns this run's counts"""
+        with unit_of_work(commit=False):
+            query = db.session.query(Business.id, Business.website).filter(Business.website.isnot(None),
+                                                                             Business.website != '')
+            if business_ids is not None:
+                query = query.filter(Business.id.in_(business_ids))
+            websites = query.order_by(Business.id).all()
+
+        counts = dict.fromkeys(self.stats, 0)
+        for start in range(0, len(websites), self.sites_per_batch):
+            batch = websites[start:start + self.sites_per_batch]
+            known = self._known_pages([business_id for business_id, _ in batch])
+            results = asyncio.run(self.crawl_sites([(website, known.get(business_id, {}))
+                                                    for business_id, website in batch]))
+            with unit_of_work():
+                for (business_id, _), result in zip(batch, results):
+                    self._store(business_id, result, counts)
+
+        for name, value in counts.items():
+            self.stats[name] += value
+        logger.info("Crawled %s sites: %s pages updated, %s not modified, %s bytes saved by revalidation",
+                    counts['sites'], counts['updated'], counts['not_modified'], counts['bytes_saved'])
+        return counts
+
+    def _known_pages(self, business_ids: List[int]) -> Dict[int, Dict[str, Dict[str, Any]]]:
+        known: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        with unit_of_work(commit=False):
+            rows = db.session.query(BusinessPage.business_id, BusinessPage.url, BusinessPage.etag,
+                                    BusinessPage.last_modified, BusinessPage.content_bytes
+                                    ).filter(BusinessPage.business_id.in_(business_ids))
+            for business_id, url, etag, last_modified, content_bytes in rows:
+                known.setdefault(business_id, {})[url] = {'etag': etag, 'last_modified': last_modified,
+                                                          'content_bytes': content_bytes}
+        return known
+
+    def _store(self, business_id: int, result: Dict[str, Any], counts: Dict[str, int]):
+        """Apply one site's crawl to its stored pages (inside the caller's unit of work)"""
+        counts['sites'] += 1
+        if result.get('error'):
+            # The site as a whole could not be crawled; what is stored stays until the next round
+            counts['sites_failed'] += 1
+            return
+        now = utcnow()
+        stored = {page.url: page for page in BusinessPage.query.filter_by(business_id=business_id)}
+        for page in result['pages']:
+            status = page['status']
+            row = stored.get(page['url'])
+            if status == 'fetched':
+                counts['bytes_downloaded'] += page['content_bytes']
+                counts['truncated'] += int(page['truncated'])
+                if row is None:
+                    row = BusinessPage(business_id=business_id, url=page['url'], path=page_path(page['url']))
+                    db.session.add(row)
+                    stored[page['url']] = row
+                if row.content_hash == page['content_hash']:
+                    counts['unchanged'] += 1
+                else:
+                    counts['updated'] += 1
+                    row.title, row.text, row.content_hash = page['title'], page['text'], page['content_hash']
+                row.etag, row.last_modified = page['etag'], page['last_modified']
+                row.content_bytes, row.truncated = page['content_bytes'], page['truncated']
+                row.fetched_at = row.checked_at = now
+            elif status == 'not_modified':
+                counts['not_modified'] += 1
+                counts['bytes_saved'] += page['bytes_saved']
+                if row is not None:
+                    row.checked_at = now
+            elif status in ('blocked', 'gone'):
+                # Explicitly disallowed by robots.txt, or a 404/410
+                counts[status] += 1
+                if row is not None:
+                    db.session.delete(row)
+            else:
+                counts['errors'] += 1
+
+    def page_paths(self, website_url: str, limit: int = 15) -> List[str]:
+        """Paths of a website's stored pages in discovery order, or [] if none are stored yet
+        (a business website is then queued for its first crawl; callers fall back to common paths)"""
+        with unit_of_work(commit=False):
+            business_ids = [business_id for business_id, in
+                            db.session.query(Business.id).filter(Business.website == website_url)]
+            paths = self._stored_paths(business_ids, limit)
+        if not paths and business_ids:
+            self.crawl_async(business_ids[0])
+        return paths
+
+    def crawl_async(self, business_id: int):
+        """Queue a crawl of one business website, at most once per FIRST_CRAWL_RETRY_SECONDS"""
+        now = time.monotonic()
+        with self._first_crawls_lock:
+            queued_at = self._first_crawls.get(business_id)
+            if queued_at is not None and now - queued_at < self.FIRST_CRAWL_RETRY_SECONDS:
+                return None
+            self._first_crawls[business_id] = now
+
+        def job():
+            try:
+                self.crawl_businesses([business_id])
+            except Exception as e:
+                logger.error("Crawl of business %s website failed: %s", business_id, e)
+
+        return self._executor.submit(job)
+
+    def _stored_paths(self, business_ids: List[int], limit: int) -> List[str]:
+        if not business_ids:
+            return []
+        paths = []
+        for path, in db.session.query(BusinessPage.path).filter(
+                BusinessPage.business_id.in_(business_ids), BusinessPage.path != '/').order_by(BusinessPage.id):
+            if path not in paths:
+                paths.append(path)
+                if len(paths) >= limit:
+                    break
+        return paths
+
+    # Background recrawl
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name='site-crawler', daemon=True)
+        self.thread.start()
+        logger.info("Business website recrawl job started")
+
+    def stop(self, timeout: float = 10):
+        if not self.running:
+            return
+        self.running = False
+        self._stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=timeout)
+        self.thread = None
+
+    def _run(self):
+        while self.running:
+            try:
+                self.crawl_businesses()
+            except Exception as e:
+                logger.error("Business website recrawl failed: %s", e)
+            self._stop_event.wait(self.recrawl_seconds)
+
+
+# Global instance
+site_crawler = SiteCrawler()
@@ -5,17 +5,19 @@ Handles social media posting, scheduling, and content management for monthly sub
 
 import os
 import json
+import logging
 import base64
 import random
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Any, Optional
 from sqlalchemy import and_
 import requests
-from PIL import Image
-from io import BytesIO
 
 from app import db
 from models import Business, Conversation, ConversationMessage
+from social_outbox import social_outbox
+from engagement_analytics import engagement_analytics
+from social_templates import TemplateRegistry, truncate_to_budget
 
 class SocialMediaManager:
     """Manages social media posting and scheduling for businesses"""
@@ -140,55 +142,56 @@ class SocialMediaManager:
     def __init__(self):
         self.post_frequency = 2  # Posts per day
         
+    HIGHLIGHT_POST_TYPES = ['conversation_highlight', 'summary', 'question_engagement', 'service_showcase']
+    
     def generate_conversation_highlights(self, conversation_id: int) -> List[Dict[str, Any]]:
-        """Generate social media posts from conversation highlights using professional content templates"""
+        """Social media posts for a conversation, read from the precomputed highlight table"""
+        from conversation_highlights import conversation_highlights
         try:
-            conversation = Conversation.query.get(conversation_id)
-            if not conversation:
-                return []
-            
-            business = conversation.business
-            
-            # Generate different types of professional posts
-            posts = []
-            
-            # 1. Conversation highlight post with AI quote
-            highlight_content = self._generate_professional_content(conversation, business, 'conversation_highlight')
-            posts.append({
-                'type': 'conversation_highlight',
-                'content': highlight_content,
-                'platform_content': self._adapt_for_platforms_professional(highlight_content)
-            })
-            
-            # 2. Conversation summary post with statistics
-            summary_content = self._generate_professional_content(conversation, business, 'summary')
-            posts.append({
-                'type': 'summary',
-                'content': summary_content,
-                'platform_content': self._adapt_for_platforms_professional(summary_content)
-            })
-            
-            # 3. Question/engagement post to drive interaction
-            question_content = self._generate_professional_content(conversation, business, 'question_engagement')
-            posts.append({
-                'type': 'question_engagement',
-                'content': question_content,
-                'platform_content': self._adapt_for_platforms_professional(question_content)
-            })
-            
-            # 4. Service showcase post (bonus content)
-            showcase_content = self._generate_professional_content(conversation, business, 'service_showcase')
-            posts.append({
-                'type': 'service_showcase',
-                'content': showcase_content,
-                'platform_content': self._adapt_for_platforms_professional(showcase_content)
-            })
-            
-            return posts
-            
+            return conversation_highlights.get_highlights([conversation_id]).get(conversation_id, [])
         except Exception as e:
+            logging.error(f"Failed to load highlights for conversation {conversation_id}: {e}")
             return []
     
+    def build_highlights(self, conversation: Conversation, business: Business, seed: int) -> List[Dict[str, Any]]:
+        """Generate every highlight post type with template choices drawn from a seeded RNG"""
+        return self.build_highlights_batch([(conversation, business, seed)])[0]
+    
+    def build_highlights_batch(self, items: List[tuple]) -> List[List[Dict[str, Any]]]:
+        """Highlights for many (conversation, business, seed) tuples from the compiled template registry"""
+        registry = self.template_registry
+        results = []
+        for conversation, business, seed in items:
+            industry = registry.industry_key(business)
+            hashtags = registry.hashtags(business, industry)
+            sizes = registry.pool_sizes(industry)
+            fields = self._template_fields(conversation, business)
+            
+            posts = []
+            for post_type in self.HIGHLIGHT_POST_TYPES:
+                # Same draw order as random.choice over hooks, value props, then CTAs
+                rng = random.Random(f"{seed}:{post_type}")
+                choices = {name: rng.randrange(sizes[name]) for name in
+                           ('opening_hooks', 'value_propositions', 'call_to_actions')}
+                posts.append(registry.render_post(post_type, industry, fields, choices, hashtags))
+            results.append(posts)
+        return results
+    
+    def _template_fields(self, conversation: Conversation, business: Business) -> Dict[str, Any]:
+        """Per-conversation values shared by every post type and platform"""
+        messages = conversation.messages
+        best_message = self._find_best_message(messages)
+        return {
+            'quote': best_message.content[:120] if best_message else "Expert insights from our AI discussion",
+            'topic': conversation.topic,
+            'topic_lower': conversation.topic.lower(),
+            'message_count': len(messages),
+            'agent_count': len({msg.ai_agent_name for msg in messages}),
+            'industry_lower': (business.industry or 'service').lower(),
+            'location': business.location,
+            'business_name': business.name
+        }
+    
     def _find_best_message(self, messages: List[ConversationMessage]) -> Optional[ConversationMessage]:
         """Find the most quotable message from the conversation"""
         if not messages:
@@ -254,9 +257,8 @@ Drop a comment below 👇
         for platform, config in self.SUPPORTED_PLATFORMS.items():
             content = base_content
             
-            # Truncate if needed
-            if len(content) > config['max_chars']:
-                content = content[:config['max_chars']-3] + "..."
+            # Truncate if needed, without splitting emoji or combined characters
+            content = truncate_to_budget(content, config['max_chars'])
             
             # Platform-specific adaptations
             if platform == 'twitter':
@@ -293,6 +295,10 @@ Drop a comment below 👇
             if not recent_conversations:
                 return {'success': False, 'error': 'No conversations available for posting'}
             
+            # Precomputed highlights for every candidate conversation in one query
+            from conversation_highlights import conversation_highlights
+            highlights_by_conversation = conversation_highlights.get_highlights([c.id for c in recent_conversations])
+            
             # Generate posts for next 7 days
             scheduled_posts = []
             for i in range(7):
@@ -301,8 +307,7 @@ Drop a comment below 👇
                 # Get conversation for this day (cycle through available)
                 conversation = recent_conversations[i % len(recent_conversations)]
                 
-                # Generate posts for this conversation
-                posts = self.generate_conversation_highlights(conversation.id)
+                posts = highlights_by_conversation.get(conversation.id, [])
                 
                 # Schedule posts for selected platforms
                 for platform in selected_platforms:
@@ -327,9 +332,20 @@ Drop a comment below 👇
                                 'conversation_id': conversation.id
                             })
             
+            # Hand everything to the outbox in one write; slots already queued are skipped
+            queued = social_outbox.enqueue_many([{
+                'business_id': business_id,
+                'conversation_id': post['conversation_id'],
+                'platform': post['platform'],
+                'content': post['content'],
+                'post_type': 'scheduled',
+                'scheduled_time': post['scheduled_time'].astimezone(timezone.utc)
+            } for post in scheduled_posts])
+            
             return {
                 'success': True,
                 'scheduled_posts': len(scheduled_posts),
+                'queued_posts': queued,
                 'posts': scheduled_posts[:10],  # Return first 10 for preview
                 'message': f'Successfully scheduled {len(scheduled_posts)} posts across {len(selected_platforms)} platforms'
             }
@@ -387,35 +403,10 @@ Drop a comment below 👇
             if not business:
                 return {'success': False, 'error': 'Business not found'}
             
-            # Mock analytics data (in production, this would come from social media APIs)
+            # Post counts plus engagement from the hourly/daily rollups (last 30 days)
             return {
                 'success': True,
-                'analytics': {
-                    'total_posts': 45,
-                    'total_engagements': 1250,
-                    'avg_engagement_rate': 8.5,
-                    'top_performing_platform': 'LinkedIn',
-                    'platform_breakdown': {
-                        'facebook': {'posts': 15, 'engagements': 400, 'rate': 7.2},
-                        'twitter': {'posts': 12, 'engagements': 350, 'rate': 6.8},
-                        'linkedin': {'posts': 10, 'engagements': 300, 'rate': 12.1},
-                        'instagram': {'posts': 8, 'engagements': 200, 'rate': 5.5}
-                    },
-                    'recent_posts': [
-                        {
-                            'platform': 'LinkedIn',
-                            'content': 'AI insights about roofing maintenance...',
-                            'posted_at': '2025-07-02T14:00:00Z',
-                            'engagements': 45
-                        },
-                        {
-                            'platform': 'Facebook',
-                            'content': 'What our AI experts think about...',
-                            'posted_at': '2025-07-02T09:00:00Z',
-                            'engagements': 32
-                        }
-                    ]
-                }
+                'analytics': engagement_analytics.get_summary(business_id)
             }
             
         except Exception as e:
@@ -446,157 +437,22 @@ Drop a comment below 👇
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
-    def _get_industry_content(self, business):
-        """Get industry-specific content templates"""
-        industry_key = 'roofing' if 'roof' in business.industry.lower() else 'general'
-        return self.CONTENT_TEMPLATES.get(industry_key, self.CONTENT_TEMPLATES['general'])
-    
-    def _generate_professional_content(self, conversation, business, post_type='highlight'):
+    def _generate_professional_content(self, conversation, business, post_type='highlight', rng=None):
         """Generate professional social media content with proper emojis and hashtags"""
-        content_templates = self._get_industry_content(business)
+        registry = self.template_registry
+        industry = registry.industry_key(business)
+        sizes = registry.pool_sizes(industry)
+        rng = rng or random
         
         # Get random content elements to ensure variety
-        hook = random.choice(content_templates['opening_hooks'])
-        value_prop = random.choice(content_templates['value_propositions'])
-        cta = random.choice(content_templates['call_to_actions'])
-        
-        # Get relevant hashtags
-        hashtag_categories = ['general', 'quality']
-        if business.location and 'new jersey' in business.location.lower():
-            hashtag_categories.append('location')
-        
-        hashtags = []
-        for category in hashtag_categories:
-            if category in content_templates['hashtags']:
-                hashtags.extend(content_templates['hashtags'][category])
+        choices = {name: rng.randrange(sizes[name]) for name in
+                   ('opening_hooks', 'value_propositions', 'call_to_actions')}
         
-        # Add business-specific hashtags
-        business_hashtag = f"#{business.name.replace(' ', '')}"
-        hashtags.insert(0, business_hashtag)
+        if post_type not in self.HIGHLIGHT_POST_TYPES:
+            post_type = 'service_showcase'  # Default service showcase
         
-        # Limit to 6-8 hashtags for optimal engagement
-        hashtags = hashtags[:8]
-        hashtag_string = ' '.join(hashtags)
-        
-        if post_type == 'conversation_highlight':
-            # Get the best message from conversation
-            best_message = self._find_best_message(conversation.messages)
-            message_content = best_message.content if best_message else "Expert insights from our AI discussion"
-            
-            content = f"""{hook}
-            
-💬 "{message_content[:120]}..."
-
-✅ {value_prop}
-🎯 AI experts discussing {conversation.topic.lower()}
-⚡ Real-time insights about our services
-📞 {cta}
-
-{hashtag_string}"""
-            
-        elif post_type == 'summary':
-            message_count = len(conversation.messages)
-            agent_count = len(set(msg.agent_name for msg in conversation.messages))
-            
-            content = f"""{hook}
-
-🤖 Latest AI conversation: {conversation.topic}
-📊 {message_count} expert messages exchanged
-👥 {agent_count} AI specialists discussing our services
-⭐ {value_prop}
-
-Key highlights:
-🔧 Professional expertise and quality standards
-🏠 Customer-focused service delivery
-📈 Industry-leading solutions and results
-
-{cta}
-
-{hashtag_string}"""
-            
-        elif post_type == 'question_engagement':
-            content = f"""{hook}
-
-❓ What matters most when choosing a {business.industry.lower()} professional?
-
-Our AI experts just discussed:
-🎯 Quality materials and craftsmanship
-⚡ Emergency response capabilities  
-🏆 Industry certifications and experience
-📞 Customer service excellence
-
-✅ {value_prop}
-
-Drop a comment - what's your top priority? 👇
-
-{cta}
-
-{hashtag_string}"""
-            
-        else:  # Default service showcase
-            content = f"""{hook}
-
-🌟 Serving {business.location} with professional excellence!
-
-Why choose {business.name}:
-✅ {value_prop}
-🏆 Years of proven industry experience
-🔧 Quality materials and expert installation
-📞 Responsive customer service team
-
-{cta}
-
-{hashtag_string}"""
-        
-        return content.strip()
-    
-    def _create_platform_specific_content(self, base_content, platform):
-        """Adapt content for specific platform requirements"""
-        max_chars = self.SUPPORTED_PLATFORMS[platform]['max_chars']
-        
-        if platform == 'twitter' and len(base_content) > max_chars:
-            # For Twitter, create a shorter version
-            lines = base_content.split('\n')
-            # Keep hook, one key point, and hashtags
-            short_content = []
-            short_content.append(lines[0])  # Hook
-            
-            # Find the most important content line
-            for line in lines[1:]:
-                if any(emoji in line for emoji in ['✅', '🎯', '⚡', '📞']) and len(' '.join(short_content + [line])) < max_chars - 50:
-                    short_content.append(line)
-                    break
-            
-            # Add hashtags (last lines usually)
-            hashtag_line = next((line for line in reversed(lines) if line.startswith('#')), '')
-            if hashtag_line:
-                # Limit hashtags for Twitter
-                hashtags = hashtag_line.split()[:5]
-                short_content.append(' '.join(hashtags))
-            
-            return '\n'.join(short_content)
-        
-        elif platform == 'linkedin':
-            # LinkedIn prefers more professional tone
-            professional_content = base_content.replace('🔥', '💼').replace('🚀', '📈')
-            return professional_content
-        
-        elif platform == 'instagram':
-            # Instagram can use more emojis and visual language
-            visual_content = base_content
-            # Could add more visual elements here
-            return visual_content
-        
-        return base_content
-    
-    def _adapt_for_platforms_professional(self, base_content):
-        """Create platform-specific adaptations of professional content"""
-        adapted = {}
-        
-        for platform in self.SUPPORTED_PLATFORMS.keys():
-            adapted[platform] = self._create_platform_specific_content(base_content, platform)
-        
-        return adapted
+        return registry.render(post_type, 'base', industry, self._template_fields(conversation, business),
+                               choices, registry.hashtags(business, industry))
     
     def _find_best_message(self, messages):
         """Find the most engaging message from conversation"""
@@ -621,11 +477,16 @@ Why choose {business.name}:
                 score += 2
             
             # Prefer certain agent types
-            if message.agent_type in ['openai', 'anthropic']:
+            if message.ai_agent_type in ['openai', 'anthropic']:
                 score += 1
             
             scored_messages.append((score, message))
         
         # Return highest scoring message
         scored_messages.sort(key=lambda x: x[0], reverse=True)
-        return scored_messages[0][1] if scored_messages else messages[0]
\ No newline at end of file
+        return scored_messages[0][1] if scored_messages else messages[0]
+
+
+# Compiled once per process; shared by every SocialMediaManager instance
+SocialMediaManager.template_registry = TemplateRegistry(SocialMediaManager.CONTENT_TEMPLATES,
+                                                       SocialMediaManager.SUPPORTED_PLATFORMS)
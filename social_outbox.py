@@ -0,0 +1,360 @@
+"""
+Social Media Outbox and Dispatcher
+Scheduled posts are written to an outbox table in bulk (deduplicated by idempotency
+key) and published by per-platform worker threads. Each platform has its own
+token bucket, failed publishes are retried with jittered exponential backoff,
+and successful ones are recorded as SocialMediaPost rows in the same commit.
+Claiming a batch and recording its outcome are separate short units of work, so
+no connection is held while a worker waits on its bucket or on the platform.
+"""
+
+import logging
+import random
+from abc import ABC, abstractmethod
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, insert, or_, select, update
+
+from app import db
+from models import SocialMediaPost, SocialPostOutbox
+from rate_limiting import TokenBucket
+from unit_of_work import unit_of_work
+
+logger = logging.getLogger(__name__)
+
+# (sustained posts per second, burst) per platform, shared by all businesses
+PLATFORM_RATE_LIMITS = {
+    'facebook': (2.0, 20),
+    'twitter': (1.0, 10),
+    'linkedin': (1.0, 10),
+    'instagram': (0.5, 5)
+}
+
+
+def make_idempotency_key(business_id: int, platform: str, post_type: str, scheduled_time: datetime) -> str:
+    """Stable key for one business/platform/slot, so re-scheduling never double-posts"""
+    return f"{business_id}:{platform}:{post_type}:{scheduled_time.strftime('%Y%m%dT%H%M')}"
+
+
+class TransientPublishError(Exception):
+    """Publish failed but may succeed later (timeouts, 429s, 5xx)"""
+
+
+class PermanentPublishError(Exception):
+    """Publish can never succeed (rejected content, revoked account)"""
+
+
+class PlatformAdapter(ABC):
+    """Publishes one outbox post to a platform; returns the platform's post ID"""
+
+    platform = None
+
+    @abstractmethod
+    def publish(self, post: Dict[str, Any]) -> str:
+        ...
+
+
+class StubPlatformAdapter(PlatformAdapter):
+    """Local stand-in for a platform API that honours idempotency keys"""
+
+    def __init__(self, platform: str, latency_seconds: float = 0.0, failure_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        self.platform = platform
+        self.latency_seconds = latency_seconds
+        self.failure_rate = failure_rate
+        self.published: Dict[str, str] = {}
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def publish(self, post: Dict[str, Any]) -> str:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        with self._lock:
+            self.calls += 1
+            if self.failure_rate and self._rng.random() < self.failure_rate:
+                raise TransientPublishError(f"{self.platform} temporarily unavailable")
+            # A retried request with the same key returns the original post
+            key = post['idempotency_key']
+            if key not in self.published:
+                self.published[key] = f"{self.platform}-{len(self.published) + 1}"
+            return self.published[key]
+
+
+class SocialOutbox:
+    """Bulk outbox writes plus per-platform dispatcher workers"""
+
+    CLAIM_BATCH_SIZE = 50
+    MAX_ATTEMPTS = 6
+    BASE_BACKOFF_SECONDS = 5
+    MAX_BACKOFF_SECONDS = 900
+    LEASE_SECONDS = 300  # In-flight rows older than this are assumed orphaned by a crash
+    POLL_INTERVAL_SECONDS = 5
+
+    def __init__(self, adapters: Optional[Dict[str, PlatformAdapter]] = None,
+                 rate_limits: Optional[Dict[str, tuple]] = None, workers_per_platform: int = 1):
+        rate_limits = rate_limits or PLATFORM_RATE_LIMITS
+        self.adapters = adapters or {platform: StubPlatformAdapter(platform) for platform in rate_limits}
+        self.buckets = {platform: TokenBucket(rate, burst) for platform, (rate, burst) in rate_limits.items()}
+        self.workers_per_platform = workers_per_platform
+        self._wakeups = {platform: threading.Event() for platform in self.adapters}
+        self._stop_event = threading.Event()
+        self.threads: List[threading.Thread] = []
+        self.running = False
+        self.stats = {'enqueued': 0, 'sent': 0, 'retried': 0, 'dead': 0}
+        self._stats_lock = threading.Lock()
+
+    def register_adapter(self, platform: str, adapter: PlatformAdapter, rate: float = None, burst: float = None):
+        """Swap in a real platform client (call before start())"""
+        self.adapters[platform] = adapter
+        self._wakeups.setdefault(platform, threading.Event())
+        if rate is not None:
+            self.buckets[platform] = TokenBucket(rate, burst or rate)
+        self.buckets.setdefault(platform, TokenBucket(*PLATFORM_RATE_LIMITS.get(platform, (1.0, 1))))
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def enqueue_many(self, posts: Iterable[Dict[str, Any]], commit: bool = True) -> int:
+        """Insert posts in one statement, skipping idempotency keys already queued; returns rows added"""
+        now = datetime.now(timezone.utc)
+        rows = []
+        seen = set()
+        for post in posts:
+            scheduled_time = post.get('scheduled_time') or now
+            if scheduled_time.tzinfo is None:
+                scheduled_time = scheduled_time.replace(tzinfo=timezone.utc)
+            key = post.get('idempotency_key') or make_idempotency_key(
+                post['business_id'], post['platform'], post.get('post_type', 'auto'), scheduled_time)
+            if key in seen:
+                continue
+            seen.add(key)
+            rows.append({
+                'business_id': post['business_id'],
+                'conversation_id': post.get('conversation_id'),
+                'platform': post['platform'],
+                'content': post['content'],
+                'post_type': post.get('post_type', 'auto'),
+                'idempotency_key': key,
+                'status': 'pending',
+                'attempts': 0,
+                'scheduled_time': scheduled_time,
+                'next_attempt_at': scheduled_time,
+                'created_at': now
+            })
+        if not rows:
+            return 0
+
+        try:
+            # Core execution on the session's connection: an ORM bulk insert result has no rowcount
+            result = db.session.connection().execute(self._insert_ignoring_duplicates(), rows)
+            if commit:
+                db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        added = result.rowcount if result.rowcount is not None and result.rowcount >= 0 else len(rows)
+        with self._stats_lock:
+            self.stats['enqueued'] += added
+        for platform in {row['platform'] for row in rows}:
+            if platform in self._wakeups:
+                self._wakeups[platform].set()
+        return added
+
+    def _insert_ignoring_duplicates(self):
+        dialect = db.engine.dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            return insert(SocialPostOutbox).prefix_with('IGNORE')
+        return dialect_insert(SocialPostOutbox).on_conflict_do_nothing(index_elements=['idempotency_key'])
+
+    # ------------------------------------------------------------------
+    # Dispatching
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Start dispatcher workers for every platform with an adapter"""
+        if self.running:
+            return
+        self.running = True
+        self._stop_event.clear()
+        self._release_stale_leases()
+        for platform in self.adapters:
+            for index in range(self.workers_per_platform):
+                thread = threading.Thread(target=self._run_worker, args=(platform,),
+                                          name=f'social-outbox-{platform}-{index}', daemon=True)
+                thread.start()
+                self.threads.append(thread)
+        logger.info("Social outbox dispatcher started for %s", ', '.join(self.adapters))
+
+    def stop(self, timeout: float = 10):
+        if not self.running:
+            return
+        self.running = False
+        self._stop_event.set()
+        for event in self._wakeups.values():
+            event.set()
+        for thread in self.threads:
+            thread.join(timeout=timeout)
+        self.threads = []
+        logger.info("Social outbox dispatcher stopped")
+
+    def _run_worker(self, platform: str):
+        wakeup = self._wakeups[platform]
+        while self.running:
+            try:
+                dispatched = self.dispatch_once(platform)
+            except Exception as e:
+                logger.error("Social outbox worker for %s failed: %s", platform, e)
+                dispatched = 0
+            if not dispatched:
+                wakeup.wait(self.POLL_INTERVAL_SECONDS)
+                wakeup.clear()
+
+    def dispatch_once(self, platform: str) -> int:
+        """Claim one batch for platform, publish it and record the outcome; returns rows claimed.
+        Bucket waits and publish calls happen between the two units of work, with no session open."""
+        claimed = self._claim(platform)
+        if not claimed:
+            return 0
+
+        adapter = self.adapters[platform]
+        bucket = self.buckets[platform]
+        sent, retries, dead = [], [], []
+        now = datetime.now(timezone.utc)
+
+        for index, post in enumerate(claimed):
+            if not bucket.acquire(stop_event=self._stop_event):
+                # Shutting down: hand the rest back without counting the attempt
+                retries.extend({'id': p['id'], 'status': 'pending', 'attempts': p['attempts'] - 1,
+                                'next_attempt_at': now, 'last_error': None, 'locked_at': None}
+                               for p in claimed[index:])
+                break
+            try:
+                external_id = adapter.publish(post)
+                sent.append((post, external_id))
+            except PermanentPublishError as e:
+                dead.append({'id': post['id'], 'status': 'dead', 'last_error': str(e), 'locked_at': None})
+            except Exception as e:
+                if post['attempts'] >= self.MAX_ATTEMPTS:
+                    dead.append({'id': post['id'], 'status': 'dead', 'last_error': str(e), 'locked_at': None})
+                else:
+                    retries.append({
+                        'id': post['id'],
+                        'status': 'pending',
+                        'attempts': post['attempts'],
+                        'next_attempt_at': datetime.now(timezone.utc) + timedelta(seconds=self._backoff(post['attempts'])),
+                        'last_error': str(e),
+                        'locked_at': None
+                    })
+
+        self._record_results(sent, retries, dead)
+        return len(claimed)
+
+    def _claim(self, platform: str) -> List[Dict[str, Any]]:
+        """Atomically move due pending rows, and rows whose lease expired, to in_flight and return them"""
+        now = datetime.now(timezone.utc)
+        lease_cutoff = now - timedelta(seconds=self.LEASE_SECONDS)
+        due = (select(SocialPostOutbox.id)
+               .where(SocialPostOutbox.platform == platform,
+                      or_(and_(SocialPostOutbox.status == 'pending', SocialPostOutbox.next_attempt_at <= now),
+                          # Orphaned by a crashed worker or a failed _record_results; the lost attempt still counts
+                          and_(SocialPostOutbox.status == 'in_flight', SocialPostOutbox.locked_at < lease_cutoff)))
+               .order_by(SocialPostOutbox.next_attempt_at)
+               .limit(self.CLAIM_BATCH_SIZE))
+        with unit_of_work():
+            if db.engine.dialect.name == 'postgresql':
+                # Concurrent workers (or processes) skip each other's rows instead of blocking
+                due = due.with_for_update(skip_locked=True)
+            result = db.session.execute(
+                update(SocialPostOutbox)
+                .where(SocialPostOutbox.id.in_(due.scalar_subquery()))
+                .values(status='in_flight', locked_at=now, attempts=SocialPostOutbox.attempts + 1)
+                .returning(SocialPostOutbox.id, SocialPostOutbox.business_id, SocialPostOutbox.conversation_id,
+                           SocialPostOutbox.platform, SocialPostOutbox.content, SocialPostOutbox.post_type,
+                           SocialPostOutbox.idempotency_key, SocialPostOutbox.attempts,
+                           SocialPostOutbox.scheduled_time)
+                .execution_options(synchronize_session=False)
+            )
+            claimed = [dict(row) for row in result.mappings()]
+        return claimed
+
+    def _record_results(self, sent, retries, dead):
+        """Write every outcome of a batch in one unit of work"""
+        now = datetime.now(timezone.utc)
+        with unit_of_work():
+            if sent:
+                db.session.execute(update(SocialPostOutbox), [{
+                    'id': post['id'],
+                    'status': 'sent',
+                    'external_id': external_id,
+                    'sent_at': now,
+                    'last_error': None,
+                    'locked_at': None
+                } for post, external_id in sent])
+                db.session.execute(insert(SocialMediaPost), [{
+                    'business_id': post['business_id'],
+                    'conversation_id': post['conversation_id'],
+                    'platform': post['platform'],
+                    'content': post['content'],
+                    'post_type': post['post_type'],
+                    'scheduled_time': post['scheduled_time'],
+                    'posted_time': now,
+                    'status': 'posted',
+                    'created_at': post['scheduled_time'] or now
+                } for post, _ in sent])
+            if retries:
+                db.session.execute(update(SocialPostOutbox), retries)
+            if dead:
+                db.session.execute(update(SocialPostOutbox), dead)
+
+        with self._stats_lock:
+            self.stats['sent'] += len(sent)
+            self.stats['retried'] += len(retries)
+            self.stats['dead'] += len(dead)
+        for post in dead:
+            logger.warning("Outbox post %s gave up: %s", post['id'], post['last_error'])
+
+    def _backoff(self, attempts: int) -> float:
+        """Full-jitter exponential backoff so retries from a failed burst spread out"""
+        ceiling = min(self.MAX_BACKOFF_SECONDS, self.BASE_BACKOFF_SECONDS * 2 ** max(0, attempts - 1))
+        return random.uniform(self.BASE_BACKOFF_SECONDS / 2, ceiling)
+
+    def _release_stale_leases(self):
+        """Return rows left in_flight by a crashed worker to the queue (at startup; _claim also reclaims them)"""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.LEASE_SECONDS)
+        try:
+            with unit_of_work():
+                result = db.session.execute(
+                    update(SocialPostOutbox)
+                    .where(SocialPostOutbox.status == 'in_flight', SocialPostOutbox.locked_at < cutoff)
+                    .values(status='pending', locked_at=None)
+                    .execution_options(synchronize_session=False)
+                )
+            if result.rowcount:
+                logger.info("Released %s stale outbox leases", result.rowcount)
+        except Exception as e:
+            logger.error("Failed to release stale outbox leases: %s", e)
+
+    def get_queue_depths(self) -> Dict[str, Dict[str, int]]:
+        """Row counts per platform and status"""
+        rows = db.session.execute(
+            select(SocialPostOutbox.platform, SocialPostOutbox.status, db.func.count())
+            .group_by(SocialPostOutbox.platform, SocialPostOutbox.status)
+        ).all()
+        depths: Dict[str, Dict[str, int]] = {}
+        for platform, status, count in rows:
+            depths.setdefault(platform, {})[status] = count
+        return depths
+
+
+# Global instance
+social_outbox = SocialOutbox()
@@ -0,0 +1,272 @@
+"""
+Compiled Social Post Templates
+Layouts and phrase pools are adapted per industry and platform once, when the
+registry is built, so rendering a post is a single format_map call. Length
+budgets are measured in grapheme clusters with emoji and wide characters
+weighted like Twitter/X counts them, and truncation never splits a cluster.
+"""
+
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+BASE_PLATFORM = 'base'
+ELLIPSIS = '…'
+
+# Literal substitutions baked into each platform's layouts and phrase pools
+PLATFORM_REPLACEMENTS = {
+    'linkedin': (('🔥', '💼'), ('🚀', '📈'))
+}
+
+HASHTAG_LIMITS = {'twitter': 5}
+DEFAULT_HASHTAG_LIMIT = 8
+
+# Full layouts per post type; every platform except Twitter/X uses these
+LAYOUTS = {
+    'conversation_highlight': """{hook}
+
+💬 "{quote}..."
+
+✅ {value_prop}
+🎯 AI experts discussing {topic_lower}
+⚡ Real-time insights about our services
+📞 {cta}
+
+{hashtags}""",
+    'summary': """{hook}
+
+🤖 Latest AI conversation: {topic}
+📊 {message_count} expert messages exchanged
+👥 {agent_count} AI specialists discussing our services
+⭐ {value_prop}
+
+Key highlights:
+🔧 Professional expertise and quality standards
+🏠 Customer-focused service delivery
+📈 Industry-leading solutions and results
+
+{cta}
+
+{hashtags}""",
+    'question_engagement': """{hook}
+
+❓ What matters most when choosing a {industry_lower} professional?
+
+Our AI experts just discussed:
+🎯 Quality materials and craftsmanship
+⚡ Emergency response capabilities
+🏆 Industry certifications and experience
+📞 Customer service excellence
+
+✅ {value_prop}
+
+Drop a comment - what's your top priority? 👇
+
+{cta}
+
+{hashtags}""",
+    'service_showcase': """{hook}
+
+🌟 Serving {location} with professional excellence!
+
+Why choose {business_name}:
+✅ {value_prop}
+🏆 Years of proven industry experience
+🔧 Quality materials and expert installation
+📞 Responsive customer service team
+
+{cta}
+
+{hashtags}"""
+}
+
+# Short-form layouts: hook, the first key point, and trimmed hashtags
+SHORT_LAYOUTS = {
+    'conversation_highlight': "{hook}\n✅ {value_prop}\n{hashtags}",
+    'summary': "{hook}\n{hashtags}",
+    'question_engagement': "{hook}\n🎯 Quality materials and craftsmanship\n{hashtags}",
+    'service_showcase': "{hook}\n✅ {value_prop}\n{hashtags}"
+}
+SHORT_FORM_PLATFORMS = {'twitter'}
+
+POOL_NAMES = ('opening_hooks', 'value_propositions', 'call_to_actions')
+
+_ZWJ = '\u200d'
+_KEYCAP = '\u20e3'
+_NON_ASCII_RUN = re.compile(r'[^\x00-\x7f]+')
+
+
+def _is_extender(char: str) -> bool:
+    """Code points that attach to the previous grapheme cluster"""
+    code = ord(char)
+    return (unicodedata.combining(char) != 0
+            or 0xFE00 <= code <= 0xFE0F        # variation selectors
+            or 0x1F3FB <= code <= 0x1F3FF      # skin tone modifiers
+            or 0xE0020 <= code <= 0xE007F      # tag sequences (subdivision flags)
+            or char == _KEYCAP
+            or unicodedata.category(char) in ('Mn', 'Me'))
+
+
+def _is_regional_indicator(char: str) -> bool:
+    return 0x1F1E6 <= ord(char) <= 0x1F1FF
+
+
+def grapheme_clusters(text: str) -> List[str]:
+    """Split text into user-perceived characters (emoji ZWJ sequences, flags, keycaps, combining marks)"""
+    clusters: List[str] = []
+    joined = False
+    for char in text:
+        if clusters and (joined or _is_extender(char) or char == _ZWJ):
+            clusters[-1] += char
+        elif (clusters and _is_regional_indicator(char) and len(clusters[-1]) == 1
+              and _is_regional_indicator(clusters[-1])):
+            clusters[-1] += char
+        else:
+            clusters.append(char)
+        joined = char == _ZWJ
+    return clusters
+
+
+def cluster_width(cluster: str) -> int:
+    """Weighted length: emoji and East Asian wide characters count double, as on Twitter/X"""
+    first = cluster[0]
+    code = ord(first)
+    if len(cluster) > 1 and any(ord(c) >= 0x1F000 or c == '\ufe0f' for c in cluster):
+        return 2
+    if code >= 0x1F000 or 0x2600 <= code <= 0x27BF or 0x2B00 <= code <= 0x2BFF:
+        return 2
+    if unicodedata.east_asian_width(first) in ('W', 'F'):
+        return 2
+    return 1
+
+
+def display_length(text: str) -> int:
+    """Weighted length; only the non-ASCII runs are segmented"""
+    if text.isascii():
+        return len(text)
+    length = len(text)
+    for match in _NON_ASCII_RUN.finditer(text):
+        start, run = match.start(), match.group()
+        if start and _is_extender(run[0]):
+            # Combining mark or keycap attached to the ASCII character before it
+            start, run = start - 1, text[start - 1] + run
+        length -= len(run)
+        length += sum(cluster_width(cluster) for cluster in grapheme_clusters(run))
+    return length
+
+
+def truncate_to_budget(text: str, budget: int, ellipsis: str = ELLIPSIS) -> str:
+    """Cut text to fit budget (weighted), ending on a cluster boundary with an ellipsis"""
+    if len(text) * 2 <= budget or display_length(text) <= budget:
+        return text
+    room = budget - display_length(ellipsis)
+    used = 0
+    kept = []
+    for cluster in grapheme_clusters(text):
+        width = cluster_width(cluster)
+        if used + width > room:
+            break
+        kept.append(cluster)
+        used += width
+    return ''.join(kept).rstrip() + ellipsis
+
+
+def dedupe_hashtags(tags: Iterable[str]) -> List[str]:
+    """Drop repeated hashtags (case-insensitive), keeping the first spelling"""
+    seen = set()
+    unique = []
+    for tag in tags:
+        key = tag.lower()
+        if tag and key not in seen:
+            seen.add(key)
+            unique.append(tag)
+    return unique
+
+
+def _adapt(text: str, platform: str) -> str:
+    for old, new in PLATFORM_REPLACEMENTS.get(platform, ()):
+        text = text.replace(old, new)
+    return text
+
+
+class TemplateRegistry:
+    """Per-industry, per-platform compiled layouts and phrase pools"""
+
+    def __init__(self, content_templates: Dict[str, Dict[str, Any]], platforms: Dict[str, Dict[str, Any]]):
+        self.content_templates = content_templates
+        self.budgets = {platform: config['max_chars'] for platform, config in platforms.items()}
+        self.platforms = tuple(platforms)
+        self._layouts: Dict[Tuple[str, str], str] = {}
+        self._pools: Dict[Tuple[str, str], Dict[str, Tuple[str, ...]]] = {}
+        self._hashtag_cache: Dict[tuple, Dict[str, str]] = {}
+
+        for platform in (BASE_PLATFORM,) + self.platforms:
+            layouts = SHORT_LAYOUTS if platform in SHORT_FORM_PLATFORMS else LAYOUTS
+            for post_type, layout in layouts.items():
+                self._layouts[(post_type, platform)] = _adapt(layout, platform)
+            for industry, templates in content_templates.items():
+                self._pools[(industry, platform)] = {
+                    name: tuple(_adapt(phrase, platform) for phrase in templates[name]) for name in POOL_NAMES
+                }
+
+    def industry_key(self, business) -> str:
+        return 'roofing' if 'roof' in (business.industry or '').lower() else 'general'
+
+    def pool_sizes(self, industry: str) -> Dict[str, int]:
+        return {name: len(self._pools[(industry, BASE_PLATFORM)][name]) for name in POOL_NAMES}
+
+    def hashtags(self, business, industry: str) -> Dict[str, str]:
+        """Deduplicated hashtag line per platform, cached per business"""
+        key = (business.id, business.name, business.location, industry)
+        cached = self._hashtag_cache.get(key)
+        if cached is not None:
+            return cached
+
+        templates = self.content_templates[industry]
+        categories = ['general', 'quality']
+        if business.location and 'new jersey' in business.location.lower():
+            categories.append('location')
+
+        tags = [f"#{business.name.replace(' ', '')}"]
+        for category in categories:
+            tags.extend(templates['hashtags'].get(category, []))
+        tags = dedupe_hashtags(tags)
+
+        cached = {platform: ' '.join(tags[:HASHTAG_LIMITS.get(platform, DEFAULT_HASHTAG_LIMIT)])
+                  for platform in (BASE_PLATFORM,) + self.platforms}
+        if len(self._hashtag_cache) > 10000:
+            self._hashtag_cache.clear()
+        self._hashtag_cache[key] = cached
+        return cached
+
+    def render(self, post_type: str, platform: str, industry: str, fields: Dict[str, Any],
+               choices: Dict[str, int], hashtags: Dict[str, str]) -> str:
+        """One post for one platform; choices index into the industry's phrase pools"""
+        pools = self._pools[(industry, platform)]
+        values = dict(fields,
+                      hook=pools['opening_hooks'][choices['opening_hooks']],
+                      value_prop=pools['value_propositions'][choices['value_propositions']],
+                      cta=pools['call_to_actions'][choices['call_to_actions']],
+                      hashtags=hashtags[platform])
+        content = self._layouts[(post_type, platform)].format_map(values).strip()
+
+        budget = self.budgets.get(platform)
+        # Every cluster weighs at most 2, so only measure posts that could be over budget
+        if budget and len(content) * 2 > budget and display_length(content) > budget:
+            # Keep the hashtag line intact and shorten the body in front of it
+            tag_line = hashtags[platform]
+            body = content[:-len(tag_line)].rstrip() if tag_line and content.endswith(tag_line) else content
+            tail = f"\n{tag_line}" if body is not content else ''
+            content = truncate_to_budget(body, budget - display_length(tail)) + tail
+        return content
+
+    def render_post(self, post_type: str, industry: str, fields: Dict[str, Any], choices: Dict[str, int],
+                    hashtags: Dict[str, str], platforms: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Base text plus every platform variant, in the shape generate_conversation_highlights returns"""
+        platforms = self.platforms if platforms is None else tuple(platforms)
+        return {
+            'type': post_type,
+            'content': self.render(post_type, BASE_PLATFORM, industry, fields, choices, hashtags),
+            'platform_content': {platform: self.render(post_type, platform, industry, fields, choices, hashtags)
+                                 for platform in platforms}
+        }
@@ -0,0 +1,211 @@
+"""
+Structured Logging Setup
+Configures the root logger once at start-up: per-module levels from config, JSON
+or text output, sampling for high-frequency messages, and a queue handler so the
+threads that log never block on (or pay for formatting of) log I/O.
+
+Configuration comes from environment variables, optionally overlaid by a JSON
+file named in LOG_CONFIG with the same keys in lowercase:
+    LOG_LEVEL=INFO
+    LOG_LEVELS=conversation_orchestrator=WARNING,sqlalchemy.engine=WARNING
+    LOG_FORMAT=json            (or text)
+    LOG_SAMPLING=conversation_orchestrator=0.1
+    LOG_QUEUE=1                (0 logs synchronously, e.g. for debugging)
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+DEFAULT_LEVELS = {
+    # Chatty third-party loggers stay quiet unless explicitly raised
+    'urllib3': 'WARNING',
+    'werkzeug': 'INFO',
+    'engineio': 'WARNING',
+    'socketio': 'WARNING',
+    'apscheduler': 'WARNING',
+    'httpx': 'WARNING'
+}
+
+# LogRecord attributes that are not user-supplied "extra" fields
+_RESERVED = set(logging.makeLogRecord({}).__dict__) | {'message', 'asctime', 'sample_rate'}
+
+_listener: Optional[QueueListener] = None
+_configured = False
+_lock = threading.Lock()
+
+
+def _parse_pairs(value: str) -> Dict[str, str]:
+    pairs = {}
+    for item in (value or '').split(','):
+        if '=' in item:
+            name, setting = item.split('=', 1)
+            pairs[name.strip()] = setting.strip()
+    return pairs
+
+
+def load_logging_config(environ=None) -> Dict[str, Any]:
+    """Settings from the environment, overlaid by the LOG_CONFIG JSON file if set"""
+    environ = os.environ if environ is None else environ
+    config = {
+        'level': environ.get('LOG_LEVEL', 'INFO'),
+        'levels': dict(DEFAULT_LEVELS, **_parse_pairs(environ.get('LOG_LEVELS', ''))),
+        'format': environ.get('LOG_FORMAT', 'json'),
+        'sampling': {name: float(rate) for name, rate in _parse_pairs(environ.get('LOG_SAMPLING', '')).items()},
+        'queue': environ.get('LOG_QUEUE', '1') == '1'
+    }
+
+    path = environ.get('LOG_CONFIG')
+    if path:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                overrides = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable LOG_CONFIG {path}: {e}", file=sys.stderr)
+        else:
+            for key in ('levels', 'sampling'):
+                config[key].update(overrides.pop(key, {}))
+            config.update(overrides)
+    return config
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, plus any extra= fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'thread': record.threadName
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps 1 in N records per (logger, message template) below WARNING.
+
+    Rates come from config per logger prefix, or per call via extra={'sample_rate': 0.01}.
+    Counting rather than random() keeps the output deterministic.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # Longest prefix first so 'a.b' overrides 'a'
+        self.rates = sorted(rates.items(), key=lambda item: -len(item[0]))
+        self._counts: Dict[tuple, int] = {}
+        self.dropped = 0
+
+    def _rate_for(self, name: str) -> float:
+        for prefix, rate in self.rates:
+            if name == prefix or name.startswith(prefix + '.'):
+                return rate
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = getattr(record, 'sample_rate', None)
+        if rate is None:
+            rate = self._rate_for(record.name)
+        if rate >= 1.0:
+            return True
+
+        key = (record.name, record.msg)
+        if len(self._counts) > 10000:
+            # Only eagerly formatted (f-string) messages can produce this many templates
+            self._counts.clear()
+        count = self._counts.get(key, 0)
+        self._counts[key] = count + 1
+        if count % max(1, round(1 / rate)) == 0:
+            record.sampled = rate
+            return True
+        self.dropped += 1
+        return False
+
+
+class InProcessQueueHandler(QueueHandler):
+    """Hands records to the listener thread as-is.
+
+    The stock prepare() formats the message in the calling thread so records can be
+    pickled; our queue never leaves the process, so formatting is deferred entirely.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging(config: Optional[Dict[str, Any]] = None, stream=None) -> Dict[str, Any]:
+    """Install handlers on the root logger (idempotent); returns the effective config"""
+    global _listener, _configured
+    with _lock:
+        if _configured:
+            return config or {}
+        config = config or load_logging_config()
+
+        output = logging.StreamHandler(stream or sys.stderr)
+        if config.get('format') == 'text':
+            output.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+        else:
+            output.setFormatter(JsonFormatter())
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.setLevel(config.get('level', 'INFO'))
+        for name, level in config.get('levels', {}).items():
+            logging.getLogger(name).setLevel(level)
+
+        if config.get('queue', True):
+            handler = InProcessQueueHandler(queue.SimpleQueue())
+            _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+            _listener.start()
+            atexit.register(shutdown_logging)
+        else:
+            handler = output
+
+        # Filters on the handler see records from every logger, unlike logger-level filters
+        handler.addFilter(SamplingFilter(config.get('sampling', {})))
+        root.addHandler(handler)
+        _configured = True
+        return config
+
+
+def _restart_listener_after_fork():
+    """The listener thread does not survive fork(); give each child process its own"""
+    global _listener
+    if _listener is not None:
+        # Records still queued at fork time belong to the parent, whose listener writes them
+        try:
+            while True:
+                _listener.queue.get_nowait()
+        except queue.Empty:
+            pass
+        _listener = QueueListener(_listener.queue, *_listener.handlers,
+                                  respect_handler_level=_listener.respect_handler_level)
+        _listener.start()
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_listener_after_fork)
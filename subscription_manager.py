@@ -3,10 +3,11 @@ Monthly Subscription Management System
 Handles monthly plans, conversation limits, and billing cycles
 """
 
-from datetime import datetime, timedelta
+from datetime import timedelta
 from typing import Dict, List, Optional
 from models import Business, Conversation
 from app import db
+from billing_cycle import billing_cycle, SubscriptionSnapshot, BILLING_CYCLE_DAYS, utcnow
 
 
 class SubscriptionManager:
@@ -50,14 +51,14 @@ class SubscriptionManager:
             return {'success': False, 'error': 'Invalid plan type'}
         
         plan = self.MONTHLY_PLANS[plan_type]
-        now = datetime.utcnow()
+        now = utcnow()
         
         # Update business subscription
         business.subscription_type = plan_type
         business.monthly_conversation_limit = plan['conversations_per_month']
         business.conversations_used_this_month = 0
         business.subscription_start_date = now
-        business.subscription_end_date = now + timedelta(days=30)
+        business.subscription_end_date = now + timedelta(days=BILLING_CYCLE_DAYS)
         business.auto_renew = True
         
         # For enterprise plans, also set unlimited flag
@@ -75,32 +76,29 @@ class SubscriptionManager:
             'next_billing_date': business.subscription_end_date
         }
     
-    def check_conversation_allowance(self, business_id: int) -> Dict[str, any]:
-        """Check if business can create a new conversation"""
-        business = Business.query.get(business_id)
-        if not business:
+    def check_conversation_allowance(self, business_id: int, snapshot: Optional[SubscriptionSnapshot] = None) -> Dict[str, any]:
+        """Check if business can create a new conversation (read-only, served from the snapshot cache)"""
+        snapshot = snapshot or billing_cycle.snapshot(business_id)
+        if not snapshot:
             return {'can_create': False, 'reason': 'Business not found'}
         
-        # Reset monthly counter if new billing cycle
-        self._reset_monthly_counter_if_needed(business)
-        
         # Check allowance based on subscription type
-        if business.subscription_type == 'credit':
+        if snapshot.subscription_type == 'credit':
             # Credit-based system
-            if business.is_unlimited or business.credits_remaining > 0:
-                return {'can_create': True, 'remaining': business.credits_remaining if not business.is_unlimited else 'unlimited'}
+            if snapshot.is_unlimited or snapshot.credits_remaining > 0:
+                return {'can_create': True, 'remaining': snapshot.credits_remaining if not snapshot.is_unlimited else 'unlimited'}
             else:
                 return {'can_create': False, 'reason': 'Insufficient credits'}
         
-        elif business.subscription_type in self.MONTHLY_PLANS:
-            plan = self.MONTHLY_PLANS[business.subscription_type]
+        elif snapshot.subscription_type in self.MONTHLY_PLANS:
+            plan = self.MONTHLY_PLANS[snapshot.subscription_type]
             
             # Unlimited plans
             if plan['conversations_per_month'] == -1:
                 return {'can_create': True, 'remaining': 'unlimited'}
             
-            # Limited monthly plans
-            used = business.conversations_used_this_month or 0
+            # Limited monthly plans; an expired cycle counts as rolled over even before the job runs
+            used = snapshot.effective_usage()
             remaining = plan['conversations_per_month'] - used
             
             if remaining > 0:
@@ -116,11 +114,14 @@ class SubscriptionManager:
         if not business:
             return False
         
-        allowance_check = self.check_conversation_allowance(business_id)
+        # Check against the row we are about to write (with any pending rollover applied), not a
+        # cached snapshot; a refusal leaves the row, and the caller's pending work, untouched
+        allowance_check = self.check_conversation_allowance(business_id, SubscriptionSnapshot.from_business(business))
         if not allowance_check['can_create']:
             return False
         
         # Deduct from appropriate system
+        self._rollover_if_expired(business)
         if business.subscription_type == 'credit':
             if not business.is_unlimited and business.credits_remaining > 0:
                 business.credits_remaining -= 1
@@ -131,43 +132,37 @@ class SubscriptionManager:
         db.session.commit()
         return True
     
-    def _reset_monthly_counter_if_needed(self, business: Business):
-        """Reset monthly conversation counter if billing cycle has renewed"""
-        if not business.subscription_end_date:
-            return
-        
-        now = datetime.utcnow()
-        
-        # If subscription has expired and auto-renew is enabled
-        if now > business.subscription_end_date and business.auto_renew:
+    def _rollover_if_expired(self, business: Business):
+        """Apply a pending rollover to a row being written (the scheduled job handles the rest)"""
+        now = utcnow()
+        if business.subscription_end_date and business.auto_renew and now > business.subscription_end_date:
             business.conversations_used_this_month = 0
             business.subscription_start_date = now
-            business.subscription_end_date = now + timedelta(days=30)
-            db.session.commit()
+            business.subscription_end_date = now + timedelta(days=BILLING_CYCLE_DAYS)
     
-    def get_subscription_status(self, business_id: int) -> Dict[str, any]:
+    def get_subscription_status(self, business_id: int, snapshot: Optional[SubscriptionSnapshot] = None) -> Dict[str, any]:
         """Get detailed subscription status for a business"""
-        business = Business.query.get(business_id)
-        if not business:
+        snapshot = snapshot or billing_cycle.snapshot(business_id)
+        if not snapshot:
             return {'error': 'Business not found'}
         
-        self._reset_monthly_counter_if_needed(business)
-        
         status = {
             'business_id': business_id,
-            'subscription_type': business.subscription_type,
+            'subscription_type': snapshot.subscription_type,
             'is_active': True
         }
         
-        if business.subscription_type == 'credit':
+        if snapshot.subscription_type == 'credit':
             status.update({
                 'system': 'credit-based',
-                'credits_remaining': business.credits_remaining,
-                'is_unlimited': business.is_unlimited
+                'credits_remaining': snapshot.credits_remaining,
+                'is_unlimited': snapshot.is_unlimited
             })
-        elif business.subscription_type in self.MONTHLY_PLANS:
-            plan = self.MONTHLY_PLANS[business.subscription_type]
-            used = business.conversations_used_this_month or 0
+        elif snapshot.subscription_type in self.MONTHLY_PLANS:
+            plan = self.MONTHLY_PLANS[snapshot.subscription_type]
+            now = utcnow()
+            used = snapshot.effective_usage(now)
+            cycle_start, cycle_end = snapshot.effective_cycle(now)
             
             status.update({
                 'system': 'monthly-subscription',
@@ -176,19 +171,37 @@ class SubscriptionManager:
                 'conversations_limit': plan['conversations_per_month'],
                 'conversations_used': used,
                 'conversations_remaining': 'unlimited' if plan['conversations_per_month'] == -1 else plan['conversations_per_month'] - used,
-                'billing_cycle_start': business.subscription_start_date,
-                'billing_cycle_end': business.subscription_end_date,
-                'auto_renew': business.auto_renew,
-                'days_until_renewal': (business.subscription_end_date - datetime.utcnow()).days if business.subscription_end_date else None
+                'billing_cycle_start': cycle_start,
+                'billing_cycle_end': cycle_end,
+                'auto_renew': snapshot.auto_renew,
+                'days_until_renewal': (cycle_end - now).days if cycle_end else None
             })
         
         return status
     
+    def get_upgrade_page_context(self, business_id: int) -> Optional[Dict[str, any]]:
+        """Everything the upgrade page renders, from a single Business query"""
+        business = Business.query.get(business_id)
+        if not business:
+            return None
+        
+        snapshot = billing_cycle.remember(SubscriptionSnapshot.from_business(business))
+        return {
+            'business': business,
+            'monthly_plans': self._display_plans,
+            'savings_calculations': self._upgrade_savings,
+            'subscription_status': self.get_subscription_status(business_id, snapshot)
+        }
+    
     def get_monthly_plans_for_display(self) -> List[Dict[str, any]]:
         """Get monthly plans formatted for display"""
+        return [dict(plan) for plan in self._display_plans]
+    
+    @classmethod
+    def _build_display_plans(cls) -> List[Dict[str, any]]:
         plans = []
         
-        for plan_id, plan_data in self.MONTHLY_PLANS.items():
+        for plan_id, plan_data in cls.MONTHLY_PLANS.items():
             display_plan = {
                 'id': plan_id,
                 'name': plan_data['name'],
@@ -206,8 +219,11 @@ class SubscriptionManager:
         """Calculate potential savings when upgrading to monthly plan"""
         if target_plan not in self.MONTHLY_PLANS:
             return {'error': 'Invalid plan'}
-        
-        plan = self.MONTHLY_PLANS[target_plan]
+        return dict(self._upgrade_savings[target_plan])
+    
+    @classmethod
+    def _build_upgrade_savings(cls, target_plan: str) -> Dict[str, any]:
+        plan = cls.MONTHLY_PLANS[target_plan]
         monthly_price = plan['price']
         conversations_included = plan['conversations_per_month']
         
@@ -228,4 +244,10 @@ class SubscriptionManager:
             'monthly_savings': monthly_savings,
             'annual_savings': annual_savings,
             'savings_percentage': int((monthly_savings / equivalent_credit_cost) * 100) if equivalent_credit_cost > 0 else 0
-        }
\ No newline at end of file
+        }
+
+
+# Plan-derived values are the same for every business
+SubscriptionManager._display_plans = SubscriptionManager._build_display_plans()
+SubscriptionManager._upgrade_savings = {plan_id: SubscriptionManager._build_upgrade_savings(plan_id)
+                                        for plan_id in SubscriptionManager.MONTHLY_PLANS}
@@ -0,0 +1,107 @@
+"""
+Cached System Statistics
+The public status endpoints are polled constantly, so their counts come from an
+in-memory snapshot refreshed by one combined query at most every few seconds
+(per process) instead of several COUNT(*) queries per request. Every response
+carries the snapshot's as-of time.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
+
+from sqlalchemy import func, select
+
+from app import db
+from db_routing import replica_router
+from models import Business, Conversation, ConversationMessage, ConversationMessageArchive, LiveConversationState
+
+logger = logging.getLogger(__name__)
+
+
+class SystemStatsService:
+    """Snapshot of platform-wide counts, refreshed lazily from a single query"""
+
+    def __init__(self, refresh_seconds: float = None):
+        if refresh_seconds is None:
+            refresh_seconds = float(os.environ.get('SYSTEM_STATS_REFRESH_SECONDS', '5'))
+        self.refresh_seconds = refresh_seconds
+        self._snapshot: Dict[str, Any] = {}
+        self._loaded_at = float('-inf')
+        self._lock = threading.Lock()
+        self.stats = {'refreshes': 0, 'served': 0}
+
+    def get(self) -> Dict[str, Any]:
+        """Current snapshot; at most one request per interval pays for the refresh"""
+        self.stats['served'] += 1
+        if time.monotonic() - self._loaded_at < self.refresh_seconds:
+            return self._snapshot
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock
+            if time.monotonic() - self._loaded_at >= self.refresh_seconds:
+                try:
+                    self._snapshot = self._load()
+                    self._loaded_at = time.monotonic()
+                except Exception as e:
+                    db.session.rollback()
+                    if not self._snapshot:
+                        raise
+                    logger.error("System stats refresh failed, serving previous snapshot: %s", e)
+        return self._snapshot
+
+    def invalidate(self):
+        self._loaded_at = float('-inf')
+
+    def _load(self) -> Dict[str, Any]:
+        now = datetime.now(timezone.utc)
+        # Stored timestamps are naive UTC on some rows, so compare against naive UTC like the old queries
+        cutoff = now.replace(tzinfo=None) - timedelta(hours=24)
+
+        def count(model, *criteria):
+            return select(func.count()).select_from(model).where(*criteria).scalar_subquery()
+
+        active = LiveConversationState.state == 'ACTIVE'
+        first_active_id = (select(LiveConversationState.id).where(active)
+                           .order_by(LiveConversationState.id).limit(1).scalar_subquery())
+        last_completed_id = (select(func.max(Conversation.id))
+                             .where(Conversation.status == 'completed').scalar_subquery())
+
+        # Already seconds stale by design, so any caught-up replica can answer
+        with replica_router.reads():
+            row = db.session.execute(select(
+                count(Conversation).label('total_conversations'),
+                count(ConversationMessage).label('live_messages'),
+                # Archived conversations keep their count in the archive row, not the hot table
+                select(func.coalesce(func.sum(ConversationMessageArchive.message_count), 0))
+                .scalar_subquery().label('archived_messages'),
+                count(Business).label('total_businesses'),
+                count(Conversation, Conversation.created_at >= cutoff).label('conversations_last_24h'),
+                count(LiveConversationState, active).label('active_conversations'),
+                select(LiveConversationState.messages_generated)
+                .where(LiveConversationState.id == first_active_id).scalar_subquery().label('active_messages_generated'),
+                select(LiveConversationState.total_messages)
+                .where(LiveConversationState.id == first_active_id).scalar_subquery().label('active_total_messages'),
+                # Summary column, recounted from the messages only for rows not yet backfilled
+                select(func.coalesce(
+                    Conversation.last_message_at,
+                    select(func.max(ConversationMessage.created_at))
+                    .where(ConversationMessage.conversation_id == last_completed_id).scalar_subquery()))
+                .where(Conversation.id == last_completed_id)
+                .scalar_subquery().label('last_completed_message_at')
+            )).one()
+
+        snapshot = dict(row._mapping)
+        snapshot['total_messages'] = snapshot.pop('live_messages') + snapshot.pop('archived_messages')
+        last_message_at = snapshot['last_completed_message_at']
+        if last_message_at is not None and last_message_at.tzinfo is None:
+            snapshot['last_completed_message_at'] = last_message_at.replace(tzinfo=timezone.utc)
+        snapshot['as_of'] = now
+        self.stats['refreshes'] += 1
+        return snapshot
+
+
+# Global instance
+system_stats = SystemStatsService()
@@ -0,0 +1,175 @@
+"""
+Template Precompilation and Fragment Cache
+Templates are compiled ahead of time into Python modules (one directory per
+template-source version) and loaded through a Jinja ModuleLoader, so a worker
+never parses template source. Immutable blocks - a stored message's card, the
+JSON-LD of a completed conversation - are rendered once and cached under
+(conversation_id, message_id, template version); editing any template changes
+the version and so retires every cached fragment.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from jinja2 import ChoiceLoader, ModuleLoader
+from jinja2.utils import htmlsafe_json_dumps
+from markupsafe import Markup
+
+logger = logging.getLogger(__name__)
+
+# Badge label and colour per agent type, as on the live feed
+AGENT_BADGES = {
+    'openai': ('GPT', 'success'),
+    'anthropic': ('CLD', 'primary'),
+    'perplexity': ('PPL', 'info'),
+    'gemini': ('GMI', 'warning')
+}
+DEFAULT_BADGE = ('AI', 'secondary')
+
+
+def template_version(template_folder: str) -> str:
+    """Digest of every template's path and source"""
+    digest = hashlib.sha1()
+    for directory, subdirectories, files in sorted(os.walk(template_folder)):
+        subdirectories.sort()
+        for name in sorted(files):
+            path = os.path.join(directory, name)
+            digest.update(os.path.relpath(path, template_folder).encode('utf-8'))
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+class PrecompiledLoader(ModuleLoader):
+    """ModuleLoader that can also list its templates, which precompiling and preloading need"""
+
+    def __init__(self, path: str, names):
+        super().__init__(path)
+        self.names = sorted(names)
+
+    def list_templates(self):
+        return list(self.names)
+
+
+class FragmentCache:
+    """LRU of rendered, immutable template fragments"""
+
+    def __init__(self, max_entries: int = 20000):
+        self.max_entries = max_entries
+        self.version = ''
+        self._fragments: 'OrderedDict[Hashable, Markup]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def get_or_render(self, key: Hashable, render: Callable[[], str]) -> Markup:
+        key = key + (self.version,)
+        with self._lock:
+            fragment = self._fragments.get(key)
+            if fragment is not None:
+                self._fragments.move_to_end(key)
+                self.stats['hits'] += 1
+                return fragment
+
+        # Rendered outside the lock; two threads racing on a miss produce identical output
+        fragment = Markup(render())
+        self.stats['misses'] += 1
+        with self._lock:
+            self._fragments[key] = fragment
+            while len(self._fragments) > self.max_entries:
+                self._fragments.popitem(last=False)
+        return fragment
+
+    def invalidate_conversation(self, conversation_id: int):
+        with self._lock:
+            for key in [key for key in self._fragments if key[0] == conversation_id]:
+                del self._fragments[key]
+
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
+
+
+class TemplateCache:
+    """Ahead-of-time compiled templates plus the fragment helpers exposed to Jinja"""
+
+    def __init__(self):
+        self.fragments = FragmentCache()
+        self.app = None
+        self.compiled_path: Optional[str] = None
+
+    def init_app(self, app, precompile: Optional[bool] = None):
+        self.app = app
+        self.fragments.version = template_version(os.path.join(app.root_path, app.template_folder))
+
+        if precompile is None:
+            precompile = os.environ.get('TEMPLATE_PRECOMPILE', '1') == '1' and not app.debug
+        if precompile:
+            try:
+                self.compiled_path = self.compile(app)
+                # Compiled modules first; anything missing falls through to the source loader
+                source_loader = app.jinja_env.loader
+                app.jinja_env.loader = ChoiceLoader([
+                    PrecompiledLoader(self.compiled_path, source_loader.list_templates()), source_loader])
+            except Exception as e:
+                logger.warning("Template precompilation failed, rendering from source: %s", e)
+
+        app.add_template_global(self.message_card)
+        app.add_template_global(self.message_preview)
+
+    def compile(self, app) -> str:
+        """Compile all templates for the current version (once per version, shared by workers)"""
+        root = os.environ.get('TEMPLATE_CACHE_DIR', os.path.join(app.instance_path, 'compiled_templates'))
+        target = os.path.join(root, self.fragments.version)
+        if os.path.isdir(target):
+            return target
+
+        os.makedirs(root, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='compiling-', dir=root)
+        app.jinja_env.compile_templates(staging, zip=None, ignore_errors=True,
+                                        log_function=lambda message: logger.debug(message))
+        try:
+            # Atomic publish; another process may have won the race with identical output
+            os.rename(staging, target)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+        logger.info("Compiled templates into %s", target)
+        return target
+
+    # ------------------------------------------------------------------
+    # Fragment helpers (template globals)
+    # ------------------------------------------------------------------
+
+    def message_card(self, message) -> Markup:
+        """Full card for one stored message; stored messages never change"""
+        return self.fragments.get_or_render(
+            (message.conversation_id, message.id, 'card'),
+            lambda: self._render('_message_card.html', message=message,
+                                 badge=AGENT_BADGES.get(message.ai_agent_type, DEFAULT_BADGE)))
+
+    def message_preview(self, message) -> Markup:
+        """Truncated one-line preview used by the conversation archive"""
+        return self.fragments.get_or_render(
+            (message.conversation_id, message.id, 'preview'),
+            lambda: self._render('_message_preview.html', message=message))
+
+    def structured_data(self, conversation, build: Callable[[], Dict[str, Any]]) -> Markup:
+        """JSON-LD for a conversation, cached once it is completed (and so immutable)"""
+        if conversation.status != 'completed':
+            return htmlsafe_json_dumps(build(), dumps=self.app.json.dumps)
+        business = conversation.business
+        # Business details are part of the block, so they are part of the key
+        key = (conversation.id, None, 'jsonld', business.name, business.website, business.description)
+        return self.fragments.get_or_render(key, lambda: htmlsafe_json_dumps(build(), dumps=self.app.json.dumps))
+
+    def _render(self, template_name: str, **context) -> str:
+        return self.app.jinja_env.get_template(template_name).render(**context)
+
+
+# Global instance
+template_cache = TemplateCache()
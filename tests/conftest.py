@@ -0,0 +1,41 @@
+"""
+Test configuration: the app is pointed at a throwaway SQLite database before it
+is imported (app.py configures itself at import time), and every test that
+asks for `database` starts from freshly created tables.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_DATA_DIR = tempfile.mkdtemp(prefix='visitorintel-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_DATA_DIR, 'app.db')}"
+os.environ['INVESTIGATION_PRECOMPUTE'] = '0'
+os.environ.setdefault('SESSION_SECRET', 'test-secret')
+
+from sqlalchemy import text  # noqa: E402
+
+from app import app, db, init_database  # noqa: E402
+
+
+@pytest.fixture
+def database():
+    """Empty schema (including the search tables and triggers) inside an app context"""
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+        with db.engine.begin() as connection:
+            for table in ('conversation_message_fts', 'conversation_fts'):
+                connection.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        init_database()
+        yield db
+        db.session.remove()
+
+
+@pytest.fixture
+def client(database):
+    return app.test_client()
@@ -0,0 +1,52 @@
+"""Code search: the indexed extension set is fixed and request input is validated"""
+
+import pytest
+
+from code_search_index import CodeSearchIndex, UnindexedExtension
+
+
+@pytest.fixture
+def index(tmp_path):
+    (tmp_path / 'app.py').write_text("def handle_request():\n    return 'ok'\n")
+    (tmp_path / 'notes.md').write_text("handle_request is the entry point\n")
+    (tmp_path / 'Makefile').write_text("handle_request:\n\techo run\n")
+    (tmp_path / 'secrets.cfg').write_text("handle_request_token = abc\n")
+    return CodeSearchIndex(tmp_path, ['.py', '.md'])
+
+
+def test_query_extensions_narrow_the_index(index):
+    assert [r['file'] for r in index.search('handle_request', ['.py'])] == ['app.py']
+    assert [r['file'] for r in index.search('handle_request', '.md')] == ['notes.md']
+    assert {r['file'] for r in index.search('handle_request')} == {'app.py', 'notes.md'}
+
+
+@pytest.mark.parametrize('extensions', [['.cfg'], [''], '.cfg'])
+def test_unindexed_extensions_are_refused_without_widening(index, extensions):
+    index.refresh(force=True)
+    with pytest.raises(UnindexedExtension):
+        index.search('handle_request', extensions)
+
+    assert index.extensions == {'.py', '.md'}
+    assert sorted(index._files) == ['app.py', 'notes.md']
+
+
+@pytest.mark.parametrize('payload', [
+    {'search_term': 'def ', 'max_results': 'lots'},
+    {'search_term': 'def ', 'max_results': -1},
+    {'search_term': 'def ', 'extensions': ['']},
+    {'search_term': 'def ', 'extensions': {'py': True}},
+    {'search_term': 'def ', 'extensions': ['.cfg']},
+])
+def test_search_route_rejects_bad_input(client, payload):
+    response = client.post('/ai-api/search-files', json=payload)
+
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_search_route_accepts_a_single_extension_string(client):
+    response = client.post('/ai-api/search-files',
+                           json={'search_term': 'class CodeSearchIndex', 'extensions': '.py', 'max_results': '5'})
+
+    assert response.status_code == 200
+    assert any(r['file'] == 'code_search_index.py' for r in response.get_json()['results'])
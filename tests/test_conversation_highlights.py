@@ -0,0 +1,45 @@
+"""Highlight precomputation: concurrent writers converge on one set of variants"""
+
+from app import db
+from conversation_highlights import conversation_highlights
+from conversation_persistence import persistence_service
+from models import Business, ConversationHighlight
+
+
+def _conversation():
+    business = Business(name="Perfect Roofing Team", location="Lodi, New Jersey")
+    db.session.add(business)
+    db.session.commit()
+    conversation_id, _ = persistence_service.save_conversation(
+        business.id, "Storm damage roof repair",
+        [('SEO AI Specialist', 'anthropic', "Storm damage roof repair in North Jersey"),
+         ('Local Customer', 'openai', "How fast can you get a crew out after a storm?")])
+    return conversation_id
+
+
+def test_precompute_over_existing_rows_returns_stored_highlights(database):
+    conversation_id = _conversation()
+    first = conversation_highlights.precompute([conversation_id])
+    stored = ConversationHighlight.query.count()
+    assert first[conversation_id]
+
+    # The completion job already wrote the variants when a lazy read precomputes the same conversation
+    second = conversation_highlights.precompute([conversation_id])
+
+    assert second == first
+    assert ConversationHighlight.query.count() == stored
+    assert conversation_highlights.get_highlights([conversation_id]) == first
+
+
+def test_precompute_drops_variants_it_no_longer_produces(database):
+    conversation_id = _conversation()
+    conversation_highlights.precompute([conversation_id])
+    stale = ConversationHighlight(conversation_id=conversation_id, post_type='retired_type', platform='base',
+                                  position=99, content="old template", seed=conversation_id)
+    db.session.add(stale)
+    db.session.commit()
+
+    highlights = conversation_highlights.precompute([conversation_id])
+
+    assert 'retired_type' not in {post['type'] for post in highlights[conversation_id]}
+    assert ConversationHighlight.query.filter_by(post_type='retired_type').count() == 0
@@ -0,0 +1,44 @@
+"""Keyset paging across tied scores, and snippet escaping, for /api/search"""
+
+from app import db
+from conversation_persistence import persistence_service
+from models import Business
+
+
+def _seed(messages):
+    business = Business(name="Perfect Roofing Team", location="Lodi, New Jersey")
+    db.session.add(business)
+    db.session.commit()
+    _, message_ids = persistence_service.save_conversation(
+        business.id, "Storm damage roof repair", [('SEO AI Specialist', 'anthropic', content) for content in messages])
+    return message_ids
+
+
+def test_pages_through_tied_scores_without_skipping_or_repeating(client):
+    message_ids = _seed(["Storm damage roof repair in North Jersey"] * 7)
+
+    seen, scores, cursor = [], set(), None
+    while True:
+        url = '/api/search?q=roof&limit=2' + (f'&cursor={cursor}' if cursor else '')
+        page = client.get(url).get_json()
+        assert page['success']
+        seen += [result['message_id'] for result in page['results']]
+        scores |= {result['score'] for result in page['results']}
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+
+    assert len(scores) == 1, "every row should tie, so each page boundary falls inside a tie"
+    assert len(seen) == len(set(seen))
+    assert sorted(seen) == sorted(message_ids)
+
+
+def test_snippet_escapes_message_content(client):
+    _seed(["<script>alert('owned')</script> Our roof inspections are free <b>today</b>"])
+
+    result = client.get('/api/search?q=roof').get_json()['results'][0]
+
+    assert '<script>' not in result['snippet']
+    assert '<b>' not in result['snippet']
+    assert '&lt;script&gt;' in result['snippet']
+    assert '<mark>roof</mark>' in result['snippet']
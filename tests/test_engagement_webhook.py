@@ -0,0 +1,95 @@
+"""Engagement webhook: signature enforcement, input validation, and post ownership"""
+
+import hashlib
+import hmac
+import json
+
+import pytest
+
+from app import db
+from models import Business, EngagementEvent, SocialMediaPost
+
+SECRET = 'webhook-test-secret'
+
+
+@pytest.fixture
+def businesses(database):
+    ours = Business(name="Perfect Roofing Team", location="Lodi, New Jersey")
+    theirs = Business(name="Garden State Gutters", location="Newark, New Jersey")
+    db.session.add_all([ours, theirs])
+    db.session.commit()
+    post = SocialMediaPost(business_id=ours.id, platform='twitter', content="Free roof inspections",
+                           post_type='auto', status='posted')
+    db.session.add(post)
+    db.session.commit()
+    return ours.id, theirs.id, post.id
+
+
+def deliver(client, events, secret=SECRET):
+    body = json.dumps({'events': events}).encode()
+    headers = {}
+    if secret:
+        headers['X-Signature'] = 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return client.post('/webhooks/social/twitter', data=body, content_type='application/json', headers=headers)
+
+
+def test_rejected_when_secret_is_not_configured(client, businesses, monkeypatch):
+    monkeypatch.delenv('SOCIAL_WEBHOOK_SECRET', raising=False)
+    ours, _, _ = businesses
+
+    response = deliver(client, [{'business_id': ours, 'event_type': 'like'}], secret=None)
+
+    assert response.status_code == 503
+    assert EngagementEvent.query.count() == 0
+
+
+def test_signed_delivery_is_stored(client, businesses, monkeypatch):
+    monkeypatch.setenv('SOCIAL_WEBHOOK_SECRET', SECRET)
+    ours, _, post_id = businesses
+
+    response = deliver(client, [{'business_id': ours, 'post_id': post_id, 'event_type': 'like', 'count': '2'}])
+
+    assert response.status_code == 200
+    assert response.get_json()['stored'] == 1
+    assert db.session.get(SocialMediaPost, post_id).engagement_count == 2
+
+
+def test_bad_signature_is_rejected(client, businesses, monkeypatch):
+    monkeypatch.setenv('SOCIAL_WEBHOOK_SECRET', SECRET)
+    ours, _, _ = businesses
+
+    assert deliver(client, [{'business_id': ours, 'event_type': 'like'}], secret='wrong').status_code == 401
+
+
+@pytest.mark.parametrize('event', [
+    'like',
+    {'event_type': 'like', 'count': 'many'},
+    {'event_type': 'like', 'count': 2.5},
+    {'event_type': 'like', 'count': 0},
+    {'event_type': 'like', 'occurred_at': 'yesterday'},
+    {'event_type': 'like', 'occurred_at': 12345},
+    {'event_type': 'like', 'post_id': 'abc'},
+    {'event_type': 'poke'},
+])
+def test_malformed_event_is_a_bad_request(client, businesses, monkeypatch, event):
+    monkeypatch.setenv('SOCIAL_WEBHOOK_SECRET', SECRET)
+    ours, _, _ = businesses
+    if isinstance(event, dict):
+        event = {'business_id': ours, **event}
+
+    response = deliver(client, [event])
+
+    assert response.status_code == 400
+    assert EngagementEvent.query.count() == 0
+
+
+def test_post_of_another_business_is_rejected(client, businesses, monkeypatch):
+    monkeypatch.setenv('SOCIAL_WEBHOOK_SECRET', SECRET)
+    _, theirs, post_id = businesses
+
+    response = deliver(client, [{'business_id': theirs, 'post_id': post_id, 'event_type': 'like'}])
+
+    assert response.status_code == 400
+    assert 'does not belong' in response.get_json()['error']
+    assert EngagementEvent.query.count() == 0
+    assert not db.session.get(SocialMediaPost, post_id).engagement_count
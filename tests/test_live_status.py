@@ -0,0 +1,59 @@
+"""Live status endpoints report the conversation orchestrator's state"""
+
+from datetime import datetime, timedelta, timezone
+
+from app import db
+from conversation_orchestrator import ConversationOrchestrator
+from models import Business, LiveConversationState
+
+
+def add_business(name):
+    business = Business(name=name, location="Lodi, New Jersey")
+    db.session.add(business)
+    db.session.commit()
+    return business
+
+
+def test_idle_when_no_business_is_live(database):
+    state = ConversationOrchestrator().get_current_state()
+
+    assert state['status'] == 'IDLE'
+    assert state['active_conversations_count'] == 0
+
+
+def test_reports_the_active_business_else_the_next_to_start(database):
+    orchestrator = ConversationOrchestrator()
+    soon, later = add_business("Perfect Roofing Team"), add_business("Garden State Gutters")
+    orchestrator.enable_business(later.id, start_in_seconds=600)
+    orchestrator.enable_business(soon.id, start_in_seconds=60)
+
+    waiting = orchestrator.get_current_state()
+
+    assert waiting['status'] == 'WAITING'
+    assert waiting['business_id'] == soon.id
+    assert 0 < waiting['seconds_until_next'] <= 60
+    assert waiting['next_conversation_time'] == waiting['next_event_time']
+
+    live = LiveConversationState.query.filter_by(business_id=later.id).one()
+    live.state = 'ACTIVE'
+    live.conversation_started_at = datetime.now(timezone.utc) - timedelta(seconds=90)
+    live.messages_generated = 2
+    db.session.commit()
+
+    active = orchestrator.get_current_state()
+
+    assert active['status'] == 'ACTIVE'
+    assert active['business_id'] == later.id
+    assert active['active_conversations_count'] == 1
+    assert active['elapsed_seconds'] >= 90
+
+
+def test_system_status_reads_the_orchestrator(client):
+    business = add_business("Perfect Roofing Team")
+    ConversationOrchestrator().enable_business(business.id, start_in_seconds=60)
+
+    status = client.get('/api/system-status').get_json()
+
+    assert status['conversation_status'] == 'waiting'
+    assert status['conversation_active'] is False
+    assert status['next_conversation_time'] is not None
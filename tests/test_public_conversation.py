@@ -0,0 +1,29 @@
+"""Public conversation page: message count and JSON-LD structured data"""
+
+import json
+import re
+
+from app import db
+from conversation_persistence import persistence_service
+from models import Business
+
+
+def test_structured_data_carries_the_full_first_answer(client):
+    business = Business(name="Perfect Roofing Team", location="Lodi, New Jersey")
+    db.session.add(business)
+    db.session.commit()
+    answer = "Storm damage roof repair starts with a full inspection. " * 20
+    conversation_id, _ = persistence_service.save_conversation(
+        business.id, "Storm damage roof repair",
+        [('SEO AI Specialist', 'anthropic', answer), ('Local Customer', 'openai', "How fast can you come out?")])
+
+    response = client.get(f'/public/conversation/{conversation_id}')
+
+    assert response.status_code == 200
+    page = response.get_data(as_text=True)
+    block = re.search(r'<script type="application/ld\+json">(.*?)</script>', page, re.S).group(1)
+    question = json.loads(block)['mainEntity']
+    assert len(answer) > 500
+    assert question['acceptedAnswer']['text'] == answer
+    assert question['answerCount'] == 2
+    assert '2 Messages' in page
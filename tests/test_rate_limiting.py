@@ -0,0 +1,33 @@
+"""Rate limiter client identification: X-Forwarded-For is only trusted behind a configured proxy"""
+
+import pytest
+from flask import request
+
+from app import app
+from rate_limiting import RateLimiter
+
+PEER = '203.0.113.9'
+
+
+def client_address(monkeypatch, hops, forwarded_for=None):
+    if hops is None:
+        monkeypatch.delenv('RATE_LIMIT_PROXY_HOPS', raising=False)
+    else:
+        monkeypatch.setenv('RATE_LIMIT_PROXY_HOPS', str(hops))
+    headers = {'X-Forwarded-For': forwarded_for} if forwarded_for else {}
+    with app.test_request_context('/', headers=headers, environ_base={'REMOTE_ADDR': PEER}):
+        return RateLimiter().client_address(request)
+
+
+@pytest.mark.parametrize('forwarded_for', [None, '127.0.0.1', '198.51.100.1, 198.51.100.2'])
+def test_without_a_proxy_the_peer_address_is_used(monkeypatch, forwarded_for):
+    assert client_address(monkeypatch, None, forwarded_for) == PEER
+
+
+def test_behind_one_proxy_the_address_it_appended_is_used(monkeypatch):
+    # The client spoofed 127.0.0.1; the proxy appended the address it actually saw
+    assert client_address(monkeypatch, 1, '127.0.0.1, 198.51.100.7') == '198.51.100.7'
+
+
+def test_behind_a_proxy_without_the_header_the_peer_address_is_used(monkeypatch):
+    assert client_address(monkeypatch, 1) == PEER
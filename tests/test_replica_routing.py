@@ -0,0 +1,100 @@
+"""Replica routing against two SQLite files standing in for a primary and its replica"""
+
+import pytest
+from flask import Flask, jsonify
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import select
+from sqlalchemy.orm import DeclarativeBase
+
+from db_routing import STICKY_COOKIE, RoutingSession, replica_reads, replica_router
+
+
+def make_app(tmp_path, monkeypatch, replica_url=None):
+    """A small app with the production session class, routed by the global replica_router"""
+    class Base(DeclarativeBase):
+        pass
+
+    db = SQLAlchemy(model_class=Base, session_options={'class_': RoutingSession})
+
+    class Note(db.Model):
+        __tablename__ = 'note'
+        id = db.Column(db.Integer, primary_key=True)
+        body = db.Column(db.String(100), nullable=False)
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'primary.db'}"
+    app.config['SQLALCHEMY_BINDS'] = {'replica_1': replica_url or f"sqlite:///{tmp_path / 'replica.db'}"}
+    db.init_app(app)
+
+    # Point the global router (which RoutingSession consults) at this app for the test only
+    for name, value in (('db', None), ('names', []), ('_lag', {}), ('_checked_at', {}),
+                        ('stats', {'replica': 0, 'primary_fallback': 0, 'sticky': 0})):
+        monkeypatch.setattr(replica_router, name, value)
+    replica_router.init_app(app, db)
+
+    # Each database says where it is, so a response shows which one served it
+    with app.app_context():
+        db.create_all(bind_key=None)
+        db.session.add(Note(body='primary'))
+        db.session.commit()
+        if replica_url is None:
+            db.metadata.create_all(db.engines['replica_1'])
+            with db.engines['replica_1'].begin() as connection:
+                connection.execute(Note.__table__.insert(), {'body': 'replica'})
+
+    @app.route('/notes')
+    @replica_reads
+    def notes():
+        return jsonify(db.session.scalars(select(Note.body).order_by(Note.id)).all())
+
+    @app.route('/notes/locked')
+    @replica_reads
+    def locked_notes():
+        return jsonify(db.session.scalars(select(Note.body).order_by(Note.id).with_for_update()).all())
+
+    @app.route('/notes', methods=['POST'])
+    def add_note():
+        db.session.add(Note(body='written'))
+        db.session.commit()
+        return jsonify(db.session.scalars(select(Note.body).order_by(Note.id)).all())
+
+    return app
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    return make_app(tmp_path, monkeypatch)
+
+
+def test_replica_reads_get_is_served_by_the_replica(app):
+    assert app.test_client().get('/notes').get_json() == ['replica']
+    assert replica_router.stats['replica'] == 1
+
+
+def test_writes_and_locking_reads_go_to_the_primary(app):
+    client = app.test_client()
+
+    assert client.get('/notes/locked').get_json() == ['primary']
+    assert client.post('/notes').get_json() == ['primary', 'written']
+    # The write landed on the primary only
+    assert app.test_client().get('/notes').get_json() == ['replica']
+
+
+def test_client_that_wrote_is_pinned_to_the_primary(app):
+    writer = app.test_client()
+
+    response = writer.post('/notes')
+
+    assert STICKY_COOKIE in response.headers.get('Set-Cookie', '')
+    assert writer.get('/notes').get_json() == ['primary', 'written']
+    assert replica_router.stats['sticky'] == 1
+    # Other clients still read the replica
+    assert app.test_client().get('/notes').get_json() == ['replica']
+
+
+def test_unreachable_replica_falls_back_to_the_primary(tmp_path, monkeypatch):
+    app = make_app(tmp_path, monkeypatch, replica_url=f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+
+    assert app.test_client().get('/notes').get_json() == ['primary']
+    assert replica_router.stats['primary_fallback'] == 1
+    assert replica_router.lags() == {'replica_1': None}
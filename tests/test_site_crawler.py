@@ -0,0 +1,195 @@
+"""Site crawler against local fixture websites: revalidation, robots.txt, size caps and
+redirects; an unreachable robots.txt never empties the page store, and reads never crawl inline"""
+
+import importlib.util
+import os
+import socket
+import time
+from unittest import mock
+
+import pytest
+
+from app import db
+from models import Business, BusinessPage
+from site_crawler import SiteCrawler
+
+
+@pytest.fixture
+def unreachable_website():
+    # A port nothing listens on, so robots.txt fails with a connection error
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    return f"http://127.0.0.1:{port}/"
+
+
+@pytest.fixture
+def business(database, unreachable_website):
+    business = Business(name="Perfect Roofing Team", website=unreachable_website)
+    db.session.add(business)
+    db.session.commit()
+    db.session.add(BusinessPage(business_id=business.id, url=f"{unreachable_website}services", path='/services',
+                                title="Services", text="Storm damage roof repair"))
+    db.session.commit()
+    return business
+
+
+def test_unreachable_site_keeps_its_pages(business):
+    crawler = SiteCrawler()
+
+    counts = crawler.crawl_businesses([business.id])
+
+    assert counts['sites_failed'] == 1
+    assert counts['blocked'] == 0
+    db.session.expire_all()
+    assert BusinessPage.query.filter_by(business_id=business.id).count() == 1
+
+
+def test_page_paths_queues_the_first_crawl(business, monkeypatch):
+    crawler = SiteCrawler()
+    BusinessPage.query.delete()
+    db.session.commit()
+    crawled = []
+    monkeypatch.setattr(crawler, 'crawl_businesses', lambda business_ids: crawled.append(business_ids))
+
+    assert crawler.page_paths(business.website) == []
+    crawler._executor.shutdown(wait=True)
+
+    assert crawled == [[business.id]]
+    # Asking again soon after does not queue another crawl
+    assert crawler.crawl_async(business.id) is None
+
+
+def load_bench():
+    """The benchmark's fixture website (FixtureSite + serve), without its environment defaults"""
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks',
+                        'bench_site_crawler.py')
+    spec = importlib.util.spec_from_file_location('bench_site_crawler', path)
+    module = importlib.util.module_from_spec(spec)
+    with mock.patch.dict(os.environ):
+        spec.loader.exec_module(module)
+    return module
+
+
+bench = load_bench()
+
+
+@pytest.fixture
+def serve_site():
+    servers = []
+
+    def start(name="Perfect Roofing Team", pages=5):
+        site = bench.FixtureSite(name, pages)
+        server = bench.serve(site)
+        servers.append(server)
+        site.origin = f"http://127.0.0.1:{server.server_address[1]}"
+        return site
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def site(serve_site):
+    return serve_site()
+
+
+@pytest.fixture
+def site_business(database, site):
+    business = Business(name=site.name, website=f"{site.origin}/")
+    db.session.add(business)
+    db.session.commit()
+    return business
+
+
+@pytest.fixture
+def crawler():
+    crawler = SiteCrawler()
+    crawler.max_bytes = 32 * 1024
+    return crawler
+
+
+def stored_pages(business):
+    db.session.expire_all()
+    return {page.path: page for page in BusinessPage.query.filter_by(business_id=business.id)}
+
+
+def test_recrawl_revalidates_then_updates_and_drops_disallowed_pages(site, site_business, crawler):
+    first = crawler.crawl_businesses([site_business.id])
+
+    pages = stored_pages(site_business)
+    assert sorted(pages) == ['/', '/huge', '/page/0', '/page/1', '/page/2', '/page/3', '/page/4']
+    assert first['updated'] == 7
+    assert first['blocked'] == 1
+    assert site.hits.get('/private/admin') is None
+
+    second = crawler.crawl_businesses([site_business.id])
+
+    assert second['not_modified'] == 7
+    assert second['updated'] == second['bytes_downloaded'] == 0
+    assert second['bytes_saved'] == sum(page.content_bytes for page in pages.values())
+
+    site.versions['/page/1'] += 1
+    third = crawler.crawl_businesses([site_business.id])
+
+    assert third['updated'] == 1
+    assert third['not_modified'] == 6
+    assert 'revision 2' in stored_pages(site_business)['/page/1'].text
+
+    site.disallowed.append('/page/2')
+    fourth = crawler.crawl_businesses([site_business.id])
+
+    # The home page revalidated (304), so /private/admin is not rediscovered this round
+    assert fourth['blocked'] == 1
+    assert '/page/2' not in stored_pages(site_business)
+
+
+def test_crawl_delay_spaces_requests(site, site_business, crawler):
+    site.crawl_delay = 1  # RobotFileParser only understands whole seconds
+    crawler.max_pages = 3
+
+    started = time.monotonic()
+    counts = crawler.crawl_businesses([site_business.id])
+
+    assert counts['updated'] == 3
+    # Each fetch waits out the previous one's delay, despite four workers per host
+    assert time.monotonic() - started >= 2
+
+
+def test_pages_over_max_bytes_are_truncated(site, site_business, crawler):
+    counts = crawler.crawl_businesses([site_business.id])
+
+    huge = stored_pages(site_business)['/huge']
+    assert counts['truncated'] == 1
+    assert huge.truncated
+    assert huge.content_bytes == crawler.max_bytes
+
+
+def test_gone_and_blocked_pages_are_deleted(site, site_business, crawler):
+    crawler.crawl_businesses([site_business.id])
+    del site.versions['/page/4']
+    site.disallowed.append('/huge')
+
+    counts = crawler.crawl_businesses([site_business.id])
+
+    assert counts['gone'] == 1
+    assert counts['blocked'] == 1
+    assert sorted(stored_pages(site_business)) == ['/', '/page/0', '/page/1', '/page/2', '/page/3']
+
+
+def test_off_site_redirect_is_an_error_and_keeps_the_stored_page(serve_site, site, site_business, crawler):
+    elsewhere = serve_site("Garden State Gutters")
+    site.redirects['/moved'] = f"{elsewhere.origin}/page/0"
+    db.session.add(BusinessPage(business_id=site_business.id, url=f"{site.origin}/moved", path='/moved',
+                                title="Moved", text="Seamless gutter installation"))
+    db.session.commit()
+
+    counts = crawler.crawl_businesses([site_business.id])
+
+    pages = stored_pages(site_business)
+    assert counts['errors'] == 1
+    assert elsewhere.hits.get('/page/0') == 1
+    assert pages['/moved'].text == "Seamless gutter installation"
+    assert all(page.url.startswith(site.origin) for page in pages.values())
@@ -0,0 +1,208 @@
+"""Outbox dispatch against stub platform adapters: publish, backoff, dead-letter, idempotency"""
+
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+
+from app import db
+from models import Business, SocialMediaPost, SocialPostOutbox
+from social_outbox import PermanentPublishError, SocialOutbox, StubPlatformAdapter, TransientPublishError
+
+PLATFORM = 'facebook'
+
+
+class FlakyAdapter(StubPlatformAdapter):
+    """Fails the first `failures` publishes (every one when None), then behaves like the stub"""
+
+    def __init__(self, failures=None, error=TransientPublishError):
+        super().__init__(PLATFORM)
+        self.failures = failures
+        self.error = error
+
+    def publish(self, post):
+        if self.failures is None or self.calls < self.failures:
+            self.calls += 1
+            raise self.error(f"{PLATFORM} returned 503")
+        return super().publish(post)
+
+
+@pytest.fixture
+def business(database):
+    business = Business(name="Perfect Roofing Team", location="Lodi, New Jersey")
+    db.session.add(business)
+    db.session.commit()
+    return business
+
+
+def make_outbox(adapter):
+    # A bucket this large never makes the test wait
+    return SocialOutbox(adapters={PLATFORM: adapter}, rate_limits={PLATFORM: (1000.0, 1000)})
+
+
+def enqueue(outbox, business, content="Storm season is here - book a free roof inspection"):
+    return outbox.enqueue_many([{'business_id': business.id, 'platform': PLATFORM, 'content': content,
+                                 'post_type': 'highlight', 'scheduled_time': datetime.now(timezone.utc)}])
+
+
+def outbox_row():
+    db.session.expire_all()
+    return SocialPostOutbox.query.one()
+
+
+def make_due():
+    db.session.execute(update(SocialPostOutbox).values(next_attempt_at=datetime.now(timezone.utc) - timedelta(seconds=1)))
+    db.session.commit()
+
+
+def test_enqueue_then_publish(business):
+    adapter = StubPlatformAdapter(PLATFORM)
+    outbox = make_outbox(adapter)
+
+    assert enqueue(outbox, business) == 1
+    assert outbox.dispatch_once(PLATFORM) == 1
+
+    row = outbox_row()
+    assert row.status == 'sent'
+    assert row.attempts == 1
+    assert row.external_id == adapter.published[row.idempotency_key]
+    assert SocialMediaPost.query.filter_by(business_id=business.id, platform=PLATFORM, status='posted').count() == 1
+    assert outbox.stats['sent'] == 1
+
+
+def test_worker_thread_dispatches_without_an_app_context(business):
+    adapter = StubPlatformAdapter(PLATFORM)
+    outbox = make_outbox(adapter)
+    enqueue(outbox, business)
+    dispatched = []
+
+    # Worker threads have no app context of their own; claim and record open their own units of work
+    worker = threading.Thread(target=lambda: dispatched.append(outbox.dispatch_once(PLATFORM)))
+    worker.start()
+    worker.join()
+
+    assert dispatched == [1]
+    assert outbox_row().status == 'sent'
+
+
+def test_adapter_error_is_retried_with_backoff(business):
+    adapter = FlakyAdapter(failures=1)
+    outbox = make_outbox(adapter)
+    enqueue(outbox, business)
+
+    before = datetime.now(timezone.utc).replace(tzinfo=None)
+    outbox.dispatch_once(PLATFORM)
+
+    row = outbox_row()
+    assert row.status == 'pending'
+    assert row.attempts == 1
+    assert '503' in row.last_error
+    delay = (row.next_attempt_at - before).total_seconds()
+    assert outbox.BASE_BACKOFF_SECONDS / 2 <= delay <= outbox.BASE_BACKOFF_SECONDS + 1
+    # Not due yet, so an immediate pass leaves it alone
+    assert outbox.dispatch_once(PLATFORM) == 0
+
+    make_due()
+    outbox.dispatch_once(PLATFORM)
+
+    row = outbox_row()
+    assert row.status == 'sent'
+    assert row.attempts == 2
+    assert row.last_error is None
+    assert outbox.stats == {'enqueued': 1, 'sent': 1, 'retried': 1, 'dead': 0}
+
+
+def test_backoff_grows_and_is_capped():
+    outbox = make_outbox(StubPlatformAdapter(PLATFORM))
+    ceilings = [max(outbox._backoff(attempts) for _ in range(200)) for attempts in (1, 3, 20)]
+    assert ceilings[0] <= outbox.BASE_BACKOFF_SECONDS
+    assert outbox.BASE_BACKOFF_SECONDS < ceilings[1] <= outbox.BASE_BACKOFF_SECONDS * 4
+    assert ceilings[2] <= outbox.MAX_BACKOFF_SECONDS
+
+
+def test_dead_lettered_after_max_attempts(business):
+    adapter = FlakyAdapter()
+    outbox = make_outbox(adapter)
+    outbox.MAX_ATTEMPTS = 3
+    enqueue(outbox, business)
+
+    for attempt in range(1, outbox.MAX_ATTEMPTS + 1):
+        outbox.dispatch_once(PLATFORM)
+        row = outbox_row()
+        assert row.attempts == attempt
+        assert row.status == ('dead' if attempt == outbox.MAX_ATTEMPTS else 'pending')
+        make_due()
+
+    assert outbox.dispatch_once(PLATFORM) == 0
+    assert adapter.calls == outbox.MAX_ATTEMPTS
+    assert SocialMediaPost.query.count() == 0
+    assert outbox.stats['dead'] == 1
+
+
+def test_permanent_error_is_dead_lettered_at_once(business):
+    outbox = make_outbox(FlakyAdapter(error=PermanentPublishError))
+    enqueue(outbox, business)
+
+    outbox.dispatch_once(PLATFORM)
+
+    row = outbox_row()
+    assert row.status == 'dead'
+    assert row.attempts == 1
+
+
+def test_republish_after_lost_result_is_idempotent(business, monkeypatch):
+    adapter = StubPlatformAdapter(PLATFORM)
+    outbox = make_outbox(adapter)
+    enqueue(outbox, business)
+    # Re-enqueueing the same slot is a no-op
+    assert enqueue(outbox, business) == 0
+
+    # The platform accepts the post, then the worker dies before recording it
+    def crash(*args):
+        raise RuntimeError("worker killed")
+    with monkeypatch.context() as patch:
+        patch.setattr(outbox, '_record_results', crash)
+        with pytest.raises(RuntimeError):
+            outbox.dispatch_once(PLATFORM)
+    assert outbox_row().status == 'in_flight'
+
+    # Its lease expires and another worker publishes the row again
+    outbox.LEASE_SECONDS = 0
+    outbox._release_stale_leases()
+    outbox.dispatch_once(PLATFORM)
+
+    row = outbox_row()
+    assert row.status == 'sent'
+    assert row.attempts == 2
+    assert adapter.calls == 2
+    assert list(adapter.published.values()) == [row.external_id]
+    assert SocialMediaPost.query.count() == 1
+
+
+def test_expired_lease_is_reclaimed_without_a_restart(business, monkeypatch):
+    adapter = StubPlatformAdapter(PLATFORM)
+    outbox = make_outbox(adapter)
+    enqueue(outbox, business)
+
+    # Published, then recording the result fails (a DB blip) and the row is left in flight
+    def blip(*args):
+        raise RuntimeError("connection reset")
+    with monkeypatch.context() as patch:
+        patch.setattr(outbox, '_record_results', blip)
+        with pytest.raises(RuntimeError):
+            outbox.dispatch_once(PLATFORM)
+    assert outbox_row().status == 'in_flight'
+
+    # Still leased: the next poll leaves it alone
+    assert outbox.dispatch_once(PLATFORM) == 0
+
+    # Once the lease expires the next poll claims it again; no _release_stale_leases() needed
+    outbox.LEASE_SECONDS = 0
+    assert outbox.dispatch_once(PLATFORM) == 1
+
+    row = outbox_row()
+    assert row.status == 'sent'
+    assert row.attempts == 2
+    assert list(adapter.published.values()) == [row.external_id]
+    assert SocialMediaPost.query.count() == 1
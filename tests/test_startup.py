@@ -0,0 +1,28 @@
+"""Start-up budget: benchmarks/bench_startup.py's import-time check as a test"""
+
+import importlib.util
+import os
+import subprocess
+import sys
+
+BENCH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'bench_startup.py')
+
+
+def _bench_startup():
+    spec = importlib.util.spec_from_file_location('bench_startup', BENCH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_boot_stays_within_budget_and_loads_providers_lazily():
+    # Fails (with the report on stdout) past STARTUP_BUDGET_MS or when repo code imports an SDK eagerly
+    assert _bench_startup().run('main')
+
+
+def test_boot_builds_no_services_or_provider_clients():
+    # A fresh interpreter, so services built by earlier tests' requests do not count
+    result = subprocess.run([sys.executable, '-c', 'import main, providers; print(providers.provider_registry.loaded())'],
+                            cwd=os.path.dirname(os.path.dirname(BENCH)), capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert result.stdout.strip().splitlines()[-1] == '[]'
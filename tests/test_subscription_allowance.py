@@ -0,0 +1,42 @@
+"""Consuming a conversation allowance: refusals leave the session alone, expired cycles roll over"""
+
+from datetime import timedelta
+
+from app import db
+from billing_cycle import utcnow
+from models import Business
+from subscription_manager import SubscriptionManager
+
+
+def monthly_business(used, cycle_end):
+    business = Business(name="Perfect Roofing Team", location="Lodi, New Jersey",
+                        subscription_type='monthly_basic', is_unlimited=False, auto_renew=True,
+                        conversations_used_this_month=used, subscription_start_date=cycle_end - timedelta(days=30),
+                        subscription_end_date=cycle_end)
+    db.session.add(business)
+    db.session.commit()
+    return business
+
+
+def test_refusal_keeps_the_callers_pending_work(database):
+    business = monthly_business(used=10, cycle_end=utcnow() + timedelta(days=3))
+    business.website = "https://perfectroofing.example"
+
+    assert SubscriptionManager().consume_conversation_allowance(business.id) is False
+    assert business.website == "https://perfectroofing.example"
+    assert business.conversations_used_this_month == 10
+
+    db.session.commit()
+    db.session.expire_all()
+    assert db.session.get(Business, business.id).website == "https://perfectroofing.example"
+
+
+def test_expired_cycle_is_rolled_over_when_consumed(database):
+    business = monthly_business(used=10, cycle_end=utcnow() - timedelta(hours=1))
+
+    assert SubscriptionManager().consume_conversation_allowance(business.id) is True
+
+    db.session.expire_all()
+    business = db.session.get(Business, business.id)
+    assert business.conversations_used_this_month == 1
+    assert business.subscription_end_date > utcnow() + timedelta(days=29)
@@ -0,0 +1,29 @@
+"""System stats: message totals survive archiving"""
+
+from datetime import datetime, timedelta
+
+from app import db
+from conversation_persistence import persistence_service
+from message_archive import message_archive
+from models import Business, Conversation
+from system_stats import SystemStatsService
+
+
+def test_total_messages_counts_archived_conversations(database):
+    business = Business(name="Perfect Roofing Team", location="Lodi, New Jersey")
+    db.session.add(business)
+    db.session.commit()
+    old_id, _ = persistence_service.save_conversation(
+        business.id, "Ice dam prevention",
+        [('SEO AI Specialist', 'anthropic', "Ventilate the attic."), ('Local Customer', 'openai', "How much?")])
+    persistence_service.save_conversation(
+        business.id, "Gutter guards", [('SEO AI Specialist', 'anthropic', "Mesh guards work best.")])
+    old = db.session.get(Conversation, old_id)
+    old.status = 'completed'
+    old.created_at = datetime.utcnow() - timedelta(days=400)
+    db.session.commit()
+    stats = SystemStatsService(refresh_seconds=0)
+
+    assert stats.get()['total_messages'] == 3
+    assert message_archive.archive(older_than_months=6) == 1
+    assert stats.get()['total_messages'] == 3
@@ -0,0 +1,41 @@
+"""Business location text -> IANA timezone"""
+
+import pytest
+
+from geo_language_detector import timezone_resolver
+
+
+@pytest.mark.parametrize('location, expected', [
+    # Ambiguous codes lose to city and country names
+    ("Berlin, DE", 'Europe/Berlin'),
+    ("Toronto, CA", 'America/Toronto'),
+    ("Perth, WA", 'Australia/Perth'),
+    ("Seattle, WA", 'America/Los_Angeles'),
+    # ...and fall back to the US state when nothing else matches
+    ("Fresno, CA", 'America/Los_Angeles'),
+    ("Wilmington, DE", 'America/New_York'),
+    ("Spokane, WA", 'America/Los_Angeles'),
+    # The trailing region decides between region names and codes
+    ("Washington, DC", 'America/New_York'),
+    ("Victoria, BC", 'America/Vancouver'),
+    ("Sydney, Nova Scotia", 'America/Halifax'),
+    ("London, ON", 'America/Toronto'),
+    ("Portland, Maine, USA", 'America/New_York'),
+    # Longest name at a position, without re-matching its tail
+    ("Charleston, West Virginia", 'America/New_York'),
+    ("Adelaide, South Australia", 'Australia/Adelaide'),
+    ("Brooklyn, New York City", 'America/New_York'),
+    # Plain cases
+    ("Lodi, New Jersey", 'America/New_York'),
+    ("Newark, NJ", 'America/New_York'),
+    ("Melbourne, FL", 'America/New_York'),
+    ("München", 'Europe/Berlin'),
+    ("Lille, FR", 'Europe/Paris'),
+    ("Utrecht, Nederland", 'Europe/Amsterdam'),
+    # Lower-case words are never codes
+    ("Serving homes in or near me", 'UTC'),
+    ("", 'UTC'),
+    (None, 'UTC'),
+])
+def test_resolve(location, expected):
+    assert timezone_resolver.resolve(location) == expected
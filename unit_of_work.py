@@ -0,0 +1,49 @@
+"""
+Unit of Work for Background Jobs
+Background threads used to wrap a whole tick in app.app_context() and reuse
+its db.session, holding a pooled connection (and often an open transaction)
+across AI provider calls that take tens of seconds. unit_of_work() scopes a
+session to one short transaction instead: it pushes its own app context, so
+the session is fresh and is closed - its connection back in the pool - on
+exit, and it draws from the separately sized 'background' pool (db_pools.py)
+so scheduled work can never exhaust the connections request threads need.
+
+    with unit_of_work(commit=False):
+        business = db.session.get(Business, business_id)
+        context = f"{business.name} in {business.location}"
+    content = provider_call(context)  # no connection held here
+    with unit_of_work():
+        db.session.add(ConversationMessage(...))
+
+Objects loaded inside stay readable afterwards (expire_on_commit is off) but
+are detached: copy what a network call needs into locals before leaving.
+"""
+
+import logging
+from contextlib import contextmanager
+from typing import Iterator
+
+from sqlalchemy.orm import Session
+
+from app import app, db
+from db_pools import BACKGROUND_BIND
+from db_routing import BIND_KEY
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def unit_of_work(commit: bool = True) -> Iterator[Session]:
+    """One short transaction on the background pool; commits on success unless commit=False"""
+    with app.app_context():
+        # A new app context gets its own scoped session, removed when the context pops
+        session = db.session()
+        session.info[BIND_KEY] = BACKGROUND_BIND
+        session.expire_on_commit = False
+        try:
+            yield session
+            if commit:
+                session.commit()
+        except Exception:
+            session.rollback()
+            raise